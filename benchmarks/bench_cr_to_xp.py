@@ -0,0 +1,70 @@
+"""Measure challenge rating to experience conversion throughput.
+
+Times `cr_to_xp` on one challenge rating at a time, the linear scan it used to do,
+and `cr_to_xp_many` on the whole batch, for a mix of table and interpolated ratings.
+
+Usage, with fourhills installed:
+    python benchmarks/bench_cr_to_xp.py [--count N] [--repeats N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from fourhills.utils.cr_to_xp import CR_XP_LUT, MAX_CR, cr_to_xp, cr_to_xp_many
+
+
+def linear_scan_cr_to_xp(cr):
+    # What cr_to_xp used to do on every call
+    cr = float(cr)
+    max_cr = list(CR_XP_LUT.keys())[-1]
+    if cr > max_cr:
+        raise ValueError(cr)
+    if cr in CR_XP_LUT:
+        return CR_XP_LUT[cr]
+    for key, val in CR_XP_LUT.items():
+        if key < cr:
+            lower = (key, val)
+        if key > cr:
+            upper = (key, val)
+            break
+    ratio = (cr - lower[0]) / (upper[0] - lower[0])
+    return lower[1] + ratio * (upper[1] - lower[1])
+
+
+def best_time(function, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000, help="challenge ratings")
+    parser.add_argument("--repeats", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Half straight from the table, half needing interpolation
+    table = rng.choice(list(CR_XP_LUT), args.count // 2)
+    between = rng.uniform(0, MAX_CR, args.count - len(table))
+    crs = np.concatenate([table, between])
+    cr_list = crs.tolist()
+
+    timings = [
+        ("linear scan, one at a time", lambda: [linear_scan_cr_to_xp(cr) for cr in cr_list]),
+        ("cr_to_xp, one at a time", lambda: [cr_to_xp(cr) for cr in cr_list]),
+        ("cr_to_xp_many", lambda: cr_to_xp_many(crs)),
+    ]
+    for label, function in timings:
+        elapsed = best_time(function, args.repeats)
+        print(f"{label:>26}: {args.count / elapsed / 1e6:8.2f} million/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Measure how fast damage can be rolled from a stat block's free text.
+
+Compares parsing the text and rolling each die with `random` on every roll, as a naive
+roller would, with parsing once and sampling the whole batch from the exact
+distribution with `DiceExpression.sample`.
+
+Usage, with fourhills installed:
+    python benchmarks/bench_dice.py [--rolls N] [--repeats N]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from fourhills.dice import parse_damage, total_damage
+
+DAMAGE = "10 (2d6 + 3) piercing plus 7 (2d6) fire damage"
+
+
+def naive_roll(text: str, rng: random.Random) -> int:
+    # Re-parses the text on every roll
+    total = 0
+    for count, sides, modifier in re.findall(r"\((\d+)d(\d+)(?:\s*\+\s*(\d+))?\)", text):
+        total += sum(rng.randint(1, int(sides)) for _ in range(int(count)))
+        total += int(modifier or 0)
+    return total
+
+
+def best_time(function, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rolls", type=int, default=200000, help="rolls per run")
+    parser.add_argument("--repeats", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    timings = [
+        ("parse and roll each time", lambda: [naive_roll(DAMAGE, rng) for _ in range(args.rolls)]),
+        ("sample", lambda: total_damage(parse_damage(DAMAGE)).sample(args.rolls, rng=0)),
+    ]
+    for label, function in timings:
+        elapsed = best_time(function, args.repeats)
+        print(f"{label:>24}: {args.rolls / elapsed / 1e6:8.2f} million rolls/s")
+
+
+if __name__ == "__main__":
+    main()
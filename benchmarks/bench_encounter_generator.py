@@ -0,0 +1,64 @@
+"""Measure how long encounter suggestions take for a large monster library.
+
+Generates suggestions for a range of parties, difficulties and filters from a random
+library, and reports the slowest and median times.
+
+Usage, with fourhills installed:
+    python benchmarks/bench_encounter_generator.py [--monsters N] [--limit N]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from fourhills.encounter_generator import EncounterGenerator, MonsterOption
+from fourhills.utils.cr_to_xp import CR_VALUES
+
+TYPES = ["beast", "undead", "humanoid (goblinoid)", "fiend", "dragon", "aberration"]
+ENVIRONMENTS = ["forest", "swamp", "underdark", "city", "mountain", "coast"]
+PARTIES = [(1,) * 4, (3,) * 4, (5,) * 5, (10,) * 4, (15,) * 6, (20,) * 4, (2, 2), (8,) * 7]
+FILTERS = [
+    {},
+    {"creature_type": "undead"},
+    {"environment": "forest"},
+    {"max_kinds": 4, "max_monsters": 15},
+]
+
+
+def random_library(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    # Most monsters have low challenge ratings, as in the published books
+    weights = [30 if cr <= 5 else 10 if cr <= 12 else 3 for cr in CR_VALUES]
+    return [
+        MonsterOption(
+            f"monster_{i}",
+            rng.choices(CR_VALUES, weights)[0],
+            rng.choice(TYPES),
+            tuple(rng.sample(ENVIRONMENTS, 2)),
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--monsters", type=int, default=2000, help="monsters in the library")
+    parser.add_argument("--limit", type=int, default=10, help="suggestions per search")
+    args = parser.parse_args()
+
+    generator = EncounterGenerator(random_library(args.monsters))
+    timings = []
+    for levels in PARTIES:
+        for difficulty in ["easy", "medium", "hard", "deadly"]:
+            for filters in FILTERS:
+                start = time.perf_counter()
+                generator.generate(levels, difficulty, limit=args.limit, seed=0, **filters)
+                timings.append(time.perf_counter() - start)
+    print(f"{len(timings)} searches of {args.monsters} monsters")
+    print(f"median: {statistics.median(timings) * 1000:6.1f} ms")
+    print(f"   max: {max(timings) * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Measure monster page parse throughput and peak memory for each HTML parser.
+
+Parses a corpus of saved D&D Beyond monster pages with every parser available to
+`fourhills.utils.import_monster`, both as the importer does, parsing only the stat
+block and description, and by building a tree of the whole page first, as it used to.
+Reports pages per second and the peak memory used to parse one page.
+
+The saved test pages leave out most of the site's navigation, scripts and adverts, so
+by default each page is padded with that much unrelated markup, to be about as big as
+a real page.
+
+Usage, with fourhills installed:
+    python benchmarks/bench_monster_parser.py [--pages DIR] [--chrome-kb N] [--repeats N]
+"""
+
+import argparse
+import importlib
+from pathlib import Path
+import time
+import tracemalloc
+
+import bs4
+
+# fourhills.utils exports a function with the same name as the module
+import_monster = importlib.import_module("fourhills.utils.import_monster")
+
+DEFAULT_PAGES = Path(__file__).parents[1] / "fourhills" / "utils" / "tests" / "pages"
+
+CHROME_ITEM = (
+    '<li class="site-nav__item"><a class="site-nav__link" href="/sources/{i}">'
+    '<span class="site-nav__label">Source book {i}</span></a>'
+    '<div class="ad-slot" data-slot="{i}"><script>var slot{i} = {{}};</script></div></li>\n'
+)
+
+
+def add_chrome(content: bytes, kilobytes: int) -> bytes:
+    """Pad a page with navigation markup around the monster, as on the real site"""
+    if kilobytes <= 0:
+        return content
+    items = []
+    size = 0
+    while size < kilobytes * 1024:
+        items.append(CHROME_ITEM.format(i=len(items)))
+        size += len(items[-1])
+    half = len(items) // 2
+    before = '<nav class="site-nav"><ul>\n' + "".join(items[:half]) + "</ul></nav>\n"
+    after = '<aside class="sidebar"><ul>\n' + "".join(items[half:]) + "</ul></aside>\n"
+    text = content.decode("utf-8")
+    text = text.replace("<body>", "<body>\n" + before, 1)
+    text = text.replace("</body>", after + "</body>", 1)
+    return text.encode("utf-8")
+
+
+def parse_strained(content: bytes, parser: str):
+    return import_monster.parse_monster_page(content, parser=parser)
+
+
+def parse_whole_page(content: bytes, parser: str):
+    # What the importer used to do: a tree of the entire page, then the same extraction
+    return import_monster._parse_monster_page(bs4.BeautifulSoup(content, parser), "")
+
+
+def time_parse(parse, pages, parser: str, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for content in pages:
+            parse(content, parser)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(parse, pages, parser: str) -> int:
+    """Return the most memory used while parsing any one page"""
+    peak = 0
+    for content in pages:
+        tracemalloc.start()
+        parse(content, parser)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pages", type=Path, default=DEFAULT_PAGES, help="directory of saved .html pages"
+    )
+    parser.add_argument(
+        "--chrome-kb", type=int, default=250,
+        help="KiB of site navigation to add to each page; 0 for pages saved in full",
+    )
+    parser.add_argument("--copies", type=int, default=20, help="times to parse each page")
+    parser.add_argument("--repeats", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    pages = [
+        add_chrome(path.read_bytes(), args.chrome_kb)
+        for path in sorted(args.pages.glob("*.html"))
+    ]
+    if not pages:
+        parser.error(f"No .html pages in {args.pages}")
+    mean_kb = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {mean_kb:.0f} KiB on average")
+    print(f"Default parser: {import_monster.html_parser()}")
+    corpus = pages * args.copies
+
+    methods = [("stat block only", parse_strained), ("whole page", parse_whole_page)]
+    for backend in import_monster.HTML_PARSERS:
+        for label, parse in methods:
+            elapsed = time_parse(parse, corpus, backend, args.repeats)
+            peak = peak_memory(parse, pages, backend)
+            print(
+                f"{backend:>11}, {label:<15}: {len(corpus) / elapsed:8.1f} pages/s, "
+                f"peak {peak / 2 ** 20:6.2f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Measure how many simulated fights can be run per second.
+
+Fights a party of four typical level 3 characters against goblins, in one process and
+in a pool of processes.
+
+Usage, with fourhills installed:
+    python benchmarks/bench_simulation.py [--trials N] [--goblins N] [--workers N]
+"""
+
+import argparse
+import os
+import time
+
+from fourhills.combat import Attack, Combatant, player_combatant
+from fourhills.dice import DiceExpression
+from fourhills.simulation import simulate
+
+
+def goblin(number: int) -> Combatant:
+    attack = Attack("scimitar", 4, DiceExpression.parse("1d6 + 2"))
+    return Combatant(f"goblin {number}", 15, DiceExpression.parse("2d6"), (attack,), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=100000, help="fights per run")
+    parser.add_argument("--goblins", type=int, default=6, help="goblins in each fight")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="processes in the pool"
+    )
+    args = parser.parse_args()
+
+    party = [player_combatant(f"Player {number}", 3) for number in range(4)]
+    monsters = [goblin(number) for number in range(args.goblins)]
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        result = simulate(party, monsters, args.trials, seed=0, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{workers:>2} processes: {elapsed:6.2f} s, {args.trials / elapsed:9.0f} fights/s, "
+            f"party wins {result.win_probability:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
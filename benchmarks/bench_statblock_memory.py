@@ -0,0 +1,57 @@
+"""Compare the memory used by slotted, interned stat blocks with plain dataclasses.
+
+Builds the same stat blocks as `StatBlock` and as an equivalent dataclass with a
+per-instance `__dict__` and no string interning (as `StatBlock` used to be), and uses
+tracemalloc to report the memory held per 10k stat blocks.
+
+Usage, with fourhills installed:
+    python benchmarks/bench_statblock_memory.py [--count N]
+"""
+
+import argparse
+from dataclasses import fields, make_dataclass
+import pickle
+import tracemalloc
+
+from bench_yaml_loader import make_monster
+from fourhills.dataclasses import StatBlock
+
+# The same fields and defaults as StatBlock, but stored in an instance dict
+PlainStatBlock = make_dataclass(
+    "PlainStatBlock", [(field.name, field.type, field) for field in fields(StatBlock)]
+)
+
+
+def fresh_dicts(count: int):
+    # Round trip each dict through pickle so that, like parsed YAML, every stat block
+    # has its own copy of every string
+    template = [pickle.dumps(make_monster(index)) for index in range(16)]
+    for index in range(count):
+        yield pickle.loads(template[index % len(template)])
+
+
+def measure(entity_cls, count: int) -> int:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    entities = [entity_cls(**monster) for monster in fresh_dicts(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(entities) == count
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="stat blocks to build")
+    args = parser.parse_args()
+
+    per_10k = 10000 / args.count
+    plain = measure(PlainStatBlock, args.count)
+    slotted = measure(StatBlock, args.count)
+    print(f"  plain dataclass: {plain * per_10k / 2 ** 20:8.2f} MiB per 10k stat blocks")
+    print(f"slotted, interned: {slotted * per_10k / 2 ** 20:8.2f} MiB per 10k stat blocks")
+    print(f"          saving: {100 * (1 - slotted / plain):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
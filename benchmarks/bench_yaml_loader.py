@@ -0,0 +1,105 @@
+"""Measure YAML parse throughput for each available backend.
+
+Generates a synthetic library of monster files and times parsing all of them with
+every backend in `fourhills.utils.yaml_loader`, reporting files per second.
+
+Usage, with fourhills installed:
+    python benchmarks/bench_yaml_loader.py [--files N] [--repeats N]
+"""
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from fourhills.utils.yaml_loader import (
+    BACKENDS, dump_yaml, load_yaml, set_yaml_backend, yaml_backend
+)
+
+
+def make_monster(index: int) -> dict:
+    return {
+        "name": f"Synthetic monster {index}",
+        "size": ["tiny", "small", "medium", "large", "huge"][index % 5],
+        "creature_type": ["beast", "undead", "humanoid (goblinoid)", "fiend"][index % 4],
+        "alignment": "neutral evil",
+        "ac": str(10 + index % 10),
+        "hp": f"{index % 100 + 5} ({index % 12 + 1}d10 + {index % 7})",
+        "speed": "30 ft., climb 20 ft.",
+        "ability": {
+            "STR": 10 + index % 9, "DEX": 12, "CON": 14, "INT": 8, "WIS": 10, "CHA": 6
+        },
+        "saving_throws": {"DEX": "+4", "CON": "+3"},
+        "skills": {"perception": "+2", "stealth": "+6"},
+        "damage_resistances": ["cold", "nonmagical bludgeoning"],
+        "damage_immunities": ["poison"],
+        "condition_immunities": ["poisoned", "exhaustion"],
+        "passive_perception": 12,
+        "special_senses": {"darkvision": "60 ft."},
+        "languages": ["common", "goblin"],
+        "challenge": [0.125, 0.25, 0.5, 1, 2, 5][index % 6],
+        "special_traits": {
+            "nimble escape": "The monster can take the Disengage or Hide action as a "
+            "bonus action on each of its turns.",
+        },
+        "melee_attacks": {
+            "scimitar": {
+                "hit": "+4", "reach": "5 ft.", "targets": "one target",
+                "damage": "5 (1d6 + 2) slashing damage",
+            },
+        },
+        "ranged_attacks": {
+            "shortbow": {
+                "hit": "+4", "range": "80/320 ft.", "targets": "one target",
+                "damage": "5 (1d6 + 2) piercing damage",
+            },
+        },
+        "multiattack": "The monster makes two scimitar attacks.",
+        "description": "A synthetic monster used for benchmarking. " * 5,
+    }
+
+
+def make_library(directory: Path, n_files: int):
+    for index in range(n_files):
+        with open(directory / f"monster_{index}.yaml", "w") as f:
+            dump_yaml(make_monster(index), f, sort_keys=False)
+
+
+def time_backend(files, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for path in files:
+            load_yaml(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=500, help="monster files to generate")
+    parser.add_argument("--repeats", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    default_backend = yaml_backend()
+    print(f"Default backend: {default_backend}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = Path(tmp_dir)
+        make_library(directory, args.files)
+        files = sorted(directory.glob("*.yaml"))
+
+        results = {}
+        for backend in sorted(BACKENDS):
+            set_yaml_backend(backend)
+            elapsed = time_backend(files, args.repeats)
+            results[backend] = len(files) / elapsed
+            print(f"{backend:>8}: {results[backend]:10.1f} files/s ({elapsed:.3f} s)")
+        set_yaml_backend(default_backend)
+
+    if "libyaml" in results:
+        print(f" speedup: {results['libyaml'] / results['python']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
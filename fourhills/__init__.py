@@ -1,7 +1,9 @@
 from .setting import Setting
+from .world import World
 
 name = "fourhills"
 
 __all__ = [
     "Setting",
+    "World",
 ]
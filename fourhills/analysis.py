@@ -0,0 +1,212 @@
+"""How dangerous and how tough every monster in a library is, worked out all at once.
+
+From a `MonsterTable`, this works out each monster's expected damage per round against
+targets of several armour classes, its effective hit points against attackers of
+several bonuses to hit, and an estimate of its challenge rating from those numbers,
+following the Dungeon Master's Guide: the defensive rating is the one whose hit points
+match the monster's, moved one step for every two points of armour class above or
+below that rating's, and the offensive rating is the one whose damage per round
+matches, moved likewise by the attack bonus. The estimate is the average of the two.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from fourhills.monster_table import MonsterTable
+from fourhills.utils.cr_to_xp import format_cr
+
+# The armour classes damage per round is worked out against, and the bonuses to hit
+# effective hit points are worked out against, roughly those of each tier of play
+AC_BANDS = (13, 15, 17, 19)
+ATTACK_BANDS = (4, 7, 10, 13)
+# The band used when only one number is shown
+DEFAULT_AC = 15
+DEFAULT_ATTACK = 7
+
+# Monster statistics by challenge rating, from the Dungeon Master's Guide: each
+# rating's armour class, most hit points, attack bonus and most damage per round
+CR_STEPS = np.array([0, 0.125, 0.25, 0.5] + list(range(1, 31)), dtype=float)
+CR_AC = np.array(
+    [13, 13, 13, 13, 13, 13, 13, 14, 15, 15, 15, 16, 16, 17, 17, 17, 18, 18, 18, 18]
+    + [19] * 14
+)
+CR_MAX_HP = np.array(
+    [6, 35, 49, 70, 85, 100, 115, 130, 145, 160, 175, 190, 205, 220, 235, 250, 265, 280,
+     295, 310, 325, 340, 355, 400, 445, 490, 535, 580, 625, 670, 715, 760, 805, 850]
+)
+CR_ATTACK = np.array(
+    [3, 3, 3, 3, 3, 3, 4, 5, 6, 6, 6, 7, 7, 7, 8, 8, 8, 8, 8, 9, 10, 10, 10, 10, 11, 11,
+     11, 12, 12, 12, 13, 13, 13, 14]
+)
+CR_MAX_DAMAGE = np.array(
+    [1, 3, 5, 8, 14, 20, 26, 32, 38, 44, 50, 56, 62, 68, 74, 80, 86, 92, 98, 104, 110,
+     116, 122, 140, 158, 176, 194, 212, 230, 248, 266, 284, 302, 320]
+)
+
+COLUMNS = ("name", "type", "cr", "estimated_cr", "hp", "ac", "ehp", "attacks", "dpr")
+# Short names for the columns of the default bands
+ALIASES = {"ehp": f"ehp_{DEFAULT_ATTACK:+d}", "dpr": f"dpr_ac{DEFAULT_AC}"}
+
+
+def hit_chance(ac, bonus):
+    """The chance of an attack with a bonus to hit beating an armour class, where a 20
+    always hits and a 1 always misses; the arguments are broadcast together"""
+    needed = np.clip(np.asarray(ac) - np.asarray(bonus), 2, 20)
+    return (21 - needed) / 20
+
+
+@dataclass
+class MonsterAnalysis:
+    """The analysis of every monster in a table, in the table's order"""
+
+    table: MonsterTable
+    # One column per band in AC_BANDS
+    damage_per_round: np.ndarray
+    # One column per band in ATTACK_BANDS
+    effective_hp: np.ndarray
+    defensive_cr: np.ndarray
+    offensive_cr: np.ndarray
+    estimated_cr: np.ndarray
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Every column, by name, including one per band"""
+        table = self.table
+        columns = {
+            "name": table.names,
+            "type": table.creature_type,
+            "cr": table.challenge,
+            "estimated_cr": self.estimated_cr,
+            "defensive_cr": self.defensive_cr,
+            "offensive_cr": self.offensive_cr,
+            "xp": table.xp,
+            "hp": table.hp,
+            "ac": table.ac,
+            "attacks": table.attacks_per_round,
+        }
+        for index, bonus in enumerate(ATTACK_BANDS):
+            columns[f"ehp_{bonus:+d}"] = self.effective_hp[:, index]
+        for index, ac in enumerate(AC_BANDS):
+            columns[f"dpr_ac{ac}"] = self.damage_per_round[:, index]
+        return columns
+
+    def column(self, name: str) -> np.ndarray:
+        """One column, by its name or short name
+
+        Raises
+        ------
+        KeyError
+            If there is no such column.
+        """
+        return self.columns()[ALIASES.get(name, name)]
+
+    def order(self, by: str = "name", descending: bool = False) -> np.ndarray:
+        """The rows sorted by a column, with any NaNs last
+
+        Raises
+        ------
+        KeyError
+            If there is no such column.
+        """
+        values = self.column(by)
+        if values.dtype == object:
+            rows = np.array(sorted(range(len(values)), key=lambda row: str(values[row])))
+            return rows[::-1] if descending else rows
+        keys = -values if descending else values
+        # Stable, and NaNs sort last either way
+        return np.argsort(keys, kind="stable")
+
+    def rows(
+        self,
+        columns: Sequence[str] = COLUMNS,
+        order: Optional[np.ndarray] = None,
+    ) -> List[List[str]]:
+        """The table as text, one list of cells per monster; NaNs are left blank"""
+        data = [(name, self.column(name)) for name in columns]
+        order = np.arange(len(self.table)) if order is None else order
+        return [[_format(name, values[row]) for name, values in data] for row in order]
+
+
+def analyze_monsters(table: MonsterTable) -> MonsterAnalysis:
+    """Work out the damage, toughness and estimated challenge rating of every monster"""
+    count = len(table)
+    # Attacks down, armour classes across
+    chances = hit_chance(np.array(AC_BANDS)[np.newaxis, :], table.attack_hit[:, np.newaxis])
+    # A 20 is always a critical hit, adding the extra dice
+    per_attack = (
+        chances * table.attack_damage[:, np.newaxis]
+        + table.attack_critical[:, np.newaxis] / 20
+    )
+    damage_per_round = np.stack(
+        [
+            np.bincount(table.attack_monster, weights=per_attack[:, band], minlength=count)
+            for band in range(len(AC_BANDS))
+        ],
+        axis=1,
+    ) if count else np.zeros((0, len(AC_BANDS)))
+
+    effective_hp = table.hp[:, np.newaxis] / hit_chance(
+        table.ac[:, np.newaxis], np.array(ATTACK_BANDS)[np.newaxis, :]
+    )
+
+    # The best attack bonus of each monster's routine
+    attack_bonus = np.full(count, np.nan)
+    if len(table.attack_hit):
+        np.fmax.at(attack_bonus, table.attack_monster, table.attack_hit)
+    dpr = damage_per_round[:, AC_BANDS.index(DEFAULT_AC)] if count else np.zeros(0)
+
+    defensive = _cr_step(table.hp, CR_MAX_HP) + _adjustment(table.ac, CR_AC, table.hp, CR_MAX_HP)
+    offensive = _cr_step(dpr, CR_MAX_DAMAGE) + _adjustment(
+        attack_bonus, CR_ATTACK, dpr, CR_MAX_DAMAGE
+    )
+    # Without attacks, the offensive rating is the lowest
+    offensive = np.where(np.isnan(attack_bonus), 0, offensive)
+    estimated = np.round((defensive + offensive) / 2)
+
+    return MonsterAnalysis(
+        table=table,
+        damage_per_round=damage_per_round,
+        effective_hp=effective_hp,
+        defensive_cr=_cr_from_step(defensive),
+        offensive_cr=_cr_from_step(offensive),
+        estimated_cr=_cr_from_step(estimated),
+    )
+
+
+def _cr_step(values: np.ndarray, maxima: np.ndarray) -> np.ndarray:
+    """The index in CR_STEPS of the first rating whose maximum covers each value"""
+    steps = np.searchsorted(maxima, np.ceil(values), side="left").astype(float)
+    steps = np.minimum(steps, len(CR_STEPS) - 1)
+    steps[np.isnan(values)] = np.nan
+    return steps
+
+
+def _adjustment(values, expected, base_values, maxima) -> np.ndarray:
+    """Steps to move a rating: one for every two points above or below what's expected
+    of the rating the base values give"""
+    step = _cr_step(base_values, maxima)
+    known = ~np.isnan(step) & ~np.isnan(values)
+    adjustment = np.zeros(len(values))
+    expected_values = expected[np.where(known, step, 0).astype(int)]
+    adjustment[known] = np.trunc((values[known] - expected_values[known]) / 2)
+    return adjustment
+
+
+def _cr_from_step(steps: np.ndarray) -> np.ndarray:
+    ratings = np.full(len(steps), np.nan)
+    known = ~np.isnan(steps)
+    ratings[known] = CR_STEPS[np.clip(steps[known], 0, len(CR_STEPS) - 1).astype(int)]
+    return ratings
+
+
+def _format(column: str, value) -> str:
+    if isinstance(value, str):
+        return value
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    if column in ("cr", "estimated_cr", "defensive_cr", "offensive_cr"):
+        return format_cr(float(value))
+    if column in ("ac", "attacks", "xp"):
+        return f"{value:.0f}"
+    return f"{value:.1f}"
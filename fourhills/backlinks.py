@@ -0,0 +1,148 @@
+from collections import Counter
+from pathlib import Path
+import re
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Set
+
+from fourhills.exceptions import FourhillsError
+from fourhills.index import FileIndex, Reference, normalise_name, read_text
+from fourhills.setting import Setting
+from fourhills.utils.yaml_loader import load_yaml
+
+# Anchors as written in Markdown and YAML text, e.g. [Centel](npc://centel)
+ANCHOR_RE = re.compile(r"\b(npc|monster|location|quest|party|note)://([^\s\"'<>()\[\]]+)")
+# Monster entries in scene files, e.g. "walton_thug x3"
+MONSTER_ENTRY_RE = re.compile(r"^(\w*)(?: ?x?(\d+))?$")
+
+
+def _anchors(value: Any) -> Iterator[Reference]:
+    """Generate a reference for every anchor in any string inside a YAML document."""
+    if isinstance(value, str):
+        if "://" in value:
+            for kind, name in ANCHOR_RE.findall(value):
+                name = normalise_name(name)
+                if name:
+                    yield Reference(kind, name)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _anchors(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _anchors(item)
+
+
+def _names(entries: Any, key: str = "name") -> Iterator[str]:
+    """Generate the names from a YAML list of either strings or `{name: ...}` dicts."""
+    if not isinstance(entries, list):
+        return
+    for entry in entries:
+        if isinstance(entry, dict):
+            entry = entry.get(key)
+        if entry is not None:
+            yield str(entry)
+
+
+class BacklinkIndex(FileIndex):
+    """Index of which objects in a setting refer to which others.
+
+    Locations name their NPCs, monsters and quests; parties name their quests; quests
+    name their giver and start location; NPCs name the stat block they're based on; and
+    any YAML or Markdown file can link to anything with an anchor such as `npc://centel`.
+    The index inverts all of these, so that `referrers("npc", "centel")` answers "where is
+    Centel used?" with a dictionary lookup rather than a search of the whole world.
+    """
+
+    def __init__(self, setting: Setting):
+        super().__init__(setting)
+        # The source and targets of every indexed file
+        self._file_links: Dict[Path, Reference] = {}
+        self._file_targets: Dict[Path, FrozenSet[Reference]] = {}
+        # For every target, how many files of each source refer to it
+        self._backlinks: Dict[Reference, Counter] = {}
+
+    def __len__(self):
+        """The number of files which refer to at least one object."""
+        self._ensure_built()
+        return len(self._file_targets)
+
+    def referrers(self, kind: str, name) -> List[Reference]:
+        """Return everything which refers to an object, sorted by kind and name.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of object, as used in anchors: "npc", "monster", "location",
+            "quest", "party" or "note".
+        name : str or pathlib.Path
+            The name of the object, or its relative path for locations, quests and notes.
+        """
+        self._ensure_built()
+        target = Reference(kind, normalise_name(name))
+        with self._lock:
+            sources = self._backlinks.get(target)
+            return sorted(sources) if sources else []
+
+    def _targets_for(self, path: Path, source: Reference) -> Set[Reference]:
+        cache = self.setting.cache
+        if path.suffix == ".md":
+            return set(_anchors(cache.get(path, read_text)))
+        data = cache.get(path, load_yaml)
+        if not isinstance(data, dict):
+            return set()
+
+        targets = set(_anchors(data))
+        if source.kind == "location":
+            targets.update(Reference("npc", name) for name in _names(data.get("npcs")))
+            targets.update(Reference("quest", name) for name in _names(data.get("quests")))
+            for name in _names(data.get("monsters")):
+                # Scene files give monsters as "name xN" rather than a dictionary
+                match = MONSTER_ENTRY_RE.match(name)
+                if match and match.group(1):
+                    name = match.group(1)
+                targets.add(Reference("monster", name))
+        elif source.kind == "party":
+            targets.update(Reference("quest", name) for name in _names(data.get("quests")))
+        elif source.kind == "quest":
+            for kind, key in (("npc", "giver"), ("location", "start_location")):
+                if data.get(key):
+                    targets.add(Reference(kind, data[key]))
+        elif source.kind == "npc" and data.get("stats_base"):
+            targets.add(Reference("monster", data["stats_base"]))
+
+        # Names in YAML are free text, so tidy them the same way as lookups
+        targets = {
+            Reference(target.kind, normalise_name(target.name))
+            for target in targets
+        }
+        targets.discard(source)
+        return {target for target in targets if target.name}
+
+    def _add_file(self, path: Path, source: Reference):
+        try:
+            targets = frozenset(self._targets_for(path, source))
+        except (FourhillsError, OSError, UnicodeDecodeError):
+            # Files which can't be read don't refer to anything
+            return
+        if not targets:
+            return
+        self._file_links[path] = source
+        self._file_targets[path] = targets
+        for target in targets:
+            self._backlinks.setdefault(target, Counter())[source] += 1
+
+    def _remove_file(self, path: Path):
+        source = self._file_links.pop(path)
+        for target in self._file_targets.pop(path):
+            sources = self._backlinks[target]
+            sources[source] -= 1
+            if sources[source] <= 0:
+                del sources[source]
+            if not sources:
+                del self._backlinks[target]
+
+    def _clear(self):
+        self._file_links.clear()
+        self._file_targets.clear()
+        self._backlinks.clear()
+
+    def _indexed_paths(self) -> Iterable[Path]:
+        return list(self._file_links)
@@ -0,0 +1,413 @@
+import datetime
+import hashlib
+import io
+import os
+from pathlib import Path
+import pickle
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+
+# A file's signature is its modification time in nanoseconds and its size in bytes
+Signature = Tuple[int, int]
+
+# A directory listing is a sorted tuple of (name, is_dir) pairs
+Listing = Tuple[Tuple[str, bool], ...]
+
+# Bump this whenever the layout of the on-disk cache changes
+DISK_CACHE_FORMAT = 1
+
+
+def file_signature(path: Path) -> Optional[Signature]:
+    """Return the signature of a file, used to decide whether a cached value is stale.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path to the file.
+
+    Returns
+    -------
+    tuple of (int, int) or None
+        The modification time (in nanoseconds) and size of the file, or None if the file
+        could not be found.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def schema_version() -> str:
+    """Return a string identifying the cache format and the shape of the dataclasses.
+
+    Any change to a dataclass field, the cache format or the YAML library produces a
+    different string, which makes an existing on-disk cache be discarded.
+    """
+    # Imported here as the dataclasses themselves depend on the setting, and so on this
+    # module
+    from dataclasses import fields
+    from fourhills import dataclasses as fh_dataclasses
+
+    parts = [f"format={DISK_CACHE_FORMAT}", f"yaml={yaml.__version__}"]
+    for class_name in sorted(fh_dataclasses.__all__):
+        entity_cls = getattr(fh_dataclasses, class_name)
+        field_names = ",".join(field.name for field in fields(entity_cls))
+        parts.append(f"{class_name}({field_names})")
+    return hashlib.sha1(";".join(parts).encode()).hexdigest()
+
+
+class _DataUnpickler(pickle.Unpickler):
+    """Unpickler which only rebuilds the plain data that `yaml.safe_load` can produce."""
+
+    ALLOWED = {
+        ("datetime", "date"),
+        ("datetime", "datetime"),
+        ("datetime", "timedelta"),
+        ("datetime", "timezone"),
+    }
+
+    def find_class(self, module, name):
+        if (module, name) not in self.ALLOWED:
+            raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from cache")
+        return getattr(datetime, name)
+
+
+def _dumps(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=4)
+
+
+def _loads(data: bytes) -> Any:
+    return _DataUnpickler(io.BytesIO(data)).load()
+
+
+class DiskCache:
+    """Persistent store of parsed files and directory listings, kept in SQLite.
+
+    The database may be shared between several processes (e.g. the `4h` command and
+    the GUI) as SQLite handles the locking. It is only ever a cache: if it is missing,
+    from an older schema, or corrupt, it is silently thrown away and rebuilt.
+    """
+
+    DIRNAME = ".fourhills"
+    FILENAME = "cache.sqlite"
+
+    def __init__(self, db_path: Path, version: str, root: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.version = version
+        # Paths are stored relative to the root, so the cache stays valid however the
+        # setting was opened, or if it is moved
+        self.root = os.path.abspath(str(root if root is not None else self.db_path.parent))
+        self._lock = threading.Lock()
+        self._conn = None
+        self._open()
+
+    @classmethod
+    def for_root(cls, root: Path) -> Optional["DiskCache"]:
+        """Open the cache for a setting root, or return None if it can't be created."""
+        try:
+            return cls(root / cls.DIRNAME / cls.FILENAME, schema_version(), root=root)
+        except (OSError, sqlite3.Error):
+            return None
+
+    def _open(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._connect()
+        except sqlite3.OperationalError:
+            # e.g. locked by another process for longer than the timeout
+            raise
+        except sqlite3.DatabaseError:
+            # Not a database at all, so start again from scratch
+            self._reset()
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        try:
+            # WAL lets the CLI read while the GUI writes, and keeps each commit cheap.
+            # Durability doesn't matter for a cache, a lost write is just a cache miss
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                conn.execute("DROP TABLE IF EXISTS files")
+                conn.execute("DROP TABLE IF EXISTS dirs")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (self.version,)
+                )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, data BLOB)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dirs ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, data BLOB)"
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._conn = conn
+
+    def _reset(self):
+        """Delete the database and create an empty one in its place."""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.remove(str(self.db_path) + suffix)
+            except OSError:
+                pass
+        try:
+            self._connect()
+        except sqlite3.Error:
+            # Carry on without the disk cache rather than failing every lookup
+            self._conn = None
+
+    def _key(self, path: Path) -> str:
+        return os.path.relpath(os.path.abspath(str(path)), self.root)
+
+    def _get(self, table: str, path: Path, signature: Signature) -> Tuple[bool, Any]:
+        with self._lock:
+            if self._conn is None:
+                return (False, None)
+            try:
+                row = self._conn.execute(
+                    f"SELECT mtime_ns, size, data FROM {table} WHERE path = ?",
+                    (self._key(path),)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                return (False, None)
+            except sqlite3.DatabaseError:
+                self._reset()
+                return (False, None)
+        if row is None or (row[0], row[1]) != signature:
+            return (False, None)
+        try:
+            return (True, _loads(row[2]))
+        except Exception:
+            # A damaged entry is just a miss; it is overwritten once reloaded
+            return (False, None)
+
+    def _put(self, table: str, path: Path, signature: Signature, value: Any):
+        try:
+            data = _dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {table} (path, mtime_ns, size, data) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self._key(path), signature[0], signature[1], data)
+                )
+                self._conn.commit()
+            except sqlite3.OperationalError:
+                # Most likely another process holds the lock; skipping a write is fine
+                pass
+            except sqlite3.DatabaseError:
+                self._reset()
+
+    def get_file(self, path: Path, signature: Signature) -> Tuple[bool, Any]:
+        """Return `(True, value)` if a parsed file is stored with this signature."""
+        return self._get("files", path, signature)
+
+    def put_file(self, path: Path, signature: Signature, value: Any):
+        """Store the parsed contents of a file."""
+        self._put("files", path, signature, value)
+
+    def get_listing(self, path: Path, signature: Signature) -> Tuple[bool, Any]:
+        """Return `(True, listing)` if a directory listing is stored with this signature."""
+        return self._get("dirs", path, signature)
+
+    def put_listing(self, path: Path, signature: Signature, listing: Listing):
+        """Store the listing of a directory."""
+        self._put("dirs", path, signature, listing)
+
+    def clear(self):
+        """Remove everything from the cache."""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute("DELETE FROM dirs")
+                self._conn.commit()
+            except sqlite3.OperationalError:
+                pass
+            except sqlite3.DatabaseError:
+                self._reset()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class FileCache:
+    """Caches values derived from files, revalidating against each file's signature.
+
+    A lookup costs one `stat()` call when the file is unchanged; the loader is only
+    called again once the file's modification time or size changes. Cached values are
+    shared between everyone who looks them up, so they must be treated as read-only.
+
+    If a `DiskCache` is given, values missing from memory are looked for there before
+    calling the loader, so they survive between runs. Loaders must then return plain
+    data, such as the output of `yaml.safe_load`.
+    """
+
+    def __init__(self, disk_cache: Optional[DiskCache] = None):
+        self.disk_cache = disk_cache
+        self._entries: Dict[Path, Tuple[Signature, Any]] = {}
+        self._listings: Dict[Path, Tuple[Signature, Listing]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return Path(path) in self._entries
+
+    def get(self, path: Path, loader: Callable[[Path], Any]) -> Any:
+        """Return the value for a file, calling `loader` only if it is missing or stale.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            Path to the file.
+        loader : callable
+            Called with `path` to produce the value when the cache cannot be used.
+            Exceptions from the loader are propagated and nothing is cached.
+
+        Returns
+        -------
+        object
+            The cached or freshly loaded value.
+        """
+        path = Path(path)
+        signature = file_signature(path)
+        if signature is not None:
+            found, value = self.lookup(path, signature)
+            if found:
+                return value
+
+        value = loader(path)
+        if signature is not None:
+            self.put(path, signature, value)
+        return value
+
+    def lookup(self, path: Path, signature: Optional[Signature] = None) -> Tuple[bool, Any]:
+        """Return `(True, value)` if a file has an up-to-date cached value.
+
+        Unlike `get`, nothing is loaded on a miss, which gives `(False, None)`.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            Path to the file.
+        signature : tuple of (int, int) or None
+            The file's signature, if it is already known.
+        """
+        path = Path(path)
+        if signature is None:
+            signature = file_signature(path)
+            if signature is None:
+                return (False, None)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == signature:
+            return (True, entry[1])
+        if self.disk_cache is not None:
+            found, value = self.disk_cache.get_file(path, signature)
+            if found:
+                with self._lock:
+                    self._entries[path] = (signature, value)
+                return (True, value)
+        return (False, None)
+
+    def put(self, path: Path, signature: Signature, value: Any):
+        """Store a value for a file with a known signature."""
+        path = Path(path)
+        with self._lock:
+            self._entries[path] = (signature, value)
+        if self.disk_cache is not None:
+            self.disk_cache.put_file(path, signature, value)
+
+    def list_dir(self, directory: Path) -> Listing:
+        """Return the sorted `(name, is_dir)` entries of a directory.
+
+        The listing is reused for as long as the directory's modification time, which
+        changes whenever an entry is added, removed or renamed, stays the same. A missing
+        directory gives an empty listing.
+        """
+        directory = Path(directory)
+        signature = file_signature(directory)
+        if signature is None:
+            return ()
+        with self._lock:
+            entry = self._listings.get(directory)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        if self.disk_cache is not None:
+            found, listing = self.disk_cache.get_listing(directory, signature)
+            if found:
+                with self._lock:
+                    self._listings[directory] = (signature, listing)
+                return listing
+
+        try:
+            with os.scandir(directory) as it:
+                listing = tuple(sorted((entry.name, entry.is_dir()) for entry in it))
+        except OSError:
+            return ()
+        with self._lock:
+            self._listings[directory] = (signature, listing)
+        if self.disk_cache is not None:
+            self.disk_cache.put_listing(directory, signature, listing)
+        return listing
+
+    def walk(self, directory: Path) -> Iterator[Tuple[Path, List[str], List[str]]]:
+        """Walk a directory tree top-down like `os.walk`, using cached listings.
+
+        Yields
+        ------
+        tuple of (pathlib.Path, list of str, list of str)
+            The directory, the names of its subdirectories and the names of its files.
+            Hidden entries, whose names start with a dot, are skipped.
+        """
+        directory = Path(directory)
+        listing = self.list_dir(directory)
+        dirnames = [name for name, is_dir in listing if is_dir and not name.startswith(".")]
+        filenames = [
+            name for name, is_dir in listing if not is_dir and not name.startswith(".")
+        ]
+        yield directory, dirnames, filenames
+        for dirname in dirnames:
+            yield from self.walk(directory / dirname)
+
+    def invalidate(self, path: Optional[Path] = None):
+        """Forget the cached value for a file, or for every file if no path is given.
+
+        Only the in-memory copy is dropped; entries on disk are always revalidated
+        against the file's signature before being used.
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._listings.clear()
+            else:
+                self._entries.pop(Path(path), None)
+                self._listings.pop(Path(path), None)
@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fourhills.encounters import party_levels, read_monsters
+from fourhills.exceptions import FourhillsError
+from fourhills.index import FileIndex, Reference
+from fourhills.setting import Setting
+from fourhills.utils.cr_to_xp import parse_cr
+from fourhills.utils.yaml_loader import load_yaml
+
+# The file which defines each kind of object stored in a directory of its own
+DEFINITION_FILES = {
+    "location": "location.yaml",
+    "quest": "quest.yaml",
+}
+# Sizes in order, for sorting
+SIZES = ("tiny", "small", "medium", "large", "huge", "gargantuan")
+
+
+@dataclass
+class CatalogEntry:
+    """A summary of one object, with the fields used to list and sort objects.
+
+    `challenge` is the challenge rating as written in the file, and `cr` is the same
+    rating as a number for sorting and filtering; both are None if there isn't one.
+    NPCs based on a stat block take their challenge rating, type and size from it.
+
+    Locations have the `monsters` there, as (name, quantity) pairs, and parties have the
+    `levels` of their players, if every player's level is known, for assessing
+    encounters without reading any files. `environments` are a monster's environments,
+    or a location's environment, in lower case.
+    """
+
+    reference: Reference
+    path: Path
+    title: str
+    challenge: Optional[str] = None
+    cr: Optional[float] = None
+    creature_type: Optional[str] = None
+    size: Optional[str] = None
+    monsters: Tuple[Tuple[str, int], ...] = ()
+    levels: Tuple[int, ...] = ()
+    environments: Tuple[str, ...] = ()
+
+    @property
+    def name(self) -> str:
+        return self.reference.name
+
+    @property
+    def size_order(self) -> int:
+        """The position of the size in `SIZES`, or -1 if it isn't a known size."""
+        size = (self.size or "").lower()
+        return SIZES.index(size) if size in SIZES else -1
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _environments(value: Any) -> Tuple[str, ...]:
+    values = value if isinstance(value, list) else [value]
+    environments = (_text(environment) for environment in values)
+    return tuple(environment.lower() for environment in environments if environment)
+
+
+class CatalogIndex(FileIndex):
+    """Index of a summary of every NPC, monster, party, location and quest in a setting.
+
+    The summaries hold everything needed to list and sort objects, such as challenge
+    rating, type and size, so lists of thousands of objects can be shown without
+    reading any of their files again.
+    """
+
+    def __init__(self, setting: Setting):
+        super().__init__(setting)
+        self._entries: Dict[Path, CatalogEntry] = {}
+        self._by_reference: Dict[Reference, CatalogEntry] = {}
+
+    def __len__(self):
+        """The number of objects in the index."""
+        self._ensure_built()
+        return len(self._entries)
+
+    def entries(self, kind: str) -> List[CatalogEntry]:
+        """Return the summaries of every object of a kind, sorted by name.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of object, e.g. "monster"; see `KIND_LABELS`.
+
+        Returns
+        -------
+        list of CatalogEntry
+            The summaries, sorted by name.
+        """
+        self._ensure_built()
+        with self._lock:
+            entries = [
+                entry for reference, entry in self._by_reference.items()
+                if reference.kind == kind
+            ]
+        return sorted(entries, key=lambda entry: entry.name)
+
+    def entry(self, kind: str, name: str) -> Optional[CatalogEntry]:
+        """Return the summary of one object, or None if there is no such object."""
+        self._ensure_built()
+        with self._lock:
+            return self._by_reference.get(Reference(kind, name))
+
+    def _add_file(self, path: Path, source: Reference):
+        if source.kind == "note":
+            return
+        definition = DEFINITION_FILES.get(source.kind)
+        if definition is not None and path.name != definition:
+            return
+        if path.suffix != ".yaml":
+            return
+        try:
+            data = self.setting.cache.get(path, load_yaml)
+            stats = self._stat_block_data(path, source.kind, data) or {}
+        except (FourhillsError, OSError, UnicodeDecodeError):
+            # Objects which can't be read are still listed, without any details
+            data = stats = {}
+        if not isinstance(data, dict):
+            data = {}
+
+        challenge = _text(stats.get("challenge"))
+        try:
+            cr = parse_cr(challenge) if challenge is not None else None
+        except ValueError:
+            cr = None
+        entry = CatalogEntry(
+            reference=source,
+            path=path,
+            title=_text(data.get("name")) or source.name,
+            challenge=challenge,
+            cr=cr,
+            creature_type=_text(stats.get("creature_type")),
+            size=_text(stats.get("size")),
+        )
+        if source.kind == "location":
+            entry.monsters = read_monsters(data.get("monsters"))
+            entry.environments = _environments(data.get("environment"))
+        elif source.kind == "monster":
+            entry.environments = _environments(data.get("environments"))
+        elif source.kind == "party":
+            entry.levels = party_levels(
+                data.get("players"), data.get("level"), data.get("levels")
+            ) or ()
+        self._entries[path] = entry
+        self._by_reference[source] = entry
+
+    def _remove_file(self, path: Path):
+        entry = self._entries.pop(path)
+        if self._by_reference.get(entry.reference) is entry:
+            del self._by_reference[entry.reference]
+
+    def _clear(self):
+        self._entries.clear()
+        self._by_reference.clear()
+
+    def _indexed_paths(self) -> Iterable[Path]:
+        return list(self._entries)
@@ -0,0 +1,543 @@
+"""Commands for the 4h tool which work on the whole setting rather than one scene"""
+
+import csv
+from pathlib import Path
+
+import click
+
+from fourhills.analysis import ALIASES, COLUMNS, analyze_monsters
+from fourhills.combat import location_combatants, party_combatants, player_combatant
+from fourhills.encounter_generator import EncounterGenerator
+from fourhills.encounters import (
+    DIFFICULTIES,
+    parse_levels,
+    world_encounter_table,
+    world_parties,
+)
+from fourhills.exceptions import FourhillsError
+from fourhills.simulation import DEFAULT_MAX_ROUNDS, DEFAULT_TRIALS, simulate as run_simulation
+from fourhills.utils.batch_import import (
+    BatchImporter,
+    SavedPageImporter,
+    queue_path_for,
+    read_monster_names,
+)
+from fourhills.utils.import_monster import DND_BEYOND_MONSTER_URL
+from fourhills.utils.cr_to_xp import format_cr, parse_cr
+from fourhills.utils.page_cache import PageCache
+from fourhills.monster_table import MonsterTable
+from fourhills.world import World
+
+
+@click.command()
+@click.argument("query", nargs=-1, required=True)
+@click.option(
+    "-n", "--limit", default=20, show_default=True, help="Maximum number of results to show."
+)
+def search(query, limit):
+    """Search every note, scene, description and entity in the setting.
+
+    Words may end in * to match as a prefix, and results can be filtered with
+    type:<kind> and cr:<rating>, for example:
+
+        4h search goblin* type:monster cr:>=1
+    """
+    try:
+        world = World()
+        results = world.search(" ".join(query), limit=limit)
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+
+    if not results:
+        click.echo("No results.")
+        return
+    for result in results:
+        reference = result.reference
+        path = result.path.relative_to(world.root)
+        click.echo(f"{reference.name} ({reference.label}) - {path}")
+        if result.snippet:
+            click.echo(f"    {result.snippet}")
+
+
+@click.command()
+@click.argument("kind", type=click.Choice(["monster", "npc"]))
+@click.argument("name")
+@click.option(
+    "-f", "--format", "output_format", type=click.Choice(["text", "markdown", "html"]),
+    default="text", show_default=True, help="How to lay out the output.",
+)
+@click.option("-w", "--width", type=int, help="Width of text output, in characters.")
+def show(kind, name, output_format, width):
+    """Show a monster's stat block, or an NPC's description and stats.
+
+    Text is as wide as a pane in the battle view unless a width is given; Markdown and
+    HTML are for pasting into notes or web pages.
+    """
+    try:
+        world = World()
+        entity = (world.monsters if kind == "monster" else world.npcs)[name]
+    except KeyError:
+        raise click.ClickException(f"No {kind} called {name}.")
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+
+    documents = [entity.summary_document()]
+    if kind == "npc":
+        documents.append(entity.character_document())
+    documents.append(entity.battle_document())
+    if output_format == "markdown":
+        click.echo("\n".join(document.markdown() for document in documents), nl=False)
+    elif output_format == "html":
+        click.echo("".join(document.html() for document in documents), nl=False)
+    else:
+        width = width or world.setting.pane_width
+        for document in documents:
+            for line in document.text(width):
+                click.echo(line.rstrip())
+
+
+@click.command()
+@click.argument("locations", nargs=-1)
+@click.option(
+    "-p", "--party", "party_names", multiple=True,
+    help="Party to assess for; may be given more than once [default: every party].",
+)
+@click.option(
+    "-l", "--levels", help="Player levels to assess for instead, e.g. 3,3,4,5 or 4x3."
+)
+def difficulty(locations, party_names, levels):
+    """Show how difficult the monsters at each location are for each party.
+
+    LOCATIONS are paths within the world directory, e.g. Walton/TheCopperSword; every
+    location with monsters is shown if none are given. Parties need their players'
+    levels, given as `level` (and `levels` for any player on a different level) in
+    their files.
+    """
+    try:
+        world = World()
+        if levels:
+            parties = {"Party": parse_levels(levels)}
+        else:
+            parties = world_parties(world)
+            if party_names:
+                missing = [name for name in party_names if name not in parties]
+                if missing:
+                    raise click.ClickException(
+                        "No party with known levels called " + ", ".join(missing)
+                    )
+                parties = {name: parties[name] for name in party_names}
+        table = world_encounter_table(world, parties)
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+    if not table.parties:
+        raise click.ClickException("No party's levels are known; use --levels to give them.")
+
+    columns = range(len(table.encounters))
+    if locations:
+        wanted = {str(Path(location)) for location in locations}
+        columns = [i for i in columns if str(table.encounters[i]) in wanted]
+    if not columns:
+        click.echo("No locations with monsters.")
+        return
+    for i in columns:
+        click.echo(
+            f"{table.encounters[i]}: {table.monster_counts[i]} monsters, "
+            f"{table.xp[i]:.0f} XP"
+        )
+        if table.unknown[i]:
+            click.echo(
+                "    Not counting, with no challenge rating: " + ", ".join(table.unknown[i])
+            )
+        for j, party in enumerate(table.parties):
+            assessment = table.assessment(j, i)
+            click.echo(
+                f"    {party}: {assessment.adjusted_xp:.0f} adjusted XP, {assessment.label}"
+            )
+
+
+@click.command()
+@click.option("-p", "--party", "party_name", help="Party to build the encounter for.")
+@click.option("-l", "--levels", help="Player levels instead of a party, e.g. 3,3,4,5 or 4x3.")
+@click.option(
+    "-d", "--difficulty", type=click.Choice(DIFFICULTIES[1:]), default="medium",
+    show_default=True,
+)
+@click.option("-t", "--type", "creature_type", help="Only use monsters of this type.")
+@click.option("-e", "--environment", help="Only use monsters found in this environment.")
+@click.option(
+    "--location", help="Only use monsters found in this location's environment."
+)
+@click.option("--max-cr", help="Only use monsters up to this challenge rating.")
+@click.option(
+    "-m", "--max-monsters", default=EncounterGenerator.DEFAULT_MAX_MONSTERS,
+    show_default=True, help="Most monsters in an encounter.",
+)
+@click.option(
+    "-k", "--max-kinds", default=EncounterGenerator.DEFAULT_MAX_KINDS, show_default=True,
+    help="Most different kinds of monster in an encounter.",
+)
+@click.option(
+    "-n", "--limit", default=10, show_default=True, help="Number of encounters to suggest."
+)
+@click.option("--seed", type=int, help="Seed for repeatable suggestions.")
+def encounter(
+    party_name, levels, difficulty, creature_type, environment, location, max_cr,
+    max_monsters, max_kinds, limit, seed,
+):
+    """Suggest encounters of a difficulty from the monsters in the setting.
+
+    The encounters' adjusted experience is as close as possible to the party's
+    threshold for the difficulty. Give either a party, whose players' levels are in its
+    file, or the players' levels. For example:
+
+        4h encounter --levels 4x3 --difficulty hard --type humanoid
+    """
+    try:
+        max_cr = parse_cr(max_cr) if max_cr is not None else None
+    except ValueError:
+        raise click.BadParameter(f"Invalid challenge rating {max_cr}", param_hint="--max-cr")
+    try:
+        world = World()
+        if levels:
+            party_levels = parse_levels(levels)
+        else:
+            parties = world_parties(world)
+            if party_name is None and len(parties) == 1:
+                party_name = next(iter(parties))
+            if party_name not in parties:
+                raise click.UsageError(
+                    "Give --levels, or --party with one of: " + ", ".join(parties)
+                    if parties else "No party's levels are known; give --levels."
+                )
+            party_levels = parties[party_name]
+        if location is not None:
+            entry = world.catalog.entry("location", str(Path(location)))
+            if entry is None:
+                raise click.ClickException(f"No location {location}")
+            if not entry.environments:
+                raise click.ClickException(f"Location {location} has no environment")
+            environment = entry.environments[0]
+        generator = EncounterGenerator.from_world(world)
+        encounters = generator.generate(
+            party_levels, difficulty, limit=limit, creature_type=creature_type,
+            environment=environment, max_cr=max_cr,
+            max_monsters=max_monsters, max_kinds=max_kinds, seed=seed,
+        )
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+
+    if not encounters:
+        click.echo("No encounters found; try fewer filters, or more monsters or kinds.")
+        return
+    for number, suggestion in enumerate(encounters, 1):
+        monsters = ", ".join(
+            f"{quantity} x {monster.name} (CR {format_cr(monster.cr)})"
+            for monster, quantity in suggestion.monsters
+        )
+        assessment = suggestion.assessment
+        click.echo(
+            f"{number}. {monsters}: {assessment.xp:.0f} XP, "
+            f"{assessment.adjusted_xp:.0f} adjusted XP"
+        )
+
+
+@click.command()
+@click.argument("location")
+@click.option("-p", "--party", "party_name", help="Party to fight the monsters.")
+@click.option(
+    "-l", "--levels",
+    help="Player levels instead of a party, e.g. 3,3,4,5 or 4x3, for typical characters.",
+)
+@click.option(
+    "-n", "--trials", default=DEFAULT_TRIALS, show_default=True, help="Number of fights."
+)
+@click.option(
+    "-j", "--workers", type=int, default=None,
+    help="Number of processes to fight in [default: one per CPU].",
+)
+@click.option("--seed", type=int, help="Seed for repeatable results.")
+@click.option(
+    "--max-rounds", default=DEFAULT_MAX_ROUNDS, show_default=True,
+    help="Rounds after which a fight is left undecided.",
+)
+def simulate(location, party_name, levels, trials, workers, seed, max_rounds):
+    """Fight a party against the monsters at a location many times, and show how it went.
+
+    LOCATION is a path within the world directory, e.g. Walton/TheCopperSword. Players'
+    armour class, hit points and attacks are given as `stats` in their party's file;
+    anything not given there is that of a typical martial character of their level.
+    For example:
+
+        4h simulate Walton --party example_party --trials 100000
+    """
+    try:
+        world = World()
+        entry = world.catalog.entry("location", str(Path(location)))
+        if entry is None:
+            raise click.ClickException(f"No location {location}")
+        if levels:
+            party_label = f"a party of level {levels}"
+            party = [
+                player_combatant(f"Player {number}", level)
+                for number, level in enumerate(parse_levels(levels), 1)
+            ]
+        else:
+            party_names = list(world.parties)
+            if party_name is None and len(party_names) == 1:
+                party_name = party_names[0]
+            if party_name not in party_names:
+                raise click.UsageError(
+                    "Give --levels, or --party with one of: " + ", ".join(party_names)
+                    if party_names else "There are no parties; give --levels."
+                )
+            party_label = party_name
+            party = party_combatants(world.parties[party_name])
+        monsters, unknown = location_combatants(world, entry.monsters)
+        if unknown:
+            click.echo(
+                "Leaving out, with no stats that can be read: " + ", ".join(unknown), err=True
+            )
+        if not monsters:
+            raise click.ClickException(f"There are no monsters to fight at {location}")
+        result = run_simulation(
+            party, monsters, trials=trials, seed=seed, workers=workers, max_rounds=max_rounds
+        )
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+
+    low, high = result.rounds_range()
+    after_win = result.mean_hp_remaining_after_win
+    click.echo(
+        f"{location}: {party_label} ({len(party)} players) against {len(monsters)} "
+        f"monsters, {result.trials} fights"
+    )
+    click.echo(f"  Party wins:    {result.win_probability:6.1%}")
+    click.echo(f"  Party loses:   {result.loss_probability:6.1%}")
+    click.echo(
+        f"  Undecided:     {result.undecided_probability:6.1%} after {max_rounds} rounds"
+    )
+    click.echo(
+        f"  Rounds:        {result.mean_rounds:6.1f} on average, {low} to {high} in most fights"
+    )
+    click.echo(
+        f"  Party HP left: {result.mean_hp_remaining:6.1%} on average"
+        + (f", {after_win:.1%} when they win" if after_win is not None else "")
+    )
+    click.echo(f"  Players down:  {result.mean_players_down:6.1f} on average")
+
+
+@click.group()
+def analyze():
+    """Work out numbers across the whole setting."""
+
+
+@analyze.command("monsters")
+@click.option(
+    "-s", "--sort", "sort_by", default="name", show_default=True,
+    help="Column to sort by, e.g. cr, estimated_cr, hp, ehp, dpr or dpr_ac17.",
+)
+@click.option("-r", "--reverse", is_flag=True, help="Sort from highest to lowest.")
+@click.option("-t", "--type", "creature_type", help="Only show monsters of this type.")
+@click.option("-n", "--limit", type=int, help="Show at most this many monsters.")
+@click.option(
+    "--csv", "csv_file", type=click.File("w", encoding="utf-8"),
+    help="Write every column to this CSV file instead; use - for standard output.",
+)
+def analyze_monsters_command(sort_by, reverse, creature_type, limit, csv_file):
+    """Show every monster's damage per round, toughness and estimated challenge rating.
+
+    Damage per round (dpr) is the average against armour class 15, using the
+    multiattack if there is one, and effective hit points (ehp) are the hit points
+    divided by the chance of an attacker with +7 to hit hitting. The estimated
+    challenge rating follows the Dungeon Master's Guide. The CSV has these against
+    other armour classes and bonuses too.
+    """
+    try:
+        table, errors = MonsterTable.from_world(World())
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+    for path, error in sorted(errors.items()):
+        click.echo(f"Couldn't load {path.name}: {error}", err=True)
+
+    analysis = analyze_monsters(table)
+    try:
+        order = analysis.order(sort_by, descending=reverse)
+    except KeyError:
+        raise click.BadParameter(
+            f"No column {sort_by}; expected one of: "
+            + ", ".join(list(analysis.columns()) + list(ALIASES)),
+            param_hint="--sort",
+        )
+    if creature_type:
+        wanted = creature_type.lower()
+        order = [row for row in order if wanted in table.creature_type[row]]
+    order = order[:limit] if limit is not None else order
+
+    if csv_file is not None:
+        columns = list(analysis.columns())
+        writer = csv.writer(csv_file)
+        writer.writerow(columns)
+        writer.writerows(analysis.rows(columns, order))
+        return
+    if not len(order):
+        click.echo("No monsters.")
+        return
+    headings = ["Name", "Type", "CR", "Est. CR", "HP", "AC", "eHP", "Attacks", "DPR"]
+    rows = analysis.rows(COLUMNS, order)
+    widths = [max(len(cell) for cell in column) for column in zip(headings, *rows)]
+    for row in [headings] + rows:
+        cells = [
+            cell.ljust(width) if index < 2 else cell.rjust(width)
+            for index, (cell, width) in enumerate(zip(row, widths))
+        ]
+        click.echo("  ".join(cells).rstrip())
+
+
+@click.command("import-monsters")
+@click.argument("names_file", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "-j", "--workers", default=4, show_default=True,
+    help="Number of monsters to download at once.",
+)
+@click.option(
+    "--delay", default=1.0, show_default=True,
+    help="Minimum number of seconds between requests to the same website.",
+)
+@click.option(
+    "--retries", default=3, show_default=True,
+    help="Number of times to retry a monster after a timeout or server error.",
+)
+@click.option("--overwrite", is_flag=True, help="Replace monsters which already exist.")
+@click.option(
+    "--restart", is_flag=True, help="Start again rather than resuming an interrupted import."
+)
+@click.option(
+    "--base-url", default=DND_BEYOND_MONSTER_URL, show_default=True,
+    help="URL which monster names are appended to.",
+)
+@click.option(
+    "--offline", is_flag=True,
+    help="Only import monsters from pages downloaded before, never going online.",
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Download every page, without keeping a copy."
+)
+def import_monsters(
+    names_file, workers, delay, retries, overwrite, restart, base_url, offline, no_cache
+):
+    """Import every monster listed in NAMES_FILE into the setting's monsters.
+
+    NAMES_FILE has one monster name, or page URL, per line; use - to read from standard
+    input. If the import is interrupted, running the same command again carries on
+    where it left off.
+
+    Downloaded pages are kept in the setting's .fourhills directory, so importing the
+    same monsters again doesn't download them again.
+    """
+    try:
+        setting = World().setting
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+    names = read_monster_names(names_file)
+    if not names:
+        click.echo("No monsters to import.")
+        return
+    if offline and no_cache:
+        raise click.UsageError("--offline needs the page cache, so can't be used with --no-cache.")
+    page_cache = None if no_cache else PageCache.for_root(setting.root)
+
+    importer = BatchImporter(
+        setting.monsters_dir,
+        queue_path=queue_path_for(setting.root),
+        workers=workers,
+        min_interval=delay,
+        retries=retries,
+        overwrite=overwrite,
+        base_url=base_url,
+        page_cache=page_cache,
+        offline=offline,
+    )
+    if restart:
+        importer.queue.clear()
+
+    def report(progress):
+        prefix = f"[{progress.done}/{progress.total}]"
+        if progress.error is None:
+            click.echo(f"{prefix} {progress.name} -> {progress.output_path.name}")
+        else:
+            click.echo(f"{prefix} {progress.name} failed: {progress.error}", err=True)
+
+    try:
+        result = importer.run(names, progress=report)
+    except KeyboardInterrupt:
+        raise click.ClickException(
+            "Import interrupted; run the same command again to carry on."
+        )
+
+    click.echo(
+        f"Imported {len(result.imported)}, skipped {len(result.skipped)} already "
+        f"imported, {len(result.failed)} failed."
+    )
+    if result.failed:
+        raise click.ClickException(
+            "Some monsters could not be imported; run the same command again to retry them."
+        )
+
+
+@click.command("import-pages")
+@click.argument("source", type=click.Path(exists=True))
+@click.option(
+    "-j", "--workers", type=int, default=None,
+    help="Number of pages to parse at once [default: one per CPU].",
+)
+@click.option("--overwrite", is_flag=True, help="Replace monsters which already exist.")
+def import_pages(source, workers, overwrite):
+    """Import monsters from saved D&D Beyond pages, without going online.
+
+    SOURCE is a directory or zip file of monster pages saved as HTML; subdirectories
+    are searched too. Each monster is named after the monster in its page.
+    """
+    try:
+        setting = World().setting
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+
+    importer = SavedPageImporter(setting.monsters_dir, workers=workers, overwrite=overwrite)
+
+    def report(progress):
+        # Failures are listed together at the end
+        prefix = f"[{progress.done}/{progress.total}]"
+        if progress.output_path is not None:
+            click.echo(f"{prefix} {progress.name} -> {progress.output_path.name}")
+        elif progress.error is None:
+            click.echo(f"{prefix} {progress.name} skipped, monster already exists")
+
+    try:
+        result = importer.run(source, progress=report)
+    except FourhillsError as exc:
+        raise click.ClickException(str(exc))
+    except KeyboardInterrupt:
+        raise click.ClickException("Import interrupted.")
+
+    click.echo(
+        f"Imported {len(result.imported)}, skipped {len(result.skipped)} already "
+        f"imported, {len(result.failed)} failed."
+    )
+    if result.failed:
+        click.echo("Failed pages:", err=True)
+        for name, error in sorted(result.failed.items()):
+            click.echo(f"  {name}: {error}", err=True)
+        raise click.ClickException(f"{len(result.failed)} pages could not be imported.")
+
+
+# Commands run as `4h <name> ...`
+COMMANDS = {
+    "analyze": analyze,
+    "difficulty": difficulty,
+    "encounter": encounter,
+    "import-monsters": import_monsters,
+    "import-pages": import_pages,
+    "search": search,
+    "show": show,
+    "simulate": simulate,
+}
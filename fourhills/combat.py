@@ -0,0 +1,281 @@
+"""The numbers a fight needs, worked out from stat blocks and parties.
+
+A `Combatant` has an armour class, hit point dice, an initiative bonus and the attacks
+it makes each round. Monsters' come from their stat blocks, using their multiattack if
+they have one; players' come from the `stats` in their party's file, with anything not
+given there filled in for a typical martial character of their level.
+"""
+
+from dataclasses import dataclass, replace
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fourhills.dice import DiceExpression, parse_hp, total_damage
+from fourhills.encounters import MAX_LEVEL
+from fourhills.exceptions import FourhillsCombatError
+
+# The armour class attacks are compared against when choosing between them
+DEFAULT_TARGET_AC = 15
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_NUMBER = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+_LEADING_NUMBER_RE = re.compile(r"\s*([+-]?\s*\d+)")
+_MAKES_RE = re.compile(r"\bmakes?\s+" + _NUMBER + r"\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Attack:
+    """One attack roll: the bonus to hit, and the damage if it hits"""
+
+    name: str
+    hit: int
+    damage: DiceExpression
+    ranged: bool = False
+
+    def hit_chance(self, ac: int) -> float:
+        """The chance of hitting an armour class; a 20 always hits and a 1 always misses"""
+        needed = min(max(ac - self.hit, 2), 20)
+        return (21 - needed) / 20
+
+    def expected_damage(self, ac: int = DEFAULT_TARGET_AC) -> float:
+        """The average damage against an armour class, counting critical hits"""
+        damage = max(self.damage.mean, 0)
+        critical = max(self.damage.critical().mean, 0)
+        return (self.hit_chance(ac) - 1 / 20) * damage + critical / 20
+
+
+@dataclass(frozen=True)
+class Combatant:
+    """Anything which takes part in a fight, with the attacks it makes every round"""
+
+    name: str
+    ac: int
+    hp: DiceExpression
+    routine: Tuple[Attack, ...] = ()
+    initiative: int = 0
+
+    def expected_damage(self, ac: int = DEFAULT_TARGET_AC) -> float:
+        """The average damage the combatant does in a round against an armour class"""
+        return sum(attack.expected_damage(ac) for attack in self.routine)
+
+
+def read_number(value: Any) -> Optional[int]:
+    """Read the number at the start of a stat, e.g. 15 from "15 (natural armor)" or 4
+    from "+4"; None if there isn't one"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        return None
+    match = _LEADING_NUMBER_RE.match(value)
+    return int(match.group(1).replace(" ", "")) if match else None
+
+
+def ability_modifier(score: Any) -> int:
+    try:
+        return (int(score) - 10) // 2
+    except (TypeError, ValueError):
+        return 0
+
+
+def stat_block_attacks(stat_block) -> List[Attack]:
+    """Return every attack in a stat block whose bonus to hit and damage can be read"""
+    attacks = []
+    for ranged, details_by_name, damage_by_name in (
+        (False, stat_block.melee_attacks, stat_block.melee_damage),
+        (True, stat_block.ranged_attacks, stat_block.ranged_damage),
+    ):
+        for name, rolls in damage_by_name.items():
+            hit = read_number(details_by_name[name].get("hit"))
+            if hit is None or not rolls:
+                continue
+            attacks.append(Attack(str(name), hit, total_damage(rolls), ranged))
+    return attacks
+
+
+def attack_routine(
+    attacks: List[Attack], multiattack: Optional[str] = None, ac: int = DEFAULT_TARGET_AC
+) -> Tuple[Attack, ...]:
+    """Return the attacks made in one round.
+
+    Without a multiattack, that is the attack doing the most damage against `ac`. A
+    multiattack such as "The dragon makes three attacks: one with its bite and two with
+    its claws" is read for how many attacks are made, and how many of them with each
+    named attack; the rest are made with the best attack, or the best melee or ranged
+    attack if the multiattack says "melee attacks" or "ranged attacks".
+    """
+    if not attacks:
+        return ()
+
+    def best(candidates):
+        return max(candidates, key=lambda attack: attack.expected_damage(ac))
+
+    if not isinstance(multiattack, str) or not multiattack.strip():
+        return (best(attacks),)
+
+    text = multiattack.lower()
+    named = []
+    for attack in attacks:
+        name = re.escape(attack.name.lower().replace("_", " "))
+        # e.g. "one with its bite", "two with its claws" or "two scimitar attacks"
+        pattern = r"\b" + _NUMBER + r"\s+(?:\w+\s+){0,3}?" + name + r"s?\b"
+        for found in re.finditer(pattern, text):
+            named.extend([attack] * _number(found.group(1)))
+    match = _MAKES_RE.search(text)
+    count = _number(match.group(1)) if match else len(named) or 1
+    if len(named) > count:
+        # Alternatives, as in "two with its longsword or two with its longbow"
+        named = sorted(named, key=lambda attack: -attack.expected_damage(ac))[:count]
+
+    candidates = attacks
+    if "melee attack" in text:
+        candidates = [attack for attack in attacks if not attack.ranged] or attacks
+    elif "ranged attack" in text:
+        candidates = [attack for attack in attacks if attack.ranged] or attacks
+    return tuple(named) + (best(candidates),) * (count - len(named))
+
+
+def _number(word: str) -> int:
+    return int(word) if word.isdigit() else NUMBER_WORDS[word]
+
+
+def monster_combatant(stat_block, name: Optional[str] = None) -> Combatant:
+    """Return the combatant for a monster.
+
+    Raises
+    ------
+    FourhillsCombatError
+        If the monster's armour class or hit points can't be read.
+    """
+    name = name or stat_block.name
+    ac = read_number(stat_block.ac)
+    hp = stat_block.hp_dice
+    if ac is None or hp is None:
+        raise FourhillsCombatError(f"Can't read the armour class and hit points of {name}")
+    ability = stat_block.ability if isinstance(stat_block.ability, dict) else {}
+    return Combatant(
+        name=name,
+        ac=ac,
+        hp=hp,
+        routine=attack_routine(stat_block_attacks(stat_block), stat_block.multiattack),
+        initiative=ability_modifier(ability.get("DEX")),
+    )
+
+
+def player_combatant(name: str, level: Optional[int], stats: Any = None) -> Combatant:
+    """Return the combatant for a player, from their stats and level.
+
+    Anything not given in `stats` is that of a typical martial character of the
+    player's level: armour class 16, rising by one every five levels; 12 hit points
+    plus 8 per level after the first; a weapon doing 1d8 plus a modifier of 3 to 5,
+    with a bonus to hit of that plus proficiency; an extra attack at levels 5, 11 and
+    20; and +2 to initiative.
+
+    Parameters
+    ----------
+    name : str
+        The player's name.
+    level : int, optional
+        The player's level, which gives any stats not in `stats`.
+    stats : dict, optional
+        Any of `ac`, `hp` (e.g. 28 or "3d10 + 6"), `hit` (e.g. "+5"), `damage`
+        (e.g. "1d8 + 3"), `attacks` (the number made each round) and `initiative`.
+
+    Raises
+    ------
+    FourhillsCombatError
+        If a stat can't be read, or the level is needed but unknown.
+    """
+    stats = {
+        key: value for key, value in (stats.items() if isinstance(stats, dict) else ())
+        if value is not None
+    }
+    values = {"initiative": 2}
+    if any(key not in stats for key in ("ac", "hp", "hit", "damage", "attacks")):
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            raise FourhillsCombatError(
+                f"{name} needs a level, or their ac, hp, hit, damage and attacks"
+            ) from None
+        if not 1 <= level <= MAX_LEVEL:
+            raise FourhillsCombatError(f"{name}'s level must be between 1 and {MAX_LEVEL}")
+        values.update(_typical_player(level))
+    values.update(stats)
+
+    ac = read_number(values["ac"])
+    hit = read_number(values["hit"])
+    attacks = read_number(values["attacks"])
+    initiative = read_number(values["initiative"])
+    hp = parse_hp(values["hp"])
+    damage = parse_hp(values["damage"])
+    if None in (ac, hit, attacks, initiative, hp, damage):
+        raise FourhillsCombatError(f"Can't read the combat stats of {name}: {stats}")
+    return Combatant(
+        name=name,
+        ac=ac,
+        hp=hp,
+        routine=(Attack("attack", hit, damage),) * max(attacks, 0),
+        initiative=initiative,
+    )
+
+
+def _typical_player(level: int) -> Dict[str, Any]:
+    proficiency = 2 + (level - 1) // 4
+    modifier = 3 + (level >= 4) + (level >= 8)
+    return {
+        "ac": 16 + level // 5,
+        "hp": 12 + 8 * (level - 1),
+        "hit": modifier + proficiency,
+        "damage": f"1d8 + {modifier}",
+        "attacks": 1 + (level >= 5) + (level >= 11) + (level >= 20),
+    }
+
+
+def party_combatants(party) -> List[Combatant]:
+    """Return the combatants for the players in a party.
+
+    Raises
+    ------
+    FourhillsCombatError
+        If a player's stats can't be read, or their level is needed but unknown.
+    """
+    levels = party.levels if isinstance(party.levels, dict) else {}
+    stats = party.stats if isinstance(party.stats, dict) else {}
+    return [
+        player_combatant(player, levels.get(player, party.level), stats.get(player))
+        for player in party.players
+    ]
+
+
+def location_combatants(world, monsters) -> Tuple[List[Combatant], List[str]]:
+    """Return the combatants for monsters listed at a location.
+
+    Parameters
+    ----------
+    world : World
+        The world the monsters are in.
+    monsters : iterable of (str, int)
+        The monsters' names and how many of each, e.g. from `read_monsters`.
+
+    Returns
+    -------
+    list of Combatant
+        One per monster, numbered if there is more than one of a kind.
+    list of str
+        The monsters which don't exist, or whose stats can't be read.
+    """
+    combatants = []
+    unknown = []
+    for name, quantity in monsters:
+        try:
+            combatant = monster_combatant(world.monsters[name], name)
+        except (KeyError, FourhillsCombatError):
+            unknown.append(name)
+            continue
+        for number in range(quantity):
+            label = f"{name} {number + 1}" if quantity > 1 else name
+            combatants.append(replace(combatant, name=label))
+    return combatants, unknown
@@ -1,14 +1,14 @@
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, List
-import yaml
 
-from fourhills.exceptions import (
-    FourhillsFileLoadError, FourhillsSettingStructureError
-)
+from fourhills.dataclasses.slots import add_slots
+from fourhills.exceptions import FourhillsSettingStructureError
 from fourhills.setting import Setting
+from fourhills.utils.yaml_loader import load_yaml
 
 
+@add_slots
 @dataclass
 class Location:
     """Represents a location in the world."""
@@ -45,11 +45,7 @@ class Location:
         loc_file = Location.get_location_path(path, setting)
         if not loc_file.is_file():
             raise FourhillsSettingStructureError(f"Location file {loc_file} does not exist.")
-        with open(loc_file) as f:
-            try:
-                loc_dict = yaml.safe_load(f)
-            except yaml.YAMLError as exc:
-                raise FourhillsFileLoadError(f"Error loading from {loc_file}.") from exc
+        loc_dict = setting.cache.get(loc_file, load_yaml)
 
         if loc_dict is None:
             loc_dict = {}
@@ -1,14 +1,19 @@
-import yaml
 from dataclasses import dataclass
 from typing import Optional, List, Dict
 from fourhills.setting import Setting
+from fourhills.dataclasses.slots import add_slots
 from fourhills.dataclasses.stats import StatBlock
+from fourhills.document import (
+    BulletList, Document, Heading, Paragraph, Title, kept_document
+)
 from fourhills.exceptions import (
     FourhillsFileLoadError, FourhillsSettingStructureError
 )
-from fourhills.utils.text_utils import centre_pad, wrap_lines_paragraph
+from fourhills.utils.yaml_loader import load_yaml
 
 
+# The documents describing the NPC are kept in `_documents` once made
+@add_slots(extra=("_documents",))
 @dataclass
 class Npc:
     """Represents a non-player character."""
@@ -27,6 +32,48 @@ class Npc:
     def __str__(self):
         return self.summary_info(line_width=80)
 
+    def summary_document(self) -> Document:
+        """Return a document summarising the NPC: their name, and what their stats are
+        based on."""
+        return kept_document(self, "summary", self._build_summary)
+
+    def character_document(self) -> Document:
+        """Return a document describing the NPC: how they look, sound and behave."""
+        return kept_document(self, "character", self._build_character)
+
+    def battle_document(self) -> Document:
+        """Return a document of the NPC's stats, for running them in a fight."""
+        if self.stats:
+            return self.stats.battle_document()
+        return kept_document(self, "battle", lambda: Document([
+            Paragraph("This NPC has no stats defined")
+        ]))
+
+    def _build_summary(self) -> Document:
+        elements = [Title(f"{self.name} (deceased)" if self.deceased else self.name)]
+        if self.stats:
+            # Size, type and alignment
+            elements.append(Paragraph(
+                f"{self.stats.alignment.capitalize()} {self.stats.name} "
+                f"({self.stats.size.capitalize()} {self.stats.creature_type})",
+                link=f"monster://{self.stats_base}" if self.stats_base else None,
+            ))
+        return Document(elements)
+
+    def _build_character(self) -> Document:
+        elements = [Paragraph(self.appearance, label="Appearance")]
+        if self.description:
+            elements.append(Paragraph(self.description, label="Description"))
+        if self.accent:
+            elements.append(Paragraph(self.accent, label="Accent"))
+        personality = " ".join(text for text in (self.temperament, self.background) if text)
+        if personality:
+            elements.append(Paragraph(personality))
+        if self.phrases:
+            elements.append(Heading("Phrases"))
+            elements.append(BulletList(tuple(self.phrases)))
+        return Document(elements)
+
     def summary_info(self, line_width: int = 80) -> List[str]:
         """Return a list of lines summarising the NPC.
 
@@ -40,21 +87,7 @@ class Npc:
         list of str
             A summary of the NPC block as a list of lines.
         """
-        lines = []
-        if self.deceased:
-            lines.append(centre_pad(f"{self.name} (deceased)", line_width))
-        else:
-            lines.append(centre_pad(self.name, line_width))
-        lines.append("=" * line_width)
-
-        if self.stats:
-            # Size, type and alignment
-            lines.append(
-                f"{self.stats.alignment.capitalize()} {self.stats.name} "
-                f"({self.stats.size.capitalize()} {self.stats.creature_type})"
-            )
-
-        return wrap_lines_paragraph(lines, line_width)
+        return list(self.summary_document().text(line_width))
 
     def battle_info(self, line_width: int = 80) -> List[str]:
         """Return a list of lines detailing the NPC's stats.
@@ -71,8 +104,7 @@ class Npc:
         """
         if self.stats:
             return self.stats.battle_info(line_width)
-        else:
-            return ["This NPC has no stats defined"]
+        return list(self.battle_document().text(line_width))
 
     def character_info(self, line_width: int = 80) -> List[str]:
         """Return a list of lines describing the NPC.
@@ -87,21 +119,7 @@ class Npc:
         list of str
             A representation of the NPC as a list of lines.
         """
-        lines = []
-        lines.append(f"Appearance: {self.appearance}")
-        if self.description:
-            lines.append(f"Description: {self.description}")
-        if self.accent:
-            lines.append(f"Accent: {self.accent}")
-        lines.append((self.temperament or "") + (" " + self.background or ""))
-
-        if self.phrases:
-            lines.append("")
-            lines.append("Phrases:")
-            for phrase in self.phrases:
-                lines.append(f"- {phrase}")
-
-        return wrap_lines_paragraph(lines, line_width)
+        return list(self.character_document().text(line_width))
 
     @classmethod
     def from_name(cls, name: str, setting: Setting):
@@ -120,33 +138,29 @@ class Npc:
         npc_file = Npc.absolute_path(name, setting)
         if not npc_file.is_file():
             raise FourhillsSettingStructureError(f"NPC file {npc_file} does not exist.")
-        with open(npc_file) as f:
-            try:
-                npc_dict = yaml.safe_load(f)
-            except yaml.YAMLError as exc:
-                raise FourhillsFileLoadError(f"Error loading from {npc_file}.") from exc
-
-            if "stats_base" in npc_dict:
-                stats = StatBlock.from_name(npc_dict["stats_base"], setting)
-            else:
-                stats = None
-
-            if "stats" in npc_dict:
-                raise NotImplementedError
-
-            try:
-                npc = cls(
-                    **{
-                        key: value
-                        for key, value in npc_dict.items()
-                        if key not in ["stats"]
-                    }
-                )
-                npc.stats = stats
-            except TypeError as te:
-                raise FourhillsFileLoadError from te
-
-            return npc
+        npc_dict = setting.cache.get(npc_file, load_yaml)
+
+        if "stats_base" in npc_dict:
+            stats = StatBlock.from_name(npc_dict["stats_base"], setting)
+        else:
+            stats = None
+
+        if "stats" in npc_dict:
+            raise NotImplementedError
+
+        try:
+            npc = cls(
+                **{
+                    key: value
+                    for key, value in npc_dict.items()
+                    if key not in ["stats"]
+                }
+            )
+            npc.stats = stats
+        except TypeError as te:
+            raise FourhillsFileLoadError from te
+
+        return npc
 
     @staticmethod
     def absolute_path(name: str, setting: Setting):
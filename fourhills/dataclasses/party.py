@@ -1,14 +1,17 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Dict
-import yaml
+from typing import Optional, List, Dict, Tuple
 
+from fourhills.dataclasses.slots import add_slots
+from fourhills.encounters import party_levels
 from fourhills.setting import Setting
 from fourhills.exceptions import (
     FourhillsFileLoadError, FourhillsSettingStructureError
 )
+from fourhills.utils.yaml_loader import load_yaml
 
 
+@add_slots
 @dataclass
 class Party:
     """Represents a party of players existing within the setting."""
@@ -16,6 +19,11 @@ class Party:
     players: List[str]
     quests: Optional[Dict[str, str]] = None
     notes: Optional[str] = None
+    # The level of every player, unless given by name in levels
+    level: Optional[int] = None
+    levels: Optional[Dict[str, int]] = None
+    # Combat stats of particular players, for simulating fights
+    stats: Optional[Dict[str, Dict]] = None
 
     def __str__(self):
         return "{}: {}".format(
@@ -40,23 +48,25 @@ class Party:
         party_file = Party.absolute_path(name, setting)
         if not party_file.is_file():
             raise FourhillsSettingStructureError(f"Party file {party_file} does not exist.")
-        with open(party_file) as f:
-            try:
-                party_dict = yaml.safe_load(f)
-            except yaml.YAMLError as exc:
-                raise FourhillsFileLoadError(f"Error loading from {party_file}.") from exc
-
-            try:
-                party = cls(
-                    **{
-                        key: value
-                        for key, value in party_dict.items()
-                    }
-                )
-            except TypeError as te:
-                raise FourhillsFileLoadError from te
-
-            return party
+        party_dict = setting.cache.get(party_file, load_yaml)
+        if not isinstance(party_dict, dict):
+            raise FourhillsFileLoadError(f"Party file {party_file} is not a mapping.")
+
+        try:
+            party = cls(
+                **{
+                    key: value
+                    for key, value in party_dict.items()
+                }
+            )
+        except TypeError as te:
+            raise FourhillsFileLoadError from te
+
+        return party
+
+    def player_levels(self) -> Optional[Tuple[int, ...]]:
+        """Return the level of each player, or None if any player's level isn't known"""
+        return party_levels(self.players, self.level, self.levels)
 
     @staticmethod
     def absolute_path(name: str, setting: Setting) -> Path:
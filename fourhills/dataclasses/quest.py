@@ -1,14 +1,14 @@
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, List
-import yaml
 
 from fourhills import Setting
-from fourhills.exceptions import (
-    FourhillsFileLoadError, FourhillsSettingStructureError
-)
+from fourhills.dataclasses.slots import add_slots
+from fourhills.exceptions import FourhillsSettingStructureError
+from fourhills.utils.yaml_loader import load_yaml
 
 
+@add_slots
 @dataclass
 class Quest:
     """Represents a possible quest for the party."""
@@ -43,11 +43,7 @@ class Quest:
         quest_file = Quest.get_quest_path(path, setting)
         if not quest_file.is_file():
             raise FourhillsSettingStructureError(f"Quest file {quest_file} does not exist.")
-        with open(quest_file) as f:
-            try:
-                quest_dict = yaml.safe_load(f)
-            except yaml.YAMLError as exc:
-                raise FourhillsFileLoadError(f"Error loading from {quest_file}.") from exc
+        quest_dict = setting.cache.get(quest_file, load_yaml)
 
         if quest_dict is None:
             quest_dict = {}
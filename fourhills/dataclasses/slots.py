@@ -0,0 +1,52 @@
+from dataclasses import fields
+import sys
+from typing import Dict, Optional, List, Tuple
+
+
+def add_slots(cls=None, *, extra: Tuple[str, ...] = ()):
+    """Rebuild a dataclass so that its fields are stored in `__slots__`.
+
+    Instances then have no per-instance `__dict__`, which makes them much smaller when
+    many are held in memory at once. Must be applied on top of `@dataclass`, either
+    bare or as `@add_slots(extra=(...))` to add slots which aren't fields, e.g. for
+    caching values worked out from the fields.
+
+    Notes
+    -----
+    Equivalent to `@dataclass(slots=True)`, which is only available from Python 3.10.
+    """
+    if cls is None:
+        return lambda cls: add_slots(cls, extra=extra)
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(field.name for field in fields(cls))
+    cls_dict["__slots__"] = field_names + tuple(extra)
+    # Class attributes holding the field defaults would clash with the slots; the
+    # generated __init__ already has its own copy of the defaults
+    for field_name in field_names:
+        cls_dict.pop(field_name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+def intern_str(value: Optional[str]) -> Optional[str]:
+    """Intern a string so that repeats share one object; other values are unchanged."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def intern_list(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Return a copy of a list with every string in it interned."""
+    if not isinstance(values, list):
+        return intern_str(values)
+    return [intern_str(value) for value in values]
+
+
+def intern_dict(values: Optional[Dict]) -> Optional[Dict]:
+    """Return a copy of a dict with its keys and string values interned."""
+    if not isinstance(values, dict):
+        return values
+    return {intern_str(key): intern_str(value) for key, value in values.items()}
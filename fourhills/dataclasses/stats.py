@@ -1,16 +1,24 @@
 from dataclasses import dataclass
 import math
 import sys
-from typing import Optional, Dict, List
-import yaml
+from typing import Optional, Dict, List, Tuple
 
+from fourhills.dataclasses.slots import add_slots, intern_dict, intern_list, intern_str
+from fourhills.document import (
+    Blank, BulletList, Document, Heading, Paragraph, Rule, Table, Title, kept_document
+)
+from fourhills.dice import DamageRoll, DiceExpression, parse_damage, parse_hp
 from fourhills.exceptions import (
-    FourhillsFileLoadError, FourhillsSettingStructureError
+    FourhillsExperienceLookupError, FourhillsSettingStructureError
 )
 from fourhills.setting import Setting
-from fourhills.utils.text_utils import format_indented_paragraph, format_list, centre_pad
+from fourhills.utils.cr_to_xp import cr_to_xp
+from fourhills.utils.yaml_loader import load_yaml
 
 
+# The dice parsed from the hit points and attacks are kept in `_dice` once worked out, and
+# the documents describing the stat block in `_documents`
+@add_slots(extra=("_dice", "_documents"))
 @dataclass
 class StatBlock:
     """The stat block for a monster or character."""
@@ -42,10 +50,108 @@ class StatBlock:
     legendary_actions: Optional[Dict[str, str]] = None
     legendary_reactions: Optional[Dict[str, str]] = None
     lair_actions: Optional[Dict[str, str]] = None
+    environments: Optional[List[str]] = None
+
+    def __post_init__(self):
+        # The same few sizes, types, languages etc. appear in almost every stat block, so
+        # share one copy of each string between them all
+        self.size = intern_str(self.size)
+        self.creature_type = intern_str(self.creature_type)
+        self.alignment = intern_str(self.alignment)
+        self.speed = intern_str(self.speed)
+        self.ability = intern_dict(self.ability)
+        self.saving_throws = intern_dict(self.saving_throws)
+        self.skills = intern_dict(self.skills)
+        self.special_senses = intern_dict(self.special_senses)
+        self.melee_attacks = self._intern_attacks(self.melee_attacks)
+        self.ranged_attacks = self._intern_attacks(self.ranged_attacks)
+        self.damage_vulnerabilities = intern_list(self.damage_vulnerabilities)
+        self.damage_resistances = intern_list(self.damage_resistances)
+        self.damage_immunities = intern_list(self.damage_immunities)
+        self.condition_immunities = intern_list(self.condition_immunities)
+        self.languages = intern_list(self.languages)
+        self.environments = intern_list(self.environments)
+
+    @staticmethod
+    def _intern_attacks(attacks):
+        if not isinstance(attacks, dict):
+            return attacks
+        interned = {}
+        for name, details in attacks.items():
+            if isinstance(details, dict):
+                # Hit bonus, reach, range and targets come from a small set of values,
+                # but the damage and extra info are mostly unique
+                details = {
+                    intern_str(key): value if key in ("damage", "info") else intern_str(value)
+                    for key, value in details.items()
+                }
+            interned[name] = details
+        return interned
 
     def __str__(self):
         return self.summary_info(line_width=80)
 
+    @property
+    def xp(self) -> Optional[float]:
+        """The experience awarded for defeating the creature.
+
+        Returns
+        -------
+        float or None
+            The experience, or None if it can't be calculated from the challenge rating.
+        """
+        try:
+            return cr_to_xp(self.challenge)
+        except (FourhillsExperienceLookupError, TypeError, ValueError):
+            return None
+
+    def _parsed_dice(self):
+        try:
+            return self._dice
+        except AttributeError:
+            pass
+        self._dice = (
+            parse_hp(self.hp),
+            self._parse_attacks(self.melee_attacks),
+            self._parse_attacks(self.ranged_attacks),
+        )
+        return self._dice
+
+    @staticmethod
+    def _parse_attacks(attacks) -> Dict[str, Tuple[DamageRoll, ...]]:
+        if not isinstance(attacks, dict):
+            return {}
+        return {
+            name: parse_damage(details.get("damage"))
+            for name, details in attacks.items()
+            if isinstance(details, dict)
+        }
+
+    @property
+    def hp_dice(self) -> Optional[DiceExpression]:
+        """The creature's hit points as dice, e.g. 6d10 + 12 for "45 (6d10 + 12)".
+
+        The dice are parsed the first time they are needed, and kept with the stat
+        block; they are None if the hit points can't be read.
+        """
+        return self._parsed_dice()[0]
+
+    @property
+    def melee_damage(self) -> Dict[str, Tuple[DamageRoll, ...]]:
+        """The damage of each melee attack, by name, parsed from its description.
+
+        Attacks whose damage can't be read have no rolls.
+        """
+        return self._parsed_dice()[1]
+
+    @property
+    def ranged_damage(self) -> Dict[str, Tuple[DamageRoll, ...]]:
+        """The damage of each ranged attack, by name, parsed from its description.
+
+        Attacks whose damage can't be read have no rolls.
+        """
+        return self._parsed_dice()[2]
+
     @staticmethod
     def calculate_ability_modifier(ability_score: int) -> int:
         """Calculate the ability modifier from an ability score.
@@ -62,6 +168,131 @@ class StatBlock:
         """
         return math.floor((ability_score - 10) / 2)
 
+    def summary_document(self, quantity: Optional[int] = None) -> Document:
+        """Return a document summarising the stat block: its name, size, type and
+        alignment.
+
+        Parameters
+        ----------
+        quantity : int or None
+            If an int, it will be shown as in the header as a quantity e.g. "Lion x3".
+            If None, just the name will be shown e.g. "Lion".
+        """
+        summary = kept_document(self, "summary", self._build_summary)
+        if not quantity:
+            return summary
+        # Only the title changes, and that is cheap to lay out again
+        return Document((Title(f"{self.name} x{quantity:d}"),) + summary.elements[1:])
+
+    def battle_document(self) -> Document:
+        """Return a document of everything needed to run the creature in a fight.
+
+        The document is made the first time it is needed and kept with the stat block,
+        along with each rendering of it.
+        """
+        return kept_document(self, "battle", self._build_battle)
+
+    def _build_summary(self) -> Document:
+        return Document([
+            Title(self.name),
+            Paragraph(f"{self.size.capitalize()} {self.creature_type}, {self.alignment}"),
+        ])
+
+    def _build_battle(self) -> Document:
+        elements = [
+            Paragraph(f"AC {self.ac}"),
+            Paragraph(f"HP {self.hp}"),
+            Paragraph(f"Speed {self.speed}"),
+            Rule(),
+            Table(
+                tuple(self.ability),
+                tuple(
+                    f"{score:d}({self.calculate_ability_modifier(score):+d})"
+                    for score in self.ability.values()
+                ),
+            ),
+            Rule(),
+        ]
+
+        def add_list(label, items):
+            if items:
+                elements.append(Paragraph(", ".join(items), label=label))
+
+        def add_named(items):
+            for name, text in (items or {}).items():
+                elements.append(Paragraph(text, label=name.capitalize()))
+
+        def pairs(values):
+            return [f"{key} {value}" for key, value in (values or {}).items()]
+
+        add_list("Saving throws", pairs(self.saving_throws))
+        add_list("Skills", pairs(self.skills))
+        add_list("Damage vulnerabilities", self.damage_vulnerabilities)
+        add_list("Damage resistances", self.damage_resistances)
+        add_list("Damage immunities", self.damage_immunities)
+        add_list("Condition immunities", self.condition_immunities)
+        elements.append(Paragraph(str(self.passive_perception), label="Passive perception"))
+        add_list("Senses", pairs(self.special_senses))
+        add_list("Languages", self.languages or ["none"])
+        xp = self.xp
+        elements.append(Paragraph(
+            f"{self.challenge} ({xp:g} XP)" if xp is not None else str(self.challenge),
+            label="Challenge",
+        ))
+
+        if self.special_traits:
+            elements.append(Heading("Special traits"))
+            add_named(self.special_traits)
+
+        elements.append(Heading("Actions"))
+        for kind, attacks in (("melee", self.melee_attacks), ("ranged", self.ranged_attacks)):
+            for name, details in (attacks or {}).items():
+                elements.append(Paragraph(
+                    self._attack_text(kind, details), label=name.capitalize()
+                ))
+        if self.multiattack:
+            elements.append(Paragraph(self.multiattack, label="Multiattack"))
+        add_named(self.other_actions)
+
+        if self.legendary_actions:
+            elements.append(Heading("Legendary actions"))
+            add_named(self.legendary_actions)
+        if self.legendary_reactions:
+            elements.append(Heading("Legendary reactions"))
+            add_named(self.legendary_reactions)
+        if self.lair_actions:
+            elements.append(Heading("Lair actions"))
+            if self.lair_actions.get("description"):
+                elements.append(Paragraph(self.lair_actions["description"]))
+            if self.lair_actions.get("actions"):
+                elements.append(BulletList(tuple(self.lair_actions["actions"])))
+
+        elements.append(Blank())
+        if self.description:
+            elements.append(Paragraph(self.description))
+        return Document(elements)
+
+    @staticmethod
+    def _attack_text(kind: str, details) -> str:
+        if not isinstance(details, dict):
+            return str(details)
+        # Leave out anything missing from the attack rather than failing to show it
+        parts = [f"{kind} weapon attack"]
+        if "hit" in details:
+            parts.append(f"{details['hit']} to hit")
+        if "reach" in details:
+            parts.append(f"reach {details['reach']}")
+        if "range" in details:
+            parts.append(f"range {details['range']}")
+        if "targets" in details:
+            parts.append(str(details["targets"]))
+        text = ", ".join(parts) + "."
+        if "damage" in details:
+            text += f" Hit damage: {details['damage']}."
+        if "info" in details:
+            text += f" {details['info']}."
+        return text
+
     def summary_info(
         self, line_width: int = 80, quantity: Optional[int] = None
     ) -> List[str]:
@@ -80,18 +311,7 @@ class StatBlock:
         list of str
             A summary of the stat block as a list of lines.
         """
-        lines = []
-        if quantity:
-            header_text = f"{self.name} x{quantity:d}"
-        else:
-            header_text = self.name
-        lines.append(centre_pad(header_text, line_width))
-        lines.append("=" * line_width)
-
-        # Size, type and alignment
-        lines.append(f"{self.size.capitalize()} {self.creature_type}, {self.alignment}")
-
-        return lines
+        return list(self.summary_document(quantity).text(line_width))
 
     def battle_info(self, line_width: int = 80) -> List[str]:
         """Return the battle info for the stat block as a list of lines.
@@ -116,149 +336,7 @@ class StatBlock:
             raise ValueError(
                 "Width must be at least 56 for there to be room for all scores."
             )
-
-        # List to hold the lines of the output.
-        lines = list()
-
-        # AC, HP, speed
-        lines.append(f"AC {self.ac}")
-        lines.append(f"HP {self.hp}")
-        lines.append(f"Speed {self.speed}")
-
-        # Separator
-        lines.append("-" * line_width)
-
-        # Abilities
-        ability_width = math.floor(line_width / len(self.ability))
-        # Lists to hold the name and score strings for the abilities
-        ability_name_strings = list()
-        ability_score_strings = list()
-        # Go through the abilities, generating padded strings for the name and score
-        for ability, score in self.ability.items():
-            # Add the name to the list of names
-            ability_name_strings.append(centre_pad(ability, ability_width))
-            # Calculate the ability modifier
-            modifier = self.calculate_ability_modifier(score)
-            # Add the score and modifier to the list of scores
-            ability_score_strings.append(
-                centre_pad(f"{score:d}({modifier:+d})", ability_width)
-            )
-        # Join the names and scores into one line each, and centre and pad for the whole
-        # line width, before appending to the list
-        lines.append(centre_pad("".join(ability_name_strings), line_width))
-        lines.append(centre_pad("".join(ability_score_strings), line_width))
-
-        # Separator
-        lines.append("-" * line_width)
-
-        # Saving throws
-        if self.saving_throws:
-            throws = [f"{throw} {value}" for throw, value in self.saving_throws.items()]
-            lines.extend(format_list("Saving throws", throws, line_width))
-        # Skills
-        if self.skills:
-            skill_list = [f"{skill} {value}" for skill, value in self.skills.items()]
-            lines.extend(format_list("Skills", skill_list, line_width))
-        # Vulnerabilities
-        if self.damage_vulnerabilities:
-            lines.extend(
-                format_list(
-                    "Damage vulnerabilities", self.damage_vulnerabilities, line_width
-                )
-            )
-        # Resistances
-        if self.damage_resistances:
-            lines.extend(
-                format_list("Damage resistances", self.damage_resistances, line_width)
-            )
-        # Immunities
-        if self.damage_immunities:
-            lines.extend(
-                format_list("Damage immunities", self.damage_immunities, line_width)
-            )
-        if self.condition_immunities:
-            lines.extend(
-                format_list(
-                    "Condition immunities", self.condition_immunities, line_width
-                )
-            )
-        # Passive perception
-        lines.append(f"Passive perception: {self.passive_perception}")
-        # Senses
-        if self.special_senses:
-            senses = [
-                f"{sense} {value}" for sense, value in self.special_senses.items()
-            ]
-            lines.extend(format_list("Senses", senses, line_width))
-        # Languages
-        lines.extend(format_list("Languages", self.languages or ["none"], line_width))
-
-        # Challenge rating
-        lines.append(f"Challenge: {self.challenge}")
-
-        # Separator
-        lines.append("")
-        lines.append(centre_pad("Special traits", line_width))
-        lines.append("-" * line_width)
-
-        if self.special_traits:
-            for name, text in self.special_traits.items():
-                lines.extend(
-                    format_indented_paragraph(
-                        f"{name.capitalize()}: {text}", line_width
-                    )
-                )
-
-        # Separator and title
-        lines.append("")
-        lines.append(centre_pad("Actions", line_width))
-        lines.append("-" * line_width)
-
-        # Melee attacks
-        if self.melee_attacks:
-            for name, details in self.melee_attacks.items():
-                details_formatted = (
-                    f"{name.capitalize()}: melee weapon attack, "
-                    f"{details['hit']} to hit, reach {details['reach']}, "
-                    f"{details['targets']}. "
-                    f"Hit damage: {details['damage']}."
-                )
-                if "info" in details:
-                    details_formatted += f" {details['info']}."
-                lines.extend(format_indented_paragraph(details_formatted, line_width))
-
-        # Ranged attacks
-        if self.ranged_attacks:
-            for name, details in self.ranged_attacks.items():
-                details_formatted = (
-                    f"{name.capitalize()}: ranged weapon attack, "
-                    f"{details['hit']} to hit, range {details['range']},"
-                    f"{details['targets']}. "
-                    f"Hit damage: {details['damage']}."
-                )
-                if "info" in details:
-                    details_formatted += f" {details['info']}."
-                lines.extend(format_indented_paragraph(details_formatted, line_width))
-
-        if self.multiattack:
-            lines.extend(
-                format_indented_paragraph(
-                    f"Multiattack: {self.multiattack}", line_width
-                )
-            )
-
-        # Other actions
-        if self.other_actions:
-            for name, text in self.other_actions.items():
-                action_formatted = f"{name.capitalize()}: {text}"
-                lines.extend(format_indented_paragraph(action_formatted, line_width))
-
-        lines.append("")
-
-        if self.description:
-            lines.extend(format_indented_paragraph(self.description, line_width))
-
-        return lines
+        return list(self.battle_document().text(line_width))
 
     @classmethod
     def from_file(cls, filename: str):
@@ -269,13 +347,7 @@ class StatBlock:
         filename: str
             Path to the YAML file
         """
-        with open(filename) as f:
-            try:
-                stat_dict = yaml.safe_load(f)
-            except yaml.YAMLError as exc:
-                raise FourhillsFileLoadError(f"Error loading from {filename}.") from exc
-
-            return cls(**stat_dict)
+        return cls(**load_yaml(filename))
 
     @classmethod
     def from_name(cls, name: str, setting: Setting):
@@ -296,7 +368,7 @@ class StatBlock:
             raise FourhillsSettingStructureError(
                 f"Stat file {stat_file} does not exist."
             )
-        return cls.from_file(str(stat_file))
+        return cls(**setting.cache.get(stat_file, load_yaml))
 
     @staticmethod
     def absolute_path(name: str, setting: Setting):
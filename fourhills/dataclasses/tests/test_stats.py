@@ -0,0 +1,69 @@
+import pickle
+import pytest
+
+from fourhills.dataclasses import Location, Npc, Party, Quest, StatBlock
+
+
+@pytest.fixture
+def stat_dict():
+    yield {
+        "name": "Goblin",
+        "size": "small",
+        "creature_type": "humanoid (goblinoid)",
+        "alignment": "neutral evil",
+        "ac": "15",
+        "hp": "7 (2d6)",
+        "speed": "30 ft.",
+        "ability": {"STR": 8, "DEX": 14, "CON": 10, "INT": 10, "WIS": 8, "CHA": 8},
+        "challenge": 0.25,
+        "passive_perception": 9,
+        "languages": ["common", "goblin"],
+    }
+
+
+@pytest.mark.parametrize("entity_cls", [Location, Npc, Party, Quest, StatBlock])
+def test_entities_have_no_instance_dict(entity_cls):
+    assert "__slots__" in vars(entity_cls)
+    assert "__dict__" not in vars(entity_cls)
+
+
+def test_xp_is_computed_from_challenge(stat_dict):
+    assert StatBlock(**stat_dict).xp == 50
+
+
+def test_xp_is_none_for_unsupported_challenge(stat_dict):
+    stat_dict["challenge"] = 31
+    assert StatBlock(**stat_dict).xp is None
+
+
+def test_repeated_strings_are_shared(stat_dict):
+    # Copy via pickle so that each stat block starts with its own strings
+    first = StatBlock(**pickle.loads(pickle.dumps(stat_dict)))
+    second = StatBlock(**pickle.loads(pickle.dumps(stat_dict)))
+    assert first.alignment is second.alignment
+    assert first.languages[1] is second.languages[1]
+
+
+def test_interning_does_not_modify_source(stat_dict):
+    languages = stat_dict["languages"]
+    StatBlock(**stat_dict)
+    assert stat_dict["languages"] is languages
+
+
+def test_stat_block_pickles(stat_dict):
+    stat_block = StatBlock(**stat_dict)
+    assert pickle.loads(pickle.dumps(stat_block)) == stat_block
+
+
+def test_dice_are_parsed_once(stat_dict):
+    stat_dict["melee_attacks"] = {
+        "scimitar": {"hit": "+4", "reach": "5 ft.", "targets": "one target",
+                     "damage": "5 (1d6 + 2) slashing damage"},
+    }
+    stat_block = StatBlock(**stat_dict)
+    assert str(stat_block.hp_dice) == "2d6"
+    assert stat_block.hp_dice is stat_block.hp_dice
+    assert [str(roll) for roll in stat_block.melee_damage["scimitar"]] == ["1d6 + 2 slashing"]
+    assert stat_block.melee_damage is stat_block.melee_damage
+    assert stat_block.ranged_damage == {}
+    assert pickle.loads(pickle.dumps(stat_block)).hp_dice == stat_block.hp_dice
@@ -0,0 +1,324 @@
+"""Dice expressions such as "2d6 + 3", read from the hit points and damage in stat blocks.
+
+An expression is parsed once into a `DiceExpression`, which works out its exact
+probability distribution by convolving its dice, and samples rolls from that
+distribution with NumPy, so rolling a million times is a few array operations however
+many dice there are.
+
+Stat blocks write dice inside free text, e.g. "45 (6d10 + 12)" for hit points, or
+"4 (1d4 + 2) piercing plus 5 (1d6 + 2) slashing damage" for an attack; `parse_hp` and
+`parse_damage` find the expressions in those.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from fourhills.exceptions import FourhillsDiceError
+
+# The most dice, and sides on a die, in one expression, which keeps distributions to
+# at most their product of values
+MAX_DICE = 100
+MAX_SIDES = 100
+
+DAMAGE_TYPES = (
+    "acid",
+    "bludgeoning",
+    "cold",
+    "fire",
+    "force",
+    "lightning",
+    "necrotic",
+    "piercing",
+    "poison",
+    "psychic",
+    "radiant",
+    "slashing",
+    "thunder",
+)
+
+# One term: an optional sign, then dice such as "2d6" or "d20", or a number
+_TERM_RE = re.compile(r"\s*([+-])?\s*(?:(\d*)\s*[dD]\s*(\d+)|(\d+))\s*")
+# Dashes which pages copied from the web use for minus
+_MINUS_RE = re.compile("[\u2012\u2013\u2014\u2212]")
+_BRACKETED_RE = re.compile(r"\(([^()]*)\)")
+_DICE_TEXT = r"\d*\s*[dD]\s*\d+(?:\s*[+-]\s*\d*\s*(?:[dD]\s*)?\d+)*"
+_DAMAGE_RE = re.compile(
+    r"(?:\d+\s*\((?P<bracketed>[^()]*)\)|(?P<dice>" + _DICE_TEXT + r")|(?P<number>\d+))"
+    r"\s*(?P<type>" + "|".join(DAMAGE_TYPES) + r")\b",
+    re.IGNORECASE,
+)
+_LEADING_NUMBER_RE = re.compile(r"\s*(\d+)")
+
+Rng = Union[None, int, np.random.Generator]
+
+
+@dataclass(frozen=True)
+class DiceExpression:
+    """A sum of dice and a modifier, e.g. 2d6 + 1d4 + 3.
+
+    Use `DiceExpression.parse` rather than making these directly.
+
+    Attributes
+    ----------
+    dice : tuple of (int, int)
+        The number and sides of each kind of die, in order of sides, with the dice
+        added before those subtracted, which have a negative number.
+    modifier : int
+        The constant added to the dice.
+    """
+
+    dice: Tuple[Tuple[int, int], ...] = ()
+    modifier: int = 0
+
+    @classmethod
+    def parse(cls, text: Union[str, int]) -> "DiceExpression":
+        """Parse an expression such as "2d6 + 3", "d20 - 1" or "7".
+
+        Each distinct string is only parsed once; the same expression is returned for
+        it every time.
+
+        Raises
+        ------
+        FourhillsDiceError
+            If the text isn't a dice expression, or has too many dice.
+        """
+        if isinstance(text, int) and not isinstance(text, bool):
+            return cls(modifier=text)
+        if not isinstance(text, str):
+            raise FourhillsDiceError(f"Not a dice expression: {text!r}")
+        return _parse(text)
+
+    @classmethod
+    def constant(cls, value: int) -> "DiceExpression":
+        return cls(modifier=value)
+
+    def __str__(self):
+        parts = []
+        for count, sides in self.dice:
+            sign = "-" if count < 0 else "+"
+            parts.append(f"{sign} {abs(count)}d{sides}")
+        if self.modifier or not parts:
+            parts.append(f"{'-' if self.modifier < 0 else '+'} {abs(self.modifier)}")
+        text = " ".join(parts)
+        return text[2:] if text.startswith("+ ") else "-" + text[2:]
+
+    def __add__(self, other: "DiceExpression") -> "DiceExpression":
+        if isinstance(other, int):
+            return DiceExpression(self.dice, self.modifier + other)
+        if not isinstance(other, DiceExpression):
+            return NotImplemented
+        return _combine(self.dice + other.dice, self.modifier + other.modifier)
+
+    __radd__ = __add__
+
+    @property
+    def min(self) -> int:
+        return self.modifier + sum(
+            count if count > 0 else count * sides for count, sides in self.dice
+        )
+
+    @property
+    def max(self) -> int:
+        return self.modifier + sum(
+            count * sides if count > 0 else count for count, sides in self.dice
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.modifier + sum(count * (sides + 1) / 2 for count, sides in self.dice)
+
+    @property
+    def is_constant(self) -> bool:
+        return not self.dice
+
+    def critical(self) -> "DiceExpression":
+        """The expression with twice as many dice, as rolled for a critical hit"""
+        return DiceExpression(
+            tuple((count * 2, sides) for count, sides in self.dice), self.modifier
+        )
+
+    def distribution(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return every possible total, in order, and the probability of each.
+
+        The arrays are shared between calls, so mustn't be changed.
+        """
+        probabilities = _probabilities(self.dice)
+        values = np.arange(self.min, self.min + len(probabilities))
+        return values, probabilities
+
+    def probability(self, at_least: int) -> float:
+        """The probability of rolling `at_least` or more"""
+        values, probabilities = self.distribution()
+        return float(probabilities[values >= at_least].sum())
+
+    def sample(self, size: Optional[int] = None, rng: Rng = None):
+        """Roll the expression.
+
+        Parameters
+        ----------
+        size : int, optional
+            How many times to roll; a single int is returned if not given.
+        rng : int or numpy.random.Generator, optional
+            The random number generator to use, or a seed for a new one.
+
+        Returns
+        -------
+        int or numpy.ndarray
+            The totals rolled.
+        """
+        rng = np.random.default_rng(rng)
+        if self.is_constant:
+            totals = np.full(() if size is None else size, self.modifier)
+        else:
+            # Inverse transform sampling, from the exact distribution
+            index = np.searchsorted(_cumulative(self.dice), rng.random(size), side="right")
+            # Rounding can leave the cumulative probability just under 1
+            totals = self.min + np.minimum(index, self.max - self.min)
+        return int(totals) if size is None else totals
+
+
+def _combine(dice, modifier: int) -> DiceExpression:
+    """Make an expression, adding up the dice with the same sides and sign"""
+    counts: Dict[Tuple[bool, int], int] = {}
+    for count, sides in dice:
+        key = (count < 0, sides)
+        counts[key] = counts.get(key, 0) + count
+    if sum(abs(count) for count in counts.values()) > MAX_DICE:
+        raise FourhillsDiceError(f"Too many dice; at most {MAX_DICE} can be rolled")
+    return DiceExpression(
+        tuple((count, sides) for (_, sides), count in sorted(counts.items())), modifier
+    )
+
+
+@lru_cache(maxsize=4096)
+def _parse(text: str) -> DiceExpression:
+    text = _MINUS_RE.sub("-", text)
+    dice = []
+    modifier = 0
+    position = 0
+    while position < len(text):
+        match = _TERM_RE.match(text, position)
+        # Every term but the first needs a sign
+        if match is None or match.end() == position or (position and not match.group(1)):
+            raise FourhillsDiceError(f"Not a dice expression: {text!r}")
+        sign = -1 if match.group(1) == "-" else 1
+        if match.group(4) is not None:
+            modifier += sign * int(match.group(4))
+        else:
+            count = int(match.group(2) or 1)
+            sides = int(match.group(3))
+            if sides < 1 or sides > MAX_SIDES:
+                raise FourhillsDiceError(
+                    f"Dice must have between 1 and {MAX_SIDES} sides: {text!r}"
+                )
+            dice.append((sign * count, sides))
+        position = match.end()
+    if position == 0:
+        raise FourhillsDiceError(f"Not a dice expression: {text!r}")
+    return _combine(dice, modifier)
+
+
+@lru_cache(maxsize=1024)
+def _probabilities(dice: Tuple[Tuple[int, int], ...]) -> np.ndarray:
+    """The probabilities of each total of the dice, from the lowest"""
+    probabilities = np.ones(1)
+    for count, sides in dice:
+        die = np.full(sides, 1 / sides)
+        # Doubling up the dice needs log(count) convolutions rather than count
+        power = np.ones(1)
+        remaining = abs(count)
+        while remaining:
+            if remaining & 1:
+                power = np.convolve(power, die)
+            remaining >>= 1
+            if remaining:
+                die = np.convolve(die, die)
+        # Subtracted dice count down from their highest total
+        probabilities = np.convolve(probabilities, power if count > 0 else power[::-1])
+    probabilities.setflags(write=False)
+    return probabilities
+
+
+@lru_cache(maxsize=1024)
+def _cumulative(dice: Tuple[Tuple[int, int], ...]) -> np.ndarray:
+    cumulative = np.cumsum(_probabilities(dice))
+    cumulative.setflags(write=False)
+    return cumulative
+
+
+@dataclass(frozen=True)
+class DamageRoll:
+    """One part of an attack's damage, e.g. the 1d6 + 2 slashing damage of a sword"""
+
+    expression: DiceExpression
+    # Lower case, or None if the text doesn't say
+    damage_type: Optional[str] = None
+
+    def __str__(self):
+        if self.damage_type is None:
+            return str(self.expression)
+        return f"{self.expression} {self.damage_type}"
+
+
+def parse_hp(text: Any) -> Optional[DiceExpression]:
+    """Return the hit points in a stat block, e.g. "45 (6d10 + 12)", as an expression.
+
+    The dice in brackets are used if there are any, or else the number given, so
+    "45" is a constant 45. Returns None if no hit points can be found.
+    """
+    if isinstance(text, int) and not isinstance(text, bool):
+        return DiceExpression.constant(text)
+    if not isinstance(text, str):
+        return None
+    for candidate in _BRACKETED_RE.findall(text) + [text]:
+        try:
+            return DiceExpression.parse(candidate)
+        except FourhillsDiceError:
+            pass
+    match = _LEADING_NUMBER_RE.match(text)
+    return DiceExpression.constant(int(match.group(1))) if match else None
+
+
+@lru_cache(maxsize=4096)
+def _parse_damage(text: str) -> Tuple[DamageRoll, ...]:
+    # Only the first of several alternatives, as in "1d6 + 2 piercing damage, or
+    # 1d8 + 2 piercing damage if used with two hands"
+    text = _MINUS_RE.sub("-", text)
+    main = re.split(r"\bor\b", text, maxsplit=1)[0]
+    rolls = []
+    for match in _DAMAGE_RE.finditer(main):
+        expression_text = match.group("bracketed") or match.group("dice") or match.group("number")
+        try:
+            expression = DiceExpression.parse(expression_text)
+        except FourhillsDiceError:
+            continue
+        rolls.append(DamageRoll(expression, match.group("type").lower()))
+    if not rolls:
+        # Damage with no type, e.g. "5 (1d6 + 2)"
+        expression = parse_hp(main)
+        if expression is not None:
+            rolls.append(DamageRoll(expression))
+    return tuple(rolls)
+
+
+def parse_damage(text: Any) -> Tuple[DamageRoll, ...]:
+    """Return each part of the damage described in an attack, e.g. "4 (1d4 + 2) piercing
+    plus 5 (1d6 + 2) slashing damage".
+
+    Only the first of several alternatives ("... or ...") is read, and parts without
+    dice or a number are skipped, so the result may be empty.
+    """
+    if isinstance(text, int) and not isinstance(text, bool):
+        return (DamageRoll(DiceExpression.constant(text)),)
+    if not isinstance(text, str):
+        return ()
+    return _parse_damage(text)
+
+
+def total_damage(rolls: Tuple[DamageRoll, ...]) -> DiceExpression:
+    """Add up the parts of an attack's damage, whatever their types"""
+    return sum((roll.expression for roll in rolls), DiceExpression())
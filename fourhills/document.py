@@ -0,0 +1,256 @@
+"""A width-independent description of how an entity is laid out, with ways to render it.
+
+Entities such as stat blocks and NPCs describe themselves once as a `Document`: a
+sequence of titles, headings, labelled paragraphs, tables and lists, with all of the
+text already worked out. Rendering a document as terminal text at some width, as HTML
+for the GUI, or as Markdown is then only a matter of laying out those elements, and
+each rendering is kept with the document, so showing it again costs nothing.
+"""
+
+import html
+import math
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from fourhills.utils.text_utils import centre_pad, format_indented_paragraph
+
+
+class Title(NamedTuple):
+    """The name at the top of a document, underlined."""
+
+    text: str
+
+
+class Heading(NamedTuple):
+    """The start of a section, such as "Actions"."""
+
+    text: str
+
+
+class Rule(NamedTuple):
+    """A line across the page between two parts of a section."""
+
+
+class Blank(NamedTuple):
+    """An empty line in text; nothing in other formats."""
+
+
+class Paragraph(NamedTuple):
+    """A paragraph, wrapped to the width of the page in text.
+
+    A label is shown before the text as "Label: text", emphasised where the format
+    allows. A link, such as "monster://goblin", is followed from the text in formats
+    which have links.
+    """
+
+    text: str
+    label: Optional[str] = None
+    link: Optional[str] = None
+
+
+class Table(NamedTuple):
+    """A row of values under a row of headings, spread evenly across the page."""
+
+    headings: Tuple[str, ...]
+    values: Tuple[str, ...]
+
+
+class BulletList(NamedTuple):
+    """A list of items, one after the other."""
+
+    items: Tuple[str, ...]
+
+
+Element = Union[Title, Heading, Rule, Blank, Paragraph, Table, BulletList]
+
+
+class Document:
+    """The elements describing an entity, and the renderings of them made so far.
+
+    Documents are read-only once made, so they can be shared between threads and kept
+    with the entity they describe.
+    """
+
+    __slots__ = ("elements", "_renderings", "_lock")
+
+    def __init__(self, elements):
+        self.elements: Tuple[Element, ...] = tuple(elements)
+        self._renderings: Dict[Tuple[str, Optional[int]], object] = {}
+        self._lock = threading.Lock()
+
+    def __add__(self, other: "Document") -> "Document":
+        return Document(self.elements + other.elements)
+
+    def __eq__(self, other):
+        return isinstance(other, Document) and self.elements == other.elements
+
+    def __repr__(self):
+        return f"Document({list(self.elements)!r})"
+
+    def __reduce__(self):
+        # Renderings are cheap to make again, and the lock can't be pickled
+        return (Document, (self.elements,))
+
+    def _rendered(self, key, render: Callable):
+        with self._lock:
+            try:
+                return self._renderings[key]
+            except KeyError:
+                pass
+        rendering = render()
+        with self._lock:
+            return self._renderings.setdefault(key, rendering)
+
+    def text(self, line_width: int) -> List[str]:
+        """Return the document as lines of text no wider than `line_width` where
+        possible; the list is shared, so must not be changed."""
+        return self._rendered(("text", line_width), lambda: render_text(self, line_width))
+
+    def html(self) -> str:
+        """Return the document as an HTML fragment."""
+        return self._rendered(("html", None), lambda: render_html(self))
+
+    def markdown(self) -> str:
+        """Return the document as Markdown."""
+        return self._rendered(("markdown", None), lambda: render_markdown(self))
+
+
+def kept_document(entity, kind: str, build: Callable[[], Document]) -> Document:
+    """Return one of an entity's documents, building it the first time it is asked for.
+
+    Documents are kept in the entity's `_documents` slot, by kind, so each is built
+    once for each version of the entity loaded from the setting.
+    """
+    try:
+        documents = entity._documents
+    except AttributeError:
+        documents = entity._documents = {}
+    document = documents.get(kind)
+    if document is None:
+        document = documents.setdefault(kind, build())
+    return document
+
+
+def _labelled(label: str, text: str) -> str:
+    return f"{label}: {text}" if label else text
+
+
+def render_text(document: Document, line_width: int) -> List[str]:
+    """Lay out a document as lines of text for a terminal.
+
+    Parameters
+    ----------
+    document : Document
+        The document to lay out.
+    line_width : int
+        The width of the output, in characters.
+
+    Returns
+    -------
+    list of str
+        The lines of text.
+    """
+    lines = []
+    for element in document.elements:
+        if isinstance(element, Title):
+            lines.append(centre_pad(element.text, line_width))
+            lines.append("=" * line_width)
+        elif isinstance(element, Heading):
+            lines.append("")
+            lines.append(centre_pad(element.text, line_width))
+            lines.append("-" * line_width)
+        elif isinstance(element, Rule):
+            lines.append("-" * line_width)
+        elif isinstance(element, Blank):
+            lines.append("")
+        elif isinstance(element, Paragraph):
+            lines.extend(
+                format_indented_paragraph(_labelled(element.label, element.text), line_width)
+            )
+        elif isinstance(element, Table):
+            cell_width = math.floor(line_width / max(len(element.headings), 1))
+            for row in (element.headings, element.values):
+                cells = "".join(centre_pad(cell, cell_width) for cell in row)
+                lines.append(centre_pad(cells, line_width))
+        elif isinstance(element, BulletList):
+            for item in element.items:
+                lines.extend(format_indented_paragraph(f"- {item}", line_width))
+    return lines
+
+
+def render_html(document: Document) -> str:
+    """Lay out a document as an HTML fragment, for the GUI.
+
+    Parameters
+    ----------
+    document : Document
+        The document to lay out.
+
+    Returns
+    -------
+    str
+        The HTML, with the document's text escaped.
+    """
+    escape = html.escape
+    parts = []
+    for element in document.elements:
+        if isinstance(element, Title):
+            parts.append(f"<h2>{escape(element.text)}</h2>\n<hr>")
+        elif isinstance(element, Heading):
+            parts.append(f"<h3>{escape(element.text)}</h3>")
+        elif isinstance(element, Rule):
+            parts.append("<hr>")
+        elif isinstance(element, Paragraph):
+            text = escape(element.text)
+            if element.link:
+                text = f'<a href="{escape(element.link)}">{text}</a>'
+            if element.label:
+                text = f"<strong>{escape(element.label)}:</strong> {text}"
+            parts.append(f"<p>{text}</p>")
+        elif isinstance(element, Table):
+            headings = "".join(f"<th>{escape(cell)}</th>" for cell in element.headings)
+            values = "".join(f"<td align=center>{escape(cell)}</td>" for cell in element.values)
+            parts.append(
+                "<table align=center width=95%>\n"
+                f"<thead><tr>{headings}</tr></thead>\n"
+                f"<tbody><tr>{values}</tr></tbody>\n"
+                "</table>"
+            )
+        elif isinstance(element, BulletList):
+            items = "".join(f"<li>{escape(item)}</li>" for item in element.items)
+            parts.append(f"<ul>{items}</ul>")
+    return "\n".join(parts) + "\n"
+
+
+def render_markdown(document: Document) -> str:
+    """Lay out a document as Markdown.
+
+    Parameters
+    ----------
+    document : Document
+        The document to lay out.
+
+    Returns
+    -------
+    str
+        The Markdown; text is left as it is rather than escaped.
+    """
+    blocks = []
+    for element in document.elements:
+        if isinstance(element, Title):
+            blocks.append(f"# {element.text}")
+        elif isinstance(element, Heading):
+            blocks.append(f"## {element.text}")
+        elif isinstance(element, Rule):
+            blocks.append("---")
+        elif isinstance(element, Paragraph):
+            text = f"[{element.text}]({element.link})" if element.link else element.text
+            blocks.append(f"**{element.label}:** {text}" if element.label else text)
+        elif isinstance(element, Table):
+            blocks.append("\n".join(
+                "| " + " | ".join(row) + " |"
+                for row in (element.headings, ("---",) * len(element.headings), element.values)
+            ))
+        elif isinstance(element, BulletList):
+            blocks.append("\n".join(f"- {item}" for item in element.items))
+    return "\n\n".join(blocks) + "\n"
@@ -0,0 +1,312 @@
+"""Suggesting encounters of a given difficulty from the monsters in a world.
+
+Rather than trying every combination of monsters, the monsters are grouped by challenge
+rating, and a branch and bound search finds the combinations of challenge ratings, and
+how many of each, whose adjusted experience is closest to the party's threshold for the
+difficulty without reaching the next one. Monsters are then picked from each group, so
+the search takes as long for a thousand monsters as for ten.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+import heapq
+import math
+import random
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fourhills.encounters import (
+    DIFFICULTIES,
+    EncounterDifficulty,
+    encounter_multiplier,
+    party_thresholds,
+)
+from fourhills.exceptions import FourhillsEncounterError
+from fourhills.utils.cr_to_xp import MAX_CR, cr_to_xp_many
+
+
+@dataclass
+class MonsterOption:
+    """A monster which may be put in an encounter, with what it can be filtered by"""
+
+    name: str
+    cr: float
+    creature_type: Optional[str] = None
+    environments: Tuple[str, ...] = ()
+
+
+@dataclass
+class GeneratedEncounter:
+    """A suggested encounter: each monster, with how many of it, and its difficulty"""
+
+    monsters: List[Tuple[MonsterOption, int]]
+    assessment: EncounterDifficulty
+
+    @property
+    def monster_count(self) -> int:
+        return sum(quantity for _, quantity in self.monsters)
+
+    def __str__(self):
+        return ", ".join(f"{quantity} x {monster.name}" for monster, quantity in self.monsters)
+
+
+class EncounterGenerator:
+    """Suggests encounters from a library of monsters.
+
+    Parameters
+    ----------
+    monsters : iterable of MonsterOption
+        The monsters to choose from; those without a challenge rating the experience
+        table covers are left out.
+    """
+
+    DEFAULT_MAX_MONSTERS = 10
+    DEFAULT_MAX_KINDS = 3
+
+    def __init__(self, monsters: Iterable[MonsterOption]):
+        self.monsters = [
+            monster for monster in monsters
+            if monster.cr is not None and 0 <= monster.cr <= MAX_CR
+        ]
+
+    @classmethod
+    def from_world(cls, world) -> "EncounterGenerator":
+        """Choose from the monsters in a world's catalog.
+
+        A monster is found in the environments listed in its file, and in those of
+        every location it is at.
+        """
+        environments = defaultdict(set)
+        for location in world.catalog.entries("location"):
+            for name, _ in location.monsters:
+                environments[name].update(location.environments)
+        return cls(
+            MonsterOption(
+                name=entry.name,
+                cr=entry.cr,
+                creature_type=entry.creature_type,
+                environments=tuple(
+                    sorted(environments[entry.name].union(entry.environments))
+                ),
+            )
+            for entry in world.catalog.entries("monster")
+        )
+
+    def creature_types(self) -> List[str]:
+        return sorted({
+            monster.creature_type.lower() for monster in self.monsters if monster.creature_type
+        })
+
+    def environments(self) -> List[str]:
+        return sorted({
+            environment for monster in self.monsters for environment in monster.environments
+        })
+
+    def filtered(
+        self,
+        creature_type: Optional[str] = None,
+        environment: Optional[str] = None,
+        max_cr: Optional[float] = None,
+    ) -> List[MonsterOption]:
+        """Return the monsters matching every filter given.
+
+        `creature_type` matches any type containing it, e.g. "humanoid" matches
+        "humanoid (goblinoid)", and `environment` must be one of the monster's
+        environments; neither is case sensitive.
+        """
+        creature_type = creature_type.lower() if creature_type else None
+        environment = environment.lower() if environment else None
+        return [
+            monster for monster in self.monsters
+            if (
+                creature_type is None
+                or creature_type in (monster.creature_type or "").lower()
+            )
+            and (environment is None or environment in monster.environments)
+            and (max_cr is None or monster.cr <= max_cr)
+        ]
+
+    def generate(
+        self,
+        levels: Sequence[int],
+        difficulty: str = "medium",
+        limit: int = 10,
+        creature_type: Optional[str] = None,
+        environment: Optional[str] = None,
+        max_cr: Optional[float] = None,
+        max_monsters: int = DEFAULT_MAX_MONSTERS,
+        max_kinds: int = DEFAULT_MAX_KINDS,
+        seed: Optional[int] = None,
+    ) -> List[GeneratedEncounter]:
+        """Suggest up to `limit` encounters of a difficulty for a party.
+
+        The encounters are those whose adjusted experience is closest to the party's
+        threshold for the difficulty while still below the next threshold, best first.
+        Each kind of monster in an encounter has a different challenge rating.
+
+        Parameters
+        ----------
+        levels : sequence of int
+            The level of each player.
+        difficulty : str
+            "easy", "medium", "hard" or "deadly".
+        limit : int
+            The most encounters to suggest.
+        creature_type, environment, max_cr : optional
+            Only use monsters matching these; see `filtered`.
+        max_monsters : int
+            The most monsters in one encounter.
+        max_kinds : int
+            The most different kinds of monster in one encounter.
+        seed : int, optional
+            Seeds the choice between monsters with the same challenge rating, for
+            repeatable suggestions; they are shuffled differently each time if not given.
+
+        Raises
+        ------
+        FourhillsEncounterError
+            If the difficulty isn't known, or the levels are out of range.
+        """
+        if difficulty not in DIFFICULTIES[1:]:
+            raise FourhillsEncounterError(
+                f"Unknown difficulty {difficulty}; expected one of: "
+                + ", ".join(DIFFICULTIES[1:])
+            )
+        thresholds = party_thresholds(levels)
+        index = DIFFICULTIES.index(difficulty) - 1
+        low = float(thresholds[index])
+        high = float(thresholds[index + 1]) if index + 1 < len(thresholds) else float("inf")
+
+        # One group of monsters per challenge rating, most experience first
+        groups: Dict[float, List[MonsterOption]] = defaultdict(list)
+        for monster in self.filtered(creature_type, environment, max_cr):
+            groups[monster.cr].append(monster)
+        crs = sorted(groups, reverse=True)
+        if not crs or limit <= 0 or max_monsters <= 0 or max_kinds <= 0:
+            return []
+        rng = random.Random(seed)
+        for cr in crs:
+            groups[cr].sort(key=lambda monster: monster.name)
+            rng.shuffle(groups[cr])
+
+        patterns = _search(
+            cr_to_xp_many(crs).tolist(),
+            encounter_multiplier(range(max_monsters + 1), len(levels)).tolist(),
+            low, high, max_monsters, max_kinds, limit,
+        )
+        return self._fill(patterns, crs, groups, thresholds, difficulty, limit)
+
+    @staticmethod
+    def _fill(patterns, crs, groups, thresholds, difficulty, limit) -> List[GeneratedEncounter]:
+        """Pick monsters for each pattern of challenge ratings, varying them between
+        encounters, until there are `limit` encounters or no new ones can be made"""
+        thresholds = tuple(int(xp) for xp in thresholds)
+        encounters = []
+        seen = set()
+        cursors = defaultdict(int)
+        while len(encounters) < limit:
+            added = False
+            for xp, multiplier, pattern in patterns:
+                monsters = []
+                for group, quantity in pattern:
+                    members = groups[crs[group]]
+                    monsters.append((members[cursors[group] % len(members)], quantity))
+                    cursors[group] += 1
+                key = tuple((monster.name, quantity) for monster, quantity in monsters)
+                if key in seen:
+                    continue
+                seen.add(key)
+                added = True
+                encounters.append(GeneratedEncounter(
+                    monsters=monsters,
+                    assessment=EncounterDifficulty(
+                        xp=xp,
+                        adjusted_xp=xp * multiplier,
+                        multiplier=multiplier,
+                        thresholds=thresholds,
+                        difficulty=difficulty,
+                    ),
+                ))
+                if len(encounters) == limit:
+                    break
+            if not added:
+                break
+        return encounters
+
+
+def _search(
+    xps: List[float],
+    multipliers: List[float],
+    low: float,
+    high: float,
+    max_monsters: int,
+    max_kinds: int,
+    limit: int,
+) -> List[Tuple[float, float, Tuple[Tuple[int, int], ...]]]:
+    """Find the `limit` patterns of challenge ratings closest to the budget.
+
+    A pattern is a tuple of (index into `xps`, quantity) pairs, with increasing indexes.
+    Its adjusted experience is its total experience times `multipliers[monsters]`, and
+    must be at least `low` and less than `high`, and every monster must be needed: a
+    pattern which still reaches `low` without one of its monsters is left out, so the
+    suggestions aren't padded with extras. Patterns closer to `low` are better, then
+    those with fewer kinds, then fewer monsters.
+
+    Adding monsters never lowers the adjusted experience, which gives the bounds: a
+    branch is abandoned once it reaches `high`, or can't be better than the worst
+    pattern kept, or can't reach `low` even with the most experience left to add.
+
+    Returns (experience, multiplier, pattern) for each, best first.
+    """
+    # A max-heap, by negating the keys, of the best patterns so far
+    best: List[Tuple[float, int, int, int, Tuple]] = []
+    # The adjusted experience, kinds and monsters of the worst pattern kept, once there
+    # are enough
+    worst = (float("inf"), 0, 0)
+    counter = 0
+    max_multiplier = multipliers[max_monsters]
+
+    def visit(start: int, kinds_left: int, count: int, xp: float, pattern: Tuple):
+        nonlocal counter, worst
+        # Anything found from here has at least one more kind and monster, and is at
+        # best exactly on budget
+        if (low, len(pattern) + 1, count + 1) > worst:
+            return
+        for group in range(start, len(xps)):
+            unit = xps[group]
+            # Later groups give less experience, so if this can't reach low, none can
+            if (xp + (max_monsters - count) * unit) * max_multiplier < low:
+                return
+            first = 1
+            if kinds_left == 1:
+                # Nothing more can be added, so skip the quantities which can't reach low
+                first = max(1, math.ceil((low / max_multiplier - xp) / unit))
+            for quantity in range(first, max_monsters - count + 1):
+                total = count + quantity
+                new_xp = xp + quantity * unit
+                adjusted = new_xp * multipliers[total]
+                if adjusted >= high or adjusted > worst[0]:
+                    break
+                new_pattern = pattern + ((group, quantity),)
+                if adjusted >= low:
+                    key = (-adjusted, -len(new_pattern), -total, counter, new_pattern)
+                    counter += 1
+                    if len(best) < limit:
+                        heapq.heappush(best, key)
+                    elif key > best[0]:
+                        heapq.heapreplace(best, key)
+                    if len(best) == limit:
+                        worst = (-best[0][0], -best[0][1], -best[0][2])
+                    # Any more monsters wouldn't be needed
+                    break
+                if kinds_left > 1 and total < max_monsters:
+                    visit(group + 1, kinds_left - 1, total, new_xp, new_pattern)
+
+    visit(0, max_kinds, 0, 0.0, ())
+    return [
+        (
+            sum(xps[group] * quantity for group, quantity in pattern),
+            multipliers[-negative_total],
+            pattern,
+        )
+        for _, _, negative_total, _, pattern in sorted(best, reverse=True)
+    ]
@@ -0,0 +1,362 @@
+"""How difficult an encounter is for a party, from the monsters' experience and the party's levels.
+
+Follows the Dungeon Master's Guide: the experience of every monster in an encounter is
+added up and multiplied according to how many monsters there are and how big the party
+is, then compared with the party's easy, medium, hard and deadly thresholds, which are
+the sum of each character's thresholds for their level.
+
+Everything is worked out with arrays, so every location in a world can be assessed for
+every party at once.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fourhills.exceptions import FourhillsEncounterError
+from fourhills.utils.cr_to_xp import cr_to_xp_many
+
+DIFFICULTIES = ("trivial", "easy", "medium", "hard", "deadly")
+MAX_LEVEL = 20
+
+# Easy, medium, hard and deadly experience thresholds for one character of each level
+XP_THRESHOLDS = np.array([
+    [25, 50, 75, 100],
+    [50, 100, 150, 200],
+    [75, 150, 225, 400],
+    [125, 250, 375, 500],
+    [250, 500, 750, 1100],
+    [300, 600, 900, 1400],
+    [350, 750, 1100, 1700],
+    [450, 900, 1400, 2100],
+    [550, 1100, 1600, 2400],
+    [600, 1200, 1900, 2800],
+    [800, 1600, 2400, 3600],
+    [1000, 2000, 3000, 4500],
+    [1100, 2200, 3400, 5100],
+    [1250, 2500, 3800, 5700],
+    [1400, 2800, 4300, 6400],
+    [1600, 3200, 4800, 7200],
+    [2000, 3900, 5900, 8800],
+    [2100, 4200, 6300, 9500],
+    [2400, 4900, 7300, 10900],
+    [2800, 5700, 8500, 12700],
+])
+
+# Encounter multipliers, in order; a party of fewer than three characters uses the next
+# one up, and a party of six or more the next one down
+MULTIPLIERS = np.array([0.5, 1, 1.5, 2, 2.5, 3, 4, 5])
+# The fewest monsters for each multiplier from 1 upwards
+_MULTIPLIER_COUNTS = np.array([1, 2, 3, 7, 11, 15])
+SMALL_PARTY = 3
+LARGE_PARTY = 6
+
+
+def read_monsters(monsters: Any) -> Tuple[Tuple[str, int], ...]:
+    """Return the monsters listed in a location file as (name, quantity) pairs.
+
+    Monsters may be listed by name alone, meaning one of them, or as mappings with
+    `name` and `quantity`. Anything else is skipped.
+    """
+    if not isinstance(monsters, list):
+        return ()
+    pairs = []
+    for monster in monsters:
+        if isinstance(monster, dict):
+            name = monster.get("name")
+            quantity = monster.get("quantity", 1)
+        else:
+            name, quantity = monster, 1
+        if name is None or isinstance(name, (dict, list)):
+            continue
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            continue
+        if quantity > 0:
+            pairs.append((str(name), quantity))
+    return tuple(pairs)
+
+
+def party_levels(
+    players: Any, level: Any = None, levels: Any = None
+) -> Optional[Tuple[int, ...]]:
+    """Return the level of each player in a party, or None if any isn't known.
+
+    Parameters
+    ----------
+    players : list of str
+        The players' names.
+    level : int, optional
+        The level of every player not given in `levels`.
+    levels : dict, optional
+        The levels of particular players, by name.
+    """
+    if not isinstance(players, list) or not players:
+        return None
+    if not isinstance(levels, dict):
+        levels = {}
+    result = []
+    for player in players:
+        player_level = levels.get(player, level)
+        try:
+            player_level = int(player_level)
+        except (TypeError, ValueError):
+            return None
+        if not 1 <= player_level <= MAX_LEVEL:
+            return None
+        result.append(player_level)
+    return tuple(result)
+
+
+def party_thresholds(levels: Sequence[int]) -> np.ndarray:
+    """Return a party's easy, medium, hard and deadly experience thresholds.
+
+    Raises
+    ------
+    FourhillsEncounterError
+        If the party is empty, or a level isn't between 1 and `MAX_LEVEL`.
+    """
+    levels = np.asarray(levels, dtype=int)
+    if levels.size == 0:
+        raise FourhillsEncounterError("A party needs at least one player.")
+    if levels.min() < 1 or levels.max() > MAX_LEVEL:
+        raise FourhillsEncounterError(
+            f"Player levels must be between 1 and {MAX_LEVEL}: {levels.tolist()}"
+        )
+    return XP_THRESHOLDS[levels - 1].sum(axis=0)
+
+
+def encounter_multiplier(monster_counts, party_sizes):
+    """Return the encounter multipliers for numbers of monsters and sizes of party.
+
+    Both arguments may be arrays, which are broadcast together.
+    """
+    index = np.searchsorted(_MULTIPLIER_COUNTS, monster_counts, side="right")
+    party_sizes = np.asarray(party_sizes)
+    index = index + (party_sizes < SMALL_PARTY) - (party_sizes >= LARGE_PARTY)
+    return MULTIPLIERS[np.clip(index, 0, len(MULTIPLIERS) - 1)]
+
+
+@dataclass
+class Encounter:
+    """The monsters fought together, as challenge ratings and how many of each.
+
+    `unknown` lists the monsters which have no challenge rating, or don't exist, and
+    so don't count towards the encounter's experience.
+    """
+
+    crs: List[float] = field(default_factory=list)
+    quantities: List[int] = field(default_factory=list)
+    unknown: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_monsters(cls, monsters, catalog) -> "Encounter":
+        """Look up the challenge ratings of monsters in a world's catalog.
+
+        Parameters
+        ----------
+        monsters : iterable of (str, int)
+            The monsters' names and how many of each, e.g. from `read_monsters`.
+        catalog : CatalogIndex
+            The catalog of the world the monsters are in.
+        """
+        encounter = cls()
+        for name, quantity in monsters:
+            entry = catalog.entry("monster", name)
+            if entry is None or entry.cr is None:
+                encounter.unknown.append(name)
+            else:
+                encounter.crs.append(entry.cr)
+                encounter.quantities.append(quantity)
+        return encounter
+
+    @property
+    def monster_count(self) -> int:
+        return sum(self.quantities)
+
+    @property
+    def xp(self) -> float:
+        """The total experience for the monsters, before any multiplier"""
+        return float(np.dot(cr_to_xp_many(self.crs), self.quantities)) if self.crs else 0.0
+
+
+@dataclass
+class EncounterDifficulty:
+    """How difficult one encounter is for one party"""
+
+    xp: float
+    adjusted_xp: float
+    multiplier: float
+    # The party's easy, medium, hard and deadly thresholds
+    thresholds: Tuple[int, int, int, int]
+    difficulty: str
+
+    @property
+    def label(self) -> str:
+        return self.difficulty.capitalize()
+
+
+@dataclass
+class EncounterTable:
+    """The difficulty of every encounter for every party.
+
+    The arrays with one row per party and one column per encounter are in the order of
+    `parties` and `encounters`, which label them.
+    """
+
+    parties: List[Any]
+    encounters: List[Any]
+    # One per encounter
+    xp: np.ndarray
+    monster_counts: np.ndarray
+    unknown: List[List[str]]
+    # One row per party
+    thresholds: np.ndarray
+    # One row per party and one column per encounter
+    multipliers: np.ndarray
+    adjusted_xp: np.ndarray
+    difficulty: np.ndarray
+
+    def assessment(self, party: int, encounter: int) -> EncounterDifficulty:
+        """Return the difficulty of one encounter, by index, for one party, by index"""
+        return EncounterDifficulty(
+            xp=float(self.xp[encounter]),
+            adjusted_xp=float(self.adjusted_xp[party, encounter]),
+            multiplier=float(self.multipliers[party, encounter]),
+            thresholds=tuple(int(xp) for xp in self.thresholds[party]),
+            difficulty=DIFFICULTIES[self.difficulty[party, encounter]],
+        )
+
+    def counts(self) -> Dict[str, np.ndarray]:
+        """Return how many encounters each party finds each difficulty, by difficulty"""
+        return {
+            name: (self.difficulty == index).sum(axis=1)
+            for index, name in enumerate(DIFFICULTIES)
+        }
+
+
+def assess_encounters(
+    encounters: Sequence[Encounter],
+    parties: Sequence[Sequence[int]],
+    encounter_labels: Optional[Sequence] = None,
+    party_labels: Optional[Sequence] = None,
+) -> EncounterTable:
+    """Work out how difficult every encounter is for every party, all at once.
+
+    Parameters
+    ----------
+    encounters : sequence of Encounter
+        The encounters.
+    parties : sequence of sequences of int
+        The level of each player in each party.
+    encounter_labels, party_labels : sequence, optional
+        What to call the encounters and parties in the table; their indexes if not given.
+
+    Raises
+    ------
+    FourhillsEncounterError
+        If a party has no players, or a level is out of range.
+    """
+    n_encounters = len(encounters)
+    ids = np.repeat(np.arange(n_encounters), [len(e.crs) for e in encounters])
+    crs = np.fromiter((cr for e in encounters for cr in e.crs), dtype=float, count=len(ids))
+    quantities = np.fromiter(
+        (q for e in encounters for q in e.quantities), dtype=float, count=len(ids)
+    )
+    xp = np.bincount(ids, weights=cr_to_xp_many(crs) * quantities, minlength=n_encounters)
+    monster_counts = np.bincount(ids, weights=quantities, minlength=n_encounters).astype(int)
+
+    thresholds = np.array(
+        [party_thresholds(levels) for levels in parties], dtype=int
+    ).reshape(len(parties), len(DIFFICULTIES) - 1)
+    party_sizes = np.array([len(levels) for levels in parties], dtype=int)
+    multipliers = encounter_multiplier(monster_counts[np.newaxis, :], party_sizes[:, np.newaxis])
+    adjusted_xp = xp[np.newaxis, :] * multipliers
+    # How many thresholds each encounter reaches: 0 is trivial, 4 is deadly
+    difficulty = (adjusted_xp[:, :, np.newaxis] >= thresholds[:, np.newaxis, :]).sum(axis=2)
+
+    return EncounterTable(
+        parties=list(party_labels) if party_labels is not None else list(range(len(parties))),
+        encounters=(
+            list(encounter_labels) if encounter_labels is not None
+            else list(range(n_encounters))
+        ),
+        xp=xp,
+        monster_counts=monster_counts,
+        unknown=[list(encounter.unknown) for encounter in encounters],
+        thresholds=thresholds,
+        multipliers=multipliers,
+        adjusted_xp=adjusted_xp,
+        difficulty=difficulty,
+    )
+
+
+def assess_encounter(encounter: Encounter, levels: Sequence[int]) -> EncounterDifficulty:
+    """Work out how difficult one encounter is for a party with the given levels"""
+    return assess_encounters([encounter], [levels]).assessment(0, 0)
+
+
+def world_parties(world) -> Dict[str, Tuple[int, ...]]:
+    """Return the levels of the players in each party in a world whose levels are known"""
+    return {
+        entry.name: entry.levels
+        for entry in world.catalog.entries("party")
+        if entry.levels
+    }
+
+
+def world_encounter_table(world, parties: Optional[Dict[str, Sequence[int]]] = None):
+    """Assess the monsters at every location in a world for every party.
+
+    Everything comes from the world's catalog, so no files are read, and the table can
+    be worked out again whenever a location or party changes.
+
+    Parameters
+    ----------
+    world : World
+        The world.
+    parties : dict, optional
+        The levels of the players in each party, by name; the world's parties if not
+        given.
+
+    Returns
+    -------
+    EncounterTable
+        The table, labelled with the parties' names and the locations' paths; only
+        locations with monsters are included.
+    """
+    if parties is None:
+        parties = world_parties(world)
+    locations = []
+    encounters = []
+    for entry in world.catalog.entries("location"):
+        if entry.monsters:
+            locations.append(entry.name)
+            encounters.append(Encounter.from_monsters(entry.monsters, world.catalog))
+    return assess_encounters(
+        encounters, list(parties.values()), encounter_labels=locations,
+        party_labels=list(parties),
+    )
+
+
+def parse_levels(text: str) -> Tuple[int, ...]:
+    """Parse player levels written as e.g. "3,3,4,5", or "4x3" for four level 3 players.
+
+    Raises
+    ------
+    FourhillsEncounterError
+        If the levels can't be parsed, or are out of range.
+    """
+    levels = []
+    for part in text.replace(" ", "").split(","):
+        count, _, level = part.rpartition("x")
+        try:
+            levels.extend([int(level)] * (int(count) if count else 1))
+        except ValueError:
+            raise FourhillsEncounterError(
+                f"Invalid player levels {text}; expected e.g. 3,3,4,5 or 4x3"
+            ) from None
+    party_thresholds(levels)
+    return tuple(levels)
@@ -15,5 +15,41 @@ class FourhillsMonsterImportError(FourhillsError):
     pass
 
 
+class FourhillsMonsterFetchError(FourhillsMonsterImportError):
+    """A monster's page could not be downloaded.
+
+    `status` is the HTTP status code, or None if the server couldn't be reached, and
+    `retry_after` is how many seconds the server asked us to wait, if it said.
+    """
+
+    # Statuses which may succeed if the request is tried again later
+    TRANSIENT_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status in self.TRANSIENT_STATUSES
+
+
 class FourhillsExperienceLookupError(FourhillsError):
     pass
+
+
+class FourhillsSearchQueryError(FourhillsError):
+    pass
+
+
+class FourhillsEncounterError(FourhillsError):
+    pass
+
+
+class FourhillsDiceError(FourhillsError):
+    pass
+
+
+class FourhillsCombatError(FourhillsError):
+    pass
@@ -1,12 +1,15 @@
+from functools import partial
 import sys
 import re
-import yaml
 import click
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 from fourhills import Setting
+from fourhills.cli import COMMANDS
 from fourhills.dataclasses import StatBlock, Npc
 from fourhills.exceptions import FourhillsFileLoadError
+from fourhills.utils.parallel import map_unique
 from fourhills.utils.text_utils import format_list, display_panes
+from fourhills.utils.yaml_loader import load_yaml
 
 SCENE_FILENAME = "battle.yaml"
 AUTHOR = 'smuj'
@@ -33,85 +36,86 @@ class Scene:
         filename : str
             Filename of the YAML file to load scene info from.
         """
-        with open(filename) as f:
-            try:
-                scene_info = yaml.safe_load(f)
-            except yaml.YAMLError as exc:
-                raise FourhillsFileLoadError(f"Error loading from {filename}.") from exc
-
-            # Stores the list of monster names and numbers
-            monster_info = []
-
-            # If there was a monsters section, load the monsters
-            if "monsters" in scene_info:
-                for monster_name_number in scene_info["monsters"]:
-                    # See if it matches the expected format, extracting name and number
-                    match = re.match(r"^(\w*)(?: ?x?(\d+))?$", monster_name_number)
-                    if not match:
-                        raise FourhillsFileLoadError(
-                            "Error parsing monster in scene file"
-                        )
-                    # Get the name of the monster and how many there are. If there
-                    # wasn't a number, assume 1 monster.
-                    name = match[1]
-                    number = match[2] or "1"
-                    # Convert to int
-                    try:
-                        number = int(number)
-                    except ValueError as exc:
-                        raise FourhillsFileLoadError(
-                            f"Error parsing number for monster {name}"
-                        ) from exc
-                    # Add to the list
-                    monster_info.append((name, number))
-
-            # Stores the list of NPC names
-            npc_info = scene_info["npcs"] if "npcs" in scene_info else []
-
-            return cls(monster_info, npc_info)
+        scene_info = load_yaml(filename)
+
+        # Stores the list of monster names and numbers
+        monster_info = []
+
+        # If there was a monsters section, load the monsters
+        if "monsters" in scene_info:
+            for monster_name_number in scene_info["monsters"]:
+                # See if it matches the expected format, extracting name and number
+                match = re.match(r"^(\w*)(?: ?x?(\d+))?$", monster_name_number)
+                if not match:
+                    raise FourhillsFileLoadError(
+                        "Error parsing monster in scene file"
+                    )
+                # Get the name of the monster and how many there are. If there
+                # wasn't a number, assume 1 monster.
+                name = match[1]
+                number = match[2] or "1"
+                # Convert to int
+                try:
+                    number = int(number)
+                except ValueError as exc:
+                    raise FourhillsFileLoadError(
+                        f"Error parsing number for monster {name}"
+                    ) from exc
+                # Add to the list
+                monster_info.append((name, number))
+
+        # Stores the list of NPC names
+        npc_info = scene_info["npcs"] if "npcs" in scene_info else []
+
+        return cls(monster_info, npc_info)
+
+    def battle_panes(self) -> Iterator[List[str]]:
+        """Generate a pane for each monster and NPC in the battle, in order.
+
+        Each stat block is loaded once however many times it is listed, and they are
+        loaded in parallel, a few ahead of the pane being generated.
+        """
+        width = self.setting.pane_width
+        stat_blocks = map_unique(
+            partial(StatBlock.from_name, setting=self.setting),
+            (name for name, _ in self.monster_names_quantities),
+        )
+        for (_, quantity), monster in zip(self.monster_names_quantities, stat_blocks):
+            yield monster.summary_info(width, quantity) + monster.battle_info(width)
+
+        for npc in self._npcs():
+            yield npc.summary_info(width) + npc.battle_info(width)
 
     def display_battle(self):
         """Display statistsics for battle."""
-        panes = list()
-
-        for monster_name, quantity in self.monster_names_quantities:
-            monster = StatBlock.from_name(monster_name, self.setting)
-            panes.append(
-                monster.summary_info(self.setting.pane_width, quantity)
-                + monster.battle_info(self.setting.pane_width)
-            )
+        display_panes(self.battle_panes(), self.setting.panes, self.setting.column_width)
 
-        for npc_name in self.npc_names:
-            npc = Npc.from_name(npc_name, self.setting)
-            panes.append(
-                npc.summary_info(self.setting.pane_width)
-                + npc.battle_info(self.setting.pane_width)
-            )
-
-        display_panes(panes, self.setting.panes, self.setting.column_width)
+    def npc_lines(self) -> Iterator[str]:
+        """Generate the lines describing each NPC, in order."""
+        width = self.setting.pane_width
+        for npc in self._npcs():
+            yield from npc.summary_info(width)
+            yield from npc.character_info(width)
 
     def display_npcs(self):
         """Display information about NPCs."""
-        lines = list()
-
-        for npc_name in self.npc_names:
-            npc = Npc.from_name(npc_name, self.setting)
-            lines.extend(npc.summary_info(self.setting.pane_width))
-            lines.extend(npc.character_info(self.setting.pane_width))
-
-        click.echo_via_pager("\n".join(lines))
+        click.echo_via_pager(f"{line}\n" for line in self.npc_lines())
 
-    def display_scene(self):
-        """Display information about location."""
-        lines = list()
+    def scene_lines(self) -> Iterator[str]:
+        """Generate the lines listing the monsters and NPCs in the scene."""
         monster_strings = [
             f"{name} x{quantity}" if quantity != 1 else name
             for name, quantity in self.monster_names_quantities
         ]
-        lines.extend(format_list("Monsters", monster_strings, self.setting.pane_width))
-        lines.extend(format_list("NPCs", self.npc_names, self.setting.pane_width))
+        yield from format_list("Monsters", monster_strings, self.setting.pane_width)
+        yield from format_list("NPCs", self.npc_names, self.setting.pane_width)
+
+    def display_scene(self):
+        """Display information about location."""
+        click.echo_via_pager(f"{line}\n" for line in self.scene_lines())
 
-        click.echo_via_pager("\n".join(lines))
+    def _npcs(self) -> Iterator[Npc]:
+        return map_unique(partial(Npc.from_name, setting=self.setting), self.npc_names)
 
 
 def print_usage():
@@ -119,6 +123,11 @@ def print_usage():
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        command = sys.argv[1]
+        COMMANDS[command].main(args=sys.argv[2:], prog_name=f"4h {command}")
+        return
+
     try:
         scene = Scene.from_file(SCENE_FILENAME)
     except FileNotFoundError:
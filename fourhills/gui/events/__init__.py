@@ -1,5 +1,7 @@
 from .anchor_clicked_event import AnchorClickedEvent
 from .anchor_clicked_event_filter import AnchorClickedEventFilter
+from .file_saved_event import FileSavedEvent
+from .file_saved_event_filter import FileSavedEventFilter
 from .object_renamed_event import ObjectRenamedEvent
 from .object_renamed_event_filter import ObjectRenamedEventFilter
 from .object_deleted_event import ObjectDeletedEvent
@@ -9,6 +11,8 @@ from .object_deleted_event_filter import ObjectDeletedEventFilter
 __all__ = [
     "AnchorClickedEvent",
     "AnchorClickedEventFilter",
+    "FileSavedEvent",
+    "FileSavedEventFilter",
     "ObjectRenamedEvent",
     "ObjectRenamedEventFilter",
     "ObjectDeletedEvent",
@@ -0,0 +1,16 @@
+from PyQt5 import QtCore
+
+
+class FileSavedEvent(QtCore.QEvent):
+
+    EVENT_TYPE = None
+
+    @staticmethod
+    def registeredEventType():
+        if FileSavedEvent.EVENT_TYPE is None:
+            FileSavedEvent.EVENT_TYPE = QtCore.QEvent.registerEventType()
+        return FileSavedEvent.EVENT_TYPE
+
+    def __init__(self, path):
+        super().__init__(FileSavedEvent.registeredEventType())
+        self.path = path
@@ -0,0 +1,22 @@
+from PyQt5 import QtCore
+from fourhills.gui.events.file_saved_event import FileSavedEvent
+
+
+class FileSavedEventFilter(QtCore.QObject):
+
+    fileSaved = QtCore.pyqtSignal(FileSavedEvent)
+
+    def eventFilter(self, obj, event):
+        if event and type(event) is FileSavedEvent:
+            self.fileSaved.emit(event)
+            return True
+        return QtCore.QObject.eventFilter(self, obj, event)
+
+    @staticmethod
+    def get_filter():
+        if not hasattr(FileSavedEventFilter, "_filter"):
+            core_app = QtCore.QCoreApplication.instance()
+            _filter = FileSavedEventFilter(core_app)
+            core_app.installEventFilter(_filter)
+            FileSavedEventFilter._filter = _filter
+        return FileSavedEventFilter._filter
@@ -5,12 +5,16 @@ from pathlib import Path
 from PyQt5 import QtGui, QtWidgets
 from PyQt5.QtCore import Qt
 import sys
+from typing import Optional, Tuple
 
-from fourhills import Setting
+from fourhills import Setting, World
+from fourhills.dataclasses import Npc, Party, StatBlock
 from fourhills.exceptions import FourhillsSettingStructureError
 from fourhills.gui.panes import (
+    CombatTrackerPane,
     EntityPane,
     EntityListPane,
+    JobsPane,
     LocationPane,
     LocationTreePane,
     NotePane,
@@ -19,10 +23,38 @@ from fourhills.gui.panes import (
     PartyListPane,
     QuestPane,
     QuestListPane,
+    SearchPane,
 )
-from fourhills.gui.events import AnchorClickedEventFilter
-from fourhills.gui.utils import Config
-from fourhills.gui.widgets import WorkspaceTabWidget
+from fourhills.gui.events import (
+    AnchorClickedEventFilter,
+    FileSavedEventFilter,
+    ObjectDeletedEventFilter,
+    ObjectRenamedEventFilter,
+)
+from fourhills.gui.utils import Config, Job, JobRunner, WorldWatcher
+from fourhills.gui.widgets import EncounterGeneratorDialog, WorkspaceTabWidget
+from fourhills.watcher import TreeSnapshot
+
+
+def build_world(job: Job, setting: Setting) -> Optional[Tuple[World, TreeSnapshot]]:
+    """Create the world for a setting and build its indexes, as a job.
+
+    Building the indexes reads every file in the setting, so is done here rather than
+    the first time a pane lists the world, as is the first snapshot of the setting's
+    files for the world's watcher. Returns None if the job is cancelled.
+    """
+    # Taken first, so changes made while indexing are seen by the watcher
+    snapshot = TreeSnapshot(setting.root)
+    snapshot.scan()
+    world = World(setting)
+    indexes = world.indexes
+    for done, index in enumerate(indexes):
+        if job.cancelled:
+            return None
+        job.report_progress(done, len(indexes), f"Indexing {type(index).__name__}")
+        index.build()
+    job.report_progress(len(indexes), len(indexes))
+    return world, snapshot
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -30,7 +62,10 @@ class MainWindow(QtWidgets.QMainWindow):
     BASE_TITLE = "FourHills GUI"
 
     setting = None
+    world = None
     world_dir = None
+    watcher = None
+    load_job = None
 
     location_pane = None
     note_pane = None
@@ -38,6 +73,8 @@ class MainWindow(QtWidgets.QMainWindow):
     monsters_pane = None
     party_pane = None
     quests_pane = None
+    search_pane = None
+    jobs_pane = None
 
     def __init__(self):
         super().__init__()
@@ -67,6 +104,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.create_party_pane(area=Qt.RightDockWidgetArea)
         self.create_npc_pane(area=Qt.RightDockWidgetArea)
         self.create_monsters_pane(area=Qt.RightDockWidgetArea)
+        # The jobs pane shows itself when there's something to see
+        self.create_jobs_pane(area=Qt.BottomDockWidgetArea)
+        self.jobs_pane.hide()
 
         # Create actions, then menu bar using those actions
         self.create_actions()
@@ -76,6 +116,11 @@ class MainWindow(QtWidgets.QMainWindow):
         # appearing if desired
         self.create_error_boxes()
 
+        # Keep the world's indexes up to date as files are changed from within the GUI
+        FileSavedEventFilter.get_filter().fileSaved.connect(self.on_file_saved)
+        ObjectRenamedEventFilter.get_filter().objectRenamed.connect(self.on_object_renamed)
+        ObjectDeletedEventFilter.get_filter().objectDeleted.connect(self.on_object_deleted)
+
         # Final window setup
         self.setCentralWidget(self.centralwidget)
         self.setWindowState(Qt.WindowMaximized)
@@ -98,7 +143,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self._show_docked_pane(self.location_pane, area)
             if hasattr(self, "setting") and self.setting is not None:
                 self.location_pane.load(self.setting.world_dir)
-            self.location_pane.widget().itemActivated.connect(self.on_location_activated)
+            self.location_pane.widget().activated.connect(self.on_location_activated)
 
     def create_note_pane(self, checked=False, area=None):
         if self.note_pane is None or not self.note_pane.isVisible():
@@ -106,23 +151,23 @@ class MainWindow(QtWidgets.QMainWindow):
             self._show_docked_pane(self.note_pane, area)
             if hasattr(self, "setting") and self.setting is not None:
                 self.note_pane.load(self.setting.notes_dir)
-            self.note_pane.widget().itemActivated.connect(self.on_note_activated)
+            self.note_pane.widget().activated.connect(self.on_note_activated)
 
     def create_npc_pane(self, checked=False, area=None):
         if self.npc_pane is None or not self.npc_pane.isVisible():
             self.npc_pane = EntityListPane("NPCs", "NPC", self)
             self._show_docked_pane(self.npc_pane, area)
-            if hasattr(self, "setting") and self.setting is not None:
-                self.npc_pane.load(self.setting.npcs_dir)
-            self.npc_pane.entity_list.itemActivated.connect(self.on_entity_activated)
+            if self.world is not None:
+                self.npc_pane.load(self.world, self.setting.npcs_dir)
+            self.npc_pane.entity_list.activated.connect(self.on_entity_activated)
 
     def create_monsters_pane(self, checked=False, area=None):
         if self.monsters_pane is None or not self.monsters_pane.isVisible():
             self.monsters_pane = EntityListPane("Monsters", "Monster", self)
             self._show_docked_pane(self.monsters_pane, area)
-            if hasattr(self, "setting") and self.setting is not None:
-                self.monsters_pane.load(self.setting.monsters_dir)
-            self.monsters_pane.entity_list.itemActivated.connect(self.on_entity_activated)
+            if self.world is not None:
+                self.monsters_pane.load(self.world, self.setting.monsters_dir)
+            self.monsters_pane.entity_list.activated.connect(self.on_entity_activated)
 
     def create_party_pane(self, checked=False, area=None):
         if self.party_pane is None or not self.party_pane.isVisible():
@@ -136,9 +181,25 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.quests_pane is None or not self.quests_pane.isVisible():
             self.quests_pane = QuestListPane("Quests", self)
             self._show_docked_pane(self.quests_pane, area)
-            if hasattr(self, "setting") and self.setting is not None:
-                self.quests_pane.load(self.setting.quest_dir)
-            self.quests_pane.quest_list.itemActivated.connect(self.on_quest_activated)
+            if self.world is not None:
+                self.quests_pane.load(self.world, self.setting.quest_dir)
+            self.quests_pane.quest_list.activated.connect(self.on_quest_activated)
+
+    def create_search_pane(self, checked=False, area=None):
+        if self.search_pane is None or not self.search_pane.isVisible():
+            self.search_pane = SearchPane("Search", self)
+            self._show_docked_pane(self.search_pane, area)
+            if self.world is not None:
+                self.search_pane.load(self.world)
+        self.search_pane.query_edit.setFocus()
+
+    def create_jobs_pane(self, checked=False, area=None):
+        # Kept when hidden, so the errors from earlier jobs aren't lost
+        if self.jobs_pane is None:
+            self.jobs_pane = JobsPane("Jobs", self)
+            self._show_docked_pane(self.jobs_pane, area)
+        self.jobs_pane.show()
+        self.jobs_pane.raise_()
 
     def create_actions(self):
         # File menu actions
@@ -154,7 +215,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.exit_program_action = QtWidgets.QAction("Exit Fourhills", self)
         self.exit_program_action.setStatusTip("Exit Fourhills program")
-        self.exit_program_action.triggered.connect(lambda x: QtWidgets.QApplication.quit())
+        self.exit_program_action.triggered.connect(lambda x: self.close())
 
         # View menu actions
         self.view_location_action = QtWidgets.QAction("&Locations", self)
@@ -181,6 +242,27 @@ class MainWindow(QtWidgets.QMainWindow):
         self.view_quests_action.setStatusTip("View list of quests")
         self.view_quests_action.triggered.connect(self.create_quests_pane)
 
+        self.view_search_action = QtWidgets.QAction("&Search", self)
+        self.view_search_action.setStatusTip("Search the text of everything in the world")
+        self.view_search_action.setShortcut("Ctrl+F")
+        self.view_search_action.triggered.connect(self.create_search_pane)
+
+        self.view_jobs_action = QtWidgets.QAction("&Jobs", self)
+        self.view_jobs_action.setStatusTip("View jobs running in the background, and their errors")
+        self.view_jobs_action.triggered.connect(self.create_jobs_pane)
+
+        # Tools menu actions
+        self.generate_encounter_action = QtWidgets.QAction("Generate &Encounter...", self)
+        self.generate_encounter_action.setStatusTip(
+            "Suggest encounters of a difficulty for a party from the world's monsters"
+        )
+        self.generate_encounter_action.triggered.connect(self.generate_encounter)
+        self.combat_tracker_action = QtWidgets.QAction("Combat &Tracker", self)
+        self.combat_tracker_action.setStatusTip(
+            "Track initiative, hit points and conditions in a fight at a location"
+        )
+        self.combat_tracker_action.triggered.connect(self.open_combat_tracker)
+
     def create_menu_bar(self):
         self.file_menu = self.menuBar().addMenu("&File")
         self.file_menu.addAction(self.create_world_action)
@@ -197,6 +279,33 @@ class MainWindow(QtWidgets.QMainWindow):
         self.view_menu.addAction(self.view_notes_action)
         self.view_menu.addAction(self.view_parties_action)
         self.view_menu.addAction(self.view_quests_action)
+        self.view_menu.addAction(self.view_search_action)
+        self.view_menu.addAction(self.view_jobs_action)
+
+        self.tools_menu = self.menuBar().addMenu("&Tools")
+        self.tools_menu.addAction(self.generate_encounter_action)
+        self.tools_menu.addAction(self.combat_tracker_action)
+
+    def generate_encounter(self, checked=False):
+        if self.world is None:
+            return
+        dialog = EncounterGeneratorDialog(self.world, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+
+    def open_combat_tracker(self, checked=False):
+        if self.world is None:
+            return
+        tracker_widget = CombatTrackerPane(self.world, self)
+
+        sub_window = QtWidgets.QMdiSubWindow(self.centralwidget)
+        sub_window.setWidget(tracker_widget)
+        sub_window.setAttribute(Qt.WA_DeleteOnClose)
+        sub_window.setWindowTitle(tracker_widget.title)
+
+        self.centralwidget.current_mdi_area().addSubWindow(sub_window)
+        sub_window.show()
+        sub_window.resize(600, 500)
 
     def update_recent_worlds_menu(self):
         self.recent_worlds_menu.clear()
@@ -219,7 +328,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def open_entity(self, entity_type, entity_file):
         # Present error message if entity is not real
         try:
-            entity_widget = EntityPane(entity_type, entity_file, self.setting, self)
+            entity_widget = EntityPane(entity_type, entity_file, self.world, self)
         except FourhillsSettingStructureError as fsse:
             QtWidgets.QErrorMessage(self).showMessage("\n".join(fsse.args))
             return
@@ -234,23 +343,14 @@ class MainWindow(QtWidgets.QMainWindow):
         sub_window.show()
         sub_window.resize(400, 400)
 
-    def on_location_activated(self, event, column):
-        # Figure out relative path to the opened location
-        path = Path(".")
-        item = event
-        directories = [item.text(0)]
-        while item.parent() is not None:
-            directories += [item.parent().text(0)]
-            item = item.parent()
-        directories.reverse()
-        for directory in directories:
-            path = path / directory
-        self.open_location(path)
+    def on_location_activated(self, index):
+        # The model gives the relative path to the opened location
+        self.open_location(index.data(Qt.UserRole))
 
     def open_location(self, path):
         # Present error message if location is not real
         try:
-            location_widget = LocationPane(path, self.setting, self)
+            location_widget = LocationPane(path, self.world, self)
         except FourhillsSettingStructureError as fsse:
             QtWidgets.QErrorMessage(self).showMessage("\n".join(fsse.args))
             return
@@ -265,18 +365,9 @@ class MainWindow(QtWidgets.QMainWindow):
         sub_window.show()
         sub_window.resize(400, 400)
 
-    def on_note_activated(self, event, column):
-        # Figure out relative path to the opened note
-        path = Path(".")
-        item = event
-        directories = [item.text(0)]
-        while item.parent() is not None:
-            directories += [item.parent().text(0)]
-            item = item.parent()
-        directories.reverse()
-        for directory in directories:
-            path = path / directory
-        self.open_note(path)
+    def on_note_activated(self, index):
+        # The model gives the relative path to the opened note
+        self.open_note(index.data(Qt.UserRole))
 
     def open_note(self, path):
         # Check if path is a directory
@@ -340,7 +431,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def open_quest(self, quest):
         # Present error message if quest is not real
         try:
-            quest_widget = QuestPane(quest, self.setting, self)
+            quest_widget = QuestPane(quest, self.world, self)
         except FourhillsSettingStructureError as fsse:
             QtWidgets.QErrorMessage(self).showMessage("\n".join(fsse.args))
             return
@@ -377,6 +468,58 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             return
 
+    def object_path(self, object_type, name) -> Path:
+        """Return the file or directory holding an object named as in the GUI's events."""
+        if object_type == "NPC":
+            return Npc.absolute_path(str(name), self.setting)
+        elif object_type == "Monster":
+            return StatBlock.absolute_path(str(name), self.setting)
+        elif object_type == "Party":
+            return Party.absolute_path(str(name), self.setting)
+        elif object_type == "Location":
+            return self.setting.world_dir / name
+        elif object_type == "Quest":
+            return self.setting.quest_dir / name
+        elif object_type == "Note":
+            return self.setting.notes_dir / name
+        raise ValueError(f"Unknown object type {object_type}")
+
+    def world_changed(self, *paths):
+        """Update the world's caches and indexes, and the panes using them, after edits"""
+        if self.world is None:
+            return
+        self.world.invalidate_paths(paths)
+        if self.search_pane is not None:
+            self.search_pane.refresh()
+
+    def on_files_changed(self, changes):
+        """Patch the panes with changes to the world's files, from inside or outside the GUI"""
+        self.world_changed(*changes.paths())
+        for pane, path in (
+            (self.location_pane, self.setting.world_dir),
+            (self.note_pane, self.setting.notes_dir),
+            (self.npc_pane, self.setting.npcs_dir),
+            (self.monsters_pane, self.setting.monsters_dir),
+            (self.quests_pane, self.setting.quest_dir),
+            (self.party_pane, self.setting.parties_dir),
+        ):
+            if pane is not None:
+                pane_changes = changes.under(path)
+                if pane_changes:
+                    pane.apply_changes(pane_changes)
+
+    def on_file_saved(self, event):
+        self.world_changed(Path(event.path))
+
+    def on_object_renamed(self, event):
+        self.world_changed(
+            self.object_path(event.object_type, event.old_object),
+            self.object_path(event.object_type, event.new_object),
+        )
+
+    def on_object_deleted(self, event):
+        self.world_changed(self.object_path(event.object_type, event.object_name))
+
     def create_world(self, event):
         """User has requested a new world, so touch all the files and copy templates"""
         # Get path of new world from user
@@ -439,27 +582,67 @@ class MainWindow(QtWidgets.QMainWindow):
         Config.set_last_opened(world_path)
 
     def load(self, path) -> bool:
+        """Start loading the world in the background, if the path is to a valid setting"""
         world_dir = Path(path).parent
         setting = Setting(base_path=world_dir)
         if setting.root is None:
             return False
-        self.setting = setting
-        self.world_dir = world_dir
+        if self.load_job is not None:
+            self.load_job.cancel()
+        job = Job(f"Load {world_dir.name}", build_world, setting)
+        job.signals.finished.connect(lambda loaded: self.on_world_loaded(job, loaded, path))
+        job.signals.failed.connect(lambda message: self.on_world_load_failed(job, message, path))
+        self.load_job = job
+        JobRunner.get_runner().start(job)
+        self.setWindowTitle(self.BASE_TITLE + f" (loading {path})")
+        return True
+
+    def on_world_loaded(self, job: Job, loaded: Optional[Tuple[World, TreeSnapshot]], path):
+        # Ignore a load which was cancelled, or replaced by opening another world
+        if job is not self.load_job:
+            return
+        self.load_job = None
+        if loaded is None:
+            self.setWindowTitle(self.BASE_TITLE)
+            return
+        world, snapshot = loaded
+        self.setting = world.setting
+        self.world = world
+        self.world_dir = Path(path).parent
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.watcher = WorldWatcher(self.setting.root, snapshot=snapshot, parent=self)
+        self.watcher.changed.connect(self.on_files_changed)
         self.setWindowTitle(self.BASE_TITLE + f" ({path})")
         if self.location_pane is not None:
             self.location_pane.load(self.setting.world_dir)
         if self.note_pane is not None:
             self.note_pane.load(self.setting.notes_dir)
         if self.npc_pane is not None:
-            self.npc_pane.load(self.setting.npcs_dir)
+            self.npc_pane.load(self.world, self.setting.npcs_dir)
         if self.monsters_pane is not None:
-            self.monsters_pane.load(self.setting.monsters_dir)
+            self.monsters_pane.load(self.world, self.setting.monsters_dir)
         if self.quests_pane is not None:
-            self.quests_pane.load(self.setting.quest_dir)
+            self.quests_pane.load(self.world, self.setting.quest_dir)
         if self.party_pane is not None:
             self.party_pane.load(self.setting.parties_dir)
+        if self.search_pane is not None:
+            self.search_pane.load(self.world)
+        self.update_recent_worlds_menu()
 
-        return True
+    def on_world_load_failed(self, job: Job, message: str, path):
+        if job is not self.load_job:
+            return
+        self.load_job = None
+        self.setWindowTitle(self.BASE_TITLE)
+        self.world_open_error.showMessage(f"Could not load the world {path}: {message}")
+
+    def closeEvent(self, event):
+        # Don't leave jobs writing to the world after the window has gone
+        runner = JobRunner.get_runner()
+        runner.cancel_all()
+        runner.wait()
+        super().closeEvent(event)
 
 
 def main():
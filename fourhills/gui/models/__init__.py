@@ -0,0 +1,10 @@
+from .combat_tracker_model import CombatTrackerModel
+from .directory_tree_model import DirectoryTreeModel
+from .entity_list_model import EntityFilterProxyModel, EntityListModel
+
+__all__ = [
+    "CombatTrackerModel",
+    "DirectoryTreeModel",
+    "EntityFilterProxyModel",
+    "EntityListModel",
+]
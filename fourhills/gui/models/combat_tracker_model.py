@@ -0,0 +1,79 @@
+"""Item model showing a fight being tracked, in turn order"""
+
+from typing import List, Optional
+
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtCore import Qt
+
+from fourhills.tracker import CombatTracker, TrackedCombatant
+
+# The columns shown, as (header, attribute) pairs
+COLUMNS = [("Init", "initiative"), ("Name", "name"), ("HP", "hp"), ("AC", "ac"),
+           ("Conditions", "conditions")]
+
+
+class CombatTrackerModel(QtCore.QAbstractTableModel):
+    """The combatants in a `CombatTracker`, one row each, starting with whoever's turn
+    it is.
+
+    The tracker is changed through the model's owner; call `refresh` afterwards. The
+    `Qt.UserRole` data of a row is the combatant's id.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tracker: Optional[CombatTracker] = None
+        self._order: List[TrackedCombatant] = []
+
+    def set_tracker(self, tracker: Optional[CombatTracker]):
+        self.tracker = tracker
+        self.refresh()
+
+    def refresh(self):
+        """Show the tracker as it now stands"""
+        self.beginResetModel()
+        self._order = self.tracker.order() if self.tracker is not None else []
+        self.endResetModel()
+
+    def combatant(self, row: int) -> TrackedCombatant:
+        return self._order[row]
+
+    def row_of(self, combatant_id: int) -> Optional[int]:
+        for row, combatant in enumerate(self._order):
+            if combatant.id == combatant_id:
+                return row
+        return None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        combatant = self._order[index.row()]
+        attribute = COLUMNS[index.column()][1]
+        if role == Qt.DisplayRole:
+            if attribute == "hp":
+                temp = f" (+{combatant.temp_hp})" if combatant.temp_hp else ""
+                return f"{combatant.hp}/{combatant.max_hp}{temp}"
+            if attribute == "conditions":
+                return ", ".join(sorted(combatant.conditions))
+            value = getattr(combatant, attribute)
+            return "" if value is None else str(value)
+        if role == Qt.FontRole and combatant.id == self.tracker.current:
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+        if role == Qt.ForegroundRole and combatant.down:
+            return QtGui.QBrush(Qt.gray)
+        if role == Qt.UserRole:
+            return combatant.id
+        return None
@@ -0,0 +1,335 @@
+"""Item model showing a directory tree, listing each directory only when it is expanded"""
+
+from bisect import bisect_left
+import os
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+
+from fourhills.watcher import ChangeSet
+
+
+class Child(NamedTuple):
+    """What a directory listing records about one entry"""
+
+    name: str
+    is_dir: bool
+    has_children: bool
+
+
+def _sort_key(name: str):
+    return (name.lower(), name)
+
+
+class _Node:
+    """One file or directory in the tree; `children` is None until it has been listed.
+
+    The sort keys of the children are kept alongside them, so rows can be found by
+    bisection, as views ask for the row of every index they draw.
+    """
+
+    __slots__ = ("name", "is_dir", "has_children", "parent", "children", "keys")
+
+    def __init__(self, name: str, is_dir: bool, has_children: bool, parent=None):
+        self.name = name
+        self.is_dir = is_dir
+        self.has_children = has_children
+        self.parent = parent
+        self.children: Optional[List["_Node"]] = None
+        self.keys: List = []
+
+    def parts(self) -> Sequence[str]:
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return tuple(reversed(parts))
+
+    def row(self) -> int:
+        return bisect_left(self.parent.keys, _sort_key(self.name))
+
+    def child_row(self, name: str) -> Optional[int]:
+        row = bisect_left(self.keys, _sort_key(name))
+        if row < len(self.children) and self.children[row].name == name:
+            return row
+        return None
+
+    def insert_row(self, name: str) -> int:
+        return bisect_left(self.keys, _sort_key(name))
+
+    def set_children(self, children: List["_Node"]):
+        self.children = children
+        self.keys = [_sort_key(child.name) for child in children]
+
+    def insert_child(self, row: int, child: "_Node"):
+        child.parent = self
+        self.children.insert(row, child)
+        self.keys.insert(row, _sort_key(child.name))
+
+    def remove_child(self, row: int) -> "_Node":
+        del self.keys[row]
+        return self.children.pop(row)
+
+
+class DirectoryTreeModel(QtCore.QAbstractItemModel):
+    """A tree of the files and directories below a root, sorted by name.
+
+    Each directory is listed with one `os.scandir` when it is first expanded, through
+    `canFetchMore` and `fetchMore`, so opening a deep tree only lists its top level.
+    Listings are kept until `apply_changes` says a directory changed, e.g. from the
+    world watcher; only the affected rows are then inserted, removed or moved.
+
+    Hidden entries are never shown. With `directories_only`, only directories are
+    shown, and with a `marker` only directories containing a file of that name, or
+    other directories, are shown; `DirectoryTreeModel(True, "location.yaml")` shows the
+    locations in a world.
+
+    The `Qt.UserRole` data of an index is its path relative to the root.
+    """
+
+    def __init__(self, directories_only=False, marker=None, parent=None):
+        super().__init__(parent)
+        self.directories_only = directories_only
+        self.marker = marker
+        self.root = None
+        self._root_node = _Node("", True, False)
+
+    def set_root(self, root: Path):
+        """Show the tree below a new root directory"""
+        self.beginResetModel()
+        self.root = Path(root)
+        self._root_node = _Node("", True, True)
+        self.endResetModel()
+
+    def path(self, index) -> Path:
+        """Return the absolute path of an index, or the root for the invalid index"""
+        return self.root.joinpath(*self._node(index).parts())
+
+    def is_dir(self, index) -> bool:
+        return self._node(index).is_dir
+
+    def index_for(self, parts: Sequence[str]) -> QtCore.QModelIndex:
+        """Return the index of a path relative to the root, listing directories as needed"""
+        index = QtCore.QModelIndex()
+        for part in parts:
+            node = self._node(index)
+            if node.children is None:
+                self.fetchMore(index)
+            row = node.child_row(part) if node.children is not None else None
+            if row is None:
+                return QtCore.QModelIndex()
+            index = self.index(row, 0, index)
+        return index
+
+    def list_directory(self, directory: Path) -> List[Child]:
+        """List the entries of a directory which are shown in the tree, sorted by name"""
+        children = []
+        for entry in _scan(directory):
+            is_dir = entry.is_dir()
+            if not is_dir and self.directories_only:
+                continue
+            has_children = False
+            if is_dir:
+                has_marker, has_subdirectories, has_files = self._peek(Path(entry.path))
+                if self.marker is not None and not (has_marker or has_subdirectories):
+                    continue
+                has_children = has_subdirectories or (
+                    has_files and not self.directories_only
+                )
+            children.append(Child(entry.name, is_dir, has_children))
+        return sorted(children, key=lambda child: _sort_key(child.name))
+
+    def _peek(self, directory: Path):
+        """Return whether a directory has the marker file, subdirectories and files"""
+        has_marker = has_subdirectories = has_files = False
+        for entry in _scan(directory):
+            if entry.is_dir():
+                has_subdirectories = True
+            else:
+                has_files = True
+                has_marker = has_marker or entry.name == self.marker
+        return has_marker, has_subdirectories, has_files
+
+    def refresh(self, directory: Path):
+        """List a directory again, if it has been listed, and update its rows"""
+        node = self._find_node(directory)
+        if node is None or node.children is None:
+            return
+        index = self._index_of(node)
+        listing = {child.name: child for child in self.list_directory(directory)}
+
+        # Remove rows from the bottom up, so the rows above don't move
+        for row in reversed(range(len(node.children))):
+            if node.children[row].name not in listing:
+                self.beginRemoveRows(index, row, row)
+                node.remove_child(row)
+                self.endRemoveRows()
+        for child in node.children:
+            info = listing.pop(child.name)
+            child.is_dir = info.is_dir
+            if child.has_children != info.has_children:
+                child.has_children = info.has_children
+                child_index = self.index(child.row(), 0, index)
+                self.dataChanged.emit(child_index, child_index)
+        for info in listing.values():
+            row = node.insert_row(info.name)
+            self.beginInsertRows(index, row, row)
+            node.insert_child(row, _Node(info.name, info.is_dir, info.has_children))
+            self.endInsertRows()
+        if node is not self._root_node:
+            node.has_children = bool(node.children)
+
+    def move(self, old: Path, new: Path) -> bool:
+        """Move a row for a renamed file or directory, keeping its children.
+
+        Returns False if there is no row for the old path, or already one for the new
+        path, or the new parent directory hasn't been listed.
+        """
+        node = self._find_node(old)
+        new_parent = self._find_node(new.parent)
+        if (
+            node is None or node is self._root_node or new_parent is None
+            or new_parent.children is None or new_parent.child_row(new.name) is not None
+        ):
+            return False
+        old_parent = node.parent
+        old_row = node.row()
+        # The row it ends up at, and the row to move it before, as Qt counts rows
+        new_row = new_parent.insert_row(new.name)
+        destination = new_row
+        if new_parent is old_parent and new_row > old_row:
+            # Counted without the row being moved
+            new_row -= 1
+
+        moving = not (new_parent is old_parent and destination in (old_row, old_row + 1))
+        if moving:
+            self.beginMoveRows(
+                self._index_of(old_parent), old_row, old_row,
+                self._index_of(new_parent), destination,
+            )
+        old_parent.remove_child(old_row)
+        node.name = new.name
+        new_parent.insert_child(new_row, node)
+        if moving:
+            self.endMoveRows()
+        else:
+            index = self._index_of(node)
+            self.dataChanged.emit(index, index)
+        return True
+
+    def apply_changes(self, changes: ChangeSet):
+        """Update the rows for changed files and directories.
+
+        Only directories which have been listed are listed again. A change can alter
+        whether the directory holding it is shown, so its parent is refreshed too.
+        """
+        if self.root is None:
+            return
+        directories = set()
+        unmoved = []
+        for old, new in changes.ordered_renames():
+            if not self.move(old, new):
+                unmoved.append((old, new))
+            directories.update((old.parent.parent, new.parent.parent))
+        # A move into a renamed directory can only be made once the directory has moved
+        for old, new in unmoved:
+            if not self.move(old, new):
+                directories.update((old.parent, new.parent))
+        for path in changes.added | changes.removed:
+            directories.update((path.parent, path.parent.parent))
+        # Refresh from the top down, so each directory is looked up after its parent
+        for directory in sorted(directories, key=lambda path: len(path.parts)):
+            if directory == self.root or self.root in directory.parents:
+                self.refresh(directory)
+
+    def _find_node(self, path: Path) -> Optional[_Node]:
+        """Return the node for an absolute path, without listing any directories"""
+        try:
+            parts = Path(path).relative_to(self.root).parts
+        except ValueError:
+            return None
+        node = self._root_node
+        for part in parts:
+            if node.children is None:
+                return None
+            row = node.child_row(part)
+            if row is None:
+                return None
+            node = node.children[row]
+        return node
+
+    def _node(self, index) -> _Node:
+        if not index.isValid():
+            return self._root_node
+        return index.internalPointer()
+
+    def _index_of(self, node: _Node) -> QtCore.QModelIndex:
+        if node is self._root_node:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row(), 0, node)
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or node.children is None or not 0 <= row < len(node.children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self._index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        return len(node.children) if node.children is not None else 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        if node.children is not None:
+            return bool(node.children)
+        return node.is_dir and node.has_children
+
+    def canFetchMore(self, parent):
+        if self.root is None:
+            return False
+        node = self._node(parent)
+        return node.is_dir and node.children is None
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        node = self._node(parent)
+        listing = self.list_directory(self.root.joinpath(*node.parts()))
+        if not listing:
+            node.set_children([])
+            return
+        self.beginInsertRows(parent, 0, len(listing) - 1)
+        node.set_children([
+            _Node(child.name, child.is_dir, child.has_children, node) for child in listing
+        ])
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.name
+        if role == Qt.UserRole:
+            return Path(*node.parts())
+        return None
+
+
+def _scan(directory: Path) -> List[os.DirEntry]:
+    """Return the entries of a directory which aren't hidden, or none if it can't be read"""
+    try:
+        with os.scandir(directory) as it:
+            return [entry for entry in it if not entry.name.startswith(".")]
+    except OSError:
+        return []
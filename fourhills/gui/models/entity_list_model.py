@@ -0,0 +1,274 @@
+"""Item models listing the objects in a world from its catalog"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+
+from fourhills.catalog import CatalogEntry
+
+# The columns shown for each kind of object, as (header, attribute) pairs
+COLUMNS = {
+    "monster": [("Name", "name"), ("CR", "challenge"), ("Type", "creature_type"),
+                ("Size", "size")],
+    "npc": [("Name", "name"), ("CR", "challenge"), ("Type", "creature_type")],
+    "quest": [("Name", "name"), ("Title", "title")],
+}
+DEFAULT_COLUMNS = [("Name", "name")]
+
+
+class EntityListModel(QtCore.QAbstractTableModel):
+    """A list of the objects of one kind, one row per object.
+
+    Rows are handed to the view in batches with `fetchMore`, so that only as many rows
+    as are needed to fill the view are ever laid out. Every value comes from the
+    world's catalog, so no files are read to show or sort the list.
+
+    The model sorts itself, by name to begin with, keeping the rows sorted as objects
+    are added, removed and changed; sorting in Python with precomputed keys is far
+    quicker than sorting with `QSortFilterProxyModel`, which calls `data` for every
+    comparison.
+
+    The `Qt.UserRole` data of a row is the object's name, or `(entity_type, name)` if
+    the model was given an entity type, matching what the list panes have always used.
+    """
+
+    FETCH_BATCH = 256
+
+    def __init__(self, kind: str, entity_type: Optional[str] = None, parent=None):
+        super().__init__(parent)
+        self.kind = kind
+        self.entity_type = entity_type
+        self.columns = COLUMNS.get(kind, DEFAULT_COLUMNS)
+        self._sort_column = 0
+        self._sort_order = Qt.AscendingOrder
+        # The entries and their sort keys in ascending order of key, whatever the order
+        # shown; in descending order, row 0 is the last entry
+        self._entries: List[CatalogEntry] = []
+        self._keys: List[Tuple] = []
+        self._keys_by_name: Dict[str, Tuple] = {}
+        self._filter_keys: Dict[str, str] = {}
+        self._fetched = 0
+
+    def set_entries(self, entries: Iterable[CatalogEntry]):
+        """Replace every row with the given objects"""
+        self.beginResetModel()
+        self._set_sorted(entries)
+        self._filter_keys = {entry.name: self._filter_key(entry) for entry in self._entries}
+        self._fetched = min(self.FETCH_BATCH, len(self._entries))
+        self.endResetModel()
+
+    def entry(self, row: int) -> CatalogEntry:
+        """Return the object shown in a row"""
+        return self._entries[self._position(row)]
+
+    def row_of(self, name: str) -> Optional[int]:
+        """Return the row of an object, or None if it isn't in the list or not fetched yet"""
+        position = self._find(name)
+        if position is None:
+            return None
+        row = self._position(position)
+        return row if row < self._fetched else None
+
+    def put(self, entry: CatalogEntry):
+        """Add an object to the list, or update its row if it is already there"""
+        position = self._find(entry.name)
+        if position is not None:
+            if self._sort_key(entry) == self._keys[position]:
+                self._entries[position] = entry
+                self._filter_keys[entry.name] = self._filter_key(entry)
+                row = self._position(position)
+                if row < self._fetched:
+                    self.dataChanged.emit(
+                        self.index(row, 0), self.index(row, len(self.columns) - 1)
+                    )
+                return
+            # Its sort key changed, so it moves
+            self.remove(entry.name)
+
+        key = self._sort_key(entry)
+        position = bisect_left(self._keys, key)
+        n_entries = len(self._entries)
+        row = position if self._sort_order == Qt.AscendingOrder else n_entries - position
+        # Rows past the fetched ones are invisible, so don't need to be announced
+        visible = row < self._fetched or self._fetched == n_entries
+        if visible:
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._entries.insert(position, entry)
+        self._keys.insert(position, key)
+        self._keys_by_name[entry.name] = key
+        self._filter_keys[entry.name] = self._filter_key(entry)
+        if visible:
+            self._fetched += 1
+            self.endInsertRows()
+
+    def remove(self, name: str):
+        """Remove an object from the list, if it is there"""
+        position = self._find(name)
+        if position is None:
+            return
+        row = self._position(position)
+        visible = row < self._fetched
+        if visible:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._entries[position]
+        del self._keys[position]
+        del self._keys_by_name[name]
+        del self._filter_keys[name]
+        if visible:
+            self._fetched -= 1
+            self.endRemoveRows()
+
+    def fetch_all(self):
+        """Hand every remaining row to the view, e.g. before filtering all rows"""
+        if self.canFetchMore(QtCore.QModelIndex()):
+            self.beginInsertRows(
+                QtCore.QModelIndex(), self._fetched, len(self._entries) - 1
+            )
+            self._fetched = len(self._entries)
+            self.endInsertRows()
+
+    def filter_key(self, row: int) -> str:
+        """Return the lower case text the filter is matched against for a row"""
+        return self._filter_keys[self.entry(row).name]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if (column, order) == (self._sort_column, self._sort_order):
+            return
+        # Only the fetched rows would be sorted otherwise
+        self.fetch_all()
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_names = [self.entry(index.row()).name for index in old_indexes]
+        self._sort_column = column
+        self._sort_order = order
+        self._set_sorted(self._entries)
+        new_indexes = []
+        for index, name in zip(old_indexes, old_names):
+            new_indexes.append(self.index(self.row_of(name), index.column()))
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def _set_sorted(self, entries: Iterable[CatalogEntry]):
+        keyed = sorted((self._sort_key(entry), entry) for entry in entries)
+        self._keys = [key for key, _ in keyed]
+        self._entries = [entry for _, entry in keyed]
+        self._keys_by_name = {entry.name: key for key, entry in keyed}
+
+    def _sort_key(self, entry: CatalogEntry) -> Tuple:
+        # Objects without a value sort before every object with one, then by name
+        attribute = self.columns[self._sort_column][1]
+        if attribute == "challenge":
+            value = entry.cr if entry.cr is not None else -1.0
+        elif attribute == "size":
+            value = entry.size_order
+        elif attribute == "name":
+            value = ""
+        else:
+            value = (getattr(entry, attribute) or "").lower()
+        return (value, entry.name.lower(), entry.name)
+
+    def _find(self, name: str) -> Optional[int]:
+        """Return the position of an object in the sorted entries"""
+        key = self._keys_by_name.get(name)
+        if key is None:
+            return None
+        return bisect_left(self._keys, key)
+
+    def _position(self, row: int) -> int:
+        """Convert between rows and positions in the sorted entries"""
+        if self._sort_order == Qt.AscendingOrder:
+            return row
+        return len(self._entries) - 1 - row
+
+    @staticmethod
+    def _filter_key(entry: CatalogEntry) -> str:
+        return f"{entry.name}\n{entry.title}".lower()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._fetched < len(self._entries)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH, len(self._entries) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.columns[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._fetched:
+            return None
+        entry = self.entry(index.row())
+        if role == Qt.DisplayRole:
+            return getattr(entry, self.columns[index.column()][1])
+        if role == Qt.ToolTipRole:
+            return entry.title
+        if role == Qt.UserRole:
+            if self.entity_type is None:
+                return entry.name
+            return (self.entity_type, entry.name)
+        return None
+
+
+class EntityFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """Filters an `EntityListModel`, passing sorting on to it.
+
+    Rows are kept when the filter text appears anywhere in the object's name or title,
+    ignoring case, and, if a set of names is given, the object is one of them.
+    Filtering needs every row, so the source model is asked for all of them first.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filter_text = ""
+        self._names: Optional[Set[str]] = None
+
+    @property
+    def filter_text(self) -> str:
+        return self._filter_text
+
+    def set_filter_text(self, text: str):
+        text = text.strip().lower()
+        if text == self._filter_text:
+            return
+        self._filter_text = text
+        if text:
+            self.sourceModel().fetch_all()
+        self.invalidateFilter()
+
+    def set_names(self, names: Optional[Iterable[str]]):
+        """Only keep the objects with these names, or every object if None"""
+        names = set(names) if names is not None else None
+        if names == self._names:
+            return
+        self._names = names
+        if names is not None:
+            self.sourceModel().fetch_all()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        model = self.sourceModel()
+        if self._names is not None and model.entry(source_row).name not in self._names:
+            return False
+        if not self._filter_text:
+            return True
+        return self._filter_text in model.filter_key(source_row)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # The rows stay in the source model's order, which it sorts much more quickly
+        self.sourceModel().sort(column, order)
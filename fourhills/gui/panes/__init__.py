@@ -1,5 +1,7 @@
+from .combat_tracker_pane import CombatTrackerPane
 from .entity_list_pane import EntityListPane
 from .entity_pane import EntityPane
+from .jobs_pane import JobsPane
 from .location_pane import LocationPane
 from .location_tree_pane import LocationTreePane
 from .note_pane import NotePane
@@ -8,10 +10,13 @@ from .party_pane import PartyPane
 from .party_list_pane import PartyListPane
 from .quest_pane import QuestPane
 from .quest_list_pane import QuestListPane
+from .search_pane import SearchPane
 
 __all__ = [
+    "CombatTrackerPane",
     "EntityListPane",
     "EntityPane",
+    "JobsPane",
     "LocationPane",
     "LocationTreePane",
     "NotePane",
@@ -20,4 +25,5 @@ __all__ = [
     "PartyListPane",
     "QuestPane",
     "QuestListPane",
+    "SearchPane",
 ]
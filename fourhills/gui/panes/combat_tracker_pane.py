@@ -0,0 +1,216 @@
+"""Definition for the combat tracker pane, for running a fight at a location"""
+
+from pathlib import Path
+
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtCore import Qt
+
+from fourhills import World
+from fourhills.exceptions import FourhillsCombatError, FourhillsError
+from fourhills.gui.events import AnchorClickedEvent
+from fourhills.gui.models import CombatTrackerModel
+from fourhills.tracker import BATTLE_FILENAME, CONDITIONS, CombatTracker
+
+
+class CombatTrackerPane(QtWidgets.QWidget):
+    """Tracks initiative, hit points and conditions in a fight at a location.
+
+    Every change can be undone. Activating a monster opens its stat block.
+    """
+
+    NO_PARTY = "(No party)"
+
+    def __init__(self, world: World, parent=None):
+        super().__init__(parent)
+        self.world = world
+        self.title = "Combat Tracker"
+        self.model = CombatTrackerModel(self)
+
+        # Choosing the fight
+        self.location_combo = QtWidgets.QComboBox()
+        self.location_combo.addItems([
+            entry.name for entry in world.catalog.entries("location")
+            if entry.monsters or (world.setting.world_dir / entry.name / BATTLE_FILENAME).is_file()
+        ])
+        self.party_combo = QtWidgets.QComboBox()
+        self.party_combo.addItems(
+            [self.NO_PARTY] + [entry.name for entry in world.catalog.entries("party")]
+        )
+        self.roll_hp_check = QtWidgets.QCheckBox("Roll hit points")
+        self.start_btn = QtWidgets.QPushButton("Start")
+        self.start_btn.pressed.connect(self.start)
+        start_layout = QtWidgets.QHBoxLayout()
+        start_layout.addWidget(self.location_combo, 1)
+        start_layout.addWidget(self.party_combo)
+        start_layout.addWidget(self.roll_hp_check)
+        start_layout.addWidget(self.start_btn)
+
+        self.round_label = QtWidgets.QLabel()
+        self.next_btn = QtWidgets.QPushButton("Next Turn")
+        self.next_btn.pressed.connect(self.next_turn)
+        self.undo_btn = QtWidgets.QPushButton("Undo")
+        self.undo_btn.pressed.connect(self.undo)
+        self.redo_btn = QtWidgets.QPushButton("Redo")
+        self.redo_btn.pressed.connect(self.redo)
+        turn_layout = QtWidgets.QHBoxLayout()
+        turn_layout.addWidget(self.round_label, 1)
+        turn_layout.addWidget(self.undo_btn)
+        turn_layout.addWidget(self.redo_btn)
+        turn_layout.addWidget(self.next_btn)
+
+        self.view = QtWidgets.QTreeView()
+        self.view.setModel(self.model)
+        self.view.setRootIsDecorated(False)
+        self.view.setUniformRowHeights(True)
+        self.view.setAllColumnsShowFocus(True)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.view.activated.connect(self.on_activated)
+
+        # Changing the selected combatants
+        self.amount_spin = QtWidgets.QSpinBox()
+        self.amount_spin.setRange(0, 9999)
+        self.damage_btn = QtWidgets.QPushButton("Damage")
+        self.damage_btn.pressed.connect(lambda: self.change_hp(self.tracker.damage))
+        self.heal_btn = QtWidgets.QPushButton("Heal")
+        self.heal_btn.pressed.connect(lambda: self.change_hp(self.tracker.heal))
+        self.condition_combo = QtWidgets.QComboBox()
+        self.condition_combo.setEditable(True)
+        self.condition_combo.addItems(CONDITIONS)
+        self.add_condition_btn = QtWidgets.QPushButton("Add")
+        self.add_condition_btn.pressed.connect(lambda: self.change_condition(True))
+        self.remove_condition_btn = QtWidgets.QPushButton("Remove")
+        self.remove_condition_btn.pressed.connect(lambda: self.change_condition(False))
+        self.remove_btn = QtWidgets.QPushButton("Remove Combatant")
+        self.remove_btn.pressed.connect(self.remove_combatants)
+        edit_layout = QtWidgets.QHBoxLayout()
+        edit_layout.addWidget(self.amount_spin)
+        edit_layout.addWidget(self.damage_btn)
+        edit_layout.addWidget(self.heal_btn)
+        edit_layout.addWidget(self.condition_combo, 1)
+        edit_layout.addWidget(self.add_condition_btn)
+        edit_layout.addWidget(self.remove_condition_btn)
+        edit_layout.addWidget(self.remove_btn)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(start_layout)
+        layout.addLayout(turn_layout)
+        layout.addWidget(self.view)
+        layout.addLayout(edit_layout)
+        self.setLayout(layout)
+        self.update_controls()
+
+    @property
+    def tracker(self) -> CombatTracker:
+        return self.model.tracker
+
+    def start(self):
+        """Start a new fight at the chosen location, rolling initiative"""
+        location = self.location_combo.currentText()
+        if not location:
+            return
+        party_name = self.party_combo.currentText()
+        try:
+            party = self.world.parties[party_name] if party_name != self.NO_PARTY else None
+            tracker, unknown = CombatTracker.from_location(
+                self.world, Path(location), party, roll_hp=self.roll_hp_check.isChecked()
+            )
+        except (KeyError, FourhillsError) as e:
+            QtWidgets.QErrorMessage(self).showMessage(str(e))
+            return
+        if unknown:
+            QtWidgets.QErrorMessage(self).showMessage(
+                "Left out, as they have no stat block: " + ", ".join(unknown)
+            )
+        self.title = f"Combat: {location}"
+        self.setWindowTitle(self.title)
+        self.model.set_tracker(tracker)
+        self.update_controls()
+
+    def selected_ids(self):
+        return [index.data(Qt.UserRole) for index in self.view.selectionModel().selectedRows()]
+
+    def next_turn(self):
+        if self.tracker is None:
+            return
+        try:
+            self.tracker.next_turn()
+        except FourhillsCombatError as e:
+            QtWidgets.QErrorMessage(self).showMessage(str(e))
+        self.refresh()
+
+    def undo(self):
+        if self.tracker is not None and self.tracker.undo():
+            self.refresh()
+
+    def redo(self):
+        if self.tracker is not None and self.tracker.redo():
+            self.refresh()
+
+    def change_hp(self, change):
+        if self.tracker is None:
+            return
+        for combatant_id in self.selected_ids():
+            change(combatant_id, self.amount_spin.value())
+        self.refresh()
+
+    def change_condition(self, add: bool):
+        condition = self.condition_combo.currentText().strip()
+        if self.tracker is None or not condition:
+            return
+        for combatant_id in self.selected_ids():
+            if add:
+                self.tracker.add_condition(combatant_id, condition)
+            else:
+                self.tracker.remove_condition(combatant_id, condition)
+        self.refresh()
+
+    def remove_combatants(self):
+        if self.tracker is None:
+            return
+        for combatant_id in self.selected_ids():
+            self.tracker.remove(combatant_id)
+        self.refresh()
+
+    def refresh(self):
+        """Show the fight as it now stands, keeping the selection"""
+        selected = self.selected_ids()
+        self.model.refresh()
+        selection = self.view.selectionModel()
+        for combatant_id in selected:
+            row = self.model.row_of(combatant_id)
+            if row is not None:
+                selection.select(
+                    self.model.index(row, 0),
+                    QtCore.QItemSelectionModel.Select | QtCore.QItemSelectionModel.Rows,
+                )
+        self.update_controls()
+
+    def update_controls(self):
+        tracker = self.tracker
+        running = tracker is not None
+        for widget in (self.next_btn, self.damage_btn, self.heal_btn, self.add_condition_btn,
+                       self.remove_condition_btn, self.remove_btn):
+            widget.setEnabled(running)
+        self.undo_btn.setEnabled(running and tracker.can_undo)
+        self.redo_btn.setEnabled(running and tracker.can_redo)
+        if not running:
+            self.round_label.setText("Choose a location, and start the fight")
+        elif tracker.current_combatant is None:
+            self.round_label.setText(f"{len(tracker)} combatants; press Next Turn to begin")
+        else:
+            self.round_label.setText(
+                f"Round {tracker.round}: {tracker.current_combatant.name}'s turn"
+            )
+
+    def on_activated(self, index):
+        source = self.model.combatant(index.row()).source
+        if source in self.world.monsters:
+            url = f"monster://{source}"
+        elif source in self.world.npcs:
+            url = f"npc://{source}"
+        else:
+            return
+        QtCore.QCoreApplication.postEvent(
+            QtCore.QCoreApplication.instance(), AnchorClickedEvent(QtCore.QUrl(url))
+        )
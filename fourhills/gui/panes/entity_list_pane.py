@@ -2,28 +2,43 @@ from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtCore import Qt
 import shutil
 
-from fourhills.exceptions import FourhillsMonsterImportError
+from fourhills.exceptions import FourhillsMonsterImportError, FourhillsSearchQueryError
 from fourhills.gui.events import AnchorClickedEvent, ObjectRenamedEvent, ObjectDeletedEvent
-from fourhills.gui.utils import get_template_path
+from fourhills.gui.models import EntityListModel
+from fourhills.gui.utils import Job, JobRunner, get_template_path
+from fourhills.gui.widgets import BatchImportDialog, EntityListView, StatFilterWidget
+from fourhills.utils.batch_import import queue_path_for
 from fourhills.utils.import_monster import import_monster
+from fourhills.utils.page_cache import PageCache
 from fourhills.utils.text_utils import slugify
+from fourhills.watcher import ChangeSet
 
 
 class EntityListPane(QtWidgets.QDockWidget):
 
     path = None
+    world = None
+    page_cache = None
+    batch_import_dialog = None
 
     def __init__(self, title, entity_type, parent=None):
         super().__init__(title, parent)
         self.entity_type = entity_type
+        self.kind = entity_type.lower()
 
         self.centralwidget = QtWidgets.QWidget()
         self.setWidget(self.centralwidget)
         layout = QtWidgets.QVBoxLayout()
         self.centralwidget.setLayout(layout)
 
-        self.entity_list = QtWidgets.QListWidget()
-        self.entity_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.model = EntityListModel(self.kind, entity_type, self)
+        self.entity_list = EntityListView(self.model)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.stat_filter = None
+        if self.kind in ("monster", "npc"):
+            self.stat_filter = StatFilterWidget(self.centralwidget)
+            self.stat_filter.filtersChanged.connect(self.apply_stat_filter)
+            layout.addWidget(self.stat_filter)
         layout.addWidget(self.entity_list)
 
         if entity_type == "Monster":
@@ -31,24 +46,80 @@ class EntityListPane(QtWidgets.QDockWidget):
             self.import_btn = QtWidgets.QPushButton("Import Monster", self.centralwidget)
             self.import_btn.pressed.connect(self.on_import_monster)
             layout.addWidget(self.import_btn)
+            self.batch_import_btn = QtWidgets.QPushButton(
+                "Batch Import Monsters...", self.centralwidget
+            )
+            self.batch_import_btn.pressed.connect(self.on_batch_import)
+            layout.addWidget(self.batch_import_btn)
 
         # Allow user options for adding/renaming/deleting entities
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
 
-    def load(self, path):
-        """Search path for YAML files and load them as entities"""
+    def load(self, world, path):
+        """List the entities in the world's catalog whose YAML files are in path"""
+        self.world = world
         self.path = path
-        self.entity_list.clear()
-
-        if not path.is_dir():
-            # Path does not exist, ignore
+        self.page_cache = None
+        if self.batch_import_dialog is not None:
+            # Belongs to the previous world; any import it started carries on regardless
+            self.batch_import_dialog.deleteLater()
+            self.batch_import_dialog = None
+        self.model.set_entries(world.catalog.entries(self.kind))
+        self.apply_stat_filter()
+
+    def get_page_cache(self):
+        """Return the cache of downloaded monster pages, opening it the first time"""
+        if self.page_cache is None:
+            self.page_cache = PageCache.for_root(self.world.setting.root)
+        return self.page_cache
+
+    def item_name(self, path):
+        if path.parent == self.path and path.suffix == ".yaml":
+            return path.stem
+        return None
+
+    def apply_changes(self, changes: ChangeSet):
+        """Add, remove, rename and update rows for files changed in the pane's directory.
+
+        The world's catalog must already be up to date with the changes.
+        """
+        if self.path is None:
+            return
+        removed = changes.removed | set(changes.renamed)
+        changed = changes.added | changes.modified | set(changes.renamed.values())
+        for path in removed:
+            name = self.item_name(path)
+            if name:
+                self.model.remove(name)
+        for path in changed:
+            name = self.item_name(path)
+            entry = self.world.catalog.entry(self.kind, name) if name else None
+            if entry is not None:
+                self.model.put(entry)
+        self.apply_stat_filter()
+
+    def stat_collection(self):
+        """The world's collection of the pane's objects, for querying their stats"""
+        return self.world.monsters if self.kind == "monster" else self.world.npcs
+
+    def apply_stat_filter(self):
+        """Only list the objects whose stats match the filters, using the world's index"""
+        if self.stat_filter is None or self.world is None:
+            return
+        self.stat_filter.set_creature_types(self.world.stats.creature_types(self.kind))
+        filters = self.stat_filter.filters()
+        try:
+            names = self.stat_collection().query(**filters) if filters else None
+        except FourhillsSearchQueryError as e:
+            QtWidgets.QErrorMessage(self).showMessage(str(e))
             return
+        self.entity_list.proxy.set_names(names)
 
-        for entity_file in path.rglob("*.yaml"):
-            item = QtWidgets.QListWidgetItem(entity_file.stem)
-            item.setData(Qt.UserRole, (self.entity_type, entity_file.stem))
-            self.entity_list.addItem(item)
+    def files_changed(self, changes: ChangeSet):
+        """Update the world and the list after the pane changed files itself"""
+        self.world.invalidate_paths(changes.paths())
+        self.apply_changes(changes)
 
     def show_context_menu(self, point_pos):
         if not self.path:
@@ -60,7 +131,7 @@ class EntityListPane(QtWidgets.QDockWidget):
         # Create menu and insert actions
         menu = QtWidgets.QMenu(self)
         menu.addAction(f"Create {self.entity_type}", self.create_entity)
-        n_selected = len(self.entity_list.selectedItems())
+        n_selected = len(self.entity_list.selected_names())
         if n_selected == 1:
             menu.addAction(f"Rename {self.entity_type}", self.rename_entity)
         if n_selected >= 1:
@@ -91,9 +162,7 @@ class EntityListPane(QtWidgets.QDockWidget):
         # Copy the template NPC into the new location
         template_path = get_template_path() / f"{self.entity_type.lower()}.yaml"
         shutil.copy(str(template_path), str(entity_path))
-
-        # Load up self again to load new entity
-        self.load(self.path)
+        self.files_changed(ChangeSet(added={entity_path}))
 
         # Open the new entity
         url = f"{self.entity_type.lower()}://{entity_name}"
@@ -103,8 +172,7 @@ class EntityListPane(QtWidgets.QDockWidget):
         )
 
     def rename_entity(self):
-        entity = self.entity_list.selectedItems()[0]
-        _, old_entity_name = entity.data(Qt.UserRole)
+        old_entity_name = self.entity_list.selected_names()[0]
         old_entity_path = self.path / (old_entity_name + ".yaml")
 
         # Get a new name for the entity from the user
@@ -130,9 +198,7 @@ class EntityListPane(QtWidgets.QDockWidget):
             return
 
         shutil.move(str(old_entity_path), str(new_entity_path))
-
-        # Reload entities
-        self.load(self.path)
+        self.files_changed(ChangeSet(renamed={old_entity_path: new_entity_path}))
 
         # Emit an event to make sure all relevant open windows reload
         QtCore.QCoreApplication.postEvent(
@@ -142,10 +208,8 @@ class EntityListPane(QtWidgets.QDockWidget):
 
     def delete_entities(self):
 
-        items = self.entity_list.selectedItems()
         paths = []
-        for item in items:
-            _, entity_name = item.data(Qt.UserRole)
+        for entity_name in self.entity_list.selected_names():
             entity_path = self.path / (entity_name + ".yaml")
 
             if not entity_path.is_file():
@@ -177,16 +241,19 @@ class EntityListPane(QtWidgets.QDockWidget):
                 ObjectDeletedEvent(self.entity_type, entity_path.stem)
             )
 
-        # Reload widget after deletion
-        self.load(self.path)
+        self.files_changed(ChangeSet(removed=set(paths)))
 
     def on_import_monster(self):
+        if not self.path:
+            return
         # Present user with dialog box of monster name to import
         monster_name, got_name = QtWidgets.QInputDialog.getText(
             self,
             "Enter monster name",
             "Monster name (exact):"
         )
+        if not got_name or not monster_name.strip():
+            return
 
         # Check if monster already exists in workspace
         monster_slug = slugify(monster_name)
@@ -199,22 +266,47 @@ class EntityListPane(QtWidgets.QDockWidget):
             )
             return
 
-        try:
-            import_monster(monster_slug, out_path)
-        except FourhillsMonsterImportError as e:
-            msg = "Error during import of monster: {}".format(
-                "\n".join(e.args)
-            )
-            msg += " Try checking DnD Beyond for the monster name to see if it is accessible."
-            QtWidgets.QErrorMessage(self).showMessage(msg)
-            return
+        # Download in the background; errors are listed in the jobs pane
+        job = Job(
+            f"Import {monster_slug}", import_monster_job, monster_slug, out_path,
+            self.get_page_cache(),
+        )
+        job.signals.finished.connect(lambda path: self.on_monster_imported(path))
+        JobRunner.get_runner().start(job)
 
-        # Reload monsters
-        self.load(self.path)
+    def on_monster_imported(self, path):
+        # The world may have been changed while the monster was downloading
+        if path is not None and path.parent == self.path:
+            self.files_changed(ChangeSet(added={path}))
 
-        # Inform user of success
-        QtWidgets.QMessageBox.information(
-            self,
-            "Monster Import Success",
-            f"Successfully imported monster {monster_slug}!"
-        )
+    def on_batch_import(self):
+        if not self.path:
+            return
+        # Kept while the world is open, so closing it doesn't lose a running import
+        if self.batch_import_dialog is None:
+            self.batch_import_dialog = BatchImportDialog(
+                self.path,
+                queue_path_for(self.world.setting.root),
+                self.get_page_cache(),
+                self,
+            )
+            self.batch_import_dialog.monstersImported.connect(self.on_monsters_imported)
+        self.batch_import_dialog.show()
+        self.batch_import_dialog.raise_()
+
+    def on_monsters_imported(self, paths):
+        paths = {path for path in paths if path.parent == self.path}
+        if paths:
+            self.files_changed(ChangeSet(added=paths))
+
+
+def import_monster_job(job, monster_slug, out_path, page_cache):
+    """Import a monster from D&D Beyond, as a job, returning the monster's file"""
+    try:
+        import_monster(monster_slug, out_path, cache=page_cache)
+    except FourhillsMonsterImportError as e:
+        raise FourhillsMonsterImportError(
+            "{} Try checking DnD Beyond for the monster name to see if it is accessible."
+            .format("\n".join(e.args))
+        ) from e
+    return out_path
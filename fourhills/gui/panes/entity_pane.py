@@ -2,8 +2,6 @@ from pathlib import Path
 from PyQt5 import QtWidgets
 
 from fourhills.dataclasses import Npc, StatBlock
-from fourhills.exceptions import FourhillsExperienceLookupError
-from fourhills.utils import cr_to_xp
 from fourhills.gui.events import ObjectRenamedEventFilter, ObjectDeletedEventFilter
 from fourhills.gui.utils import get_jinja_env
 from fourhills.gui.widgets import LinkingBrowser
@@ -11,12 +9,13 @@ from fourhills.gui.widgets import LinkingBrowser
 
 class EntityPane(QtWidgets.QWidget):
 
-    def __init__(self, entity_type, entity_name, setting, parent=None):
+    def __init__(self, entity_type, entity_name, world, parent=None):
         super().__init__(parent)
 
         self.entity_type = entity_type
         self.entity_name = entity_name
-        self.setting = setting
+        self.world = world
+        self.setting = world.setting
 
         # Check that entity_type is valid and refuse it if not
         if entity_type not in ["Monster", "NPC"]:
@@ -30,7 +29,6 @@ class EntityPane(QtWidgets.QWidget):
 
         # Jinja template initialisation
         jinja_env = get_jinja_env()
-        jinja_env.globals.update(cr_to_xp=cr_to_xp)
 
         self.battle_info_template = jinja_env.get_template("battle_info.j2")
         self.character_info_template = jinja_env.get_template("character_info.j2")
@@ -112,23 +110,18 @@ class EntityPane(QtWidgets.QWidget):
 
     def render_npc(self, entity_path: Path):
         npc = Npc.from_name(entity_path.stem, self.setting)
-        return self.character_info_template.render(npc=npc)
+        return self.character_info_template.render(
+            document=npc.summary_document().html() + npc.character_document().html(),
+            referenced_by=self.world.backlinks.referrers("npc", entity_path.stem)
+        )
 
     def render_npc_stat(self, entity_path: Path):
         npc = Npc.from_name(entity_path.stem, self.setting)
-        if getattr(npc, "stats"):
-            try:
-                npc.xp = f"{cr_to_xp(npc.stats.challenge)} XP"
-            except FourhillsExperienceLookupError:
-                npc.xp = "XP could not be calculated"
-        else:
-            npc.xp = "Set a state_base for this character to see XP"
-        return self.battle_info_template.render(stats=npc.stats)
+        return self.battle_info_template.render(document=npc.battle_document().html())
 
     def render_monster_stat(self, entity_path: Path):
         monster = StatBlock.from_name(entity_path.stem, self.setting)
-        try:
-            monster.xp = f"{cr_to_xp(monster.challenge)} XP"
-        except FourhillsExperienceLookupError:
-            monster.xp = "XP could not be calculated"
-        return self.battle_info_template.render(stats=monster)
+        return self.battle_info_template.render(
+            document=monster.summary_document().html() + monster.battle_document().html(),
+            referenced_by=self.world.backlinks.referrers("monster", entity_path.stem)
+        )
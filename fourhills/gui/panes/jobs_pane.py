@@ -0,0 +1,133 @@
+"""Definition for jobs pane, showing the background jobs and what went wrong in them"""
+
+from PyQt5 import QtCore, QtWidgets
+
+from fourhills.gui.utils import Job, JobRunner
+
+
+class JobRow(QtWidgets.QWidget):
+    """One job's title, progress bar, status and cancel button"""
+
+    def __init__(self, job: Job, parent=None):
+        super().__init__(parent)
+        self.job = job
+
+        self.title_label = QtWidgets.QLabel(job.title)
+        self.status_label = QtWidgets.QLabel(job.state)
+        self.progress_bar = QtWidgets.QProgressBar()
+        # Busy until the job says how much it has to do
+        self.progress_bar.setRange(0, 0)
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        self.cancel_btn.pressed.connect(self.cancel)
+
+        layout = QtWidgets.QGridLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.title_label, 0, 0)
+        layout.addWidget(self.status_label, 0, 1)
+        layout.addWidget(self.progress_bar, 1, 0)
+        layout.addWidget(self.cancel_btn, 1, 1)
+        self.setLayout(layout)
+
+        job.signals.progress.connect(self.on_progress)
+        job.signals.finished.connect(lambda _: self.on_ended())
+        job.signals.failed.connect(lambda _: self.on_ended())
+
+    def cancel(self):
+        self.job.cancel()
+        self.cancel_btn.setEnabled(False)
+        self.status_label.setText("Cancelling...")
+
+    def on_progress(self, done: int, total: int, message: str):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        if not self.job.cancelled:
+            self.status_label.setText(message or self.job.state)
+
+    def on_ended(self):
+        if self.job.state == Job.DONE:
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(1)
+        elif self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(0)
+        status = self.job.state
+        if self.job.errors:
+            status += f" ({len(self.job.errors)} errors)"
+        self.status_label.setText(status)
+        self.cancel_btn.hide()
+
+
+class JobsPane(QtWidgets.QDockWidget):
+    """The jobs running in the background, with a list of the errors they reported.
+
+    The pane shows itself when a job is still running after `SHOW_DELAY_MS`, so quick
+    jobs don't make it flicker, and whenever a job reports an error.
+    """
+
+    SHOW_DELAY_MS = 500
+
+    def __init__(self, title, parent=None):
+        super().__init__(title, parent)
+
+        self.job_list = QtWidgets.QListWidget()
+        self.job_list.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.clear_jobs_btn = QtWidgets.QPushButton("Clear Finished")
+        self.clear_jobs_btn.pressed.connect(self.clear_finished)
+        self.cancel_all_btn = QtWidgets.QPushButton("Cancel All")
+        self.cancel_all_btn.pressed.connect(self.cancel_all)
+
+        self.error_list = QtWidgets.QListWidget()
+        self.error_list.setWordWrap(True)
+        self.clear_errors_btn = QtWidgets.QPushButton("Clear Errors")
+        self.clear_errors_btn.pressed.connect(self.error_list.clear)
+
+        job_buttons = QtWidgets.QHBoxLayout()
+        job_buttons.addWidget(self.clear_jobs_btn)
+        job_buttons.addWidget(self.cancel_all_btn)
+
+        widget = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.job_list)
+        layout.addLayout(job_buttons)
+        layout.addWidget(QtWidgets.QLabel("Errors:"))
+        layout.addWidget(self.error_list)
+        layout.addWidget(self.clear_errors_btn)
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        runner = JobRunner.get_runner()
+        for job in runner.jobs:
+            self.add_job(job)
+        runner.jobAdded.connect(self.add_job)
+
+    def add_job(self, job: Job):
+        if job.quiet:
+            return
+        row = JobRow(job)
+        item = QtWidgets.QListWidgetItem()
+        item.setSizeHint(row.sizeHint())
+        self.job_list.addItem(item)
+        self.job_list.setItemWidget(item, row)
+        job.signals.error.connect(lambda message: self.add_error(job, message))
+        job.signals.failed.connect(lambda message: self.add_error(job, message))
+        QtCore.QTimer.singleShot(self.SHOW_DELAY_MS, lambda: self.show_if_running(job))
+
+    def add_error(self, job: Job, message: str):
+        self.error_list.addItem(f"{job.title}: {message}")
+        self.error_list.scrollToBottom()
+        self.show()
+        self.raise_()
+
+    def show_if_running(self, job: Job):
+        if not job.ended:
+            self.show()
+
+    def clear_finished(self):
+        for row in reversed(range(self.job_list.count())):
+            item = self.job_list.item(row)
+            if self.job_list.itemWidget(item).job.ended:
+                self.job_list.takeItem(row)
+
+    def cancel_all(self):
+        JobRunner.get_runner().cancel_all()
@@ -4,8 +4,9 @@ import markdown
 from pathlib import Path
 from PyQt5 import QtWidgets
 
-from fourhills import Setting
+from fourhills import World
 from fourhills.dataclasses import Location
+from fourhills.encounters import Encounter, assess_encounters, read_monsters, world_parties
 from fourhills.gui.events import ObjectDeletedEventFilter, ObjectRenamedEventFilter
 from fourhills.gui.utils import get_jinja_env
 from fourhills.gui.widgets import ImageViewerWidget, LinkingBrowser
@@ -15,11 +16,12 @@ class LocationPane(QtWidgets.QWidget):
 
     map_pixmap = None
 
-    def __init__(self, rel_path: Path, setting: Setting, parent=None):
+    def __init__(self, rel_path: Path, world: World, parent=None):
         super().__init__(parent)
 
         self.rel_path = rel_path
-        self.setting = setting
+        self.world = world
+        self.setting = world.setting
 
         # Jinja template initialiation
         jinja_env = get_jinja_env()
@@ -88,7 +90,25 @@ class LocationPane(QtWidgets.QWidget):
 
     def render_location(self, location_path):
         location = Location.from_name(location_path.parent, self.setting)
-        return self.location_template.render(location=location)
+        encounter = Encounter.from_monsters(
+            read_monsters(location.monsters), self.world.catalog
+        )
+        return self.location_template.render(
+            location=location,
+            encounter=encounter,
+            difficulties=self.encounter_difficulties(encounter),
+            referenced_by=self.world.backlinks.referrers("location", self.rel_path)
+        )
+
+    def encounter_difficulties(self, encounter):
+        """Return how difficult the location's monsters are for each party, by name"""
+        parties = world_parties(self.world)
+        if not encounter.crs or not parties:
+            return []
+        table = assess_encounters(
+            [encounter], list(parties.values()), party_labels=list(parties)
+        )
+        return [(party, table.assessment(i, 0)) for i, party in enumerate(table.parties)]
 
     def render_scene(self, scene_path):
         if not scene_path.is_file():
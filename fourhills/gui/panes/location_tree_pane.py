@@ -1,11 +1,11 @@
-from pathlib import Path
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtCore import Qt
 import shutil
 
 from fourhills.gui.events import AnchorClickedEvent, ObjectDeletedEvent, ObjectRenamedEvent
-from fourhills.gui.utils.make_tree import make_tree_from_path
+from fourhills.gui.models import DirectoryTreeModel
 from fourhills.gui.utils import get_template_path
+from fourhills.watcher import ChangeSet
 
 
 class LocationTreePane(QtWidgets.QDockWidget):
@@ -14,7 +14,11 @@ class LocationTreePane(QtWidgets.QDockWidget):
 
     def __init__(self, title, parent=None):
         super().__init__(title, parent)
-        self.location_tree = QtWidgets.QTreeWidget(self)
+        self.model = DirectoryTreeModel(directories_only=True, marker="location.yaml")
+        self.location_tree = QtWidgets.QTreeView(self)
+        self.location_tree.setModel(self.model)
+        self.location_tree.setHeaderHidden(True)
+        self.location_tree.setUniformRowHeights(True)
         self.location_tree.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.setWidget(self.location_tree)
 
@@ -23,20 +27,19 @@ class LocationTreePane(QtWidgets.QDockWidget):
         self.customContextMenuRequested.connect(self.show_context_menu)
 
     def load(self, path):
-        """Search path for YAML files and load them as locations"""
+        """Show the locations in path, listing each level as it is expanded"""
         self.path = path
-        self.location_tree.clear()
+        self.model.set_root(path)
 
-        if not path.is_dir():
-            # Path does not exist, ignore
+    def apply_changes(self, changes: ChangeSet):
+        """Add, remove and move rows for locations changed in the pane's directory"""
+        if self.path is None:
             return
+        self.model.apply_changes(changes)
 
-        top_level = make_tree_from_path(
-            path,
-            "location.yaml",
-            include_files=False
-        )
-        self.location_tree.addTopLevelItems(top_level)
+    def selected_paths(self):
+        """The absolute paths of the selected locations"""
+        return [self.model.path(index) for index in self.location_tree.selectedIndexes()]
 
     def show_context_menu(self, point_pos):
         if self.path is None:
@@ -47,7 +50,7 @@ class LocationTreePane(QtWidgets.QDockWidget):
 
         # Create menu and insert actions
         menu = QtWidgets.QMenu(self)
-        n_selected = len(self.location_tree.selectedItems())
+        n_selected = len(self.location_tree.selectedIndexes())
         if n_selected <= 1:
             menu.addAction(f"Create Location", self.create_location)
         if n_selected == 1:
@@ -71,17 +74,9 @@ class LocationTreePane(QtWidgets.QDockWidget):
 
         # Build path to desired location
         base_path = self.path
-        selected_locs = self.location_tree.selectedItems()
+        selected_locs = self.selected_paths()
         if selected_locs:
-            item = selected_locs[0]
-            directories = [item.text(0)]
-            while item.parent() is not None:
-                directories += [item.parent().text(0)]
-                item = item.parent()
-
-            directories.reverse()
-            for directory in directories:
-                base_path = base_path / directory
+            base_path = selected_locs[0]
 
         # Check whether a location of that name already exists in the current folder
         new_path = base_path / loc_name
@@ -97,9 +92,7 @@ class LocationTreePane(QtWidgets.QDockWidget):
         # Copy the template location into the new location
         template_path = get_template_path() / "location"
         shutil.copytree(str(template_path), str(new_path))
-
-        # Load up self again to load new location
-        self.load(self.path)
+        self.apply_changes(ChangeSet(added={new_path}))
 
         # Post event to main requesting the new location be opened
         rel_path = new_path.relative_to(self.path)
@@ -110,30 +103,20 @@ class LocationTreePane(QtWidgets.QDockWidget):
         )
 
     def rename_location(self):
-        old_loc = self.location_tree.selectedItems()[0]
+        old_loc_path = self.selected_paths()[0]
 
         # Get a new name for the location from the user
         new_loc_name, got_name = QtWidgets.QInputDialog.getText(
             self,
             "Enter new location name",
             "Location name:",
-            text=old_loc.text(0)
+            text=old_loc_path.name
         )
 
         if not got_name:
             return
 
-        directories = []
-        item = old_loc
-        while item.parent() is not None:
-            directories += [item.parent().text(0)]
-            item = item.parent()
-
-        directories.reverse()
-        base_path = self.path / Path(*directories)
-
-        old_loc_path = base_path / old_loc.text(0)
-        new_loc_path = base_path / new_loc_name
+        new_loc_path = old_loc_path.parent / new_loc_name
 
         # Check whether requested location already exists
         if new_loc_path.is_dir():
@@ -146,9 +129,7 @@ class LocationTreePane(QtWidgets.QDockWidget):
             return
 
         shutil.move(old_loc_path, new_loc_path)
-
-        # Reload locations
-        self.load(self.path)
+        self.apply_changes(ChangeSet(renamed={old_loc_path: new_loc_path}))
 
         # Post event that location has been renamed
         old_loc_rel_path = old_loc_path.relative_to(self.path)
@@ -161,17 +142,7 @@ class LocationTreePane(QtWidgets.QDockWidget):
     def delete_locations(self):
 
         # Get selected items ready for deletion
-        items = self.location_tree.selectedItems()
-        paths = []
-        for item in items:
-            directories = [item.text(0)]
-            cur_item = item
-            while cur_item.parent() is not None:
-                directories += [cur_item.parent().text(0)]
-                cur_item = cur_item.parent()
-            directories.reverse()
-            cur_path = self.path / Path(*directories)
-            paths += [cur_path]
+        paths = self.selected_paths()
 
         # Make sure they all still exist
         for path in paths:
@@ -202,5 +173,4 @@ class LocationTreePane(QtWidgets.QDockWidget):
                 ObjectDeletedEvent("Location", loc_path.relative_to(self.path))
             )
 
-        # Reload widget after deletion
-        self.load(self.path)
+        self.apply_changes(ChangeSet(removed=set(paths)))
@@ -6,9 +6,10 @@ from PyQt5.QtCore import Qt
 import shutil
 
 from fourhills.gui.events import AnchorClickedEvent, ObjectDeletedEvent, ObjectRenamedEvent
-from fourhills.gui.utils.make_tree import make_tree_from_path
+from fourhills.gui.models import DirectoryTreeModel
 from fourhills.gui.utils import get_template_path
 from fourhills.gui.widgets import DeselectableTree
+from fourhills.watcher import ChangeSet
 
 
 class ItemType(enum.Enum):
@@ -24,7 +25,11 @@ class NoteTreePane(QtWidgets.QDockWidget):
 
     def __init__(self, title, parent=None):
         super().__init__(title, parent)
+        self.model = DirectoryTreeModel()
         self.note_tree = DeselectableTree(self)
+        self.note_tree.setModel(self.model)
+        self.note_tree.setHeaderHidden(True)
+        self.note_tree.setUniformRowHeights(True)
         self.setWidget(self.note_tree)
 
         self.create_actions()
@@ -49,16 +54,26 @@ class NoteTreePane(QtWidgets.QDockWidget):
         self.delete_folder_action.triggered.connect(self.delete_item)
 
     def load(self, path):
-        """Search path for markdown files and load them as notes"""
+        """Show the notes in path, listing each folder as it is expanded"""
         self.path = path
-        self.note_tree.clear()
+        self.model.set_root(path)
 
-        if not path.is_dir():
-            # Path does not exist, ignore
+    def apply_changes(self, changes: ChangeSet):
+        """Add, remove and move rows for files changed in the pane's directory"""
+        if self.path is None:
             return
+        self.model.apply_changes(changes)
 
-        top_level = make_tree_from_path(path, "*", include_file_endings=True)
-        self.note_tree.addTopLevelItems(top_level)
+    def select_path(self, path):
+        """Select the row for a path, expanding the folders above it"""
+        index = self.model.index_for(path.relative_to(self.path).parts)
+        if not index.isValid():
+            return
+        parent = index.parent()
+        while parent.isValid():
+            self.note_tree.expand(parent)
+            parent = parent.parent()
+        self.note_tree.setCurrentIndex(index)
 
     def show_context_menu(self, point_pos):
         if not self.path:
@@ -95,21 +110,12 @@ class NoteTreePane(QtWidgets.QDockWidget):
 
     def get_selected_item_path(self) -> Tuple[Path, ItemType]:
 
-        selected = self.note_tree.selectedItems()
+        selected = self.note_tree.selectedIndexes()
         if not selected:
             return (self.path, ItemType.NoFile)
 
-        item = selected[0]
-
         # Get path of item in question
-        path = self.path
-        directories = [item.text(0)]
-        while item.parent() is not None:
-            directories += [item.parent().text(0)]
-            item = item.parent()
-        directories.reverse()
-        for directory in directories:
-            path = path / directory
+        path = self.model.path(selected[0])
 
         if path.is_dir():
             return (path, ItemType.Directory)
@@ -145,16 +151,8 @@ class NoteTreePane(QtWidgets.QDockWidget):
         shutil.copy(template_path, new_note_path)
 
         # Add the new note to the tree and set selected
-        tree_widget = QtWidgets.QTreeWidgetItem()
-        tree_widget.setText(0, new_note_path.name)
-
-        if self.note_tree.selectedItems():
-            selected_item = self.note_tree.selectedItems()[0]
-            selected_item.addChild(tree_widget)
-            selected_item.setExpanded(True)
-        else:
-            self.note_tree.addTopLevelItem(tree_widget)
-        tree_widget.setSelected(True)
+        self.apply_changes(ChangeSet(added={new_note_path}))
+        self.select_path(new_note_path)
 
         # Open the new entity
         rel_path_url = '/'.join(new_note_path.relative_to(self.path).parts)
@@ -187,16 +185,8 @@ class NoteTreePane(QtWidgets.QDockWidget):
         new_folder_path.mkdir()
 
         # Add the new folder to the tree and set selected
-        tree_widget = QtWidgets.QTreeWidgetItem()
-        tree_widget.setText(0, new_folder_path.name)
-
-        if self.note_tree.selectedItems():
-            selected_item = self.note_tree.selectedItems()[0]
-            selected_item.addChild(tree_widget)
-            selected_item.setExpanded(True)
-        else:
-            self.note_tree.addTopLevelItem(tree_widget)
-        tree_widget.setSelected(True)
+        self.apply_changes(ChangeSet(added={new_folder_path}))
+        self.select_path(new_folder_path)
 
     def rename_item(self):
         # Get new folder/note name
@@ -224,18 +214,7 @@ class NoteTreePane(QtWidgets.QDockWidget):
             return
 
         shutil.move(old_note_path, new_note_path)
-
-        # Delete old QTreeWidgetItem and add new item with new name
-        new_item = QtWidgets.QTreeWidgetItem()
-        new_item.setText(0, new_note_path.name)
-        selected_item = self.note_tree.selectedItems()[0]
-        if selected_item.parent():
-            parent_item = selected_item.parent()
-            parent_item.removeChild(selected_item)
-            parent_item.addChild(new_item)
-        else:
-            self.note_tree.takeTopLevelItem(self.note_tree.indexOfTopLevelItem(selected_item))
-            self.note_tree.addTopLevelItem(new_item)
+        self.apply_changes(ChangeSet(renamed={old_note_path: new_note_path}))
 
         # Emit an event to make sure all relevant open windows reload
         if _type == ItemType.Markdown:
@@ -273,12 +252,4 @@ class NoteTreePane(QtWidgets.QDockWidget):
                 ObjectDeletedEvent("Note", note_path.relative_to(self.path))
             )
 
-        # Remove deleted item from tree
-        selected_item = self.note_tree.selectedItems()[0]
-        if selected_item.parent():
-            selected_item.parent().removeChild(selected_item)
-        else:
-            self.note_tree.takeTopLevelItem(self.note_tree.indexOfTopLevelItem(selected_item))
-
-        # Reload entities after changes
-        self.load(self.path)
+        self.apply_changes(ChangeSet(removed={note_path}))
@@ -4,6 +4,8 @@ import shutil
 
 from fourhills.gui.events import AnchorClickedEvent, ObjectRenamedEvent, ObjectDeletedEvent
 from fourhills.gui.utils import get_template_path
+from fourhills.gui.utils.patch_widgets import patch_list_widget
+from fourhills.watcher import ChangeSet
 
 
 class PartyListPane(QtWidgets.QDockWidget):
@@ -14,6 +16,7 @@ class PartyListPane(QtWidgets.QDockWidget):
         super().__init__(title, parent)
         self.party_list = QtWidgets.QListWidget()
         self.party_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.party_list.setSortingEnabled(True)
         self.setWidget(self.party_list)
 
         self.create_actions()
@@ -41,11 +44,26 @@ class PartyListPane(QtWidgets.QDockWidget):
             # Path does not exist, ignore
             return
 
-        for party_file in path.rglob("*.yaml"):
-            item = QtWidgets.QListWidgetItem(party_file.stem)
-            item.setData(Qt.UserRole, party_file.stem)
+        for party_file in path.glob("*.yaml"):
+            item = QtWidgets.QListWidgetItem()
+            self.set_item(item, party_file.stem)
             self.party_list.addItem(item)
 
+    def set_item(self, item, party_name):
+        item.setText(party_name)
+        item.setData(Qt.UserRole, party_name)
+
+    def item_name(self, path, exists):
+        if path.parent == self.path and path.suffix == ".yaml":
+            return path.stem
+        return None
+
+    def apply_changes(self, changes: ChangeSet):
+        """Add, remove and rename items for files changed in the pane's directory"""
+        if self.path is None:
+            return
+        patch_list_widget(self.party_list, changes, self.item_name, self.set_item)
+
     def show_context_menu(self, point_pos):
         print("Showing context menu")
         if not self.path:
@@ -88,9 +106,7 @@ class PartyListPane(QtWidgets.QDockWidget):
         # Copy the template NPC into the new location
         template_path = get_template_path() / "party.yaml"
         shutil.copy(str(template_path), str(party_path))
-
-        # Load up self again to load new entity
-        self.load(self.path)
+        self.apply_changes(ChangeSet(added={party_path}))
 
         # Open the new party
         url = f"party://{party_name}"
@@ -127,9 +143,7 @@ class PartyListPane(QtWidgets.QDockWidget):
             return
 
         shutil.move(str(old_party_path), str(new_party_path))
-
-        # Reload entities
-        self.load(self.path)
+        self.apply_changes(ChangeSet(renamed={old_party_path: new_party_path}))
 
         # Emit an event to make sure all relevant open windows reload
         QtCore.QCoreApplication.postEvent(
@@ -173,5 +187,4 @@ class PartyListPane(QtWidgets.QDockWidget):
                 ObjectDeletedEvent("Party", party_path.stem)
             )
 
-        # Reload widget after deletion
-        self.load(self.path)
+        self.apply_changes(ChangeSet(removed=set(paths)))
@@ -4,17 +4,21 @@ from PyQt5.QtCore import Qt
 import shutil
 
 from fourhills.gui.events import AnchorClickedEvent, ObjectRenamedEvent, ObjectDeletedEvent
+from fourhills.gui.models import EntityListModel
 from fourhills.gui.utils import get_template_path
+from fourhills.gui.widgets import EntityListView
+from fourhills.watcher import ChangeSet
 
 
 class QuestListPane(QtWidgets.QDockWidget):
 
     path = None
+    world = None
 
     def __init__(self, title, parent=None):
         super().__init__(title, parent)
-        self.quest_list = QtWidgets.QListWidget()
-        self.quest_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.model = EntityListModel("quest", parent=self)
+        self.quest_list = EntityListView(self.model)
         self.setWidget(self.quest_list)
 
         self.create_actions()
@@ -32,20 +36,45 @@ class QuestListPane(QtWidgets.QDockWidget):
         self.rename_quest_action.triggered.connect(self.rename_quest)
         self.delete_quest_action.triggered.connect(self.delete_quest)
 
-    def load(self, path):
-        """Search path for YAML files and load them as quests"""
+    def load(self, world, path):
+        """List the quests in the world's catalog which are directly inside path"""
+        self.world = world
         self.path = path
-        self.quest_list.clear()
+        self.model.set_entries(
+            entry for entry in world.catalog.entries("quest") if "/" not in entry.name
+        )
 
-        if not path.is_dir():
-            # Path does not exist, ignore
-            return
+    def item_name(self, path):
+        # Quests are directories containing quest.yaml
+        if path.name == "quest.yaml":
+            path = path.parent
+        if path.parent == self.path:
+            return path.name
+        return None
+
+    def apply_changes(self, changes: ChangeSet):
+        """Add, remove, rename and update rows for quests changed in the pane's directory.
 
-        for quest_file in path.rglob("quest.yaml"):
-            name = quest_file.parent.name
-            item = QtWidgets.QListWidgetItem(name)
-            item.setData(Qt.UserRole, name)
-            self.quest_list.addItem(item)
+        The world's catalog must already be up to date with the changes.
+        """
+        if self.path is None:
+            return
+        removed = changes.removed | set(changes.renamed)
+        changed = changes.added | changes.modified | set(changes.renamed.values())
+        for path in removed:
+            name = self.item_name(path)
+            if name and self.world.catalog.entry("quest", name) is None:
+                self.model.remove(name)
+        for path in changed:
+            name = self.item_name(path)
+            entry = self.world.catalog.entry("quest", name) if name else None
+            if entry is not None:
+                self.model.put(entry)
+
+    def files_changed(self, changes: ChangeSet):
+        """Update the world and the list after the pane changed files itself"""
+        self.world.invalidate_paths(changes.paths())
+        self.apply_changes(changes)
 
     def show_context_menu(self, point_pos):
         if not self.path:
@@ -57,7 +86,7 @@ class QuestListPane(QtWidgets.QDockWidget):
         # Create menu and insert actions
         menu = QtWidgets.QMenu(self)
         menu.addAction(self.create_quest_action)
-        n_selected = len(self.quest_list.selectedItems())
+        n_selected = len(self.quest_list.selected_names())
         if n_selected == 1:
             menu.addAction(self.rename_quest_action)
         if n_selected >= 1:
@@ -88,9 +117,7 @@ class QuestListPane(QtWidgets.QDockWidget):
         # Copy the template quest into the new location
         template_path = get_template_path() / "quest"
         shutil.copytree(template_path, quest_path.parent)
-
-        # Load up self again for new quest
-        self.load(self.path)
+        self.files_changed(ChangeSet(added={quest_path.parent}))
 
         # Open the new quest
         url = f"quest://{quest}"
@@ -100,8 +127,7 @@ class QuestListPane(QtWidgets.QDockWidget):
         )
 
     def rename_quest(self):
-        quest = self.quest_list.selectedItems()[0]
-        old_quest_name = quest.data(Qt.UserRole)
+        old_quest_name = self.quest_list.selected_names()[0]
         old_quest_path = self.path / old_quest_name / "quest.yaml"
 
         # Get a new name for the quest from the user
@@ -127,9 +153,7 @@ class QuestListPane(QtWidgets.QDockWidget):
             return
 
         shutil.move(old_quest_path.parent, new_quest_path.parent)
-
-        # Reload entities
-        self.load(self.path)
+        self.files_changed(ChangeSet(renamed={old_quest_path.parent: new_quest_path.parent}))
 
         # Emit an event to make sure all relevant open windows reload
         QtCore.QCoreApplication.postEvent(
@@ -138,10 +162,8 @@ class QuestListPane(QtWidgets.QDockWidget):
         )
 
     def delete_quest(self):
-        items = self.quest_list.selectedItems()
         paths = []
-        for item in items:
-            quest_name = item.data(Qt.UserRole)
+        for quest_name in self.quest_list.selected_names():
             quest_path = self.path / quest_name / "quest.yaml"
 
             if not quest_path.is_file():
@@ -173,5 +195,4 @@ class QuestListPane(QtWidgets.QDockWidget):
                 ObjectDeletedEvent("Quest", str(rel_path))
             )
 
-        # Reload widget after deletion
-        self.load(self.path)
+        self.files_changed(ChangeSet(removed={quest_path.parent for quest_path in paths}))
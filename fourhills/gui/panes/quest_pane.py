@@ -4,7 +4,7 @@ import markdown
 from pathlib import Path
 from PyQt5 import QtWidgets
 
-from fourhills import Setting
+from fourhills import Setting, World
 from fourhills.dataclasses import Quest
 from fourhills.gui.events import ObjectDeletedEventFilter, ObjectRenamedEventFilter
 from fourhills.gui.utils import get_jinja_env
@@ -13,11 +13,12 @@ from fourhills.gui.widgets import LinkingBrowser
 
 class QuestPane(QtWidgets.QWidget):
 
-    def __init__(self, name: str, setting: Setting, parent=None):
+    def __init__(self, name: str, world: World, parent=None):
         super().__init__(parent)
 
         self.name = name
-        self.setting = setting
+        self.world = world
+        self.setting = world.setting
 
         # Jinja template initialisation
         jinja_env = get_jinja_env()
@@ -71,7 +72,10 @@ class QuestPane(QtWidgets.QWidget):
 
     def render_quest(self, quest_path):
         quest = Quest.from_name(quest_path.parent.name, self.setting)
-        return self.quest_template.render(quest=quest)
+        return self.quest_template.render(
+            quest=quest,
+            referenced_by=self.world.backlinks.referrers("quest", self.name)
+        )
 
     def render_description(self, description_path):
         with open(description_path) as f:
@@ -0,0 +1,80 @@
+"""Definition for search pane, finding objects in the world by their text"""
+
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtCore import Qt
+
+from fourhills.exceptions import FourhillsSearchQueryError
+from fourhills.gui.events import AnchorClickedEvent
+
+
+class SearchPane(QtWidgets.QDockWidget):
+
+    # Wait for the user to stop typing before searching
+    SEARCH_DELAY_MS = 200
+    RESULT_LIMIT = 100
+
+    world = None
+
+    def __init__(self, title, parent=None):
+        super().__init__(title, parent)
+
+        self.query_edit = QtWidgets.QLineEdit()
+        self.query_edit.setPlaceholderText("Search, e.g. goblin* type:monster cr:>1")
+        self.query_edit.setClearButtonEnabled(True)
+        self.result_list = QtWidgets.QListWidget()
+        self.result_list.itemActivated.connect(self.on_result_activated)
+
+        widget = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.query_edit)
+        layout.addWidget(self.result_list)
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.refresh)
+        self.query_edit.textChanged.connect(self.search_timer.start)
+        self.query_edit.returnPressed.connect(self.refresh)
+
+    def load(self, world):
+        """Search the given world from now on"""
+        self.world = world
+        self.refresh()
+
+    def refresh(self):
+        """Run the current query again, e.g. after files have changed"""
+        self.search_timer.stop()
+        self.result_list.clear()
+        query = self.query_edit.text().strip()
+        if self.world is None or not query:
+            return
+
+        try:
+            results = self.world.search(query, limit=self.RESULT_LIMIT)
+        except FourhillsSearchQueryError as exc:
+            item = QtWidgets.QListWidgetItem(str(exc))
+            item.setFlags(Qt.NoItemFlags)
+            self.result_list.addItem(item)
+            return
+
+        for result in results:
+            reference = result.reference
+            item = QtWidgets.QListWidgetItem(f"{reference.name} ({reference.label})")
+            item.setData(Qt.UserRole, reference.url)
+            tooltip = str(result.path.relative_to(self.world.root))
+            if result.snippet:
+                tooltip += "\n" + result.snippet
+            item.setToolTip(tooltip)
+            self.result_list.addItem(item)
+
+    def on_result_activated(self, item):
+        url = item.data(Qt.UserRole)
+        if not url:
+            return
+        QtCore.QCoreApplication.postEvent(
+            QtCore.QCoreApplication.instance(),
+            AnchorClickedEvent(QtCore.QUrl(url))
+        )
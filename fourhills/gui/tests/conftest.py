@@ -0,0 +1,53 @@
+import time
+
+from PyQt5 import QtCore, QtTest
+import pytest
+
+from fourhills.gui.utils import JobRunner
+
+
+@pytest.fixture
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+@pytest.fixture
+def runner(app):
+    runner = JobRunner(max_threads=2)
+    yield runner
+    runner.cancel_all()
+    runner.wait()
+
+
+@pytest.fixture
+def wait_for(app):
+    def wait_for(condition, timeout=5.0):
+        """Deliver the jobs' signals until the condition holds"""
+        end = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < end, "Timed out waiting for the job"
+            app.processEvents()
+            time.sleep(0.001)
+    return wait_for
+
+
+@pytest.fixture
+def model_tester(app):
+    """Check models with QAbstractItemModelTester, failing the test if it finds problems"""
+    problems = []
+
+    def handle_message(message_type, context, message):
+        if message_type != QtCore.QtDebugMsg:
+            problems.append(message)
+
+    previous_handler = QtCore.qInstallMessageHandler(handle_message)
+    testers = []
+
+    def test(model):
+        testers.append(QtTest.QAbstractItemModelTester(
+            model, QtTest.QAbstractItemModelTester.FailureReportingMode.Warning
+        ))
+
+    yield test
+    QtCore.qInstallMessageHandler(previous_handler)
+    assert problems == []
@@ -0,0 +1,274 @@
+from pathlib import Path
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+import pytest
+
+from fourhills.gui.models import DirectoryTreeModel
+from fourhills.watcher import ChangeSet, TreeSnapshot
+
+
+def make_tree(root, paths):
+    """Make files, or directories for paths ending in a slash"""
+    for path in paths:
+        if path.endswith("/"):
+            (root / path).mkdir(parents=True, exist_ok=True)
+        else:
+            (root / path).parent.mkdir(parents=True, exist_ok=True)
+            (root / path).write_text(path)
+
+
+def walk(model, parent=QtCore.QModelIndex(), fetch=True):
+    """Return the relative path of every row, depth first, listing directories if asked"""
+    if fetch and model.canFetchMore(parent):
+        model.fetchMore(parent)
+    paths = []
+    for row in range(model.rowCount(parent)):
+        index = model.index(row, 0, parent)
+        paths.append(model.data(index, Qt.UserRole).as_posix())
+        paths.extend(walk(model, index, fetch))
+    return paths
+
+
+def persistent_indexes(model):
+    """Return a persistent index for every row listed so far, by relative path"""
+    indexes = {}
+    for path in walk(model, fetch=False):
+        index = model.index_for(Path(path).parts)
+        indexes[path] = QtCore.QPersistentModelIndex(index)
+    return indexes
+
+
+def check_persistent_indexes(model, indexes, moved=None, gone=()):
+    """Check the persistent indexes followed the rows they were made for.
+
+    Qt only updates persistent indexes as the model's signals say, so this checks that
+    rows were moved, inserted and removed as announced.
+    """
+    moved = moved or {}
+    for path, index in indexes.items():
+        for old, new in moved.items():
+            if path == old or path.startswith(old + "/"):
+                path = new + path[len(old):]
+        if any(path == gone_path or path.startswith(gone_path + "/") for gone_path in gone):
+            assert not index.isValid()
+        else:
+            assert index.isValid(), path
+            assert model.data(QtCore.QModelIndex(index), Qt.UserRole).as_posix() == path
+
+
+def check_matches_a_fresh_model(model):
+    fresh = DirectoryTreeModel(model.directories_only, model.marker)
+    fresh.set_root(model.root)
+    assert walk(model) == walk(fresh)
+
+
+class Changes:
+    """Finds what changed in a directory tree, as the world watcher would"""
+
+    def __init__(self, root):
+        self.snapshot = TreeSnapshot(root)
+        self.snapshot.scan()
+
+    def __call__(self) -> ChangeSet:
+        return self.snapshot.scan()
+
+
+@pytest.fixture
+def make_model(model_tester):
+    def make_model(root, directories_only=False, marker=None, tested=True):
+        model = DirectoryTreeModel(directories_only, marker)
+        if tested:
+            model_tester(model)
+        model.set_root(root)
+        # Everything is listed, as a view would once every directory is expanded
+        walk(model)
+        return model
+    return make_model
+
+
+@pytest.fixture
+def root(tmp_path):
+    make_tree(tmp_path, [
+        "b.md", "d.md", "f.md",
+        "one/sub/deep/x.md", "one/sub/y.md", "one/z.md",
+        "two/a.md", "two/c.md",
+        ".hidden/secret.md",
+    ])
+    yield tmp_path
+
+
+def test_rows_are_listed_in_order(root, make_model):
+    model = make_model(root)
+    assert walk(model) == [
+        "b.md", "d.md", "f.md",
+        "one", "one/sub", "one/sub/deep", "one/sub/deep/x.md", "one/sub/y.md", "one/z.md",
+        "two", "two/a.md", "two/c.md",
+    ]
+    assert model.path(model.index_for(("one", "sub"))) == root / "one" / "sub"
+    assert not model.index_for(("one", "missing")).isValid()
+
+
+@pytest.mark.parametrize("new_name", ["a.md", "c.md", "e.md", "g.md", "D.md"])
+def test_rename_in_the_same_directory(root, make_model, new_name):
+    model = make_model(root)
+    changes = Changes(root)
+    indexes = persistent_indexes(model)
+    (root / "d.md").rename(root / new_name)
+    model.apply_changes(changes())
+    check_persistent_indexes(model, indexes, moved={"d.md": new_name})
+    check_matches_a_fresh_model(model)
+
+
+def test_move_between_directories(root, make_model):
+    model = make_model(root)
+    changes = Changes(root)
+    indexes = persistent_indexes(model)
+    moves = []
+    model.rowsMoved.connect(lambda *args: moves.append(args))
+    (root / "one" / "sub").rename(root / "two" / "b")
+    (root / "one" / "z.md").rename(root / "two" / "d.md")
+    (root / "two" / "c.md").rename(root / "one" / "c.md")
+    model.apply_changes(changes())
+    # Each row moved, keeping the rows inside it
+    assert len(moves) == 3
+    check_persistent_indexes(
+        model, indexes, moved={"one/sub": "two/b", "one/z.md": "two/d.md", "two/c.md": "one/c.md"}
+    )
+    check_matches_a_fresh_model(model)
+
+
+def test_move_into_a_renamed_directory(root, make_model):
+    model = make_model(root)
+    changes = Changes(root)
+    indexes = persistent_indexes(model)
+    (root / "one" / "z.md").rename(root / "two" / "z.md")
+    (root / "two").rename(root / "three")
+    model.apply_changes(changes())
+    check_persistent_indexes(model, indexes, moved={"one/z.md": "three/z.md", "two": "three"})
+    check_matches_a_fresh_model(model)
+
+
+def test_move_to_a_new_directory(root, make_model):
+    model = make_model(root, tested=False)
+    changes = Changes(root)
+    indexes = persistent_indexes(model)
+    (root / "three").mkdir()
+    (root / "one" / "sub").rename(root / "three" / "sub")
+    model.apply_changes(changes())
+    # The new directory hasn't been listed, so the row is removed rather than moved
+    check_persistent_indexes(model, indexes, gone={"one/sub"})
+    three = model.index_for(("three",))
+    assert model.hasChildren(three)
+    assert model.canFetchMore(three)
+    check_matches_a_fresh_model(model)
+
+
+def test_added_and_removed(root, make_model):
+    model = make_model(root)
+    changes = Changes(root)
+    indexes = persistent_indexes(model)
+    make_tree(root, ["a.md", "one/sub/e.md", "four/five/g.md", ".hidden.md"])
+    (root / "f.md").unlink()
+    for path in ["one/sub/deep/x.md", "two/a.md", "two/c.md"]:
+        (root / path).unlink()
+    (root / "one" / "sub" / "deep").rmdir()
+    (root / "two").rmdir()
+    model.apply_changes(changes())
+    check_persistent_indexes(model, indexes, gone={"f.md", "one/sub/deep", "two"})
+    check_matches_a_fresh_model(model)
+
+
+def test_changes_outside_the_tree_are_ignored(root, make_model, tmp_path_factory):
+    model = make_model(root / "one")
+    before = walk(model)
+    other = tmp_path_factory.mktemp("other")
+    model.apply_changes(ChangeSet(added={root / "b.md", other / "x.md"}))
+    assert walk(model) == before
+    DirectoryTreeModel().apply_changes(ChangeSet(added={root / "b.md"}))
+
+
+def test_refresh_only_lists_listed_directories(root, make_model):
+    model = make_model(root, tested=False)
+    make_tree(root, ["five/six/h.md"])
+    model.refresh(root)
+    five = model.index_for(("five",))
+    assert model.hasChildren(five) and model.canFetchMore(five)
+    make_tree(root, ["five/i.md"])
+    model.refresh(root / "five")
+    assert model.canFetchMore(five)
+    model.fetchMore(five)
+    assert walk(model, five) == ["five/i.md", "five/six", "five/six/h.md"]
+
+
+def test_refresh_updates_expandable_rows(root, make_model):
+    model = make_model(root, directories_only=True)
+    changed = []
+    model.dataChanged.connect(lambda top_left, bottom_right: changed.append(top_left))
+    assert walk(model) == ["one", "one/sub", "one/sub/deep", "two"]
+    (root / "two" / "seven").mkdir()
+    model.refresh(root / "two")
+    assert walk(model) == ["one", "one/sub", "one/sub/deep", "two", "two/seven"]
+    assert model.hasChildren(model.index_for(("two",)))
+    (root / "two" / "seven").rmdir()
+    model.refresh(root / "two")
+    assert not model.hasChildren(model.index_for(("two",)))
+    # A directory which hasn't been listed is told it can be expanded
+    (root / "one" / "sub" / "deep" / "eight").mkdir()
+    model.refresh(root / "one" / "sub")
+    assert [model.data(index, Qt.UserRole).as_posix() for index in changed] == ["one/sub/deep"]
+
+
+@pytest.fixture
+def world(tmp_path):
+    make_tree(tmp_path, [
+        "Walton/location.yaml", "Walton/Inn/location.yaml", "Walton/notes/",
+        "Empty/", "Region/Town/location.yaml", "readme.md",
+    ])
+    yield tmp_path
+
+
+def test_locations_are_shown(world, make_model):
+    model = make_model(world, directories_only=True, marker="location.yaml")
+    assert walk(model) == ["Region", "Region/Town", "Walton", "Walton/Inn"]
+
+
+def test_new_locations_are_shown(world, make_model):
+    model = make_model(world, directories_only=True, marker="location.yaml")
+    changes = Changes(world)
+    indexes = persistent_indexes(model)
+    make_tree(world, [
+        "Empty/location.yaml", "Walton/notes/location.yaml", "Far/Away/location.yaml",
+    ])
+    model.apply_changes(changes())
+    check_persistent_indexes(model, indexes)
+    assert walk(model) == [
+        "Empty", "Far", "Far/Away", "Region", "Region/Town", "Walton", "Walton/Inn",
+        "Walton/notes",
+    ]
+    check_matches_a_fresh_model(model)
+
+
+def test_removed_locations_are_hidden(world, make_model):
+    model = make_model(world, directories_only=True, marker="location.yaml")
+    changes = Changes(world)
+    indexes = persistent_indexes(model)
+    (world / "Walton" / "Inn" / "location.yaml").unlink()
+    (world / "Region" / "Town" / "location.yaml").unlink()
+    model.apply_changes(changes())
+    # Region still has a subdirectory, so is still shown, but can't be expanded
+    check_persistent_indexes(model, indexes, gone={"Walton/Inn", "Region/Town"})
+    assert walk(model) == ["Region", "Walton"]
+    assert not model.hasChildren(model.index_for(("Region",)))
+    check_matches_a_fresh_model(model)
+
+
+def test_renamed_location(world, make_model):
+    model = make_model(world, directories_only=True, marker="location.yaml")
+    changes = Changes(world)
+    indexes = persistent_indexes(model)
+    (world / "Walton" / "Inn").rename(world / "Region" / "Inn")
+    model.apply_changes(changes())
+    check_persistent_indexes(model, indexes, moved={"Walton/Inn": "Region/Inn"})
+    assert walk(model) == ["Region", "Region/Inn", "Region/Town", "Walton"]
+    check_matches_a_fresh_model(model)
@@ -0,0 +1,224 @@
+from pathlib import Path
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+import pytest
+
+from fourhills.catalog import CatalogEntry
+from fourhills.gui.models import EntityFilterProxyModel, EntityListModel
+from fourhills.index import Reference
+
+NAMES = ["bat", "cat", "dog", "eel", "fox", "gnu", "hog", "imp", "jay", "kea"]
+
+
+def make_entry(name, cr=None, title=None):
+    return CatalogEntry(
+        Reference("monster", name), Path(f"{name}.yaml"), title or name.title(),
+        challenge=None if cr is None else str(cr), cr=cr,
+    )
+
+
+def shown(model):
+    return [model.data(model.index(row, 0)) for row in range(model.rowCount())]
+
+
+class Mirror:
+    """The names a view would show, kept up to date only from the model's signals.
+
+    QAbstractItemModelTester fetches every row whenever it runs, so this checks the
+    signals of a model whose rows are only partly fetched.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = shown(model)
+        model.rowsInserted.connect(self.on_rows_inserted)
+        model.rowsRemoved.connect(self.on_rows_removed)
+        model.modelReset.connect(self.on_changed)
+        model.layoutChanged.connect(self.on_changed)
+
+    def on_rows_inserted(self, parent, first, last):
+        self.rows[first:first] = [
+            self.model.data(self.model.index(row, 0)) for row in range(first, last + 1)
+        ]
+
+    def on_rows_removed(self, parent, first, last):
+        del self.rows[first:last + 1]
+
+    def on_changed(self):
+        self.rows = shown(self.model)
+
+
+def check_rows(model, names, order, mirror=None):
+    """Check the fetched rows are the first of the names in the model's order"""
+    names = sorted(names, reverse=order == Qt.DescendingOrder)
+    assert shown(model) == names[:model.rowCount()]
+    if mirror is not None:
+        assert mirror.rows == shown(model)
+    for row, name in enumerate(shown(model)):
+        assert model.row_of(name) == row
+        assert model.entry(row).name == name
+
+
+@pytest.fixture
+def model(app):
+    model = EntityListModel("monster")
+    model.FETCH_BATCH = 4
+    model.set_entries(make_entry(name) for name in NAMES)
+    yield model
+
+
+@pytest.fixture
+def tested_model(model, model_tester):
+    model_tester(model)
+    yield model
+
+
+@pytest.fixture(params=[Qt.AscendingOrder, Qt.DescendingOrder], ids=["ascending", "descending"])
+def order(request):
+    yield request.param
+
+
+def test_rows_are_fetched_in_batches(model, order):
+    model.sort(0, order)
+    model.set_entries(make_entry(name) for name in NAMES)
+    mirror = Mirror(model)
+    assert model.rowCount() == 4
+    check_rows(model, NAMES, order, mirror)
+    assert model.row_of("bat" if order == Qt.DescendingOrder else "kea") is None
+    while model.canFetchMore(QtCore.QModelIndex()):
+        model.fetchMore(QtCore.QModelIndex())
+        check_rows(model, NAMES, order, mirror)
+    assert model.rowCount() == len(NAMES)
+
+
+@pytest.mark.parametrize("fetch", ["unfetched", "partly_fetched", "fetched"])
+def test_put_and_remove(model, model_tester, order, fetch):
+    model.sort(0, order)
+    model.set_entries(make_entry(name) for name in NAMES)
+    if fetch == "partly_fetched":
+        model.fetchMore(QtCore.QModelIndex())
+        assert 4 < model.rowCount() < len(NAMES)
+    elif fetch == "fetched":
+        # The tester fetches every row, then checks every change
+        model_tester(model)
+        assert model.rowCount() == len(NAMES)
+    mirror = Mirror(model)
+    names = list(NAMES)
+    # At each end and in the middle, among the fetched rows or after them
+    for name in ["aye", "fig", "zho", "cow", "lynx"]:
+        model.put(make_entry(name))
+        names.append(name)
+        check_rows(model, names, order, mirror)
+    for name in ["bat", "kea", "aye", "zho", "gnu", "fig"]:
+        model.remove(name)
+        names.remove(name)
+        check_rows(model, names, order, mirror)
+    # Removing something which isn't there is harmless
+    model.remove("bat")
+    check_rows(model, names, order, mirror)
+    model.fetch_all()
+    assert model.rowCount() == len(names)
+    check_rows(model, names, order, mirror)
+
+
+def test_sort_fetches_every_row(model):
+    mirror = Mirror(model)
+    assert model.rowCount() == 4
+    model.sort(0, Qt.DescendingOrder)
+    assert model.rowCount() == len(NAMES)
+    check_rows(model, NAMES, Qt.DescendingOrder, mirror)
+
+
+def test_put_updates_rows_in_place(tested_model, order):
+    model = tested_model
+    model.sort(0, order)
+    changed = []
+    model.dataChanged.connect(lambda top_left, bottom_right: changed.append(top_left.row()))
+    model.put(make_entry("dog", title="Good dog"))
+    row = model.row_of("dog")
+    assert changed == [row]
+    assert model.data(model.index(row, 0), Qt.ToolTipRole) == "Good dog"
+    check_rows(model, NAMES, order)
+
+
+def test_put_moves_rows_when_the_sort_key_changes(tested_model, order):
+    model = tested_model
+    model.sort(1, order)
+    by_cr = {name: float(cr) for cr, name in enumerate(NAMES)}
+    for name, cr in by_cr.items():
+        model.put(make_entry(name, cr=cr))
+    assert model.entry(0).name == ("bat" if order == Qt.AscendingOrder else "kea")
+    model.put(make_entry("bat", cr=20.0))
+    expected = sorted(NAMES, key=lambda name: 20.0 if name == "bat" else by_cr[name])
+    if order == Qt.DescendingOrder:
+        expected.reverse()
+    assert shown(model) == expected
+
+
+def test_sort_keeps_persistent_indexes(tested_model, order):
+    model = tested_model
+    model.set_entries(make_entry(name, cr=float(len(NAMES) - i)) for i, name in enumerate(NAMES))
+    persistent = QtCore.QPersistentModelIndex(model.index(1, 0))
+    assert persistent.data() == "cat"
+    model.sort(1, order)
+    assert model.rowCount() == len(NAMES)
+    expected = list(reversed(NAMES)) if order == Qt.AscendingOrder else list(NAMES)
+    assert shown(model) == expected
+    assert persistent.data() == "cat"
+    assert persistent.row() == expected.index("cat")
+    # Sorting the way it is already sorted changes nothing
+    model.sort(1, order)
+    assert shown(model) == expected
+
+
+@pytest.fixture
+def proxy(model):
+    proxy = EntityFilterProxyModel()
+    proxy.setSourceModel(model)
+    yield proxy
+
+
+@pytest.fixture
+def tested_proxy(proxy, model_tester):
+    model_tester(proxy)
+    yield proxy
+
+
+def test_filter_fetches_every_row(proxy, model, model_tester, order):
+    proxy.sort(0, order)
+    model.set_entries(make_entry(name) for name in NAMES)
+    assert proxy.rowCount() == 4
+    proxy.set_filter_text(" O ")
+    model_tester(proxy)
+    assert model.rowCount() == len(NAMES)
+    expected = sorted(["dog", "fox", "hog"], reverse=order == Qt.DescendingOrder)
+    assert shown(proxy) == expected
+    proxy.set_names(["dog", "hog", "imp"])
+    assert shown(proxy) == [name for name in expected if name != "fox"]
+    proxy.set_names(None)
+    proxy.set_filter_text("")
+    assert shown(proxy) == sorted(NAMES, reverse=order == Qt.DescendingOrder)
+
+
+def test_filter_follows_changes(tested_proxy, model, order):
+    proxy = tested_proxy
+    proxy.sort(0, order)
+    proxy.set_filter_text("o")
+    model.put(make_entry("owl"))
+    model.put(make_entry("ape"))
+    model.remove("dog")
+    expected = sorted(["fox", "hog", "owl"], reverse=order == Qt.DescendingOrder)
+    assert shown(proxy) == expected
+    # The title is matched as well as the name
+    model.put(make_entry("ape", title="Orangutan"))
+    assert "ape" in shown(proxy)
+
+
+def test_proxy_sorts_the_source(tested_proxy, model):
+    proxy = tested_proxy
+    proxy.sort(0, Qt.DescendingOrder)
+    assert shown(model) == sorted(NAMES, reverse=True)
+    assert shown(proxy) == shown(model)
+    proxy.sort(0, Qt.AscendingOrder)
+    assert shown(proxy) == sorted(NAMES)
@@ -0,0 +1,85 @@
+import threading
+
+from fourhills.gui.utils import Job
+
+
+def count_to(job, n, fail_at=None):
+    for i in range(n):
+        if job.cancelled:
+            break
+        if i == fail_at:
+            job.report_error(f"Couldn't count {i}")
+            continue
+        job.report_item(i)
+        job.report_progress(i + 1, n, f"Counted {i}")
+    return n
+
+
+def test_job_reports_to_gui_thread(runner, wait_for):
+    items, progress, errors, results, threads = [], [], [], [], []
+    job = Job("Count", count_to, 5, fail_at=2)
+    job.signals.item.connect(items.append)
+    job.signals.progress.connect(lambda *args: progress.append(args))
+    job.signals.error.connect(errors.append)
+    job.signals.finished.connect(lambda result: threads.append(threading.current_thread()))
+    job.signals.finished.connect(results.append)
+    ended = []
+    runner.jobEnded.connect(ended.append)
+    runner.start(job)
+    assert runner.jobs == [job]
+
+    wait_for(lambda: ended)
+    assert results == [5]
+    assert job.state == Job.DONE
+    assert items == [0, 1, 3, 4]
+    assert progress[-1] == (5, 5, "Counted 4")
+    assert errors == job.errors == ["Couldn't count 2"]
+    assert threads == [threading.main_thread()]
+    assert runner.jobs == []
+
+
+def test_job_cancelled(runner, wait_for):
+    started = threading.Event()
+    cancelled = threading.Event()
+
+    def wait_until_cancelled(job):
+        job.on_cancel(cancelled.set)
+        started.set()
+        cancelled.wait(5)
+        return "stopped early"
+
+    results = []
+    job = Job("Wait", wait_until_cancelled)
+    job.signals.finished.connect(results.append)
+    runner.start(job)
+    assert started.wait(5)
+    assert not job.ended
+    runner.cancel_all()
+    wait_for(lambda: results)
+    assert results == ["stopped early"]
+    assert job.state == Job.CANCELLED
+
+
+def test_job_cancelled_before_it_starts(runner, wait_for):
+    results = []
+    job = Job("Never run", count_to, 5)
+    job.signals.finished.connect(results.append)
+    job.cancel()
+    runner.start(job)
+    wait_for(lambda: results)
+    assert results == [None]
+    assert job.state == Job.CANCELLED
+
+
+def test_job_failed(runner, wait_for):
+    def fail(job):
+        raise ValueError("No monsters here")
+
+    failures = []
+    job = Job("Fail", fail)
+    job.signals.failed.connect(failures.append)
+    runner.start(job)
+    wait_for(lambda: failures)
+    assert failures == ["No monsters here"]
+    assert job.state == Job.FAILED
+    assert runner.jobs == []
@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+
+from fourhills.gui.utils import WorldWatcher
+from fourhills.gui.utils import world_watcher
+from fourhills.watcher import TreeSnapshot
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "npcs").mkdir()
+    (tmp_path / "npcs" / "smith.yaml").write_text("name: Smith")
+    (tmp_path / "notes.md").write_text("# Notes")
+    yield tmp_path
+
+
+@pytest.fixture
+def watched(app, runner):
+    """Make watchers which are stopped at the end of the test, with their changes"""
+    watchers = []
+
+    def watch(root, **kwargs):
+        watcher = WorldWatcher(root, runner=runner, **kwargs)
+        changes = []
+        watcher.changed.connect(changes.append)
+        watchers.append(watcher)
+        return watcher, changes
+
+    yield watch
+    for watcher in watchers:
+        watcher.stop()
+
+
+def watched_paths(watcher):
+    return set(watcher._watcher.directories()) | set(watcher._watcher.files())
+
+
+def test_events_are_coalesced(tree, watched):
+    watcher, changes = watched(tree)
+    assert not watcher.is_polling
+    (tree / "npcs" / "baker.yaml").write_text("name: Baker")
+    (tree / "npcs" / "smith.yaml").unlink()
+    watcher.on_path_changed(str(tree / "npcs"))
+    watcher.on_path_changed(str(tree / "npcs" / "smith.yaml"))
+    assert watcher._debounce_timer.isActive()
+    assert changes == []
+
+    watcher.flush()
+    assert not watcher._debounce_timer.isActive()
+    assert len(changes) == 1
+    assert changes[0].added == {tree / "npcs" / "baker.yaml"}
+    assert changes[0].removed == {tree / "npcs" / "smith.yaml"}
+    # Nothing is emitted when there is nothing new
+    watcher.flush()
+    assert len(changes) == 1
+
+
+def test_watched_paths_follow_the_tree(tree, watched):
+    watcher, changes = watched(tree)
+    assert watched_paths(watcher) == {
+        str(tree), str(tree / "npcs"), str(tree / "npcs" / "smith.yaml"), str(tree / "notes.md")
+    }
+    (tree / "quests").mkdir()
+    (tree / "quests" / "rats.md").write_text("Rats")
+    (tree / "npcs" / "smith.yaml").rename(tree / "npcs" / "blacksmith.yaml")
+    watcher.on_path_changed(str(tree))
+    watcher.on_path_changed(str(tree / "npcs"))
+    watcher.flush()
+    assert changes[0].added == {tree / "quests"}
+    assert changes[0].renamed == {tree / "npcs" / "smith.yaml": tree / "npcs" / "blacksmith.yaml"}
+    assert watched_paths(watcher) == {
+        str(tree), str(tree / "npcs"), str(tree / "npcs" / "blacksmith.yaml"),
+        str(tree / "notes.md"), str(tree / "quests"), str(tree / "quests" / "rats.md"),
+    }
+
+
+def test_too_many_paths_are_polled(tree, watched, monkeypatch):
+    monkeypatch.setattr(WorldWatcher, "MAX_WATCHED_PATHS", 3)
+    watcher, _ = watched(tree)
+    assert watcher.is_polling
+    assert watcher._poll_timer.isActive()
+
+
+def test_falls_back_to_polling_as_the_tree_grows(tree, watched, monkeypatch):
+    monkeypatch.setattr(WorldWatcher, "MAX_WATCHED_PATHS", 5)
+    watcher, changes = watched(tree)
+    assert not watcher.is_polling
+    (tree / "a.md").write_text("A")
+    (tree / "b.md").write_text("B")
+    watcher.on_path_changed(str(tree))
+    watcher.flush()
+    assert watcher.is_polling
+    assert watcher._poll_timer.isActive()
+    # The changes which tipped it over are still reported
+    assert changes[0].added == {tree / "a.md", tree / "b.md"}
+
+
+def test_poll_scans_on_a_worker_thread(tree, watched, wait_for, monkeypatch):
+    threads = []
+    scan_tree = world_watcher.scan_tree
+
+    def record_thread(job, snapshot):
+        threads.append(threading.current_thread())
+        return scan_tree(job, snapshot)
+
+    monkeypatch.setattr(world_watcher, "scan_tree", record_thread)
+    watcher, changes = watched(tree, use_polling=True)
+    assert watcher.is_polling
+    (tree / "npcs" / "smith.yaml").write_text("name: Smith\nage: 40")
+    watcher.poll()
+    assert watcher.is_scanning
+    # Only one scan runs at a time
+    watcher.poll()
+    wait_for(lambda: not watcher.is_scanning)
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+    assert len(changes) == 1
+    assert changes[0].modified == {tree / "npcs" / "smith.yaml"}
+    # Nothing is emitted when nothing changed
+    watcher.poll()
+    wait_for(lambda: not watcher.is_scanning)
+    assert len(changes) == 1
+
+
+def test_no_changes_after_stopping(tree, watched, wait_for):
+    watcher, changes = watched(tree, use_polling=True)
+    (tree / "c.md").write_text("C")
+    watcher.poll()
+    watcher.stop()
+    wait_for(lambda: not watcher.is_scanning)
+    assert changes == []
+    watcher.poll()
+    assert not watcher.is_scanning
+
+
+def test_starts_from_the_snapshot_given(tree, watched, wait_for):
+    snapshot = TreeSnapshot(tree)
+    snapshot.scan()
+    # Made after the snapshot, e.g. while the world was loading
+    (tree / "late.md").write_text("Late")
+    watcher, changes = watched(tree, snapshot=snapshot, use_polling=True)
+    assert watcher.snapshot is snapshot
+    watcher.poll()
+    wait_for(lambda: not watcher.is_scanning)
+    assert changes[0].added == {tree / "late.md"}
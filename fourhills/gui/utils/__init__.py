@@ -1,8 +1,13 @@
 from .config import Config
 from .frozen_path import get_jinja_env, get_template_path
+from .jobs import Job, JobRunner
+from .world_watcher import WorldWatcher
 
 __all__ = [
     "Config",
     "get_jinja_env",
     "get_template_path",
+    "Job",
+    "JobRunner",
+    "WorldWatcher",
 ]
@@ -2,9 +2,9 @@ from appdirs import user_data_dir
 import datetime
 from pathlib import Path
 from typing import List
-import yaml
 
 from fourhills.fourhills import AUTHOR, PACKAGE
+from fourhills.utils.yaml_loader import dump_yaml, load_yaml
 
 
 class Config:
@@ -21,9 +21,7 @@ class Config:
             conf_path.touch()
             return {}
         else:
-            conf = {}
-            with open(conf_path) as f:
-                conf = yaml.safe_load(f)
+            conf = load_yaml(conf_path)
             if conf is None:
                 conf = {}
             return conf
@@ -35,7 +33,7 @@ class Config:
             conf_path.parent.mkdir(parents=True)
             conf_path.touch()
         with open(conf_path, 'w') as f:
-            yaml.safe_dump(conf, f)
+            dump_yaml(conf, f)
 
     @staticmethod
     def _validate_recent_worlds(conf):
@@ -0,0 +1,161 @@
+"""Running slow work, such as importing monsters or loading a world, off the GUI thread"""
+
+import threading
+from typing import Callable, List, Optional
+
+from PyQt5 import QtCore
+
+
+class JobSignals(QtCore.QObject):
+    """The signals of a `Job`, which are delivered on the GUI thread.
+
+    `QRunnable` isn't a `QObject`, so can't have signals of its own.
+    """
+
+    # Steps done, total steps (0 if unknown) and what is being done
+    progress = QtCore.pyqtSignal(int, int, str)
+    # Each piece of output the job produces before it finishes, e.g. each monster imported
+    item = QtCore.pyqtSignal(object)
+    # Something which went wrong without stopping the job, e.g. one monster failing
+    error = QtCore.pyqtSignal(str)
+    # The job's result, emitted when it returns, even if it was cancelled
+    finished = QtCore.pyqtSignal(object)
+    # Why the job stopped, if it raised an exception
+    failed = QtCore.pyqtSignal(str)
+
+
+class Job(QtCore.QRunnable):
+    """A function run on a worker thread, with progress, errors and cancellation.
+
+    The function is called as `function(job, *args, **kwargs)`, and uses the job to
+    report progress and errors, and to find out whether it has been cancelled. It must
+    not touch any widgets; anything it needs to show goes through the job's signals,
+    which are delivered on the GUI thread.
+
+    Cancelling a job only asks it to stop: the function should check `cancelled`
+    regularly, or register a callback with `on_cancel`, and return early.
+    """
+
+    PENDING = "Waiting"
+    RUNNING = "Running"
+    DONE = "Done"
+    CANCELLED = "Cancelled"
+    FAILED = "Failed"
+
+    def __init__(self, title: str, function: Callable, *args, **kwargs):
+        super().__init__()
+        # The runner keeps the job until it ends, so Qt mustn't delete it
+        self.setAutoDelete(False)
+        self.title = title
+        # Quiet jobs, such as polling a world for changes, aren't shown in the jobs pane
+        self.quiet = False
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self.state = self.PENDING
+        self.errors: List[str] = []
+        self._cancelled = threading.Event()
+        self._cancel_callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def ended(self) -> bool:
+        return self.state in (self.DONE, self.CANCELLED, self.FAILED)
+
+    def cancel(self):
+        """Ask the job to stop as soon as it can"""
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Call `callback` when the job is cancelled, or now if it already has been"""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def report_progress(self, done: int, total: int = 0, message: str = ""):
+        self.signals.progress.emit(done, total, message)
+
+    def report_item(self, item):
+        self.signals.item.emit(item)
+
+    def report_error(self, message: str):
+        self.errors.append(message)
+        self.signals.error.emit(message)
+
+    def run(self):
+        if self.cancelled:
+            self.state = self.CANCELLED
+            self.signals.finished.emit(None)
+            return
+        self.state = self.RUNNING
+        try:
+            result = self.function(self, *self.args, **self.kwargs)
+        except Exception as exc:
+            self.state = self.FAILED
+            self.signals.failed.emit(str(exc) or type(exc).__name__)
+            return
+        self.state = self.CANCELLED if self.cancelled else self.DONE
+        self.signals.finished.emit(result)
+
+
+class JobRunner(QtCore.QObject):
+    """Runs jobs on a pool of worker threads, keeping track of those still going.
+
+    There is one runner for the application, from `get_runner`, so that every pane
+    and dialog's jobs can be shown and cancelled in one place.
+    """
+
+    jobAdded = QtCore.pyqtSignal(Job)
+    jobEnded = QtCore.pyqtSignal(Job)
+
+    def __init__(self, max_threads: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        if max_threads is not None:
+            self.pool.setMaxThreadCount(max_threads)
+        self.jobs: List[Job] = []
+
+    @staticmethod
+    def get_runner() -> "JobRunner":
+        if not hasattr(JobRunner, "_runner"):
+            JobRunner._runner = JobRunner(parent=QtCore.QCoreApplication.instance())
+        return JobRunner._runner
+
+    def start(self, job: Job) -> Job:
+        """Queue a job to run as soon as a worker thread is free.
+
+        Connect to the job's signals before starting it: a quick job may have finished
+        before this returns.
+        """
+        self.jobs.append(job)
+        job.signals.finished.connect(lambda _: self._job_ended(job))
+        job.signals.failed.connect(lambda _: self._job_ended(job))
+        self.jobAdded.emit(job)
+        self.pool.start(job)
+        return job
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Block until every job has ended, or the time runs out"""
+        return self.pool.waitForDone(msecs)
+
+    def _job_ended(self, job: Job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+            self.jobEnded.emit(job)
@@ -0,0 +1,65 @@
+"""Helpers for applying filesystem change sets to list widgets in place"""
+
+from typing import Callable
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt
+
+from fourhills.watcher import ChangeSet
+
+
+def patch_list_widget(
+    list_widget: QtWidgets.QListWidget,
+    changes: ChangeSet,
+    item_name: Callable,
+    set_item: Callable,
+):
+    """Apply a set of changes to a list widget holding one item per name.
+
+    Parameters
+    ----------
+    list_widget : QtWidgets.QListWidget
+        The list to update.
+    changes : ChangeSet
+        The changes to apply. Changes which have already been applied are ignored.
+    item_name : callable
+        Called as `item_name(path, exists)`, returning the name of the list item for a
+        path, or None if the path has no item. `exists` is False for paths which are no
+        longer on disk, so can't be inspected.
+    set_item : callable
+        Called as `set_item(item, name)` to set the text and data of an item.
+    """
+    def find(name):
+        items = list_widget.findItems(name, Qt.MatchExactly)
+        return items[0] if items else None
+
+    def remove(name):
+        item = find(name)
+        if item is not None:
+            list_widget.takeItem(list_widget.row(item))
+
+    def add(name):
+        if find(name) is None:
+            item = QtWidgets.QListWidgetItem()
+            set_item(item, name)
+            list_widget.addItem(item)
+
+    for old, new in changes.ordered_renames():
+        old_name = item_name(old, False)
+        new_name = item_name(new, True)
+        item = find(old_name) if old_name else None
+        if item is not None and new_name and find(new_name) is None:
+            # Rename in place, so the item keeps its selection
+            set_item(item, new_name)
+            continue
+        if old_name:
+            remove(old_name)
+        if new_name:
+            add(new_name)
+    for path in changes.removed:
+        name = item_name(path, False)
+        if name:
+            remove(name)
+    for path in changes.added:
+        name = item_name(path, True)
+        if name:
+            add(name)
@@ -0,0 +1,155 @@
+from pathlib import Path
+from typing import Optional
+
+from PyQt5 import QtCore
+
+from fourhills.gui.utils.jobs import Job, JobRunner
+from fourhills.watcher import ChangeSet, TreeSnapshot, directory_for_event
+
+
+def scan_tree(job: Job, snapshot: TreeSnapshot) -> ChangeSet:
+    """Scan the whole of a snapshot's tree, as a job"""
+    return snapshot.scan()
+
+
+class WorldWatcher(QtCore.QObject):
+    """Watches a world's directory for changes, including those made outside the GUI.
+
+    Filesystem events are collected for a short time, then the directories they came
+    from are rescanned and one coalesced `ChangeSet` is emitted through `changed`.
+    QFileSystemWatcher is used where possible; if it can't watch every directory and
+    file, e.g. because of an inotify limit or a network drive, the whole tree is polled
+    instead, on a worker thread.
+
+    Scanning a large world takes a while, so the first snapshot can be taken elsewhere,
+    e.g. while the world is loading, and passed in.
+    """
+
+    DEBOUNCE_MS = 300
+    POLL_INTERVAL_MS = 2000
+    # Watching more paths than this costs more than polling
+    MAX_WATCHED_PATHS = 8192
+
+    changed = QtCore.pyqtSignal(ChangeSet)
+
+    def __init__(
+        self,
+        root: Path,
+        snapshot: Optional[TreeSnapshot] = None,
+        use_polling: bool = False,
+        runner: Optional[JobRunner] = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        if snapshot is None:
+            snapshot = TreeSnapshot(root)
+            snapshot.scan()
+        self.snapshot = snapshot
+        self._runner = runner
+        self._poll_job = None
+        self._stopped = False
+        self._dirty = set()
+
+        self._debounce_timer = QtCore.QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self._debounce_timer.timeout.connect(self.flush)
+
+        self._poll_timer = QtCore.QTimer(self)
+        self._poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self.poll)
+
+        self._watcher = None
+        if not use_polling:
+            self._watcher = QtCore.QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self.on_path_changed)
+            self._watcher.fileChanged.connect(self.on_path_changed)
+            if not self._sync_watched_paths():
+                self._stop_watching()
+        if self._watcher is None:
+            self._poll_timer.start()
+
+    @property
+    def root(self) -> Path:
+        return self.snapshot.root
+
+    @property
+    def is_polling(self) -> bool:
+        return self._watcher is None
+
+    @property
+    def is_scanning(self) -> bool:
+        """Whether a poll is scanning the tree on a worker thread"""
+        return self._poll_job is not None
+
+    def stop(self):
+        """Stop watching; no more changes will be emitted"""
+        self._stopped = True
+        self._debounce_timer.stop()
+        self._poll_timer.stop()
+        self._stop_watching()
+        if self._poll_job is not None:
+            self._poll_job.cancel()
+
+    def on_path_changed(self, path):
+        directory = directory_for_event(Path(path), self.snapshot)
+        if directory is not None:
+            self._dirty.add(directory)
+        self._debounce_timer.start()
+
+    def flush(self):
+        """Rescan the directories with pending events and emit what changed"""
+        self._debounce_timer.stop()
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        changes = self.snapshot.rescan(dirty)
+        if self._watcher is not None and not self._sync_watched_paths():
+            # Too much to watch now; fall back to polling
+            self._stop_watching()
+            self._poll_timer.start()
+        if changes:
+            self.changed.emit(changes)
+
+    def poll(self):
+        """Start scanning the whole tree on a worker thread, unless a scan is running.
+
+        What changed is emitted when the scan finishes.
+        """
+        if self._stopped or self._poll_job is not None:
+            return
+        job = Job(f"Scan {self.root.name}", scan_tree, self.snapshot)
+        job.quiet = True
+        job.signals.finished.connect(self._on_polled)
+        job.signals.failed.connect(lambda _: self._on_polled(None))
+        self._poll_job = job
+        (self._runner or JobRunner.get_runner()).start(job)
+
+    def _on_polled(self, changes: Optional[ChangeSet]):
+        self._poll_job = None
+        if changes and not self._stopped:
+            self.changed.emit(changes)
+
+    def _stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.directoryChanged.disconnect(self.on_path_changed)
+            self._watcher.fileChanged.disconnect(self.on_path_changed)
+            self._watcher.deleteLater()
+            self._watcher = None
+
+    def _sync_watched_paths(self) -> bool:
+        """Watch every directory and file in the snapshot, returning False on failure"""
+        wanted = {str(path) for path in self.snapshot.directories() | self.snapshot.files()}
+        if len(wanted) > self.MAX_WATCHED_PATHS:
+            return False
+        watched = set(self._watcher.directories()) | set(self._watcher.files())
+        stale = watched - wanted
+        if stale:
+            self._watcher.removePaths(list(stale))
+        missing = wanted - watched
+        if missing:
+            failed = self._watcher.addPaths(list(missing))
+            # Files can disappear between the scan and now; anything else is a failure
+            if any(Path(path).exists() for path in failed):
+                return False
+        return True
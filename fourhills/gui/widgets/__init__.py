@@ -1,11 +1,19 @@
+from .batch_import_dialog import BatchImportDialog
 from .deselectable_tree_widget import DeselectableTree
+from .encounter_generator_dialog import EncounterGeneratorDialog
+from .entity_list_view import EntityListView
 from .image_viewer_widget import ImageViewerWidget
 from .linking_browser import LinkingBrowser
+from .stat_filter_widget import StatFilterWidget
 from .workspace_tab_widget import WorkspaceTabWidget
 
 __all__ = [
+    "BatchImportDialog",
     "DeselectableTree",
+    "EncounterGeneratorDialog",
+    "EntityListView",
     "ImageViewerWidget",
     "LinkingBrowser",
+    "StatFilterWidget",
     "WorkspaceTabWidget",
 ]
@@ -0,0 +1,191 @@
+from pathlib import Path
+from typing import Optional
+
+from PyQt5 import QtCore, QtWidgets
+
+from fourhills.gui.utils import Job, JobRunner
+
+from fourhills.utils.batch_import import (
+    BatchImporter,
+    BatchImportResult,
+    ImportProgress,
+    read_monster_names,
+)
+from fourhills.utils.page_cache import PageCache
+
+
+def run_batch_import(job: Job, importer: BatchImporter, names) -> BatchImportResult:
+    """Run a `BatchImporter` as a job, reporting each monster as an item"""
+    job.on_cancel(importer.cancel)
+
+    def report(progress: ImportProgress):
+        job.report_progress(progress.done, progress.total, progress.name)
+        job.report_item(progress)
+        if progress.error is not None:
+            job.report_error(f"{progress.name}: {progress.error}")
+
+    return importer.run(names, progress=report)
+
+
+class BatchImportDialog(QtWidgets.QDialog):
+    """Imports a list of monsters from D&D Beyond, several at once.
+
+    The import runs in the background as a job, so the rest of the GUI can be used
+    meanwhile, and carries on if the dialog is closed. An import which is cancelled,
+    or interrupted by closing the application, carries on where it left off the next
+    time the same monsters are imported.
+
+    `monstersImported` is emitted with the paths of the new monster files as each one
+    is written.
+    """
+
+    monstersImported = QtCore.pyqtSignal(list)
+
+    def __init__(
+        self,
+        output_dir: Path,
+        queue_path: Path,
+        page_cache: Optional[PageCache] = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.output_dir = output_dir
+        self.queue_path = queue_path
+        self.page_cache = page_cache
+        self.import_job = None
+        self.setWindowTitle("Batch Import Monsters")
+
+        self.names_edit = QtWidgets.QPlainTextEdit()
+        self.names_edit.setPlaceholderText("One monster name or D&D Beyond URL per line")
+        self.load_btn = QtWidgets.QPushButton("Load from File...")
+        self.load_btn.pressed.connect(self.load_names)
+
+        self.workers_spin = QtWidgets.QSpinBox()
+        self.workers_spin.setRange(1, 16)
+        self.workers_spin.setValue(4)
+        self.overwrite_check = QtWidgets.QCheckBox("Replace existing monsters")
+        self.offline_check = QtWidgets.QCheckBox("Only use pages downloaded before (offline)")
+        self.offline_check.setEnabled(page_cache is not None)
+
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setValue(0)
+        self.log_list = QtWidgets.QListWidget()
+
+        self.buttons = QtWidgets.QDialogButtonBox()
+        self.start_btn = self.buttons.addButton("Import", QtWidgets.QDialogButtonBox.AcceptRole)
+        self.cancel_btn = self.buttons.addButton(
+            "Cancel Import", QtWidgets.QDialogButtonBox.ActionRole
+        )
+        self.cancel_btn.setEnabled(False)
+        self.close_btn = self.buttons.addButton(QtWidgets.QDialogButtonBox.Close)
+        self.start_btn.pressed.connect(self.start)
+        self.cancel_btn.pressed.connect(self.cancel)
+        self.close_btn.pressed.connect(self.reject)
+
+        options = QtWidgets.QFormLayout()
+        options.addRow("Monsters at once:", self.workers_spin)
+        options.addRow(self.overwrite_check)
+        options.addRow(self.offline_check)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.names_edit)
+        layout.addWidget(self.load_btn)
+        layout.addLayout(options)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.log_list)
+        layout.addWidget(self.buttons)
+        self.setLayout(layout)
+
+    @property
+    def running(self) -> bool:
+        return self.import_job is not None and not self.import_job.ended
+
+    def load_names(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Load monster names", "", "Text files (*.txt);;All files (*)"
+        )
+        if not path:
+            return
+        with open(path, encoding="utf-8") as f:
+            self.names_edit.setPlainText(f.read())
+
+    def names(self):
+        return read_monster_names(self.names_edit.toPlainText().splitlines())
+
+    def start(self):
+        if self.running:
+            return
+        names = self.names()
+        if not names:
+            return
+        importer = BatchImporter(
+            self.output_dir,
+            queue_path=self.queue_path,
+            workers=self.workers_spin.value(),
+            overwrite=self.overwrite_check.isChecked(),
+            page_cache=self.page_cache,
+            offline=self.offline_check.isChecked(),
+        )
+        self.log_list.clear()
+        self.progress_bar.setRange(0, 0)
+        self.set_running(True)
+
+        title = f"Import {len(names)} monsters" if len(names) > 1 else f"Import {names[0]}"
+        self.import_job = Job(title, run_batch_import, importer, names)
+        self.import_job.signals.item.connect(self.on_progress)
+        self.import_job.signals.finished.connect(self.on_finished)
+        self.import_job.signals.failed.connect(self.on_failed)
+        JobRunner.get_runner().start(self.import_job)
+
+    def cancel(self):
+        """Stop importing; monsters already downloading are finished first"""
+        if self.running:
+            self.import_job.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.log_list.addItem("Cancelling...")
+
+    def set_running(self, running: bool):
+        self.start_btn.setEnabled(not running)
+        self.names_edit.setReadOnly(running)
+        self.load_btn.setEnabled(not running)
+        self.workers_spin.setEnabled(not running)
+        self.overwrite_check.setEnabled(not running)
+        self.offline_check.setEnabled(not running and self.page_cache is not None)
+        self.cancel_btn.setEnabled(running)
+
+    def on_progress(self, progress: ImportProgress):
+        self.progress_bar.setRange(0, progress.total)
+        self.progress_bar.setValue(progress.done)
+        if progress.output_path is not None:
+            self.log_list.addItem(f"Imported {progress.name}")
+            self.monstersImported.emit([progress.output_path])
+        elif progress.error is None:
+            self.log_list.addItem(f"Skipped {progress.name}, already imported")
+        else:
+            self.log_list.addItem(f"Failed to import {progress.name}: {progress.error}")
+        self.log_list.scrollToBottom()
+
+    def on_finished(self, result: Optional[BatchImportResult]):
+        self.set_running(False)
+        if result is None:
+            # Cancelled before it started
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(0)
+            self.log_list.addItem("Cancelled.")
+            return
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(1 if not result.cancelled else 0)
+        summary = (
+            f"Imported {len(result.imported)}, skipped {len(result.skipped)} already "
+            f"imported, {len(result.failed)} failed."
+        )
+        if result.cancelled:
+            summary = "Cancelled. " + summary + " Import again to carry on."
+        self.log_list.addItem(summary)
+        self.log_list.scrollToBottom()
+
+    def on_failed(self, message: str):
+        self.set_running(False)
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+        self.log_list.addItem(f"Import stopped: {message}")
@@ -1,7 +1,7 @@
 from PyQt5 import QtWidgets
 
 
-class DeselectableTree(QtWidgets.QTreeWidget):
+class DeselectableTree(QtWidgets.QTreeView):
     def mousePressEvent(self, event):
         self.clearSelection()
         super().mousePressEvent(event)
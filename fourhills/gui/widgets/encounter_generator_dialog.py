@@ -0,0 +1,140 @@
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtCore import Qt
+
+from fourhills.encounter_generator import EncounterGenerator
+from fourhills.encounters import DIFFICULTIES, parse_levels, world_parties
+from fourhills.exceptions import FourhillsEncounterError
+from fourhills.gui.events import AnchorClickedEvent
+from fourhills.utils.cr_to_xp import format_cr
+
+
+class EncounterGeneratorDialog(QtWidgets.QDialog):
+    """Suggests encounters of a difficulty for a party from the monsters in a world.
+
+    Activating a suggestion opens its monsters.
+    """
+
+    CUSTOM_LEVELS = "Other levels..."
+
+    def __init__(self, world, parent=None):
+        super().__init__(parent)
+        self.world = world
+        self.generator = EncounterGenerator.from_world(world)
+        self.parties = world_parties(world)
+        self.setWindowTitle("Generate Encounter")
+
+        self.party_combo = QtWidgets.QComboBox()
+        self.party_combo.addItems(list(self.parties) + [self.CUSTOM_LEVELS])
+        self.party_combo.currentTextChanged.connect(self.on_party_changed)
+        self.levels_edit = QtWidgets.QLineEdit()
+        self.levels_edit.setPlaceholderText("e.g. 3,3,4,5 or 4x3")
+        self.difficulty_combo = QtWidgets.QComboBox()
+        self.difficulty_combo.addItems([name.capitalize() for name in DIFFICULTIES[1:]])
+        self.difficulty_combo.setCurrentText("Medium")
+
+        # Filters, which may be left blank
+        self.type_combo = QtWidgets.QComboBox()
+        self.type_combo.setEditable(True)
+        self.type_combo.addItems([""] + self.generator.creature_types())
+        self.environment_combo = QtWidgets.QComboBox()
+        self.environment_combo.addItems([""] + self.generator.environments())
+
+        self.max_monsters_spin = QtWidgets.QSpinBox()
+        self.max_monsters_spin.setRange(1, 30)
+        self.max_monsters_spin.setValue(EncounterGenerator.DEFAULT_MAX_MONSTERS)
+        self.max_kinds_spin = QtWidgets.QSpinBox()
+        self.max_kinds_spin.setRange(1, 5)
+        self.max_kinds_spin.setValue(EncounterGenerator.DEFAULT_MAX_KINDS)
+        self.limit_spin = QtWidgets.QSpinBox()
+        self.limit_spin.setRange(1, 100)
+        self.limit_spin.setValue(10)
+
+        self.result_list = QtWidgets.QTreeWidget()
+        self.result_list.setHeaderLabels(["Monsters", "XP", "Adjusted XP"])
+        self.result_list.setRootIsDecorated(False)
+        self.result_list.itemActivated.connect(self.on_result_activated)
+        self.message_label = QtWidgets.QLabel()
+
+        self.buttons = QtWidgets.QDialogButtonBox()
+        self.generate_btn = self.buttons.addButton(
+            "Generate", QtWidgets.QDialogButtonBox.ActionRole
+        )
+        self.close_btn = self.buttons.addButton(QtWidgets.QDialogButtonBox.Close)
+        self.generate_btn.pressed.connect(self.generate)
+        self.close_btn.pressed.connect(self.reject)
+
+        options = QtWidgets.QFormLayout()
+        options.addRow("Party:", self.party_combo)
+        options.addRow("Levels:", self.levels_edit)
+        options.addRow("Difficulty:", self.difficulty_combo)
+        options.addRow("Creature type:", self.type_combo)
+        options.addRow("Environment:", self.environment_combo)
+        options.addRow("Most monsters:", self.max_monsters_spin)
+        options.addRow("Most kinds of monster:", self.max_kinds_spin)
+        options.addRow("Suggestions:", self.limit_spin)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(options)
+        layout.addWidget(self.result_list)
+        layout.addWidget(self.message_label)
+        layout.addWidget(self.buttons)
+        self.setLayout(layout)
+
+        self.on_party_changed(self.party_combo.currentText())
+
+    def set_environment(self, environment: str):
+        """Only suggest monsters from an environment, e.g. that of a location"""
+        self.environment_combo.setCurrentText(environment.lower())
+
+    def on_party_changed(self, name: str):
+        levels = self.parties.get(name)
+        self.levels_edit.setReadOnly(levels is not None)
+        if levels is not None:
+            self.levels_edit.setText(",".join(str(level) for level in levels))
+        else:
+            self.levels_edit.clear()
+            self.levels_edit.setFocus()
+
+    def generate(self):
+        self.result_list.clear()
+        try:
+            levels = parse_levels(self.levels_edit.text())
+            encounters = self.generator.generate(
+                levels,
+                self.difficulty_combo.currentText().lower(),
+                limit=self.limit_spin.value(),
+                creature_type=self.type_combo.currentText().strip() or None,
+                environment=self.environment_combo.currentText() or None,
+                max_monsters=self.max_monsters_spin.value(),
+                max_kinds=self.max_kinds_spin.value(),
+            )
+        except FourhillsEncounterError as exc:
+            self.message_label.setText(str(exc))
+            return
+
+        for encounter in encounters:
+            monsters = ", ".join(
+                f"{quantity} x {monster.name} (CR {format_cr(monster.cr)})"
+                for monster, quantity in encounter.monsters
+            )
+            item = QtWidgets.QTreeWidgetItem([
+                monsters,
+                f"{encounter.assessment.xp:.0f}",
+                f"{encounter.assessment.adjusted_xp:.0f}",
+            ])
+            item.setData(0, Qt.UserRole, [monster.name for monster, _ in encounter.monsters])
+            self.result_list.addTopLevelItem(item)
+        self.result_list.resizeColumnToContents(0)
+        if encounters:
+            self.message_label.setText(f"{len(encounters)} encounters")
+        else:
+            self.message_label.setText(
+                "No encounters found; try fewer filters, or more monsters or kinds."
+            )
+
+    def on_result_activated(self, item):
+        for name in item.data(0, Qt.UserRole):
+            QtCore.QCoreApplication.postEvent(
+                QtCore.QCoreApplication.instance(),
+                AnchorClickedEvent(QtCore.QUrl(f"monster://{name}"))
+            )
@@ -0,0 +1,64 @@
+from typing import List
+
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtCore import Qt
+
+from fourhills.gui.models import EntityFilterProxyModel, EntityListModel
+
+
+class EntityListView(QtWidgets.QWidget):
+    """A filter box above a sortable list of the objects in an `EntityListModel`"""
+
+    # Wait for the user to stop typing before filtering
+    FILTER_DELAY_MS = 150
+
+    def __init__(self, model: EntityListModel, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.proxy = EntityFilterProxyModel(self)
+        self.proxy.setSourceModel(model)
+
+        self.filter_edit = QtWidgets.QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter")
+        self.filter_edit.setClearButtonEnabled(True)
+
+        self.view = QtWidgets.QTreeView()
+        self.view.setModel(self.proxy)
+        self.view.setRootIsDecorated(False)
+        self.view.setUniformRowHeights(True)
+        self.view.setAllColumnsShowFocus(True)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.view.setSortingEnabled(True)
+        self.view.sortByColumn(0, Qt.AscendingOrder)
+        self.view.header().setStretchLastSection(False)
+        self.view.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        if model.columnCount() == 1:
+            self.view.setHeaderHidden(True)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.filter_edit)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+        self.filter_timer = QtCore.QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        self.filter_edit.returnPressed.connect(self.apply_filter)
+
+    @property
+    def activated(self):
+        """Signal emitted with the index of a row the user activates"""
+        return self.view.activated
+
+    def apply_filter(self):
+        self.filter_timer.stop()
+        self.proxy.set_filter_text(self.filter_edit.text())
+
+    def selected_names(self) -> List[str]:
+        """The names of the selected objects, in the order shown"""
+        rows = sorted(self.view.selectionModel().selectedRows(), key=lambda index: index.row())
+        return [self.model.entry(self.proxy.mapToSource(index).row()).name for index in rows]
@@ -2,7 +2,7 @@ from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtCore import Qt
 
 from fourhills.exceptions import FourhillsError
-from fourhills.gui.events import AnchorClickedEvent
+from fourhills.gui.events import AnchorClickedEvent, FileSavedEvent
 
 
 class LinkingBrowser(QtWidgets.QTextBrowser):
@@ -163,8 +163,12 @@ class LinkingBrowser(QtWidgets.QTextBrowser):
         self._original_text = text
         self.check_changes()
 
-        # Emit saved signal
+        # Emit saved signal, and tell the rest of the application the file changed
         self.fileSaved.emit()
+        QtCore.QCoreApplication.postEvent(
+            QtCore.QCoreApplication.instance(),
+            FileSavedEvent(self._edit_path)
+        )
 
         return True
 
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List
+
+from PyQt5 import QtCore, QtWidgets
+
+from fourhills.dice import DAMAGE_TYPES
+from fourhills.utils.cr_to_xp import CR_VALUES, format_cr
+
+
+class StatFilterWidget(QtWidgets.QWidget):
+    """Filters on the numbers in stat blocks, for the monster and NPC lists.
+
+    `filters` gives the filters chosen, as keyword arguments for `StatsIndex.query`;
+    any left blank are left out.
+    """
+
+    filtersChanged = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        crs = [""] + [format_cr(cr) for cr in CR_VALUES]
+        self.min_cr_combo = QtWidgets.QComboBox()
+        self.min_cr_combo.addItems(crs)
+        self.max_cr_combo = QtWidgets.QComboBox()
+        self.max_cr_combo.addItems(crs)
+        self.type_combo = QtWidgets.QComboBox()
+        self.type_combo.setEditable(True)
+        self.type_combo.lineEdit().setPlaceholderText("Any type")
+        self.immune_combo = QtWidgets.QComboBox()
+        self.immune_combo.addItems([""] + list(DAMAGE_TYPES))
+        self.resistant_combo = QtWidgets.QComboBox()
+        self.resistant_combo.addItems([""] + list(DAMAGE_TYPES))
+
+        for combo in (self.min_cr_combo, self.max_cr_combo, self.immune_combo,
+                      self.resistant_combo):
+            combo.currentIndexChanged.connect(self.filtersChanged)
+        self.type_combo.lineEdit().editingFinished.connect(self.filtersChanged)
+        self.type_combo.activated.connect(self.filtersChanged)
+
+        cr_layout = QtWidgets.QHBoxLayout()
+        cr_layout.addWidget(self.min_cr_combo)
+        cr_layout.addWidget(QtWidgets.QLabel("to"))
+        cr_layout.addWidget(self.max_cr_combo)
+        layout = QtWidgets.QFormLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addRow("CR:", cr_layout)
+        layout.addRow("Type:", self.type_combo)
+        layout.addRow("Immune:", self.immune_combo)
+        layout.addRow("Resists:", self.resistant_combo)
+        self.setLayout(layout)
+
+    def set_creature_types(self, creature_types: List[str]):
+        """Offer these creature types, keeping whatever is typed"""
+        text = self.type_combo.currentText()
+        self.type_combo.blockSignals(True)
+        self.type_combo.clear()
+        self.type_combo.addItems([""] + creature_types)
+        self.type_combo.setCurrentText(text)
+        self.type_combo.blockSignals(False)
+
+    def filters(self) -> Dict[str, Any]:
+        filters: Dict[str, Any] = {}
+        min_cr = self.min_cr_combo.currentText() or None
+        max_cr = self.max_cr_combo.currentText() or None
+        if min_cr or max_cr:
+            filters["cr"] = (min_cr, max_cr)
+        creature_type = self.type_combo.currentText().strip()
+        if creature_type:
+            filters["creature_type"] = creature_type
+        if self.immune_combo.currentText():
+            filters["immune"] = self.immune_combo.currentText()
+        if self.resistant_combo.currentText():
+            filters["resistant"] = self.resistant_combo.currentText()
+        return filters
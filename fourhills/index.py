@@ -0,0 +1,272 @@
+from pathlib import Path
+import threading
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional
+
+from fourhills.setting import Setting
+from fourhills.utils.yaml_loader import load_yaml
+
+# How each kind of object is named in the GUI
+KIND_LABELS = {
+    "npc": "NPC",
+    "monster": "Monster",
+    "location": "Location",
+    "quest": "Quest",
+    "party": "Party",
+    "note": "Note",
+}
+
+
+class Reference(NamedTuple):
+    """An object in the setting: its kind and its name, as used in anchors.
+
+    Locations and quests are named by their path relative to their directory, with
+    forward slashes, e.g. `Reference("location", "Walton/LensonHouse")`. Notes are named
+    by their path relative to the notes directory, e.g. `Reference("note", "plans.md")`.
+    """
+
+    kind: str
+    name: str
+
+    @property
+    def url(self) -> str:
+        return f"{self.kind}://{self.name}"
+
+    @property
+    def label(self) -> str:
+        return KIND_LABELS.get(self.kind, self.kind)
+
+    def __str__(self):
+        return self.name
+
+
+def normalise_name(name: Any) -> Optional[str]:
+    """Tidy an object name or path into the form used by `Reference`."""
+    if name is None:
+        return None
+    if isinstance(name, Path):
+        name = name.as_posix()
+    name = str(name).strip().strip("/")
+    return name or None
+
+
+def read_text(path: Path) -> str:
+    """Read a text file, for use as a loader with the setting's file cache."""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def stats_base_path(setting: Setting, kind: str, data: Any) -> Optional[Path]:
+    """Return the path of the monster an entity takes its stats from, if it does.
+
+    Only NPCs without a challenge rating of their own take it from their `stats_base`.
+    """
+    if not isinstance(data, dict):
+        return None
+    if kind == "npc" and data.get("challenge") is None and data.get("stats_base"):
+        return setting.monsters_dir / f"{data['stats_base']}.yaml"
+    return None
+
+
+def stat_block_data(setting: Setting, kind: str, data: Any) -> Optional[Dict]:
+    """Return the YAML holding an entity's stats: its own, or its `stats_base` monster's.
+
+    NPCs without a challenge rating of their own take it from the stat block they're
+    based on. Returns None if the entity has no stats.
+    """
+    if not isinstance(data, dict):
+        return None
+    stats_path = stats_base_path(setting, kind, data)
+    if stats_path is not None and stats_path.is_file():
+        stats = setting.cache.get(stats_path, load_yaml)
+        if isinstance(stats, dict):
+            return {**stats, **data}
+    return data
+
+
+class FileIndex:
+    """Base class for indexes built from every file in a setting.
+
+    The index is built lazily with one pass over the setting, reading files through
+    the setting's file cache, and is then kept up to date one file or directory at a
+    time with `update_path`. Subclasses implement `_add_file`, `_remove_file`,
+    `_clear` and `_indexed_paths`.
+
+    A file indexed using another file's contents, such as an NPC taking its challenge
+    rating from its `stats_base` monster, should say so with `_depend_on`; it is then
+    indexed again whenever that file changes.
+    """
+
+    def __init__(self, setting: Setting):
+        self.setting = setting
+        self._lock = threading.RLock()
+        self._built = False
+        self._directories = None
+        # The file each indexed file was indexed using, if any, by indexed file
+        self._dependencies: Dict[Path, Path] = {}
+
+    def build(self):
+        """(Re)build the whole index in one pass over the setting."""
+        with self._lock:
+            self.reset()
+            for path in self._indexable_files():
+                source = self.source_for(path)
+                if source is not None:
+                    self._add_file(path, source)
+            self._built = True
+
+    def reset(self):
+        """Forget the whole index; it is rebuilt the next time it is used."""
+        with self._lock:
+            self._clear()
+            self._dependencies.clear()
+            self._built = False
+
+    def update_path(self, path: Path):
+        """Bring the index up to date after a file or directory changed.
+
+        Handles new, changed, deleted and renamed files and directories; for a rename,
+        call this with both the old and the new path. Does nothing if the index hasn't
+        been built yet, as it will see the change when it is.
+        """
+        self.update_paths([path])
+
+    def update_paths(self, paths: Iterable[Path]):
+        """Bring the index up to date after several files or directories changed.
+
+        Equivalent to calling `update_path` for each path, but only goes through the
+        index once, which matters when many files change at once.
+        """
+        if not self._built:
+            return
+        paths = {Path(path) for path in paths}
+        if not paths:
+            return
+        with self._lock:
+            # Files indexed using a changed file are out of date too
+            paths.update(
+                dependent for dependent, dependency in self._dependencies.items()
+                if _is_at_or_below(dependency, paths)
+            )
+            # Drop everything previously indexed at or below the paths
+            stale = [
+                indexed for indexed in self._indexed_paths()
+                if _is_at_or_below(indexed, paths)
+            ]
+            for indexed in stale:
+                self._remove_file(indexed)
+                self._dependencies.pop(indexed, None)
+            added = set()
+            for path in sorted(paths):
+                if path.is_dir():
+                    changed: Iterable[Path] = (
+                        dirpath / filename
+                        for dirpath, _, filenames in self.setting.cache.walk(path)
+                        for filename in filenames
+                    )
+                elif path.is_file():
+                    changed = [path]
+                else:
+                    changed = []
+                for changed_path in changed:
+                    if changed_path in added:
+                        # Already added as part of a parent directory
+                        continue
+                    added.add(changed_path)
+                    source = self.source_for(changed_path)
+                    if source is not None:
+                        self._add_file(changed_path, source)
+
+    def source_for(self, path: Path) -> Optional[Reference]:
+        """Return the object a file belongs to, or None if it isn't part of any.
+
+        For example, both `location.yaml` and `scene.md` belong to their location.
+        """
+        path = Path(path)
+        if path.suffix not in (".yaml", ".md"):
+            return None
+        # Compare path parts, as this is called for every file in the setting
+        parts = path.parts
+        for kind, directory in self._directory_parts():
+            n_parts = len(directory)
+            if parts[:n_parts] != directory:
+                continue
+            rest = parts[n_parts:]
+            if kind in ("npc", "monster", "party"):
+                if len(rest) == 1 and path.suffix == ".yaml":
+                    return Reference(kind, path.stem)
+            elif kind == "note":
+                if path.suffix == ".md":
+                    return Reference(kind, "/".join(rest))
+            elif len(rest) > 1:
+                return Reference(kind, "/".join(rest[:-1]))
+            return None
+        return None
+
+    def _directory_parts(self):
+        if self._directories is None:
+            setting = self.setting
+            self._directories = tuple(
+                (kind, directory.parts) for kind, directory in (
+                    ("npc", setting.npcs_dir),
+                    ("monster", setting.monsters_dir),
+                    ("party", setting.parties_dir),
+                    ("location", setting.world_dir),
+                    ("quest", setting.quest_dir),
+                    ("note", setting.notes_dir),
+                )
+            )
+        return self._directories
+
+    def _depend_on(self, path: Path, dependency: Path):
+        """Note that a file being indexed uses another file, which may not exist yet."""
+        self._dependencies[path] = dependency
+
+    def _stat_block_data(self, path: Path, kind: str, data: Any) -> Optional[Dict]:
+        """`stat_block_data` for a file being indexed, noting any monster it uses."""
+        stats_path = stats_base_path(self.setting, kind, data)
+        if stats_path is not None:
+            self._depend_on(path, stats_path)
+        return stat_block_data(self.setting, kind, data)
+
+    def _ensure_built(self):
+        if not self._built:
+            self.build()
+
+    def _indexable_files(self) -> Iterator[Path]:
+        cache = self.setting.cache
+        for directory in (
+            self.setting.npcs_dir,
+            self.setting.monsters_dir,
+            self.setting.parties_dir,
+        ):
+            for name, is_dir in cache.list_dir(directory):
+                if not is_dir:
+                    yield directory / name
+        for directory in (
+            self.setting.world_dir,
+            self.setting.quest_dir,
+            self.setting.notes_dir,
+        ):
+            for dirpath, _, filenames in cache.walk(directory):
+                for filename in filenames:
+                    yield dirpath / filename
+
+    def _add_file(self, path: Path, source: Reference):
+        """Index one file belonging to an object."""
+        raise NotImplementedError
+
+    def _remove_file(self, path: Path):
+        """Remove one previously indexed file from the index."""
+        raise NotImplementedError
+
+    def _clear(self):
+        """Remove everything from the index."""
+        raise NotImplementedError
+
+    def _indexed_paths(self) -> Iterable[Path]:
+        """Return the paths of every file currently in the index."""
+        raise NotImplementedError
+
+
+def _is_at_or_below(path: Path, paths) -> bool:
+    return path in paths or any(parent in paths for parent in path.parents)
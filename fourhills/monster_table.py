@@ -0,0 +1,122 @@
+"""Many monsters' numbers held as columns, for working on the whole library at once.
+
+A `MonsterTable` has one NumPy array per field, with one row per monster, so a
+question about every monster is a few array operations rather than a loop over stat
+blocks. Each monster's attacks are kept in a second, flat set of columns, with the row
+of the monster making each attack, so that damage can be added up per monster with
+`np.bincount`.
+"""
+
+from dataclasses import dataclass
+import math
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from fourhills.combat import attack_routine, read_number, stat_block_attacks
+from fourhills.utils.cr_to_xp import MAX_CR, cr_to_xp_many, parse_cr
+
+
+@dataclass
+class MonsterTable:
+    """The numbers from many stat blocks, one array per field.
+
+    Numbers which can't be read from a stat block are NaN.
+    """
+
+    names: np.ndarray
+    creature_type: np.ndarray
+    challenge: np.ndarray
+    xp: np.ndarray
+    ac: np.ndarray
+    # The average hit points
+    hp: np.ndarray
+    # The attacks made each round, using the multiattack if there is one
+    attacks_per_round: np.ndarray
+    # One row per attack in a round: the row of the monster making it, its bonus to
+    # hit, and the average damage of a hit and of the dice added on a critical hit
+    attack_monster: np.ndarray
+    attack_hit: np.ndarray
+    attack_damage: np.ndarray
+    attack_critical: np.ndarray
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_stat_blocks(cls, stat_blocks: Iterable[Tuple[str, object]]) -> "MonsterTable":
+        """Build the table from (name, StatBlock) pairs.
+
+        This is the only part which looks at the stat blocks one by one; the dice in
+        them are parsed once per stat block, and once per distinct string overall.
+        """
+        names: List[str] = []
+        creature_types: List[str] = []
+        challenge: List[float] = []
+        ac: List[float] = []
+        hp: List[float] = []
+        attacks_per_round: List[int] = []
+        attack_monster: List[int] = []
+        attack_hit: List[int] = []
+        attack_damage: List[float] = []
+        attack_critical: List[float] = []
+
+        for row, (name, stat_block) in enumerate(stat_blocks):
+            names.append(name)
+            creature_types.append(str(stat_block.creature_type or "").lower())
+            challenge.append(_challenge(stat_block.challenge))
+            armour = read_number(stat_block.ac)
+            ac.append(math.nan if armour is None else armour)
+            hp_dice = stat_block.hp_dice
+            hp.append(math.nan if hp_dice is None else hp_dice.mean)
+            routine = attack_routine(stat_block_attacks(stat_block), stat_block.multiattack)
+            attacks_per_round.append(len(routine))
+            for attack in routine:
+                attack_monster.append(row)
+                attack_hit.append(attack.hit)
+                damage = max(attack.damage.mean, 0)
+                attack_damage.append(damage)
+                attack_critical.append(max(attack.damage.critical().mean, 0) - damage)
+
+        challenge_array = np.array(challenge, dtype=float)
+        xp = np.full(len(names), np.nan)
+        known = (challenge_array >= 0) & (challenge_array <= MAX_CR)
+        xp[known] = cr_to_xp_many(challenge_array[known])
+        return cls(
+            names=np.array(names, dtype=object),
+            creature_type=np.array(creature_types, dtype=object),
+            challenge=challenge_array,
+            xp=xp,
+            ac=np.array(ac, dtype=float),
+            hp=np.array(hp, dtype=float),
+            attacks_per_round=np.array(attacks_per_round, dtype=int),
+            attack_monster=np.array(attack_monster, dtype=int),
+            attack_hit=np.array(attack_hit, dtype=float),
+            attack_damage=np.array(attack_damage, dtype=float),
+            attack_critical=np.array(attack_critical, dtype=float),
+        )
+
+    @classmethod
+    def from_world(cls, world) -> Tuple["MonsterTable", dict]:
+        """Load every monster in a world, parsing the files concurrently.
+
+        Returns
+        -------
+        MonsterTable
+            The monsters which loaded, by name.
+        dict
+            The error for each monster file which couldn't be loaded, by path.
+        """
+        result = world.preload()
+        errors = {
+            path: error for path, error in result.errors.items()
+            if path.parent == world.setting.monsters_dir
+        }
+        return cls.from_stat_blocks(sorted(result.monsters.items())), errors
+
+
+def _challenge(value) -> float:
+    try:
+        return parse_cr(value)
+    except (TypeError, ValueError):
+        return math.nan
@@ -0,0 +1,358 @@
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+import math
+import operator
+from pathlib import Path
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fourhills.exceptions import FourhillsError, FourhillsSearchQueryError
+from fourhills.index import KIND_LABELS, FileIndex, Reference, read_text
+from fourhills.setting import Setting
+from fourhills.utils.cr_to_xp import parse_cr
+from fourhills.utils.yaml_loader import load_yaml
+
+# Words are runs of letters and digits; underscores split names like walton_thug
+TOKEN_RE = re.compile(r"[^\W_]+")
+FILTER_RE = re.compile(r"^(type|cr):(.*)$", re.IGNORECASE)
+CR_FILTER_RE = re.compile(r"^(<=|>=|<|>|=)?\s*(.+)$")
+CR_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    None: operator.eq,
+}
+TYPE_ALIASES = {
+    "npcs": "npc",
+    "monsters": "monster",
+    "locations": "location",
+    "quests": "quest",
+    "parties": "party",
+    "notes": "note",
+}
+
+# BM25 parameters, and how much more a word in an object's name counts than elsewhere
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3
+SNIPPET_LENGTH = 120
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower case words for indexing and searching."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def _flatten_text(value: Any) -> Iterator[str]:
+    """Generate every piece of text in a YAML value, including dictionary keys."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _flatten_text(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten_text(item)
+    elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        yield str(value)
+
+
+@dataclass
+class SearchResult:
+    """One object matching a search, with the file that matched best."""
+
+    reference: Reference
+    path: Path
+    score: float
+    snippet: str = ""
+
+
+@dataclass
+class SearchQuery:
+    """A parsed search query.
+
+    Words are matched in any order, and results are ranked by how well they match;
+    a word ending in `*` matches any word it is a prefix of. `type:` and `cr:`
+    filters must all match, e.g. `goblin* type:monster cr:>=1 cr:<5`.
+    """
+
+    terms: List[str]
+    prefixes: List[str]
+    kinds: Set[str]
+    cr_filters: List[Tuple[Callable[[float, float], bool], float]]
+
+    @classmethod
+    def parse(cls, text: str) -> "SearchQuery":
+        """Parse a query string.
+
+        Raises
+        ------
+        FourhillsSearchQueryError
+            If a filter is not valid.
+        """
+        query = cls(terms=[], prefixes=[], kinds=set(), cr_filters=[])
+        for word in text.split():
+            match = FILTER_RE.match(word)
+            if match:
+                query._add_filter(match.group(1).lower(), match.group(2))
+            elif word.endswith("*"):
+                tokens = tokenize(word)
+                query.terms.extend(tokens[:-1])
+                query.prefixes.extend(tokens[-1:])
+            else:
+                query.terms.extend(tokenize(word))
+        return query
+
+    def _add_filter(self, name: str, value: str):
+        if name == "type":
+            kind = value.lower()
+            kind = TYPE_ALIASES.get(kind, kind)
+            if kind not in KIND_LABELS:
+                raise FourhillsSearchQueryError(
+                    f"Unknown type {value}; expected one of: " + ", ".join(KIND_LABELS)
+                )
+            self.kinds.add(kind)
+        else:
+            match = CR_FILTER_RE.match(value)
+            try:
+                cr = parse_cr(match.group(2)) if match else None
+            except ValueError:
+                cr = None
+            if cr is None:
+                raise FourhillsSearchQueryError(
+                    f"Invalid challenge rating filter cr:{value}; expected e.g. cr:2, "
+                    "cr:>5 or cr:<=1/2"
+                )
+            self.cr_filters.append((CR_OPERATORS[match.group(1)], cr))
+
+    @property
+    def has_words(self) -> bool:
+        return bool(self.terms or self.prefixes)
+
+
+class SearchIndex(FileIndex):
+    """Full-text index of every note, scene, description and entity in a setting.
+
+    Every text field of the YAML entities is indexed along with the Markdown files, and
+    results are ranked with BM25. Like the other indexes, it is built with one pass over
+    the setting and is then updated one file at a time.
+    """
+
+    def __init__(self, setting: Setting):
+        super().__init__(setting)
+        # Inverted index: for every word, how often it appears in each file
+        self._postings: Dict[str, Dict[Path, int]] = {}
+        self._doc_terms: Dict[Path, Tuple[str, ...]] = {}
+        self._doc_lengths: Dict[Path, int] = {}
+        self._doc_sources: Dict[Path, Reference] = {}
+        self._doc_crs: Dict[Path, float] = {}
+        self._total_length = 0
+        # Sorted words, for prefix queries; rebuilt when the words change
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self):
+        """The number of files in the index."""
+        self._ensure_built()
+        return len(self._doc_sources)
+
+    def search(self, query: str, limit: Optional[int] = 20) -> List[SearchResult]:
+        """Find the objects which best match a query.
+
+        Parameters
+        ----------
+        query : str
+            Words to search for, which may end in `*` to match as a prefix, and filters
+            such as `type:npc` or `cr:>5`. See `SearchQuery`.
+        limit : int or None
+            The maximum number of results to return, or None for all of them.
+
+        Returns
+        -------
+        list of SearchResult
+            The matching objects, best first. If the query only has filters, every
+            object passing them is returned, sorted by kind and name.
+
+        Raises
+        ------
+        FourhillsSearchQueryError
+            If the query has an invalid filter.
+        """
+        parsed = SearchQuery.parse(query)
+        self._ensure_built()
+        with self._lock:
+            if parsed.has_words:
+                scores = self._score(parsed)
+            else:
+                scores = {path: 0.0 for path in self._doc_sources}
+            scores = {path: score for path, score in scores.items() if self._passes(path, parsed)}
+
+            # Keep only the best matching file for each object
+            best: Dict[Reference, Tuple[float, Path]] = {}
+            for path, score in sorted(scores.items()):
+                source = self._doc_sources[path]
+                if source not in best or score > best[source][0]:
+                    best[source] = (score, path)
+            ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))
+            if limit is not None:
+                ranked = ranked[:limit]
+
+        words = set(parsed.terms)
+        return [
+            SearchResult(
+                source, path, score, self._snippet(path, source, words, parsed.prefixes)
+            )
+            for source, (score, path) in ranked
+        ]
+
+    def _score(self, query: SearchQuery) -> Dict[Path, float]:
+        n_docs = len(self._doc_lengths)
+        if n_docs == 0:
+            return {}
+        avg_length = self._total_length / n_docs
+        scores: Dict[Path, float] = {}
+
+        # Each word in the query scores separately; a prefix scores its best expansion
+        groups = [[term] for term in query.terms]
+        groups.extend(self._expand_prefix(prefix) for prefix in query.prefixes)
+        for group in groups:
+            group_scores: Dict[Path, float] = {}
+            for term in group:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for path, freq in postings.items():
+                    norm = 1 - BM25_B + BM25_B * self._doc_lengths[path] / avg_length
+                    score = idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * norm)
+                    if score > group_scores.get(path, 0.0):
+                        group_scores[path] = score
+            for path, score in group_scores.items():
+                scores[path] = scores.get(path, 0.0) + score
+        return scores
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        terms = []
+        for i in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            if not vocabulary[i].startswith(prefix):
+                break
+            terms.append(vocabulary[i])
+        return terms
+
+    def _passes(self, path: Path, query: SearchQuery) -> bool:
+        if query.kinds and self._doc_sources[path].kind not in query.kinds:
+            return False
+        if query.cr_filters:
+            cr = self._doc_crs.get(path)
+            if cr is None:
+                return False
+            return all(compare(cr, value) for compare, value in query.cr_filters)
+        return True
+
+    def _snippet(self, path: Path, source: Reference, words: Set[str], prefixes: List[str]):
+        """Return the first line of a file containing one of the words searched for."""
+        try:
+            fields = self._document_fields(path, source)
+            lines = [text if field == "text" else f"{field}: {text}" for field, text in fields]
+        except (FourhillsError, OSError, UnicodeDecodeError):
+            return ""
+        for line in (line.strip() for text in lines for line in text.splitlines()):
+            for token in tokenize(line):
+                if token in words or any(token.startswith(prefix) for prefix in prefixes):
+                    return self._trim(line, token)
+        return ""
+
+    @staticmethod
+    def _trim(line: str, token: str) -> str:
+        """Shorten a line to the snippet length, keeping a word in view."""
+        if len(line) <= SNIPPET_LENGTH:
+            return line
+        start = max(0, line.lower().find(token) - SNIPPET_LENGTH // 3)
+        snippet = line[start:start + SNIPPET_LENGTH]
+        if start > 0:
+            snippet = "..." + snippet
+        if start + SNIPPET_LENGTH < len(line):
+            snippet += "..."
+        return snippet
+
+    def _document_fields(self, path: Path, source: Reference) -> List[Tuple[str, str]]:
+        """Return the text of a file as (field, text) pairs."""
+        cache = self.setting.cache
+        if path.suffix == ".md":
+            return [("text", cache.get(path, read_text))]
+        data = cache.get(path, load_yaml)
+        if not isinstance(data, dict):
+            return []
+        return [
+            (str(key), " ".join(_flatten_text(value)))
+            for key, value in data.items()
+        ]
+
+    def _challenge_rating(self, path: Path, source: Reference) -> Optional[float]:
+        if source.kind not in ("monster", "npc") or path.suffix != ".yaml":
+            return None
+        data = self.setting.cache.get(path, load_yaml)
+        stats = self._stat_block_data(path, source.kind, data)
+        if stats is None:
+            return None
+        challenge = stats.get("challenge")
+        try:
+            return parse_cr(challenge) if challenge is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def _add_file(self, path: Path, source: Reference):
+        try:
+            fields = self._document_fields(path, source)
+            cr = self._challenge_rating(path, source)
+        except (FourhillsError, OSError, UnicodeDecodeError):
+            # Files which can't be read are left out of the index
+            return
+
+        counts: Counter = Counter()
+        for name in (source.name, *(text for field, text in fields if field == "name")):
+            for token in tokenize(name):
+                counts[token] += NAME_WEIGHT
+        for field, text in fields:
+            if field != "name":
+                counts.update(tokenize(text))
+
+        self._doc_sources[path] = source
+        self._doc_terms[path] = tuple(counts)
+        self._doc_lengths[path] = sum(counts.values())
+        self._total_length += self._doc_lengths[path]
+        if cr is not None:
+            self._doc_crs[path] = cr
+        for term, freq in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[path] = freq
+
+    def _remove_file(self, path: Path):
+        del self._doc_sources[path]
+        self._doc_crs.pop(path, None)
+        self._total_length -= self._doc_lengths.pop(path)
+        for term in self._doc_terms.pop(path):
+            postings = self._postings[term]
+            del postings[path]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+    def _clear(self):
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_lengths.clear()
+        self._doc_sources.clear()
+        self._doc_crs.clear()
+        self._total_length = 0
+        self._vocabulary = None
+
+    def _indexed_paths(self) -> Iterable[Path]:
+        return list(self._doc_sources)
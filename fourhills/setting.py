@@ -1,6 +1,8 @@
 from pathlib import Path
 from typing import Optional
 
+from fourhills.cache import DiskCache, FileCache
+
 
 class Setting:
     """Represents the campaign setting directory tree."""
@@ -15,11 +17,24 @@ class Setting:
         "parties": "parties",
     }
 
-    def __init__(self, base_path=None):
+    def __init__(self, base_path=None, use_disk_cache: bool = True):
         self.root = self.find_root(base_path)
         self.pane_width = 56
         self.panes = 2
         self.column_width = 60
+        # Shared by every lookup in this setting, so repeated loads of the same file
+        # only cost a stat() call. Parsed files are also kept in the setting's
+        # `.fourhills` directory so they survive between runs.
+        disk_cache = None
+        if use_disk_cache and self.root is not None:
+            disk_cache = DiskCache.for_root(self.root)
+        self.cache = FileCache(disk_cache)
+
+    def load_all(self, executor: str = "thread", max_workers: Optional[int] = None):
+        """Load every entity in the setting concurrently; see `World.preload`."""
+        # Imported here as the world depends on the dataclasses, which depend on this
+        from fourhills.world import World
+        return World(self).preload(executor=executor, max_workers=max_workers)
 
     @staticmethod
     def find_root(base_path=None) -> Optional[Path]:
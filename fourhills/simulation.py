@@ -0,0 +1,234 @@
+"""Simulating fights between a party and monsters many times over, to see how they go.
+
+Every trial is fought at once: each combatant's hit points in every trial are one
+column of an array, and each attack is rolled for all the trials in which its attacker
+is acting, with NumPy. Trials are split into chunks, which can be fought in separate
+processes; each chunk has its own random seed, so the results for a seed are the same
+however many processes there are.
+
+The fight is kept simple. Everyone rolls initiative, then on their turn makes every
+attack in their routine against a random enemy still standing. A natural 20 hits and
+rolls the damage dice twice, and a natural 1 misses. Anyone at 0 hit points is out of
+the fight.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from fourhills.combat import Combatant
+from fourhills.dice import DiceExpression
+from fourhills.exceptions import FourhillsCombatError
+
+DEFAULT_TRIALS = 10000
+DEFAULT_MAX_ROUNDS = 50
+# Trials fought together, which bounds the memory used
+CHUNK_SIZE = 20000
+
+
+@dataclass
+class SimulationResult:
+    """How each trial of a fight ended.
+
+    Each array has one value per trial.
+    """
+
+    # Whether the party won, with every monster down and a player standing
+    won: np.ndarray
+    # Whether every player went down
+    lost: np.ndarray
+    rounds: np.ndarray
+    # The players' total hit points at the end, and at the start
+    party_hp: np.ndarray
+    party_max_hp: np.ndarray
+    players_down: np.ndarray
+
+    @classmethod
+    def concatenate(cls, results: Sequence["SimulationResult"]) -> "SimulationResult":
+        return cls(**{
+            name: np.concatenate([getattr(result, name) for result in results])
+            for name in cls.__dataclass_fields__
+        })
+
+    @property
+    def trials(self) -> int:
+        return len(self.won)
+
+    @property
+    def win_probability(self) -> float:
+        return float(self.won.mean())
+
+    @property
+    def loss_probability(self) -> float:
+        return float(self.lost.mean())
+
+    @property
+    def undecided_probability(self) -> float:
+        """The chance neither side is down after the most rounds allowed"""
+        return float((~self.won & ~self.lost).mean())
+
+    @property
+    def mean_rounds(self) -> float:
+        return float(self.rounds.mean())
+
+    def rounds_range(self, coverage: float = 0.8):
+        """The fewest and most rounds taken by the middle `coverage` of the trials"""
+        tail = (1 - coverage) / 2 * 100
+        low, high = np.percentile(self.rounds, [tail, 100 - tail])
+        return int(low), int(np.ceil(high))
+
+    @property
+    def mean_hp_remaining(self) -> float:
+        """The average fraction of the party's hit points left at the end"""
+        return float((self.party_hp / self.party_max_hp).mean())
+
+    @property
+    def mean_hp_remaining_after_win(self) -> Optional[float]:
+        """The average fraction of the party's hit points left in the fights they won"""
+        if not self.won.any():
+            return None
+        return float((self.party_hp[self.won] / self.party_max_hp[self.won]).mean())
+
+    @property
+    def mean_players_down(self) -> float:
+        return float(self.players_down.mean())
+
+
+def simulate(
+    party: Sequence[Combatant],
+    monsters: Sequence[Combatant],
+    trials: int = DEFAULT_TRIALS,
+    seed: Optional[int] = None,
+    workers: Optional[int] = 1,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+) -> SimulationResult:
+    """Fight the party against the monsters `trials` times.
+
+    Parameters
+    ----------
+    party, monsters : sequence of Combatant
+        The two sides.
+    trials : int
+        The number of fights.
+    seed : int, optional
+        Seeds the dice, for repeatable results.
+    workers : int, optional
+        The number of processes to fight in; one per CPU if None. With 1, everything
+        is done in this process.
+    max_rounds : int
+        The most rounds a fight can last before it is left undecided.
+
+    Raises
+    ------
+    FourhillsCombatError
+        If either side is empty, or there are no trials.
+    """
+    if not party or not monsters:
+        raise FourhillsCombatError("A fight needs at least one player and one monster.")
+    if trials < 1:
+        raise FourhillsCombatError("At least one trial is needed.")
+    combatants = list(party) + list(monsters)
+    sides = np.array([0] * len(party) + [1] * len(monsters))
+
+    sizes = [CHUNK_SIZE] * (trials // CHUNK_SIZE)
+    if trials % CHUNK_SIZE:
+        sizes.append(trials % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = max(1, workers or os.cpu_count() or 1)
+    if workers == 1 or len(sizes) == 1:
+        results = [
+            _fight(combatants, sides, size, chunk_seed, max_rounds)
+            for size, chunk_seed in zip(sizes, seeds)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as executor:
+            results = list(executor.map(
+                _fight,
+                [combatants] * len(sizes), [sides] * len(sizes), sizes, seeds,
+                [max_rounds] * len(sizes),
+            ))
+    return SimulationResult.concatenate(results)
+
+
+def _fight(
+    combatants: List[Combatant],
+    sides: np.ndarray,
+    trials: int,
+    seed: np.random.SeedSequence,
+    max_rounds: int,
+) -> SimulationResult:
+    """Fight one chunk of trials; runs in a worker process"""
+    rng = np.random.default_rng(seed)
+    count = len(combatants)
+    party = sides == 0
+    ac = np.array([combatant.ac for combatant in combatants])
+    # Trials down, combatants across
+    hp = np.stack(
+        [np.maximum(combatant.hp.sample(trials, rng), 1) for combatant in combatants], axis=1
+    )
+    max_hp = hp.copy()
+    bonuses = np.array([combatant.initiative for combatant in combatants])
+    # The fraction breaks ties at random
+    initiative = rng.integers(1, 21, (trials, count)) + bonuses + rng.random((trials, count))
+    # The trials in which each combatant acts at each turn of the round
+    order = np.argsort(-initiative, axis=1)
+    turns = [
+        [np.flatnonzero(order[:, turn] == index) for index in range(count)]
+        for turn in range(count)
+    ]
+    # The dice each attack rolls again on a critical hit
+    extra_dice = {
+        attack: DiceExpression(attack.damage.dice) if attack.damage.dice else None
+        for combatant in combatants for attack in combatant.routine
+    }
+
+    ongoing = np.ones(trials, dtype=bool)
+    rounds = np.zeros(trials, dtype=int)
+    for round_number in range(1, max_rounds + 1):
+        rounds[ongoing] = round_number
+        for turn in turns:
+            for index, combatant in enumerate(combatants):
+                if not combatant.routine:
+                    continue
+                acting = turn[index]
+                acting = acting[ongoing[acting] & (hp[acting, index] > 0)]
+                enemies = np.flatnonzero(sides != sides[index])
+                for attack in combatant.routine:
+                    if not len(acting):
+                        break
+                    standing = hp[np.ix_(acting, enemies)] > 0
+                    acting = acting[standing.any(axis=1)]
+                    standing = standing[standing.any(axis=1)]
+                    if not len(acting):
+                        break
+                    # A random enemy still standing
+                    keys = np.where(standing, rng.random(standing.shape), -1)
+                    targets = enemies[keys.argmax(axis=1)]
+                    roll = rng.integers(1, 21, len(acting))
+                    hits = (roll == 20) | ((roll > 1) & (roll + attack.hit >= ac[targets]))
+                    # Only the hits roll damage, and only the critical hits their
+                    # extra dice
+                    damage = attack.damage.sample(int(hits.sum()), rng)
+                    crits = roll[hits] == 20
+                    if crits.any() and extra_dice[attack] is not None:
+                        damage[crits] += extra_dice[attack].sample(int(crits.sum()), rng)
+                    hp[acting[hits], targets[hits]] -= np.maximum(damage, 0)
+        party_standing = (hp[:, party] > 0).any(axis=1)
+        monsters_standing = (hp[:, ~party] > 0).any(axis=1)
+        ongoing &= party_standing & monsters_standing
+        if not ongoing.any():
+            break
+
+    party_standing = (hp[:, party] > 0).any(axis=1)
+    monsters_standing = (hp[:, ~party] > 0).any(axis=1)
+    return SimulationResult(
+        won=party_standing & ~monsters_standing,
+        lost=~party_standing,
+        rounds=rounds,
+        party_hp=np.maximum(hp[:, party], 0).sum(axis=1),
+        party_max_hp=max_hp[:, party].sum(axis=1),
+        players_down=(hp[:, party] <= 0).sum(axis=1),
+    )
@@ -0,0 +1,326 @@
+"""An index of the numbers in every monster's and NPC's stat block, held as columns.
+
+Each field has one typed NumPy array, with one row per object: challenge rating,
+armour class, average hit points, each ability score, size and creature type, and a
+bitset of the damage types each object is immune, resistant or vulnerable to. A query
+such as "CR 3 to 5 undead which resist fire" is then a few comparisons over whole
+arrays, instead of opening and parsing every stat block.
+
+Rows are updated in place as files change; the rows of removed objects are reused.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from fourhills.catalog import SIZES
+from fourhills.combat import read_number
+from fourhills.dice import DAMAGE_TYPES, parse_hp
+from fourhills.exceptions import FourhillsError, FourhillsSearchQueryError
+from fourhills.index import FileIndex, Reference
+from fourhills.setting import Setting
+from fourhills.utils.cr_to_xp import parse_cr
+from fourhills.utils.yaml_loader import load_yaml
+
+KINDS = ("monster", "npc")
+ABILITIES = ("str", "dex", "con", "int", "wis", "cha")
+# The columns holding numbers, which are NaN where a stat block doesn't give one
+NUMBER_COLUMNS = ("challenge", "ac", "hp") + ABILITIES
+# The bitsets of damage types, and the stat block field each is read from
+DAMAGE_COLUMNS = {
+    "immune": "damage_immunities",
+    "resistant": "damage_resistances",
+    "vulnerable": "damage_vulnerabilities",
+}
+DAMAGE_BITS = {damage_type: 1 << bit for bit, damage_type in enumerate(DAMAGE_TYPES)}
+
+# A range of values: one value, or the lowest and highest, either of which may be None
+Range = Union[float, str, Tuple[Optional[Any], Optional[Any]]]
+
+
+@dataclass
+class StatsRow:
+    """The numbers from one object's stat block, as stored in a row of the index."""
+
+    numbers: Dict[str, float]
+    size: int
+    creature_type: str
+    damage: Dict[str, int]
+
+
+def read_stats(data: Any) -> StatsRow:
+    """Read the numbers indexed from a stat block's YAML, which needn't be valid."""
+    data = data if isinstance(data, dict) else {}
+    numbers = dict.fromkeys(NUMBER_COLUMNS, np.nan)
+    try:
+        numbers["challenge"] = parse_cr(data.get("challenge"))
+    except (TypeError, ValueError):
+        pass
+    ac = read_number(data.get("ac"))
+    if ac is not None:
+        numbers["ac"] = ac
+    hp = parse_hp(data.get("hp"))
+    if hp is not None:
+        numbers["hp"] = hp.mean
+    abilities = data.get("ability")
+    if isinstance(abilities, dict):
+        for key, score in abilities.items():
+            score = read_number(score)
+            if str(key).lower() in ABILITIES and score is not None:
+                numbers[str(key).lower()] = score
+    size = str(data.get("size") or "").strip().lower()
+    return StatsRow(
+        numbers=numbers,
+        size=SIZES.index(size) if size in SIZES else -1,
+        creature_type=str(data.get("creature_type") or "").strip().lower(),
+        damage={
+            column: damage_bits(data.get(field)) for column, field in DAMAGE_COLUMNS.items()
+        },
+    )
+
+
+def damage_bits(values: Any) -> int:
+    """The bitset of every damage type named in a list of immunities or the like.
+
+    Qualified entries such as "nonmagical slashing" count as the damage type.
+    """
+    values = values if isinstance(values, list) else [values]
+    bits = 0
+    for value in values:
+        text = str(value or "").lower()
+        for damage_type, bit in DAMAGE_BITS.items():
+            if damage_type in text:
+                bits |= bit
+    return bits
+
+
+class StatsIndex(FileIndex):
+    """Columnar index of the stat blocks of every monster and NPC in a setting.
+
+    NPCs based on a stat block take their numbers from it. Objects without a stat
+    block are still indexed, with NaN for every number, so only match queries which
+    don't filter on numbers.
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, setting: Setting):
+        super().__init__(setting)
+        self._clear()
+
+    def __len__(self):
+        """The number of objects in the index."""
+        self._ensure_built()
+        return len(self._rows)
+
+    def query(
+        self,
+        kind: str,
+        cr: Optional[Range] = None,
+        ac: Optional[Range] = None,
+        hp: Optional[Range] = None,
+        size: Union[None, str, Iterable[str]] = None,
+        creature_type: Union[None, str, Iterable[str]] = None,
+        immune: Union[None, str, Iterable[str]] = None,
+        resistant: Union[None, str, Iterable[str]] = None,
+        vulnerable: Union[None, str, Iterable[str]] = None,
+        abilities: Optional[Dict[str, Range]] = None,
+    ) -> List[str]:
+        """Return the names of the objects of a kind matching every filter given.
+
+        Parameters
+        ----------
+        kind : str
+            "monster" or "npc".
+        cr, ac, hp : optional
+            A value to match exactly, or a (lowest, highest) pair including both ends,
+            where None leaves that end open. Challenge ratings may be written as
+            fractions, e.g. `cr=("1/4", 2)`. `hp` is the average hit points.
+        size, creature_type : str or list of str, optional
+            The sizes or types to match any of, ignoring case. A type matches
+            with or without its tags, so "humanoid" matches "humanoid (goblinoid)".
+        immune, resistant, vulnerable : str or list of str, optional
+            Damage types which must all be in the object's immunities, resistances or
+            vulnerabilities.
+        abilities : dict, optional
+            A range for each ability score to filter on, e.g. `{"str": (18, None)}`.
+
+        Returns
+        -------
+        list of str
+            The names of the matching objects, sorted.
+
+        Raises
+        ------
+        FourhillsSearchQueryError
+            If a filter is not valid, such as an unknown size or damage type.
+        """
+        if kind not in KINDS:
+            raise FourhillsSearchQueryError(
+                f"Unknown kind {kind}; expected one of: " + ", ".join(KINDS)
+            )
+        ranges = {"challenge": cr, "ac": ac, "hp": hp}
+        for ability, value in (abilities or {}).items():
+            if str(ability).lower() not in ABILITIES:
+                raise FourhillsSearchQueryError(
+                    f"Unknown ability {ability}; expected one of: " + ", ".join(ABILITIES)
+                )
+            ranges[str(ability).lower()] = value
+        bounds = {
+            column: _bounds(column, value) for column, value in ranges.items()
+            if value is not None
+        }
+        sizes = _sizes(size) if size is not None else None
+        damage = {
+            column: _damage_mask(values) for column, values in
+            (("immune", immune), ("resistant", resistant), ("vulnerable", vulnerable))
+            if values is not None
+        }
+
+        self._ensure_built()
+        with self._lock:
+            mask = self._kinds == KINDS.index(kind)
+            for column, (low, high) in bounds.items():
+                values = self._numbers[column]
+                # NaN fails both comparisons, so unknown numbers never match
+                mask &= (values >= low) & (values <= high)
+            if sizes is not None:
+                mask &= np.isin(self._sizes, sizes)
+            if creature_type is not None:
+                mask &= np.isin(self._type_codes, self._matching_types(creature_type))
+            for column, bits in damage.items():
+                mask &= (self._damage[column] & bits) == bits
+            names = self._names[mask].tolist()
+        return sorted(names)
+
+    def creature_types(self, kind: str) -> List[str]:
+        """Return every creature type, in lower case, of the objects of a kind."""
+        self._ensure_built()
+        with self._lock:
+            codes = np.unique(self._type_codes[self._kinds == KINDS.index(kind)])
+            return sorted(self._types[code] for code in codes if self._types[code])
+
+    def _matching_types(self, creature_types: Union[str, Iterable[str]]) -> List[int]:
+        if isinstance(creature_types, str):
+            creature_types = [creature_types]
+        wanted = {str(creature_type).strip().lower() for creature_type in creature_types}
+        return [
+            code for code, creature_type in enumerate(self._types)
+            if creature_type in wanted or creature_type.split(" (")[0] in wanted
+        ]
+
+    def _add_file(self, path: Path, source: Reference):
+        if source.kind not in KINDS or path.suffix != ".yaml":
+            return
+        try:
+            data = self.setting.cache.get(path, load_yaml)
+            stats = self._stat_block_data(path, source.kind, data)
+        except (FourhillsError, OSError, UnicodeDecodeError):
+            # Objects which can't be read are still indexed, without any numbers
+            stats = None
+        row = read_stats(stats)
+
+        if self._free:
+            index = self._free.pop()
+        else:
+            index = len(self._rows)
+            if index == len(self._names):
+                self._grow()
+        self._rows[path] = index
+        self._names[index] = source.name
+        self._kinds[index] = KINDS.index(source.kind)
+        for column, value in row.numbers.items():
+            self._numbers[column][index] = value
+        self._sizes[index] = row.size
+        code = self._type_lookup.get(row.creature_type)
+        if code is None:
+            code = self._type_lookup[row.creature_type] = len(self._types)
+            self._types.append(row.creature_type)
+        self._type_codes[index] = code
+        for column, bits in row.damage.items():
+            self._damage[column][index] = bits
+
+    def _remove_file(self, path: Path):
+        index = self._rows.pop(path)
+        self._kinds[index] = -1
+        self._names[index] = None
+        self._free.append(index)
+
+    def _clear(self):
+        self._rows: Dict[Path, int] = {}
+        self._free: List[int] = []
+        self._types: List[str] = []
+        self._type_lookup: Dict[str, int] = {}
+        self._allocate(self.INITIAL_CAPACITY)
+
+    def _indexed_paths(self) -> Iterable[Path]:
+        return list(self._rows)
+
+    def _allocate(self, capacity: int):
+        # Unused rows have no kind, so never match a query
+        self._names = np.full(capacity, None, dtype=object)
+        self._kinds = np.full(capacity, -1, dtype=np.int8)
+        self._numbers = {column: np.full(capacity, np.nan) for column in NUMBER_COLUMNS}
+        self._sizes = np.full(capacity, -1, dtype=np.int8)
+        self._type_codes = np.zeros(capacity, dtype=np.int32)
+        self._damage = {column: np.zeros(capacity, dtype=np.uint32) for column in DAMAGE_COLUMNS}
+
+    def _grow(self):
+        """Double the number of rows, keeping the existing ones"""
+        old = (self._names, self._kinds, self._numbers, self._sizes, self._type_codes,
+               self._damage)
+        count = len(self._names)
+        self._allocate(count * 2)
+        self._names[:count], self._kinds[:count] = old[0], old[1]
+        for column, values in old[2].items():
+            self._numbers[column][:count] = values
+        self._sizes[:count], self._type_codes[:count] = old[3], old[4]
+        for column, values in old[5].items():
+            self._damage[column][:count] = values
+
+
+def _bounds(column: str, value: Range) -> Tuple[float, float]:
+    """The lowest and highest values of a range, as floats"""
+    low, high = value if isinstance(value, (tuple, list)) else (value, value)
+    try:
+        return (
+            -np.inf if low is None else _number(column, low),
+            np.inf if high is None else _number(column, high),
+        )
+    except (TypeError, ValueError) as exc:
+        raise FourhillsSearchQueryError(f"Invalid range for {column}: {value!r}") from exc
+
+
+def _number(column: str, value: Any) -> float:
+    return parse_cr(value) if column == "challenge" else float(value)
+
+
+def _sizes(sizes: Union[str, Iterable[str]]) -> List[int]:
+    if isinstance(sizes, str):
+        sizes = [sizes]
+    codes = []
+    for size in sizes:
+        size = str(size).strip().lower()
+        if size not in SIZES:
+            raise FourhillsSearchQueryError(
+                f"Unknown size {size}; expected one of: " + ", ".join(SIZES)
+            )
+        codes.append(SIZES.index(size))
+    return codes
+
+
+def _damage_mask(damage_types: Union[str, Iterable[str]]) -> int:
+    if isinstance(damage_types, str):
+        damage_types = [damage_types]
+    bits = 0
+    for damage_type in damage_types:
+        damage_type = str(damage_type).strip().lower()
+        if damage_type not in DAMAGE_BITS:
+            raise FourhillsSearchQueryError(
+                f"Unknown damage type {damage_type}; expected one of: "
+                + ", ".join(DAMAGE_TYPES)
+            )
+        bits |= DAMAGE_BITS[damage_type]
+    return bits
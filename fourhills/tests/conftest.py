@@ -0,0 +1,21 @@
+from pathlib import Path
+
+import pytest
+import shutil
+
+from fourhills import World
+
+EXAMPLE_WORLD = Path(__file__).parents[2] / "ExampleWorld"
+
+
+@pytest.fixture
+def world_path(tmp_path):
+    """A copy of the example world, which tests are free to change"""
+    world_path = tmp_path / "world"
+    shutil.copytree(str(EXAMPLE_WORLD), str(world_path))
+    yield world_path
+
+
+@pytest.fixture
+def world(world_path):
+    yield World(base_path=world_path)
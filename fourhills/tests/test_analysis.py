@@ -0,0 +1,142 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from fourhills.analysis import AC_BANDS, ATTACK_BANDS, analyze_monsters
+from fourhills.combat import monster_combatant
+from fourhills.dataclasses import StatBlock
+from fourhills.monster_table import MonsterTable
+
+
+def stat_block(name, ac="12", hp="22 (4d8 + 4)", challenge=1, attacks=None, multiattack=None):
+    return StatBlock(
+        name=name,
+        size="Medium",
+        creature_type="Humanoid",
+        alignment="neutral",
+        ac=ac,
+        hp=hp,
+        speed="30 ft.",
+        ability={"str": 14, "dex": 12, "con": 12, "int": 10, "wis": 10, "cha": 10},
+        challenge=challenge,
+        passive_perception=10,
+        melee_attacks=attacks,
+        multiattack=multiattack,
+    )
+
+
+def random_stat_blocks(count, seed=0):
+    rng = random.Random(seed)
+    blocks = []
+    for number in range(count):
+        attacks = {
+            f"attack {attack}": {
+                "hit": f"+{rng.randint(2, 12)}",
+                "damage": f"{rng.randint(1, 4)}d{rng.choice([4, 6, 8, 10])} + {rng.randint(0, 5)}"
+                          " slashing damage",
+            }
+            for attack in range(rng.randint(0, 2))
+        }
+        blocks.append((f"monster_{number}", stat_block(
+            f"monster_{number}",
+            ac=str(rng.randint(10, 20)),
+            hp=f"{rng.randint(1, 20)}d10",
+            challenge=rng.choice([0.25, 1, 5, 10]),
+            attacks=attacks or None,
+            multiattack="It makes two attacks." if len(attacks) == 2 else None,
+        )))
+    return blocks
+
+
+def test_table_from_world(world):
+    table, errors = MonsterTable.from_world(world)
+    assert errors == {}
+    assert list(table.names) == sorted(world.monsters)
+    thug = list(table.names).index("walton_thug")
+    assert (table.ac[thug], table.hp[thug], table.attacks_per_round[thug]) == (11, 32, 2)
+    assert table.creature_type[thug] == "human"
+    assert table.xp[thug] == 100
+    assert list(table.attack_monster).count(thug) == 2
+
+
+def test_damage_matches_combatants(world):
+    table, _ = MonsterTable.from_world(world)
+    analysis = analyze_monsters(table)
+    for row, name in enumerate(table.names):
+        combatant = monster_combatant(world.monsters[name])
+        for band, ac in enumerate(AC_BANDS):
+            assert analysis.damage_per_round[row, band] == pytest.approx(
+                combatant.expected_damage(ac)
+            )
+
+
+def test_effective_hp():
+    table = MonsterTable.from_stat_blocks([("guard", stat_block("guard", ac="16", hp="20"))])
+    analysis = analyze_monsters(table)
+    # Hit on 12 or more by +4, 9 or more by +7, and so on
+    assert analysis.effective_hp[0].tolist() == pytest.approx(
+        [20 / ((21 - (16 - bonus)) / 20) for bonus in ATTACK_BANDS]
+    )
+    # Nothing to hit with, so the lowest offensive rating
+    assert analysis.offensive_cr[0] == 0
+    assert analysis.damage_per_round[0].tolist() == [0] * len(AC_BANDS)
+
+
+def test_estimated_cr():
+    ogre = stat_block(
+        "ogre", ac="11 (hide armor)", hp="59 (7d10 + 21)", challenge=2,
+        attacks={"greatclub": {"hit": "+6", "damage": "13 (2d8 + 4) bludgeoning damage"}},
+    )
+    knight = stat_block(
+        "knight", ac="18 (plate)", hp="52 (8d8 + 16)", challenge=3,
+        attacks={"greatsword": {"hit": "+5", "damage": "10 (2d6 + 3) slashing damage"}},
+        multiattack="The knight makes two melee attacks.",
+    )
+    table = MonsterTable.from_stat_blocks([("ogre", ogre), ("knight", knight)])
+    analysis = analyze_monsters(table)
+    # The ogre: 59 hit points is a 1/2, and AC 11 two below it, so 1/4; about 9
+    # damage a round is a 1, and +6 three above it, so 2
+    # The knight: 52 hit points is a 1/2, and AC 18 five above it, so 2; about 12
+    # damage a round is a 1, and +5 two above it, so 2
+    assert analysis.defensive_cr.tolist() == [0.25, 2]
+    assert analysis.offensive_cr.tolist() == [2, 2]
+    assert analysis.estimated_cr.tolist() == [1, 2]
+
+
+def test_unreadable_numbers_are_nan():
+    table = MonsterTable.from_stat_blocks([
+        ("blank", stat_block("blank", ac="Replace Me", hp="Replace Me", challenge="?")),
+        ("orc", stat_block("orc")),
+    ])
+    analysis = analyze_monsters(table)
+    assert np.isnan(table.ac[0]) and np.isnan(table.hp[0]) and np.isnan(table.xp[0])
+    assert np.isnan(analysis.effective_hp[0]).all()
+    assert np.isnan(analysis.estimated_cr[0])
+    assert analysis.rows(["name", "ac", "hp", "estimated_cr"])[0] == ["blank", "", "", ""]
+    # Unknown numbers sort last either way
+    assert analysis.order("hp").tolist() == [1, 0]
+    assert analysis.order("hp", descending=True).tolist() == [1, 0]
+    with pytest.raises(KeyError):
+        analysis.order("speed")
+
+
+def test_order():
+    table = MonsterTable.from_stat_blocks(random_stat_blocks(50))
+    analysis = analyze_monsters(table)
+    dpr = analysis.column("dpr")
+    assert np.array_equal(dpr, analysis.column(f"dpr_ac{AC_BANDS[1]}"))
+    assert np.all(np.diff(dpr[analysis.order("dpr", descending=True)]) <= 0)
+    names = table.names[analysis.order("name")]
+    assert list(names) == sorted(names)
+
+
+def test_analysis_of_many_monsters_is_quick():
+    table = MonsterTable.from_stat_blocks(random_stat_blocks(5000))
+    start = time.perf_counter()
+    analysis = analyze_monsters(table)
+    analysis.order("ehp", descending=True)
+    # Generous, so the test isn't flaky on slow machines
+    assert time.perf_counter() - start < 1.0
+    assert analysis.damage_per_round.shape == (5000, len(AC_BANDS))
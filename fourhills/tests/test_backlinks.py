@@ -0,0 +1,61 @@
+from pathlib import Path
+import shutil
+
+from fourhills.backlinks import Reference
+
+
+def test_structured_references(world):
+    assert world.backlinks.referrers("monster", "walton_thug") == [
+        Reference("location", "Walton")
+    ]
+    assert world.backlinks.referrers("quest", "FirstFetchQuest") == [
+        Reference("location", "OldDragmooreRoad"),
+        Reference("party", "example_party"),
+    ]
+    # Quest giver, and an NPC's stat block
+    assert Reference("quest", "FirstFetchQuest") in world.backlinks.referrers(
+        "npc", "example_npc"
+    )
+    assert Reference("npc", "example_npc") in world.backlinks.referrers(
+        "monster", "example_monster"
+    )
+
+
+def test_anchor_references(world):
+    # The quest description links to the location with a location:// anchor
+    assert world.backlinks.referrers("location", Path("Walton/LensonHouse")) == [
+        Reference("quest", "FirstFetchQuest")
+    ]
+
+
+def test_unreferenced_object(world):
+    assert world.backlinks.referrers("npc", "not_an_npc") == []
+
+
+def test_saved_file_updates_index(world):
+    assert world.backlinks.referrers("npc", "dara") == []
+    note = world.setting.notes_dir / "plans.md"
+    note.write_text("Ambush at [the road](location://OldDragmooreRoad) by [Dara](npc://dara)")
+
+    world.invalidate(note)
+    assert world.backlinks.referrers("npc", "dara") == [Reference("note", "plans.md")]
+
+    note.write_text("Nothing planned")
+    world.invalidate(note)
+    assert world.backlinks.referrers("npc", "dara") == []
+
+
+def test_deleted_and_renamed_directories(world):
+    old_path = world.setting.quest_dir / "FirstFetchQuest"
+    new_path = world.setting.quest_dir / "SecondQuest"
+    world.backlinks.referrers("npc", "example_npc")
+
+    old_path.rename(new_path)
+    world.invalidate(old_path)
+    world.invalidate(new_path)
+    referrers = world.backlinks.referrers("location", "Walton/LensonHouse")
+    assert referrers == [Reference("quest", "SecondQuest")]
+
+    shutil.rmtree(str(new_path))
+    world.invalidate(new_path)
+    assert world.backlinks.referrers("location", "Walton/LensonHouse") == []
@@ -0,0 +1,79 @@
+import os
+from pathlib import Path
+import pytest
+
+from fourhills.cache import DiskCache, FileCache, file_signature
+
+
+@pytest.fixture
+def yaml_file(tmp_path):
+    path = tmp_path / "entity.yaml"
+    path.write_text("name: test\n")
+    yield path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield tmp_path / DiskCache.DIRNAME / DiskCache.FILENAME
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return {"name": Path(path).read_text().split(":")[1].strip()}
+
+
+def test_memory_cache_reuses_value(yaml_file):
+    cache = FileCache()
+    loader = CountingLoader()
+    assert cache.get(yaml_file, loader) == {"name": "test"}
+    assert cache.get(yaml_file, loader) == {"name": "test"}
+    assert loader.calls == 1
+
+
+def test_disk_cache_survives_new_file_cache(yaml_file, db_path):
+    loader = CountingLoader()
+    FileCache(DiskCache(db_path, "v1")).get(yaml_file, loader)
+    assert FileCache(DiskCache(db_path, "v1")).get(yaml_file, loader) == {"name": "test"}
+    assert loader.calls == 1
+
+
+def test_disk_cache_discarded_on_version_change(yaml_file, db_path):
+    loader = CountingLoader()
+    FileCache(DiskCache(db_path, "v1")).get(yaml_file, loader)
+    FileCache(DiskCache(db_path, "v2")).get(yaml_file, loader)
+    assert loader.calls == 2
+
+
+def test_disk_cache_ignores_stale_signature(yaml_file, db_path):
+    disk_cache = DiskCache(db_path, "v1")
+    signature = file_signature(yaml_file)
+    disk_cache.put_file(yaml_file, signature, {"name": "old"})
+    assert disk_cache.get_file(yaml_file, signature) == (True, {"name": "old"})
+    assert disk_cache.get_file(yaml_file, (0, 0)) == (False, None)
+
+
+def test_corrupt_disk_cache_is_rebuilt(yaml_file, db_path):
+    db_path.parent.mkdir(parents=True)
+    db_path.write_bytes(b"this is not a database" * 100)
+    loader = CountingLoader()
+    cache = FileCache(DiskCache(db_path, "v1"))
+    assert cache.get(yaml_file, loader) == {"name": "test"}
+    assert FileCache(DiskCache(db_path, "v1")).get(yaml_file, loader) == {"name": "test"}
+    assert loader.calls == 1
+
+
+def test_listing_tracks_new_files(tmp_path, db_path):
+    cache = FileCache(DiskCache(db_path, "v1"))
+    (tmp_path / "a.yaml").touch()
+    names = [name for name, _ in cache.list_dir(tmp_path)]
+    assert "a.yaml" in names
+    (tmp_path / "b.yaml").touch()
+    # Make sure the directory's modification time moves on even on coarse filesystems
+    signature = file_signature(tmp_path)
+    os.utime(tmp_path, ns=(signature[0], signature[0] + 10 ** 9))
+    names = [name for name, _ in cache.list_dir(tmp_path)]
+    assert "b.yaml" in names
@@ -0,0 +1,55 @@
+from fourhills.index import Reference
+
+
+def test_monster_entries(world):
+    entries = world.catalog.entries("monster")
+    assert [entry.name for entry in entries] == sorted(
+        path.stem for path in world.setting.monsters_dir.glob("*.yaml")
+    )
+    thug = world.catalog.entry("monster", "walton_thug")
+    assert thug.reference == Reference("monster", "walton_thug")
+    assert thug.cr == 0.5
+    assert thug.creature_type == "human"
+    assert thug.size == "medium"
+    assert thug.size_order == 2
+
+
+def test_npc_takes_stats_from_stats_base(world):
+    npc = world.catalog.entry("npc", "example_npc")
+    assert npc.title == "Mr. B. Smith"
+    assert npc.cr == 1.0
+    assert npc.creature_type == "beast"
+    assert world.catalog.entry("npc", "centel").cr is None
+
+
+def test_npc_updates_with_stats_base(world):
+    assert world.catalog.entry("npc", "example_npc").cr == 1.0
+    path = world.monsters.path_for("example_monster")
+    path.write_text(path.read_text().replace("challenge: 1\n", "challenge: 5\n"))
+    world.invalidate_paths([path])
+    assert world.catalog.entry("npc", "example_npc").cr == 5.0
+
+
+def test_quests_and_locations(world):
+    assert [entry.name for entry in world.catalog.entries("quest")] == ["FirstFetchQuest"]
+    assert world.catalog.entry("quest", "FirstFetchQuest").title == "Super Awesome Fetch Quest"
+    assert world.catalog.entry("location", "Walton/LensonHouse") is not None
+    # Files other than the definition don't add anything
+    assert world.catalog.entry("note", "example_note.md") is None
+
+
+def test_updates(world):
+    assert world.catalog.entry("monster", "new_monster") is None
+    path = world.setting.monsters_dir / "new_monster.yaml"
+    path.write_text("name: New monster\nchallenge: 1/4\nsize: Tiny\n")
+    world.invalidate_paths([path])
+    entry = world.catalog.entry("monster", "new_monster")
+    assert entry.challenge == "1/4"
+    assert entry.cr == 0.25
+    assert entry.size_order == 0
+
+    new_path = path.with_name("renamed_monster.yaml")
+    path.rename(new_path)
+    world.invalidate_paths([path, new_path])
+    assert world.catalog.entry("monster", "new_monster") is None
+    assert world.catalog.entry("monster", "renamed_monster").title == "New monster"
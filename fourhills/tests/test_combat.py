@@ -0,0 +1,86 @@
+import pytest
+
+from fourhills.combat import (
+    Attack,
+    attack_routine,
+    location_combatants,
+    monster_combatant,
+    party_combatants,
+    player_combatant,
+    read_number,
+)
+from fourhills.dice import DiceExpression
+from fourhills.exceptions import FourhillsCombatError
+
+BITE = Attack("bite", 7, DiceExpression.parse("2d10 + 4"))
+CLAW = Attack("claw", 7, DiceExpression.parse("2d6 + 4"))
+LONGBOW = Attack("longbow", 5, DiceExpression.parse("1d8 + 2"), ranged=True)
+
+
+def test_read_number():
+    assert read_number("15 (natural armor)") == 15
+    assert read_number("+4") == 4
+    assert read_number("-1") == -1
+    assert read_number(12) == 12
+    assert read_number("Replace Me") is None
+
+
+def test_expected_damage():
+    assert BITE.hit_chance(15) == 0.65
+    # A 1 always misses, and a 20 always hits
+    assert BITE.hit_chance(30) == 0.05
+    assert BITE.hit_chance(2) == 0.95
+    # Hits on 8 to 19 do 15 on average, and a 20 does 26
+    assert BITE.expected_damage(15) == pytest.approx(0.6 * 15 + 0.05 * 26)
+
+
+@pytest.mark.parametrize("multiattack, expected", [
+    (None, ["bite"]),
+    ("The dragon makes three attacks: one with its bite and two with its claws.",
+     ["bite", "claw", "claw"]),
+    ("The beast makes two claw attacks.", ["claw", "claw"]),
+    ("The scout makes two ranged attacks.", ["longbow", "longbow"]),
+    ("can make 2 melee attacks.", ["bite", "bite"]),
+    ("It makes two attacks with its bite or two with its claws.", ["bite", "bite"]),
+])
+def test_attack_routine(multiattack, expected):
+    routine = attack_routine([BITE, CLAW, LONGBOW], multiattack)
+    assert [attack.name for attack in routine] == expected
+
+
+def test_monster_combatant(world):
+    thug = monster_combatant(world.monsters["walton_thug"])
+    assert (thug.ac, str(thug.hp), thug.initiative) == (11, "32", 0)
+    assert [(attack.name, attack.hit) for attack in thug.routine] == [("mace", 4)] * 2
+
+    monsters, unknown = location_combatants(world, [("walton_thug", 2), ("dragon", 1)])
+    assert [monster.name for monster in monsters] == ["walton_thug 1", "walton_thug 2"]
+    assert unknown == ["dragon"]
+
+
+def test_player_combatant():
+    player = player_combatant("Fighter", 5)
+    assert (player.ac, str(player.hp), player.initiative) == (17, "44", 2)
+    assert [(attack.hit, str(attack.damage)) for attack in player.routine] == [(7, "1d8 + 4")] * 2
+
+    player = player_combatant("Wizard", None, {
+        "ac": 12, "hp": "3d6 + 3", "hit": "+5", "damage": "1d10", "attacks": 1,
+    })
+    assert (player.ac, str(player.hp), len(player.routine)) == (12, "3d6 + 3", 1)
+    with pytest.raises(FourhillsCombatError):
+        player_combatant("Rogue", None, {"ac": 14})
+    with pytest.raises(FourhillsCombatError):
+        player_combatant("Rogue", 3, {"damage": "lots"})
+
+
+def test_party_combatants(world):
+    party_path = world.setting.parties_dir / "example_party.yaml"
+    party_path.write_text(
+        party_path.read_text()
+        + "stats:\n  ExamplePlayer01:\n    ac: 19\n    damage: 2d6 + 3\n"
+    )
+    world.invalidate_paths([party_path])
+    players = party_combatants(world.parties["example_party"])
+    assert [player.ac for player in players] == [19, 16, 16, 16]
+    assert str(players[0].routine[0].damage) == "2d6 + 3"
+    assert str(players[0].hp) == str(players[1].hp) == "28"
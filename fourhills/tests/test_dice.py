@@ -0,0 +1,99 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from fourhills.dice import DiceExpression, parse_damage, parse_hp, total_damage
+from fourhills.exceptions import FourhillsDiceError
+
+
+@pytest.mark.parametrize("text, expected, low, high, mean", [
+    ("2d6 + 3", "2d6 + 3", 5, 15, 10),
+    ("d20-1", "1d20 - 1", 0, 19, 9.5),
+    ("7", "7", 7, 7, 7),
+    ("1d6 + 1d6 + 1d4", "1d4 + 2d6", 3, 16, 9.5),
+    ("1d8 − 1d4", "1d8 - 1d4", -3, 7, 2),
+    ("-2", "-2", -2, -2, -2),
+])
+def test_parse(text, expected, low, high, mean):
+    expression = DiceExpression.parse(text)
+    assert str(expression) == expected
+    assert (expression.min, expression.max, expression.mean) == (low, high, mean)
+    assert DiceExpression.parse(text) is expression
+
+
+@pytest.mark.parametrize("text", ["", "2d", "d0", "2d6 3", "fire", "1d6 + ", "101d6", 1.5])
+def test_parse_invalid(text):
+    with pytest.raises(FourhillsDiceError):
+        DiceExpression.parse(text)
+
+
+@pytest.mark.parametrize("text", ["2d6 + 3", "1d8 - 1d4", "3d4 + 1d6 - 2", "1d6 - 1d6"])
+def test_distribution_is_exact(text):
+    expression = DiceExpression.parse(text)
+    values, probabilities = expression.distribution()
+
+    # Count every way the dice can fall
+    dice = [
+        [face * (1 if count > 0 else -1) for face in range(1, sides + 1)]
+        for count, sides in expression.dice
+        for _ in range(abs(count))
+    ]
+    totals = [sum(roll) + expression.modifier for roll in product(*dice)]
+    counts = np.bincount(np.array(totals) - expression.min)
+    assert values.tolist() == list(range(expression.min, expression.max + 1))
+    assert np.allclose(probabilities, counts / len(totals))
+    assert np.isclose(np.dot(values, probabilities), expression.mean)
+
+
+def test_sample():
+    expression = DiceExpression.parse("2d6 + 3")
+    rolls = expression.sample(200000, rng=0)
+    assert rolls.min() == 5 and rolls.max() == 15
+    assert abs(rolls.mean() - 10) < 0.05
+    assert abs((rolls >= 12).mean() - expression.probability(12)) < 0.01
+    assert np.array_equal(expression.sample(100, rng=1), expression.sample(100, rng=1))
+    assert isinstance(expression.sample(rng=2), int)
+    assert DiceExpression.parse("4").sample(3).tolist() == [4, 4, 4]
+
+
+def test_combining():
+    sword = DiceExpression.parse("1d8 + 3")
+    assert str(sword + DiceExpression.parse("2d8")) == "3d8 + 3"
+    assert str(sword + 2) == "1d8 + 5"
+    assert str(sword.critical()) == "2d8 + 3"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("45 (6d10 + 12)", "6d10 + 12"),
+    ("11(2d8 + 2)", "2d8 + 2"),
+    ("32", "32"),
+    (32, "32"),
+    ("27 (5d8 + 5) in humanoid form", "5d8 + 5"),
+])
+def test_parse_hp(text, expected):
+    assert str(parse_hp(text)) == expected
+
+
+def test_parse_hp_unreadable():
+    assert parse_hp("Replace Me") is None
+    assert parse_hp(None) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("4 (1d4+2) piercing plus 5 (1d6+2) slashing damage",
+     ["1d4 + 2 piercing", "1d6 + 2 slashing"]),
+    ("5 piercing damage", ["5 piercing"]),
+    ("7 (2d6) Fire damage, or 8 (1d10 + 3) cold damage if used with two hands", ["2d6 fire"]),
+    ("2d6 + 3 poison damage, and the target must succeed on a DC 13 save", ["2d6 + 3 poison"]),
+    ("5 (1d6 + 2)", ["1d6 + 2"]),
+    ("The target is grappled", []),
+])
+def test_parse_damage(text, expected):
+    assert [str(roll) for roll in parse_damage(text)] == expected
+
+
+def test_total_damage():
+    rolls = parse_damage("4 (1d4+2) piercing plus 5 (1d6+2) slashing damage")
+    assert str(total_damage(rolls)) == "1d4 + 1d6 + 4"
+    assert str(total_damage(())) == "0"
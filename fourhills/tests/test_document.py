@@ -0,0 +1,100 @@
+import pickle
+
+import pytest
+
+from fourhills.dataclasses import Npc
+from fourhills.document import (
+    Blank, BulletList, Document, Heading, Paragraph, Rule, Table, Title, render_text
+)
+
+
+@pytest.fixture
+def document():
+    yield Document([
+        Title("Goblin"),
+        Paragraph("15", label="AC"),
+        Rule(),
+        Table(("STR", "DEX"), ("8(-1)", "14(+2)")),
+        Heading("Actions"),
+        Paragraph("A very long paragraph <of> text which needs wrapping", link="monster://x"),
+        BulletList(("one", "two")),
+        Blank(),
+    ])
+
+
+def test_render_text(document):
+    assert render_text(document, 20) == [
+        "       Goblin       ",
+        "====================",
+        "AC: 15",
+        "--------------------",
+        "   STR       DEX    ",
+        "  8(-1)     14(+2)  ",
+        "",
+        "      Actions       ",
+        "--------------------",
+        "A very long",
+        "    paragraph <of>",
+        "    text which needs",
+        "    wrapping",
+        "- one",
+        "- two",
+        "",
+    ]
+
+
+def test_render_html_and_markdown(document):
+    html = document.html()
+    assert "<strong>AC:</strong> 15" in html
+    assert '<a href="monster://x">A very long paragraph &lt;of&gt; text' in html
+    assert "<ul><li>one</li><li>two</li></ul>" in html
+    markdown = document.markdown()
+    assert markdown.startswith("# Goblin\n\n**AC:** 15\n\n---\n\n| STR | DEX |\n| --- | --- |")
+    assert "- one\n- two" in markdown
+
+
+def test_renderings_are_kept(document):
+    assert document.text(30) is document.text(30)
+    assert document.text(30) != document.text(40)
+    assert document.html() is document.html()
+    copy = pickle.loads(pickle.dumps(document))
+    assert copy == document and copy.text(30) == document.text(30)
+
+
+def test_documents_are_kept_with_the_entity(world):
+    monster = world.monsters["example_monster"]
+    assert monster.battle_document() is monster.battle_document()
+    assert monster.summary_document() is monster.summary_document()
+    assert monster.summary_info(60, quantity=3)[0].strip() == "Example monster x3"
+    # Loading the stat block again starts afresh
+    assert world.monsters["example_monster"].battle_document() is not monster.battle_document()
+    # The stat block can still be pickled once its documents are made
+    assert pickle.loads(pickle.dumps(monster)) == monster
+
+
+def test_stat_block_text(world):
+    lines = world.monsters["example_monster"].battle_info(60)
+    assert lines[:3] == ["AC 8", "HP 13 (2d10+2)", "Speed 30 ft."]
+    assert "Challenge: 1 (200 XP)" in lines
+    assert "Arrow: ranged weapon attack, +1 to hit, range 30/120 ft.," in lines
+    with pytest.raises(ValueError):
+        world.monsters["example_monster"].battle_info(40)
+
+
+def test_npc_documents(world):
+    npc = world.npcs["example_npc"]
+    assert npc.battle_document() is npc.stats.battle_document()
+    assert 'href="monster://example_monster"' in npc.summary_document().html()
+    assert "- I have run out of coal for my forge" in npc.character_info(60)
+    # Temperament and background are both optional
+    bare = Npc(name="Bare", appearance="Plain")
+    assert bare.character_info() == ["Appearance: Plain"]
+    assert bare.battle_info() == ["This NPC has no stats defined"]
+
+
+def test_attacks_with_missing_details(world):
+    stat_block = world.monsters["walton_thug"]
+    stat_block.melee_attacks = {"claw": {"hit": "+3", "damage": "4 (1d4+2) slashing"}}
+    assert "Claw: melee weapon attack, +3 to hit. Hit damage: 4 (1d4+2) slashing." in (
+        stat_block.battle_info(80)
+    )
@@ -0,0 +1,127 @@
+from itertools import combinations, product
+import random
+import time
+
+import pytest
+
+from fourhills.encounter_generator import EncounterGenerator, MonsterOption, _search
+from fourhills.encounters import Encounter, assess_encounter, encounter_multiplier
+from fourhills.exceptions import FourhillsEncounterError
+from fourhills.utils.cr_to_xp import CR_VALUES, cr_to_xp_many
+
+
+def random_library(count, seed=0):
+    rng = random.Random(seed)
+    types = ["beast", "undead", "humanoid (goblinoid)", "fiend", "dragon"]
+    environments = ["forest", "swamp", "underdark", "city", "coast"]
+    return [
+        MonsterOption(
+            f"monster_{i}",
+            rng.choice(CR_VALUES[:20]),
+            rng.choice(types),
+            tuple(rng.sample(environments, 2)),
+        )
+        for i in range(count)
+    ]
+
+
+def brute_force(xps, multipliers, low, high, max_monsters, max_kinds):
+    """Every pattern in budget which needs all its monsters, as (adjusted xp, kinds,
+    monsters), best first"""
+    found = []
+    for kinds in range(1, max_kinds + 1):
+        for groups in combinations(range(len(xps)), kinds):
+            for quantities in product(range(1, max_monsters + 1), repeat=kinds):
+                total = sum(quantities)
+                if total > max_monsters:
+                    continue
+                xp = sum(xps[group] * quantity for group, quantity in zip(groups, quantities))
+                adjusted = xp * multipliers[total]
+                # Without one of the cheapest monsters
+                smallest = (xp - xps[groups[-1]]) * multipliers[total - 1]
+                if low <= adjusted < high and smallest < low:
+                    found.append((adjusted, kinds, total))
+    return sorted(found)
+
+
+@pytest.mark.parametrize("low, high", [(300, 600), (900, 1600), (1600, float("inf")), (50, 75)])
+def test_search_matches_brute_force(low, high):
+    xps = cr_to_xp_many([3, 2, 1, 0.5, 0.25, 0.125]).tolist()
+    multipliers = encounter_multiplier(range(7), 4).tolist()
+    expected = brute_force(xps, multipliers, low, high, 6, 3)[:8]
+
+    patterns = _search(xps, multipliers, low, high, 6, 3, 8)
+    found = [
+        (xp * multiplier, len(pattern), sum(quantity for _, quantity in pattern))
+        for xp, multiplier, pattern in patterns
+    ]
+    assert found == expected
+    for xp, multiplier, pattern in patterns:
+        assert [group for group, _ in pattern] == sorted({group for group, _ in pattern})
+        assert xp == sum(xps[group] * quantity for group, quantity in pattern)
+
+
+def test_generate():
+    generator = EncounterGenerator(random_library(200))
+    levels = (3, 3, 3, 3)
+    encounters = generator.generate(levels, "hard", limit=10, seed=1)
+    assert len(encounters) == 10
+    adjusted = [encounter.assessment.adjusted_xp for encounter in encounters]
+    assert adjusted == sorted(adjusted)
+    for encounter in encounters:
+        assert encounter.assessment.difficulty == "hard"
+        assert encounter.monster_count <= EncounterGenerator.DEFAULT_MAX_MONSTERS
+        assert len(encounter.monsters) <= EncounterGenerator.DEFAULT_MAX_KINDS
+        # The assessment agrees with assessing the monsters afresh
+        check = assess_encounter(
+            Encounter(
+                [monster.cr for monster, _ in encounter.monsters],
+                [quantity for _, quantity in encounter.monsters],
+            ),
+            levels,
+        )
+        assert check == encounter.assessment
+    assert len({str(encounter) for encounter in encounters}) == 10
+
+    # The same seed gives the same suggestions
+    again = generator.generate(levels, "hard", limit=10, seed=1)
+    assert [str(e) for e in again] == [str(e) for e in encounters]
+
+
+def test_generate_filters():
+    generator = EncounterGenerator(random_library(200))
+    for encounter in generator.generate((5,) * 5, "medium", creature_type="Humanoid", seed=0):
+        assert all(m.creature_type == "humanoid (goblinoid)" for m, _ in encounter.monsters)
+    for encounter in generator.generate((5,) * 5, "medium", environment="Swamp", seed=0):
+        assert all("swamp" in m.environments for m, _ in encounter.monsters)
+    for encounter in generator.generate((5,) * 5, "deadly", max_cr=1, seed=0):
+        assert all(m.cr <= 1 for m, _ in encounter.monsters)
+    assert generator.generate((5,) * 5, "medium", creature_type="elemental") == []
+
+    with pytest.raises(FourhillsEncounterError):
+        generator.generate((3,), "impossible")
+    with pytest.raises(FourhillsEncounterError):
+        generator.generate((30,), "easy")
+
+
+def test_generate_from_world(world):
+    location = world.setting.world_dir / "Walton" / "location.yaml"
+    location.write_text(location.read_text() + "environment: Urban\n")
+    world.invalidate_paths([location])
+    generator = EncounterGenerator.from_world(world)
+    assert "beast" in generator.creature_types()
+    assert generator.environments() == ["urban"]
+    assert [m.name for m in generator.filtered(environment="urban")] == ["walton_thug"]
+
+    encounters = generator.generate((3, 3, 3, 3), "medium", environment="urban")
+    assert [str(encounter) for encounter in encounters] == ["3 x walton_thug"]
+
+
+def test_large_library_is_quick():
+    generator = EncounterGenerator(random_library(2000))
+    start = time.perf_counter()
+    for levels in [(1,) * 4, (10,) * 4, (20,) * 6]:
+        for difficulty in ["easy", "deadly"]:
+            assert generator.generate(levels, difficulty, max_monsters=15, max_kinds=4)
+    # Generous, so the test isn't flaky on slow machines
+    assert time.perf_counter() - start < 2.0
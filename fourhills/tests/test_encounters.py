@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+import pytest
+
+from fourhills.dataclasses import Party
+from fourhills.encounters import (
+    Encounter,
+    assess_encounter,
+    assess_encounters,
+    encounter_multiplier,
+    parse_levels,
+    party_levels,
+    party_thresholds,
+    read_monsters,
+    world_encounter_table,
+)
+from fourhills.exceptions import FourhillsEncounterError
+
+
+def test_party_thresholds():
+    assert party_thresholds([3, 3, 3, 3]).tolist() == [300, 600, 900, 1600]
+    assert party_thresholds([1, 20]).tolist() == [2825, 5750, 8575, 12800]
+    for levels in ([], [0], [21]):
+        with pytest.raises(FourhillsEncounterError):
+            party_thresholds(levels)
+
+
+def test_encounter_multiplier():
+    counts = [1, 2, 3, 6, 7, 10, 11, 14, 15, 40]
+    assert encounter_multiplier(counts, 4).tolist() == [1, 1.5, 2, 2, 2.5, 2.5, 3, 3, 4, 4]
+    # Small parties use the next multiplier up, large parties the next one down
+    assert encounter_multiplier([1, 15], 2).tolist() == [1.5, 5]
+    assert encounter_multiplier([1, 2], 6).tolist() == [0.5, 1]
+    assert encounter_multiplier(np.array([[1], [2]]), np.array([2, 4, 6])).shape == (2, 3)
+
+
+def test_assess_encounter():
+    # Four level 3 players against three CR 1 and one CR 1/2 monsters
+    difficulty = assess_encounter(Encounter([1, 0.5], [3, 1]), [3, 3, 3, 3])
+    assert difficulty.xp == 700
+    assert difficulty.multiplier == 2
+    assert difficulty.adjusted_xp == 1400
+    assert difficulty.thresholds == (300, 600, 900, 1600)
+    assert difficulty.label == "Hard"
+    assert assess_encounter(Encounter(), [3]).difficulty == "trivial"
+    assert assess_encounter(Encounter([5], [1]), [1]).difficulty == "deadly"
+
+
+def test_batch_matches_single():
+    rng = np.random.default_rng(0)
+    encounters = [
+        Encounter(rng.choice([0, 0.25, 1, 2, 5], 3).tolist(), rng.integers(1, 6, 3).tolist())
+        for _ in range(50)
+    ]
+    parties = [(1, 1), (3, 3, 3, 3), (5, 6, 5, 6, 5, 6), (12,)]
+    table = assess_encounters(encounters, parties)
+    assert table.adjusted_xp.shape == (4, 50)
+    for i, levels in enumerate(parties):
+        for j, encounter in enumerate(encounters):
+            assert table.assessment(i, j) == assess_encounter(encounter, levels)
+    assert sum(counts.sum() for counts in table.counts().values()) == 200
+
+
+def test_read_monsters_and_levels():
+    monsters = ["goblin", {"name": "wolf", "quantity": 3}, {"name": "bat", "quantity": 0}, 5]
+    assert read_monsters(monsters) == (("goblin", 1), ("wolf", 3), ("5", 1))
+    assert read_monsters(None) == ()
+    assert party_levels(["A", "B"], 3, {"B": 4}) == (3, 4)
+    assert party_levels(["A", "B"], None, {"B": 4}) is None
+    assert party_levels(["A"], 25) is None
+    assert parse_levels("4x3, 5") == (3, 3, 3, 3, 5)
+    with pytest.raises(FourhillsEncounterError):
+        parse_levels("three")
+
+
+def test_world_encounter_table(world):
+    party = Party.from_name("example_party", world.setting)
+    assert party.player_levels() == (3, 3, 3, 3)
+
+    table = world_encounter_table(world)
+    assert table.parties == ["example_party"]
+    assert "Walton/LensonHouse" not in table.encounters
+    walton = table.assessment(0, table.encounters.index("Walton"))
+    assert walton.xp == 600
+    assert walton.difficulty == "hard"
+
+    # Levelling up only changes the party's file
+    party_path = Party.absolute_path("example_party", world.setting)
+    party_path.write_text(party_path.read_text().replace("level: 3", "level: 5"))
+    world.invalidate_paths([party_path])
+    table = world_encounter_table(world)
+    assert table.assessment(0, table.encounters.index("Walton")).difficulty == "easy"
+
+
+def test_unknown_monsters(world):
+    location = world.setting.world_dir / "Walton" / "location.yaml"
+    location.write_text(
+        "monsters:\n  - name: walton_thug\n    quantity: 2\n  - name: dragon\n"
+    )
+    world.invalidate_paths([location])
+    table = world_encounter_table(world, {"Solo": (1,)})
+    walton = table.encounters.index("Walton")
+    assert table.monster_counts[walton] == 2
+    assert table.unknown[walton] == ["dragon"]
+
+
+def test_whole_world_is_quick():
+    encounters = [Encounter([0.25, 1, 3], [4, 2, 1]) for _ in range(5000)]
+    parties = [(level,) * 4 for level in range(1, 21)]
+    start = time.perf_counter()
+    assess_encounters(encounters, parties)
+    # 100,000 assessments; generous, so the test isn't flaky on slow machines
+    assert time.perf_counter() - start < 1.0
@@ -0,0 +1,42 @@
+import pytest
+
+from fourhills.dataclasses import StatBlock
+from fourhills.fourhills import SCENE_FILENAME, Scene
+
+
+@pytest.fixture
+def battle_dir(world_path, monkeypatch):
+    battle_dir = world_path / "world" / "OldDragmooreRoad"
+    monkeypatch.chdir(battle_dir)
+    yield battle_dir
+
+
+def test_battle_loads_each_stat_block_once(battle_dir, monkeypatch):
+    (battle_dir / SCENE_FILENAME).write_text(
+        "monsters:\n  - example_monster x3\n  - example_monster_2\n  - example_monster\n"
+        "npcs:\n  - example_npc\n"
+    )
+    loaded = []
+    from_name = StatBlock.from_name
+
+    def counting_from_name(name, setting):
+        loaded.append(name)
+        return from_name(name, setting)
+
+    monkeypatch.setattr(StatBlock, "from_name", staticmethod(counting_from_name))
+    scene = Scene.from_file(SCENE_FILENAME)
+    panes = list(scene.battle_panes())
+    assert len(panes) == 4
+    assert "Example monster x3" in panes[0][0]
+    assert "Example monster x1" in panes[2][0]
+    # The NPC's stats_base loads example_monster again, through the NPC
+    assert sorted(loaded) == ["example_monster", "example_monster", "example_monster_2"]
+
+
+def test_scene_lines(battle_dir):
+    scene = Scene.from_file(SCENE_FILENAME)
+    assert list(scene.scene_lines()) == [
+        "Monsters: example_monster x3, example_monster_2",
+        "NPCs: example_npc",
+    ]
+    assert any("Mr. B. Smith" in line for line in scene.npc_lines())
@@ -0,0 +1,67 @@
+import pytest
+
+from fourhills.exceptions import FourhillsSearchQueryError
+from fourhills.index import Reference
+
+
+def references(results):
+    return [result.reference for result in results]
+
+
+def test_ranked_results(world):
+    results = world.search("thug")
+    # The monster's own name outranks a location which merely contains it
+    assert references(results)[:2] == [
+        Reference("monster", "walton_thug"),
+        Reference("location", "Walton"),
+    ]
+    assert results[0].score > results[1].score > 0
+
+
+def test_markdown_is_searched(world):
+    results = world.search("tiefling heroine")
+    assert results[0].reference == Reference("location", "Walton")
+    assert results[0].path.name == "scene.md"
+    assert "tiefling" in results[0].snippet
+
+
+def test_prefix_query(world):
+    assert Reference("location", "OldDragmooreRoad") in references(world.search("dragmo*"))
+    assert world.search("dragmo") == []
+
+
+def test_filters(world):
+    results = references(world.search("type:monster cr:>=1"))
+    assert results
+    assert all(reference.kind == "monster" for reference in results)
+    assert Reference("monster", "walton_thug") not in results
+    assert Reference("monster", "walton_thug") in references(world.search("type:monster cr:1/2"))
+    assert references(world.search("lenson type:npc")) == [Reference("npc", "lenson")]
+
+
+def test_npc_filters_update_with_stats_base(world):
+    assert Reference("npc", "example_npc") in references(world.search("type:npc cr:1"))
+    path = world.monsters.path_for("example_monster")
+    path.write_text(path.read_text().replace("challenge: 1\n", "challenge: 5\n"))
+    world.invalidate_paths([path])
+    assert Reference("npc", "example_npc") not in references(world.search("type:npc cr:1"))
+    assert Reference("npc", "example_npc") in references(world.search("type:npc cr:5"))
+
+
+def test_invalid_filter(world):
+    with pytest.raises(FourhillsSearchQueryError):
+        world.search("cr:lots")
+    with pytest.raises(FourhillsSearchQueryError):
+        world.search("type:dragon")
+
+
+def test_index_updates_incrementally(world):
+    assert world.search("basilisk") == []
+    note = world.setting.notes_dir / "plans.md"
+    note.write_text("A basilisk lairs under the bridge.")
+    world.invalidate(note)
+    assert references(world.search("basilisk")) == [Reference("note", "plans.md")]
+
+    note.unlink()
+    world.invalidate(note)
+    assert world.search("basilisk") == []
@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+import pytest
+
+from fourhills.combat import Attack, Combatant, player_combatant
+from fourhills.dice import DiceExpression
+from fourhills.exceptions import FourhillsCombatError
+from fourhills.simulation import CHUNK_SIZE, simulate
+
+
+def duellist(name, initiative=0, ac=10, hp="10", damage="10"):
+    # Hits anything but on a 1, and always kills in one hit
+    attack = Attack("sword", 100, DiceExpression.parse(damage))
+    return Combatant(name, ac, DiceExpression.parse(hp), (attack,), initiative)
+
+
+def goblin(name):
+    attack = Attack("scimitar", 4, DiceExpression.parse("1d6 + 2"))
+    return Combatant(name, 15, DiceExpression.parse("2d6"), (attack,), 2)
+
+
+def test_duel_matches_exact_odds():
+    # The faster duellist wins unless they keep rolling 1s: 0.95 / (1 - 0.05 ** 2)
+    result = simulate([duellist("hero", initiative=100)], [duellist("villain")], 50000, seed=0)
+    assert result.win_probability == pytest.approx(0.95 / (1 - 0.05 ** 2), abs=0.005)
+    assert result.win_probability + result.loss_probability == 1
+    assert result.rounds.min() == 1
+    assert np.all(result.party_hp[result.won] == 10)
+    assert result.mean_players_down == pytest.approx(result.loss_probability)
+
+
+def test_more_monsters_are_harder():
+    party = [player_combatant(f"Player {number}", 1) for number in range(4)]
+    few = simulate(party, [goblin("goblin 1"), goblin("goblin 2")], 5000, seed=1)
+    many = simulate(party, [goblin(f"goblin {number}") for number in range(8)], 5000, seed=1)
+    assert few.win_probability > many.win_probability
+    assert few.mean_hp_remaining > many.mean_hp_remaining
+    assert 0 <= many.mean_hp_remaining <= 1
+    low, high = many.rounds_range()
+    assert 1 <= low <= many.mean_rounds <= high
+
+
+def test_undecided_fights():
+    # Neither side can hurt the other
+    harmless = Combatant("ghost", 10, DiceExpression.parse("5"))
+    result = simulate([harmless], [harmless], 100, seed=0, max_rounds=3)
+    assert result.undecided_probability == 1
+    assert result.rounds.tolist() == [3] * 100
+
+
+def test_seed_gives_same_results_in_processes():
+    trials = CHUNK_SIZE + 100
+    party = [player_combatant("Player", 3)]
+    one = simulate(party, [goblin("goblin")], trials, seed=3, workers=1)
+    two = simulate(party, [goblin("goblin")], trials, seed=3, workers=2)
+    assert one.trials == two.trials == trials
+    assert np.array_equal(one.won, two.won)
+    assert np.array_equal(one.party_hp, two.party_hp)
+
+
+def test_simulate_needs_both_sides():
+    with pytest.raises(FourhillsCombatError):
+        simulate([], [goblin("goblin")])
+    with pytest.raises(FourhillsCombatError):
+        simulate([goblin("goblin")], [goblin("goblin")], trials=0)
+
+
+def test_many_trials_are_quick():
+    party = [player_combatant(f"Player {number}", 3) for number in range(4)]
+    start = time.perf_counter()
+    simulate(party, [goblin(f"goblin {number}") for number in range(6)], 20000, seed=0)
+    # Generous, so the test isn't flaky on slow machines
+    assert time.perf_counter() - start < 5.0
@@ -0,0 +1,130 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from fourhills.exceptions import FourhillsSearchQueryError
+from fourhills.stats_index import StatsIndex, damage_bits, read_stats
+
+
+def write_monster(world, name, **fields):
+    path = world.setting.monsters_dir / f"{name}.yaml"
+    lines = [f"name: {name}"]
+    for key, value in fields.items():
+        if isinstance(value, list):
+            lines.append(f"{key}:")
+            lines.extend(f"  - {item}" for item in value)
+        else:
+            lines.append(f"{key}: {value}")
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_read_stats():
+    row = read_stats({
+        "challenge": "1/2", "ac": "15 (chain shirt)", "hp": "27 (6d8)", "size": "Large",
+        "creature_type": "Humanoid (goblinoid)", "ability": {"STR": 16, "dex": "12"},
+        "damage_immunities": ["poison"],
+        "damage_resistances": ["bludgeoning, piercing, and slashing from nonmagical attacks"],
+    })
+    assert (row.numbers["challenge"], row.numbers["ac"], row.numbers["hp"]) == (0.5, 15, 27)
+    assert (row.numbers["str"], row.numbers["dex"]) == (16, 12)
+    assert (row.size, row.creature_type) == (3, "humanoid (goblinoid)")
+    assert row.damage["immune"] == damage_bits("poison")
+    assert row.damage["resistant"] == damage_bits(["bludgeoning", "piercing", "slashing"])
+    assert row.damage["vulnerable"] == 0
+
+    blank = read_stats("not a stat block")
+    assert blank.size == -1 and blank.creature_type == ""
+    assert np.isnan(list(blank.numbers.values())).all()
+
+
+def test_query_example_world(world):
+    assert world.monsters.query() == sorted(world.monsters)
+    assert world.monsters.query(cr=(0, "1/2"), creature_type="human") == [
+        "ja_min", "turtlerobe_guard", "walton_thug"
+    ]
+    assert world.monsters.query(cr="1/2") == ["walton_thug"]
+    assert world.monsters.query(immune="thunder", resistant="lightning") == ["example_monster"]
+    assert world.monsters.query(immune=["thunder", "poison"]) == []
+    assert world.monsters.query(ac=(None, 9)) == ["example_monster", "example_monster_2"]
+    assert world.monsters.query(abilities={"STR": (15, None)}) == ["walton_thug"]
+    assert world.monsters.query(size=["Medium"]) == ["ja_min", "turtlerobe_guard", "walton_thug"]
+    assert world.stats.creature_types("monster") == ["beast", "human"]
+    # NPCs take their numbers from the stat block they're based on
+    assert world.npcs.query(cr=1, creature_type="beast") == ["example_npc"]
+    assert "centel" in world.npcs.query()
+
+
+def test_tagged_types(world):
+    write_monster(world, "goblin", creature_type="Humanoid (goblinoid)")
+    write_monster(world, "bandit", creature_type="humanoid")
+    world.invalidate_paths([world.setting.monsters_dir])
+    assert world.monsters.query(creature_type="Humanoid") == ["bandit", "goblin"]
+    assert world.monsters.query(creature_type="humanoid (goblinoid)") == ["goblin"]
+
+
+@pytest.mark.parametrize("filters", [
+    {"size": "enormous"}, {"immune": "boredom"}, {"cr": ("one", 2)},
+    {"abilities": {"luck": 10}},
+])
+def test_invalid_queries(world, filters):
+    with pytest.raises(FourhillsSearchQueryError):
+        world.monsters.query(**filters)
+
+
+def test_updates(world):
+    path = write_monster(world, "zombie", challenge="1/4", creature_type="undead",
+                         damage_immunities=["poison"])
+    world.invalidate_paths([path])
+    assert world.monsters.query(creature_type="undead") == ["zombie"]
+
+    path.write_text("name: zombie\nchallenge: 3\ncreature_type: undead\n")
+    world.invalidate_paths([path])
+    assert world.monsters.query(immune="poison") == []
+    assert world.monsters.query(cr=(2, 5)) == ["zombie"]
+
+    new_path = path.with_name("ghoul.yaml")
+    path.rename(new_path)
+    world.invalidate_paths([path, new_path])
+    assert world.monsters.query(creature_type="undead") == ["ghoul"]
+    new_path.unlink()
+    world.invalidate_paths([new_path])
+    assert world.monsters.query(creature_type="undead") == []
+
+
+def test_npcs_update_with_stats_base(world):
+    assert world.npcs.query(cr=1) == ["example_npc"]
+    path = world.monsters.path_for("example_monster")
+    path.write_text(path.read_text().replace("challenge: 1\n", "challenge: 5\n"))
+    world.invalidate_paths([path])
+    assert world.npcs.query(cr=5) == ["example_npc"]
+    assert world.npcs.query(cr=1) == []
+    # Removing the stat block leaves the NPC without numbers
+    path.unlink()
+    world.invalidate_paths([path])
+    assert world.npcs.query(cr=5) == []
+
+
+def test_many_monsters(world):
+    rng = random.Random(0)
+    count = 3 * StatsIndex.INITIAL_CAPACITY
+    expected = []
+    for number in range(count):
+        cr = rng.randint(0, 10)
+        creature_type = rng.choice(["undead", "beast", "fiend"])
+        resistances = rng.sample(["fire", "cold", "necrotic"], rng.randint(0, 2))
+        write_monster(world, f"monster_{number:03}", challenge=cr, creature_type=creature_type,
+                      damage_resistances=resistances)
+        if 3 <= cr <= 5 and creature_type == "undead" and "fire" in resistances:
+            expected.append(f"monster_{number:03}")
+    world.invalidate()
+    assert len(world.stats) == len(world.monsters) + len(world.npcs)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        found = world.monsters.query(cr=(3, 5), creature_type="undead", resistant="fire")
+    # Generous, so the test isn't flaky on slow machines
+    assert time.perf_counter() - start < 1.0
+    assert found == expected
@@ -0,0 +1,144 @@
+from pathlib import Path
+import time
+
+import pytest
+
+from fourhills.exceptions import FourhillsCombatError
+from fourhills.tracker import MAX_UNDO, CombatTracker, read_battle_monsters
+
+
+def names(combatants):
+    return [combatant.name for combatant in combatants]
+
+
+def fight():
+    tracker = CombatTracker()
+    tracker.add("slow", 5, 10)
+    tracker.add("fast", 20, 10)
+    tracker.add("middling", 12, 10, dexterity=14)
+    tracker.add("tied", 12, 10, dexterity=10)
+    return tracker
+
+
+def test_turn_order():
+    tracker = fight()
+    assert tracker.round == 0 and tracker.current_combatant is None
+    turns = [tracker.next_turn().name for _ in range(5)]
+    assert turns == ["fast", "middling", "tied", "slow", "fast"]
+    assert tracker.round == 2
+    assert names(tracker.order()) == ["fast", "middling", "tied", "slow"]
+
+
+def test_changes_to_turn_order():
+    tracker = fight()
+    tracker.next_turn()
+    tracker.next_turn()
+    # Joins this round, after the current combatant
+    tracker.add("late", 8, 10)
+    # Has acted, so goes to the end of next round's order
+    tracker.set_initiative(1, 1)
+    assert names(tracker.order()) == ["middling", "tied", "late", "slow", "fast"]
+    assert [tracker.next_turn().name for _ in range(4)] == ["tied", "late", "slow", "middling"]
+    tracker.remove(3)
+    assert [tracker.next_turn().name for _ in range(3)] == ["late", "slow", "fast"]
+
+
+def test_initiative_changed_and_changed_back():
+    tracker = CombatTracker()
+    for name, initiative in (("a", 15), ("b", 10), ("c", 5)):
+        tracker.add(name, initiative, 10)
+    tracker.next_turn()
+    tracker.set_initiative(2, 12)
+    tracker.set_initiative(2, 5)
+    assert names(tracker.order()) == ["a", "b", "c"]
+    assert [tracker.next_turn().name for _ in range(5)] == ["b", "c", "a", "b", "c"]
+    # Undone changes of initiative don't bring back old places either
+    tracker.set_initiative(2, 12)
+    tracker.undo()
+    assert names(tracker.order()) == ["c", "a", "b"]
+
+
+def test_down_monsters_are_skipped():
+    tracker = fight()
+    tracker.damage(1, 20)
+    player = tracker.add("player", 15, 10, player=True)
+    tracker.damage(player, 20)
+    assert [tracker.next_turn().name for _ in range(2)] == ["player", "middling"]
+    for combatant_id in (0, 2, 3):
+        tracker.damage(combatant_id, 20)
+    tracker.remove(player)
+    with pytest.raises(FourhillsCombatError):
+        tracker.next_turn()
+
+
+def test_hit_points_and_conditions():
+    tracker = fight()
+    tracker.set_temp_hp(0, 5)
+    assert (tracker.damage(0, 7).hp, tracker[0].temp_hp) == (8, 0)
+    assert tracker.heal(0, 10).hp == 10
+    assert tracker.add_condition(0, "Prone").conditions == {"prone"}
+    assert tracker.remove_condition(0, "prone").conditions == frozenset()
+    with pytest.raises(FourhillsCombatError):
+        tracker[99]
+    with pytest.raises(FourhillsCombatError):
+        tracker.set_initiative(99, 10)
+
+
+def test_undo_and_redo():
+    tracker = fight()
+    tracker.next_turn()
+    tracker.damage(0, 4)
+    tracker.add_condition(0, "prone")
+    assert tracker.undo() and tracker.undo()
+    assert (tracker[0].hp, tracker[0].conditions) == (10, frozenset())
+    assert tracker.redo()
+    assert tracker[0].hp == 6
+    tracker.next_turn()
+    # A new change can't be followed by a redo
+    assert not tracker.can_redo and not tracker.redo()
+    while tracker.undo():
+        pass
+    assert tracker.round == 0 and len(tracker) == 0
+    # The undo history is bounded
+    for _ in range(MAX_UNDO + 10):
+        tracker.add("extra", 1, 1)
+    assert sum(1 for _ in iter(tracker.undo, False)) == MAX_UNDO
+
+
+def test_from_location(world):
+    party = world.parties["example_party"]
+    tracker, unknown = CombatTracker.from_location(world, Path("OldDragmooreRoad"), party, rng=0)
+    assert unknown == []
+    assert sorted(names(tracker.order())) == sorted(
+        ["example_monster 1", "example_monster 2", "example_monster 3", "example_monster_2",
+         "example_npc"] + party.players
+    )
+    monsters = [c for c in tracker.order() if c.source == "example_monster"]
+    # Every example_monster shares one stat block
+    assert len({id(monster.stat_block) for monster in monsters}) == 1
+    assert {monster.hp for monster in monsters} == {13}
+    assert not tracker.can_undo
+
+    rolled, _ = CombatTracker.from_location(world, Path("OldDragmooreRoad"), roll_hp=True, rng=0)
+    assert len(rolled) == 5
+
+
+def test_read_battle_monsters():
+    assert read_battle_monsters(["goblin x3", "orc", {"name": "ogre", "quantity": 2}]) == (
+        ("goblin", 3), ("orc", 1), ("ogre", 2),
+    )
+    assert read_battle_monsters(None) == ()
+
+
+def test_large_battles_are_quick(world):
+    tracker = CombatTracker()
+    tracker.add_monster(world.monsters["walton_thug"], 500, rng=0)
+    start = time.perf_counter()
+    for _ in range(2000):
+        tracker.next_turn()
+        tracker.damage(tracker.current, 1)
+    for _ in range(MAX_UNDO):
+        tracker.undo()
+    # Generous, so the test isn't flaky on slow machines
+    assert time.perf_counter() - start < 2.0
+    assert tracker.round == 4
@@ -0,0 +1,126 @@
+from pathlib import Path
+import shutil
+import time
+
+from fourhills.watcher import ChangeSet, Entry, TreeSnapshot, diff_entries
+
+
+def make_tree(root):
+    (root / "npcs").mkdir(parents=True)
+    (root / "npcs" / "dara.yaml").write_text("name: Dara\n")
+    (root / "world" / "Walton" / "Inn").mkdir(parents=True)
+    (root / "world" / "Walton" / "location.yaml").write_text("name: Walton\n")
+    (root / "world" / "Walton" / "Inn" / "location.yaml").write_text("name: Inn\n")
+
+
+def snapshot(root):
+    snapshot = TreeSnapshot(root)
+    snapshot.scan()
+    return snapshot
+
+
+def test_scan_finds_everything(tmp_path):
+    make_tree(tmp_path)
+    (tmp_path / ".fourhills").mkdir()
+    (tmp_path / ".fourhills" / "cache").write_text("")
+    changes = TreeSnapshot(tmp_path).scan()
+    # Only the top of each new tree is reported, and hidden entries are ignored
+    assert changes.added == {tmp_path / "npcs", tmp_path / "world"}
+    assert not changes.removed and not changes.renamed
+
+
+def test_modified_added_and_removed(tmp_path):
+    make_tree(tmp_path)
+    tree = snapshot(tmp_path)
+    (tmp_path / "npcs" / "dara.yaml").write_text("name: Dara the Bold\n")
+    (tmp_path / "npcs" / "igthin.yaml").write_text("name: Igthin\n")
+    shutil.rmtree(str(tmp_path / "world" / "Walton"))
+    changes = tree.rescan([tmp_path / "npcs", tmp_path / "world"])
+    assert changes.modified == {tmp_path / "npcs" / "dara.yaml"}
+    assert changes.added == {tmp_path / "npcs" / "igthin.yaml"}
+    assert changes.removed == {tmp_path / "world" / "Walton"}
+    assert not changes.renamed
+    assert not tree.rescan([tmp_path / "npcs", tmp_path / "world"])
+
+
+def test_directory_rename_is_coalesced(tmp_path):
+    make_tree(tmp_path)
+    tree = snapshot(tmp_path)
+    old = tmp_path / "world" / "Walton"
+    new = tmp_path / "world" / "NewWalton"
+    old.rename(new)
+    changes = tree.rescan([tmp_path / "world"])
+    assert changes.renamed == {old: new}
+    assert not changes.added and not changes.removed and not changes.modified
+    # The contents of the renamed directory are known under their new paths
+    assert new / "Inn" / "location.yaml" in tree.files()
+
+
+def test_move_between_directories(tmp_path):
+    make_tree(tmp_path)
+    tree = snapshot(tmp_path)
+    old = tmp_path / "npcs" / "dara.yaml"
+    new = tmp_path / "world" / "dara.yaml"
+    old.rename(new)
+    changes = tree.rescan([tmp_path / "npcs", tmp_path / "world"])
+    assert changes.renamed == {old: new}
+
+
+def test_full_scan_matches_rescan(tmp_path):
+    make_tree(tmp_path)
+    tree = snapshot(tmp_path)
+    (tmp_path / "world" / "Walton" / "Inn").rename(tmp_path / "world" / "Inn")
+    (tmp_path / "world" / "Inn" / "location.yaml").write_text("name: The Inn\n")
+    changes = tree.scan()
+    assert changes.renamed == {
+        tmp_path / "world" / "Walton" / "Inn": tmp_path / "world" / "Inn"
+    }
+    # The file's change is implied by the move of its directory
+    assert not changes.modified
+
+
+def test_change_set_under():
+    root = Path("/setting")
+    changes = ChangeSet(
+        added={root / "npcs" / "a.yaml"},
+        renamed={
+            root / "npcs" / "b.yaml": root / "monsters" / "b.yaml",
+            root / "npcs" / "c.yaml": root / "npcs" / "d.yaml",
+        },
+    )
+    npcs = changes.under(root / "npcs")
+    assert npcs.added == {root / "npcs" / "a.yaml"}
+    assert npcs.removed == {root / "npcs" / "b.yaml"}
+    assert npcs.renamed == {root / "npcs" / "c.yaml": root / "npcs" / "d.yaml"}
+    monsters = changes.under(root / "monsters")
+    assert monsters.added == {root / "monsters" / "b.yaml"}
+    assert not monsters.removed and not monsters.renamed
+    assert changes.paths() >= {root / "npcs" / "b.yaml", root / "monsters" / "b.yaml"}
+
+
+def test_ordered_renames_deepest_first():
+    root = Path("/setting")
+    changes = ChangeSet(renamed={
+        root / "a": root / "b",
+        root / "a" / "x" / "f.md": root / "f.md",
+    })
+    assert [old for old, _ in changes.ordered_renames()] == [
+        root / "a" / "x" / "f.md", root / "a"
+    ]
+
+
+def test_large_diffs_are_quick():
+    root = Path("/world")
+    entries = {}
+    for directory in range(100):
+        entries[root / f"d{directory}"] = Entry(True, directory + 1, 0, 0)
+        for name in range(100):
+            path = root / f"d{directory}" / f"f{name}.yaml"
+            entries[path] = Entry(False, 1000 + 100 * directory + name, 0, 10)
+    start = time.perf_counter()
+    added = diff_entries({}, entries)
+    removed = diff_entries(entries, {})
+    # Generous, so the test isn't flaky on slow machines
+    assert time.perf_counter() - start < 2.0
+    # Only the directories are listed, as their files are implied
+    assert added.added == removed.removed == {root / f"d{d}" for d in range(100)}
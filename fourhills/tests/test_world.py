@@ -0,0 +1,89 @@
+import os
+from pathlib import Path
+import pytest
+
+from fourhills.dataclasses import stats
+from fourhills.utils.yaml_loader import load_yaml
+
+
+def count_parses(monkeypatch):
+    calls = []
+
+    def counting_load_yaml(filename):
+        calls.append(filename)
+        return load_yaml(filename)
+
+    monkeypatch.setattr(stats, "load_yaml", counting_load_yaml)
+    return calls
+
+
+def test_collections_list_entities(world):
+    assert "centel" in list(world.npcs)
+    assert "walton_thug" in list(world.monsters)
+    assert Path("Walton/LensonHouse") in list(world.locations)
+    assert Path("FirstFetchQuest") in list(world.quests)
+    assert list(world.parties) == ["example_party"]
+
+
+def test_lookup_by_name_and_path(world):
+    assert world.npcs["example_npc"].stats.name == "Example monster"
+    assert world.locations["Walton/LensonHouse"].path == Path("Walton/LensonHouse")
+    assert "centel" in world.npcs
+    assert "not_an_npc" not in world.npcs
+
+
+def test_missing_entity_raises_key_error(world):
+    with pytest.raises(KeyError):
+        world.monsters["not_a_monster"]
+
+
+def test_repeat_lookup_does_not_reparse(world, monkeypatch):
+    calls = count_parses(monkeypatch)
+    for _ in range(3):
+        world.monsters["example_monster"]
+        world.npcs["example_npc"]
+    assert len(calls) == 1
+
+
+def test_changed_file_is_reparsed(world, monkeypatch):
+    calls = count_parses(monkeypatch)
+    monster_path = world.monsters.path_for("walton_thug")
+    assert world.monsters["walton_thug"].name == "Walton Thug"
+
+    contents = monster_path.read_text().replace("Walton Thug", "Walton Bruiser")
+    monster_path.write_text(contents)
+    stat_result = os.stat(monster_path)
+    os.utime(monster_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10 ** 9))
+
+    assert world.monsters["walton_thug"].name == "Walton Bruiser"
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_preload_loads_everything(world, executor):
+    result = world.preload(executor=executor, max_workers=2)
+    assert not result.errors
+    assert set(result.npcs) == set(world.npcs)
+    assert result.monsters["walton_thug"].name == "Walton Thug"
+    assert Path("Walton") in result.locations
+
+
+def test_preload_reports_bad_files(world):
+    bad_path = world.monsters.path_for("broken")
+    bad_path.write_text("name: [unclosed\n")
+    result = world.preload()
+    assert list(result.errors) == [bad_path]
+    assert "walton_thug" in result.monsters
+
+
+def test_preload_reports_empty_party_file(world):
+    empty_path = world.parties.path_for("empty")
+    empty_path.write_text("")
+    result = world.preload()
+    assert list(result.errors) == [empty_path]
+    assert "example_party" in result.parties
+
+
+def test_preload_rejects_unknown_executor(world):
+    with pytest.raises(ValueError):
+        world.preload(executor="gpu")
@@ -0,0 +1,502 @@
+"""Keeping track of a fight as it is played: initiative, hit points and conditions.
+
+Each combatant is a small, immutable `TrackedCombatant` holding only what changes
+during the fight. Monsters of the same kind all refer to one shared `StatBlock`, so
+forty goblins load the goblin's stat block once. Changing a combatant replaces its
+record, which means the state of the whole fight can be saved for undo by copying a
+few lists of references, without copying any combatant.
+
+Turn order is kept in two heaps: those still to act this round, and those who have
+acted. Advancing the turn moves the combatant acting from one to the other, and
+starting a new round swaps them, so each turn takes logarithmic time however many
+combatants there are.
+"""
+
+from collections import deque
+from dataclasses import dataclass, replace
+import heapq
+from pathlib import Path
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from fourhills.combat import ability_modifier, party_combatants, read_number
+from fourhills.dataclasses import Location, StatBlock
+from fourhills.dataclasses.slots import add_slots
+from fourhills.dice import DiceExpression, Rng
+from fourhills.encounters import read_monsters
+from fourhills.exceptions import FourhillsCombatError, FourhillsError
+from fourhills.utils.yaml_loader import load_yaml
+
+CONDITIONS = (
+    "blinded", "charmed", "deafened", "frightened", "grappled", "incapacitated",
+    "invisible", "paralyzed", "petrified", "poisoned", "prone", "restrained", "stunned",
+    "unconscious",
+)
+# The most changes which can be undone
+MAX_UNDO = 200
+BATTLE_FILENAME = "battle.yaml"
+
+_D20 = DiceExpression.parse("1d20")
+_BATTLE_MONSTER_RE = re.compile(r"^(\w*)(?: ?x?(\d+))?$")
+
+
+@add_slots
+@dataclass(frozen=True)
+class TrackedCombatant:
+    """One combatant in a fight, as it stands.
+
+    Only what changes during the fight is held here; the rest is in the stat block,
+    which is shared between every combatant of the same kind. Players have no stat
+    block.
+    """
+
+    id: int
+    name: str
+    initiative: int
+    hp: int
+    max_hp: int
+    ac: Optional[int] = None
+    stat_block: Optional[StatBlock] = None
+    temp_hp: int = 0
+    conditions: FrozenSet[str] = frozenset()
+    player: bool = False
+    # Breaks ties in initiative, the higher acting first
+    dexterity: int = 10
+    # The monster or NPC the combatant is one of, by name in the world
+    source: Optional[str] = None
+
+    @property
+    def down(self) -> bool:
+        return self.hp <= 0
+
+
+class _State(NamedTuple):
+    """Everything which changes during a fight, as saved for undo"""
+
+    combatants: Dict[int, TrackedCombatant]
+    waiting: List[Tuple]
+    acted: List[Tuple]
+    live: Dict[int, Tuple]
+    round: int
+    current: Optional[int]
+
+
+class CombatTracker:
+    """The state of a fight, with every change to it able to be undone.
+
+    Combatants are referred to by the `id` given when they are added. Turns go in
+    order of initiative, then dexterity, then the order combatants were added. Monsters
+    which are down are skipped; players who are down still get their turn, for their
+    death saving throws.
+    """
+
+    def __init__(self):
+        self._combatants: Dict[int, TrackedCombatant] = {}
+        # Heaps of (-initiative, -dexterity, id, sequence) for those still to act this
+        # round, and those who have acted. Only each combatant's latest entry, as kept
+        # in `_live`, counts; older ones, and those of removed combatants, are dropped
+        # when popped
+        self._waiting: List[Tuple] = []
+        self._acted: List[Tuple] = []
+        self._live: Dict[int, Tuple] = {}
+        self._next_sequence = 0
+        self.round = 0
+        self.current: Optional[int] = None
+        self._next_id = 0
+        self._undo: deque = deque(maxlen=MAX_UNDO)
+        self._redo: List[_State] = []
+
+    def __len__(self):
+        return len(self._combatants)
+
+    def __getitem__(self, combatant_id: int) -> TrackedCombatant:
+        """Return a combatant by id
+
+        Raises
+        ------
+        FourhillsCombatError
+            If there is no such combatant.
+        """
+        try:
+            return self._combatants[combatant_id]
+        except KeyError:
+            raise FourhillsCombatError(f"No combatant {combatant_id} in the fight") from None
+
+    @property
+    def current_combatant(self) -> Optional[TrackedCombatant]:
+        """The combatant whose turn it is, or None before the fight has started"""
+        return self._combatants.get(self.current)
+
+    @classmethod
+    def from_scene(
+        cls,
+        world,
+        monsters: Iterable[Tuple[str, int]],
+        npcs: Iterable[str] = (),
+        party=None,
+        rng: Rng = None,
+        roll_hp: bool = False,
+    ) -> Tuple["CombatTracker", List[str]]:
+        """Start tracking a fight between monsters, NPCs and, optionally, a party.
+
+        Parameters
+        ----------
+        world : World
+            The world the monsters and NPCs are in.
+        monsters : iterable of (str, int)
+            The monsters' names and how many of each.
+        npcs : iterable of str
+            The names of NPCs with stat blocks.
+        party : Party, optional
+            The players; their stats are as for simulating fights.
+        rng : optional
+            Seeds the dice, or a NumPy random generator.
+        roll_hp : bool
+            Whether to roll the monsters' hit points rather than take the average.
+
+        Returns
+        -------
+        CombatTracker
+            The fight, with initiative rolled for everyone.
+        list of str
+            The monsters and NPCs which don't exist, or have no stat block.
+
+        Raises
+        ------
+        FourhillsCombatError
+            If a player's stats can't be read.
+        """
+        rng = np.random.default_rng(rng)
+        tracker = cls()
+        unknown = []
+        for name, quantity in monsters:
+            try:
+                tracker.add_monster(world.monsters[name], quantity, name, rng, roll_hp)
+            except (KeyError, FourhillsCombatError):
+                unknown.append(name)
+        for name in npcs:
+            stat_block = _npc_stat_block(world, name)
+            try:
+                if stat_block is None:
+                    raise FourhillsCombatError(f"{name} has no stat block")
+                tracker.add_monster(stat_block, 1, name, rng, roll_hp)
+            except FourhillsCombatError:
+                unknown.append(name)
+        if party is not None:
+            for player in party_combatants(party):
+                tracker.add(
+                    player.name,
+                    int(_D20.sample(rng=rng)) + player.initiative,
+                    int(player.hp.mean),
+                    ac=player.ac,
+                    player=True,
+                )
+        # Setting up the fight isn't something to undo
+        tracker._undo.clear()
+        return tracker, unknown
+
+    @classmethod
+    def from_location(
+        cls, world, path: Path, party=None, rng: Rng = None, roll_hp: bool = False
+    ) -> Tuple["CombatTracker", List[str]]:
+        """Start tracking a fight at a location, with the monsters and NPCs in its
+        `battle.yaml` if it has one, or else those in its `location.yaml`.
+
+        See `from_scene` for the other parameters and what is returned.
+        """
+        battle_path = world.setting.world_dir / path / BATTLE_FILENAME
+        if battle_path.is_file():
+            battle = world.setting.cache.get(battle_path, load_yaml)
+            battle = battle if isinstance(battle, dict) else {}
+            monsters = read_battle_monsters(battle.get("monsters"))
+            npcs = battle.get("npcs")
+        else:
+            location = Location.from_name(Path(path), world.setting)
+            monsters = read_monsters(location.monsters)
+            npcs = location.npcs
+        npcs = [str(npc) for npc in npcs] if isinstance(npcs, list) else []
+        return cls.from_scene(world, monsters, npcs, party, rng, roll_hp)
+
+    def add(
+        self,
+        name: str,
+        initiative: int,
+        hp: int,
+        max_hp: Optional[int] = None,
+        ac: Optional[int] = None,
+        stat_block: Optional[StatBlock] = None,
+        player: bool = False,
+        dexterity: int = 10,
+        source: Optional[str] = None,
+    ) -> int:
+        """Add a combatant, returning its id.
+
+        Once the fight has started, they act this round if their initiative comes
+        after the current combatant's, and from next round otherwise.
+        """
+        self._save()
+        combatant = TrackedCombatant(
+            id=self._next_id,
+            name=name,
+            initiative=initiative,
+            hp=hp,
+            max_hp=hp if max_hp is None else max_hp,
+            ac=ac,
+            stat_block=stat_block,
+            player=player,
+            dexterity=dexterity,
+            source=source,
+        )
+        self._next_id += 1
+        self._combatants[combatant.id] = combatant
+        self._schedule(combatant)
+        return combatant.id
+
+    def add_monster(
+        self,
+        stat_block: StatBlock,
+        quantity: int = 1,
+        name: Optional[str] = None,
+        rng: Rng = None,
+        roll_hp: bool = False,
+    ) -> List[int]:
+        """Add several of a monster, all sharing its stat block, returning their ids.
+
+        Each rolls their own initiative; they are numbered if there is more than one.
+
+        Raises
+        ------
+        FourhillsCombatError
+            If the monster's hit points can't be read.
+        """
+        name = name or stat_block.name
+        hp_dice = stat_block.hp_dice
+        if hp_dice is None:
+            raise FourhillsCombatError(f"Can't read the hit points of {name}")
+        ability = stat_block.ability if isinstance(stat_block.ability, dict) else {}
+        dexterity = read_number(ability.get("DEX")) or 10
+        rng = np.random.default_rng(rng)
+        initiatives = _D20.sample(quantity, rng) + ability_modifier(dexterity)
+        if roll_hp:
+            hps = np.maximum(hp_dice.sample(quantity, rng), 1)
+        else:
+            hps = np.full(quantity, max(int(hp_dice.mean), 1))
+        ac = read_number(stat_block.ac)
+
+        self._save()
+        ids = []
+        for number in range(quantity):
+            label = f"{name} {number + 1}" if quantity > 1 else name
+            hp = int(hps[number])
+            combatant = TrackedCombatant(
+                id=self._next_id,
+                name=label,
+                initiative=int(initiatives[number]),
+                hp=hp,
+                max_hp=hp,
+                ac=ac,
+                stat_block=stat_block,
+                dexterity=dexterity,
+                source=name,
+            )
+            self._next_id += 1
+            self._combatants[combatant.id] = combatant
+            self._schedule(combatant)
+            ids.append(combatant.id)
+        return ids
+
+    def remove(self, combatant_id: int):
+        """Take a combatant out of the fight"""
+        self[combatant_id]
+        self._save()
+        del self._combatants[combatant_id]
+        del self._live[combatant_id]
+        if self.current == combatant_id:
+            self.current = None
+        # Its heap entry is dropped when it comes up
+
+    def next_turn(self) -> TrackedCombatant:
+        """Move on to the next combatant's turn, starting a new round if need be.
+
+        Raises
+        ------
+        FourhillsCombatError
+            If nobody in the fight can act.
+        """
+        if not any(not self._skipped(combatant) for combatant in self._combatants.values()):
+            raise FourhillsCombatError("Nobody in the fight can act")
+        self._save()
+        if self.current is not None:
+            self._push(self._acted, self._combatants[self.current])
+            self.current = None
+        while True:
+            if not self._waiting:
+                self.round += 1
+                self._waiting, self._acted = self._acted, []
+            entry = heapq.heappop(self._waiting)
+            if self._live.get(entry[2]) != entry:
+                # Removed, or its initiative changed
+                continue
+            combatant = self._combatants[entry[2]]
+            if self._skipped(combatant):
+                heapq.heappush(self._acted, entry)
+                continue
+            self.current = combatant.id
+            return combatant
+
+    def damage(self, combatant_id: int, amount: int) -> TrackedCombatant:
+        """Deal damage, taking it from temporary hit points first"""
+        combatant = self[combatant_id]
+        from_temp = min(combatant.temp_hp, max(amount, 0))
+        return self._update(
+            combatant,
+            temp_hp=combatant.temp_hp - from_temp,
+            hp=max(combatant.hp - (amount - from_temp), 0),
+        )
+
+    def heal(self, combatant_id: int, amount: int) -> TrackedCombatant:
+        """Restore hit points, up to the combatant's maximum"""
+        combatant = self[combatant_id]
+        return self._update(combatant, hp=min(combatant.hp + amount, combatant.max_hp))
+
+    def set_temp_hp(self, combatant_id: int, amount: int) -> TrackedCombatant:
+        return self._update(self[combatant_id], temp_hp=max(amount, 0))
+
+    def set_initiative(self, combatant_id: int, initiative: int) -> TrackedCombatant:
+        """Change a combatant's initiative, moving them in the turn order.
+
+        They stay in the same round: someone who has acted this round won't act again
+        until the next. Their old place in the heap is dropped when it comes up.
+        """
+        combatant = self[combatant_id]
+        old_entry = self._live[combatant_id]
+        combatant = self._update(combatant, initiative=initiative)
+        if combatant.id != self.current:
+            heap = self._waiting if old_entry in self._waiting else self._acted
+            self._push(heap, combatant)
+        return combatant
+
+    def add_condition(self, combatant_id: int, condition: str) -> TrackedCombatant:
+        combatant = self[combatant_id]
+        condition = condition.strip().lower()
+        return self._update(combatant, conditions=combatant.conditions | {condition})
+
+    def remove_condition(self, combatant_id: int, condition: str) -> TrackedCombatant:
+        combatant = self[combatant_id]
+        condition = condition.strip().lower()
+        return self._update(combatant, conditions=combatant.conditions - {condition})
+
+    def order(self) -> List[TrackedCombatant]:
+        """Every combatant in the order they act from now: the current one, those still
+        to act this round, then those who have acted"""
+        waiting = self._live_entries(self._waiting)
+        acted = self._live_entries(self._acted)
+        order = [self.current] if self.current in self._combatants else []
+        order += [entry[2] for entry in sorted(waiting)]
+        order += [entry[2] for entry in sorted(acted)]
+        return [self._combatants[combatant_id] for combatant_id in order]
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self) -> bool:
+        """Undo the last change, returning whether there was one to undo"""
+        if not self._undo:
+            return False
+        self._redo.append(self._snapshot())
+        self._restore(self._undo.pop())
+        return True
+
+    def redo(self) -> bool:
+        """Redo the last change undone, returning whether there was one to redo"""
+        if not self._redo:
+            return False
+        self._undo.append(self._snapshot())
+        self._restore(self._redo.pop())
+        return True
+
+    def _update(self, combatant: TrackedCombatant, **changes) -> TrackedCombatant:
+        self._save()
+        combatant = replace(combatant, **changes)
+        self._combatants[combatant.id] = combatant
+        return combatant
+
+    def _snapshot(self) -> _State:
+        # The combatants are immutable, so copying the containers is enough
+        return _State(
+            dict(self._combatants), list(self._waiting), list(self._acted),
+            dict(self._live), self.round, self.current,
+        )
+
+    def _restore(self, state: _State):
+        self._combatants = state.combatants
+        self._waiting = state.waiting
+        self._acted = state.acted
+        self._live = state.live
+        self.round = state.round
+        self.current = state.current
+
+    def _save(self):
+        """Save the state before a change, for undo"""
+        self._undo.append(self._snapshot())
+        self._redo.clear()
+
+    @staticmethod
+    def _entry(combatant: TrackedCombatant) -> Tuple:
+        return (-combatant.initiative, -combatant.dexterity, combatant.id)
+
+    def _push(self, heap: List[Tuple], combatant: TrackedCombatant):
+        """Add a combatant's place in the turn order to a heap, replacing any older one"""
+        entry = self._entry(combatant) + (self._next_sequence,)
+        self._next_sequence += 1
+        self._live[combatant.id] = entry
+        heapq.heappush(heap, entry)
+
+    def _schedule(self, combatant: TrackedCombatant):
+        """Put a combatant in the turn order, in this round if their turn is still to
+        come"""
+        entry = self._entry(combatant)
+        current = self.current_combatant
+        if self.round and (current is None or entry > self._entry(current)):
+            self._push(self._waiting, combatant)
+        else:
+            self._push(self._acted, combatant)
+
+    def _live_entries(self, heap: List[Tuple]) -> List[Tuple]:
+        return [
+            entry for entry in heap
+            if entry[2] != self.current and self._live.get(entry[2]) == entry
+        ]
+
+    @staticmethod
+    def _skipped(combatant: TrackedCombatant) -> bool:
+        return combatant.down and not combatant.player
+
+
+def read_battle_monsters(monsters: Any) -> Tuple[Tuple[str, int], ...]:
+    """Return the monsters listed in a `battle.yaml` file, such as "goblin x3", as
+    (name, quantity) pairs; anything else is read as in a location file"""
+    if not isinstance(monsters, list):
+        return ()
+    pairs = []
+    for monster in monsters:
+        match = _BATTLE_MONSTER_RE.match(monster) if isinstance(monster, str) else None
+        if match:
+            pairs.append((match[1], int(match[2] or 1)))
+        else:
+            pairs.extend(read_monsters([monster]))
+    return tuple(pairs)
+
+
+def _npc_stat_block(world, name: str) -> Optional[StatBlock]:
+    try:
+        return world.npcs[name].stats
+    except (KeyError, FourhillsError, NotImplementedError):
+        return None
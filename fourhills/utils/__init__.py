@@ -1,9 +1,15 @@
-from .cr_to_xp import cr_to_xp
+from .cr_to_xp import cr_to_xp, cr_to_xp_many, parse_cr
 from .import_monster import import_monster
 from .text_utils import slugify
+from .yaml_loader import dump_yaml, load_yaml, yaml_backend
 
 __all__ = [
     "cr_to_xp",
+    "cr_to_xp_many",
+    "dump_yaml",
     "import_monster",
+    "load_yaml",
+    "parse_cr",
     "slugify",
+    "yaml_backend",
 ]
@@ -0,0 +1,561 @@
+"""Importing many monsters at once, from D&D Beyond or from saved pages"""
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, field
+from functools import partial
+import json
+import os
+from pathlib import Path
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+import zipfile
+
+from fourhills.cache import DiskCache
+from fourhills.exceptions import FourhillsMonsterFetchError, FourhillsMonsterImportError
+from fourhills.utils.import_monster import (
+    DND_BEYOND_MONSTER_URL,
+    fetch_monster_page,
+    html_parser,
+    monster_filename,
+    monster_url_for,
+    parse_monster_page,
+    write_monster,
+)
+from fourhills.utils.page_cache import PageCache
+
+# Where an interrupted batch import is recorded, so it can carry on where it left off
+IMPORT_QUEUE_FILENAME = "import_queue.json"
+
+
+def queue_path_for(root: Path) -> Path:
+    """Return where the batch import queue for a world is kept"""
+    return Path(root) / DiskCache.DIRNAME / IMPORT_QUEUE_FILENAME
+
+
+def read_monster_names(lines: Iterable[str]) -> List[str]:
+    """Read the monsters to import from lines of text, e.g. a file.
+
+    Each line is a monster name or the URL of its page. Blank lines and lines starting
+    with `#` are ignored, as are repeats.
+    """
+    names = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#") and line not in names:
+            names.append(line)
+    return names
+
+
+class HostRateLimiter:
+    """Spaces out requests to each host, so a batch import doesn't hammer a website.
+
+    Requests to different hosts don't hold each other up.
+    """
+
+    def __init__(self, min_interval: float, clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._next_request: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        """Block until a request to the URL's host is allowed, and claim the slot"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_request.get(host, now))
+            self._next_request[host] = start + self.min_interval
+        if start > now:
+            self._sleep(start - now)
+
+    def hold_off(self, url: str, seconds: float):
+        """Delay every further request to the URL's host, e.g. after a 429 response"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            until = self._clock() + seconds
+            self._next_request[host] = max(self._next_request.get(host, until), until)
+
+
+class ImportQueue:
+    """The state of each monster in a batch import, saved after every change.
+
+    If a batch import is interrupted, running it again with the same queue file skips
+    the monsters which were already imported. Monsters which failed are tried again.
+    The file is removed once every monster in it has been imported.
+    """
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        self.items: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.is_file():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    items = json.load(f).get("items", {})
+                if isinstance(items, dict):
+                    self.items = items
+            except (OSError, ValueError, AttributeError):
+                # A damaged queue just means starting again
+                self.items = {}
+
+    def add(self, names: Iterable[str]):
+        """Queue monsters which aren't already imported"""
+        with self._lock:
+            for name in names:
+                item = self.items.get(name)
+                if item is None or item.get("status") != self.DONE:
+                    self.items[name] = {"status": self.PENDING}
+            self._save()
+
+    def status(self, name: str) -> Optional[str]:
+        item = self.items.get(name)
+        return item.get("status") if item else None
+
+    def pending(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """The queued monsters which haven't been imported, in the order they were added"""
+        names = list(self.items) if names is None else names
+        return [name for name in names if self.status(name) != self.DONE]
+
+    def mark_done(self, name: str, output_path: Path):
+        with self._lock:
+            self.items[name] = {"status": self.DONE, "output": str(output_path)}
+            self._save()
+
+    def mark_failed(self, name: str, error: str):
+        with self._lock:
+            attempts = self.items.get(name, {}).get("attempts", 0) + 1
+            self.items[name] = {"status": self.FAILED, "error": error, "attempts": attempts}
+            self._save()
+
+    def clear(self):
+        """Forget every monster, e.g. to start a new import rather than resume one"""
+        with self._lock:
+            self.items = {}
+            self._save()
+
+    def finish(self):
+        """Remove the queue file if everything in it has been imported"""
+        with self._lock:
+            if self.path is None or self.pending():
+                return
+            self.items = {}
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def _save(self):
+        if self.path is None:
+            return
+        # Write to a new file and swap it in, so an interruption can't corrupt the queue
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"items": self.items}, f, indent=1)
+        os.replace(str(tmp_path), str(self.path))
+
+
+@dataclass
+class ImportProgress:
+    """Sent to the progress callback each time a monster is finished with.
+
+    `output_path` is where the monster was written, and `error` why it failed; if
+    both are None, the monster already existed so was skipped.
+    """
+
+    name: str
+    done: int
+    total: int
+    output_path: Optional[Path] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchImportResult:
+    imported: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    cancelled: bool = False
+
+
+class BatchImporter:
+    """Imports many monsters concurrently with a bounded pool of worker threads.
+
+    Requests are spaced out per host by at least `min_interval` seconds, and those
+    which fail in a way which might not happen again, such as a timeout or an HTTP 503,
+    are retried up to `retries` times with exponential backoff. Progress is recorded in
+    an `ImportQueue`, so an interrupted import can be resumed.
+
+    With a `PageCache`, pages which were downloaded recently are parsed straight from
+    the cache, without waiting for the rate limit, so importing a whole bestiary again
+    only takes as long as parsing it.
+
+    Parameters
+    ----------
+    output_dir : Path
+        The directory to write the monster YAML files to.
+    queue_path : Path, optional
+        Where to keep the queue; if None, the import can't be resumed.
+    workers : int
+        The maximum number of monsters to download and parse at once.
+    min_interval : float
+        The minimum number of seconds between requests to the same host.
+    retries : int
+        How many times to retry each monster after a transient failure.
+    backoff : float
+        The delay in seconds before the first retry; it doubles for each further one.
+    overwrite : bool
+        Whether to replace monsters which already exist; if not, they are skipped.
+    base_url : str
+        The URL which monster slugs are appended to.
+    page_cache : PageCache, optional
+        Where to keep downloaded pages, and look for them before downloading them.
+    offline : bool
+        Only import monsters whose pages are in `page_cache`, never going to the website.
+    fetch : callable, optional
+        Called as `fetch(url)` to download a page, instead of `fetch_monster_page`.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        queue_path: Optional[Path] = None,
+        workers: int = 4,
+        min_interval: float = 1.0,
+        retries: int = 3,
+        backoff: float = 1.0,
+        overwrite: bool = False,
+        base_url: str = DND_BEYOND_MONSTER_URL,
+        page_cache: Optional[PageCache] = None,
+        offline: bool = False,
+        fetch: Optional[Callable[[str], bytes]] = None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.queue = ImportQueue(queue_path)
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.overwrite = overwrite
+        self.base_url = base_url
+        self.page_cache = page_cache
+        self.offline = offline
+        self.rate_limiter = HostRateLimiter(min_interval)
+        if fetch is None:
+            fetch = partial(fetch_monster_page, cache=page_cache, offline=offline)
+        self._fetch = fetch
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop starting new monsters; those already downloading are finished"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def url_for(self, name: str) -> str:
+        if name.startswith(("http://", "https://")):
+            return name
+        return monster_url_for(name, self.base_url)
+
+    def output_path_for(self, name: str) -> Path:
+        if name.startswith(("http://", "https://")):
+            # Name the file after the last part of the URL, e.g. .../monsters/16907-goblin
+            slug = unquote(urlsplit(name).path.rstrip("/").rsplit("/", 1)[-1])
+            name = slug.split("-", 1)[1] if slug.split("-", 1)[0].isdigit() else slug
+        return self.output_dir / monster_filename(name)
+
+    def run(
+        self,
+        names: Iterable[str],
+        progress: Optional[Callable[[ImportProgress], None]] = None,
+    ) -> BatchImportResult:
+        """Import monsters, returning what happened to each of them.
+
+        Monsters recorded as done in the queue, and unless overwriting, monsters which
+        already exist, are skipped. `progress` is called from the thread running this
+        method each time a monster is imported or fails.
+        """
+        names = list(dict.fromkeys(names))
+        result = BatchImportResult()
+        self.queue.add(names)
+        todo = []
+        for name in names:
+            if self.queue.status(name) == ImportQueue.DONE:
+                # Imported before the import was interrupted
+                result.skipped.append(name)
+            elif not self.overwrite and self.output_path_for(name).exists():
+                result.skipped.append(name)
+                self.queue.mark_done(name, self.output_path_for(name))
+            else:
+                todo.append(name)
+
+        total = len(todo)
+        done = 0
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {executor.submit(self._import_one, name): name for name in todo}
+            for future in as_completed(futures):
+                name = futures[future]
+                output_path = error = None
+                try:
+                    output_path = future.result()
+                except (FourhillsMonsterImportError, OSError) as exc:
+                    # OSError if the monster couldn't be written
+                    error = str(exc)
+                if output_path is None and error is None:
+                    # Cancelled before it started; it stays pending in the queue
+                    continue
+                done += 1
+                if error is None:
+                    result.imported.append(name)
+                    self.queue.mark_done(name, output_path)
+                else:
+                    result.failed[name] = error
+                    self.queue.mark_failed(name, error)
+                if progress is not None:
+                    progress(ImportProgress(name, done, total, output_path, error))
+        except KeyboardInterrupt:
+            self.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+            result.cancelled = self.cancelled
+        self.queue.finish()
+        return result
+
+    def _import_one(self, name: str) -> Optional[Path]:
+        if self.cancelled:
+            return None
+        url = self.url_for(name)
+        content = self._fetch_with_retries(url)
+        if content is None:
+            return None
+        monster_info = parse_monster_page(content, url)
+        output_path = self.output_path_for(name)
+        write_monster(monster_info, output_path)
+        return output_path
+
+    def _needs_network(self, url: str) -> bool:
+        if self.offline:
+            return False
+        return self.page_cache is None or not self.page_cache.is_fresh(url)
+
+    def _fetch_with_retries(self, url: str) -> Optional[bytes]:
+        for attempt in range(self.retries + 1):
+            if self._needs_network(url):
+                self.rate_limiter.wait(url)
+            if self.cancelled:
+                return None
+            try:
+                return self._fetch(url)
+            except FourhillsMonsterFetchError as exc:
+                if not exc.retryable or attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt * random.uniform(1.0, 1.25)
+                if exc.retry_after is not None:
+                    delay = max(delay, exc.retry_after)
+                    self.rate_limiter.hold_off(url, exc.retry_after)
+                # Wait, unless the import is cancelled in the meantime
+                if self._cancelled.wait(delay):
+                    return None
+        return None
+
+
+SAVED_PAGE_SUFFIXES = (".html", ".htm")
+
+
+class SavedPages:
+    """The saved monster pages in a directory or zip file, found in subdirectories too.
+
+    Each page is named by its path within the source, and `names` is in order of name.
+    Use it as a context manager, so a zip file is closed afterwards.
+
+    Raises
+    ------
+    FourhillsMonsterImportError
+        If the source is neither a directory nor a zip file.
+    """
+
+    def __init__(self, source: Path):
+        self.source = Path(source)
+        self._archive = None
+        if self.source.is_dir():
+            self.names = sorted(
+                path.relative_to(self.source).as_posix()
+                for path in self.source.rglob("*")
+                if path.suffix.lower() in SAVED_PAGE_SUFFIXES and path.is_file()
+            )
+        elif zipfile.is_zipfile(str(self.source)):
+            self._archive = zipfile.ZipFile(str(self.source))
+            self.names = sorted(
+                info.filename for info in self._archive.infolist()
+                if not info.is_dir()
+                and Path(info.filename).suffix.lower() in SAVED_PAGE_SUFFIXES
+                # Resource forks added by macOS when zipping
+                and not info.filename.startswith("__MACOSX/")
+            )
+        else:
+            raise FourhillsMonsterImportError(
+                f"{self.source} is not a directory or zip file of saved monster pages."
+            )
+
+    def read(self, name: str) -> bytes:
+        if self._archive is not None:
+            return self._archive.read(name)
+        return (self.source / name).read_bytes()
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SavedPageImporter:
+    """Converts saved monster pages into monster files, without going online.
+
+    Parsing is CPU-bound, so pages are parsed in a pool of worker processes. Each
+    monster file is named after the monster in the page, rather than the page's file.
+
+    Parameters
+    ----------
+    output_dir : Path
+        The directory to write the monster YAML files to.
+    workers : int, optional
+        The number of worker processes; by default one per CPU. With one, pages are
+        parsed in this process.
+    overwrite : bool
+        Whether to replace monsters which already exist; if not, they are skipped.
+    """
+
+    # Pages handed to the workers ahead of those being parsed, per worker, so that a
+    # large zip file isn't read into memory all at once
+    PAGES_AHEAD = 4
+
+    def __init__(self, output_dir: Path, workers: Optional[int] = None, overwrite: bool = False):
+        self.output_dir = Path(output_dir)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.overwrite = overwrite
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop parsing new pages; those being parsed are finished"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(
+        self,
+        source: Path,
+        progress: Optional[Callable[[ImportProgress], None]] = None,
+    ) -> BatchImportResult:
+        """Import every page in a directory or zip file.
+
+        The result lists pages by their name within the source. A page fails if it
+        can't be parsed, or holds the same monster as a page already imported.
+
+        Raises
+        ------
+        FourhillsMonsterImportError
+            If the source is neither a directory nor a zip file.
+        """
+        with SavedPages(source) as pages:
+            return self._import_all(pages, progress)
+
+    def _import_all(self, pages: SavedPages, progress) -> BatchImportResult:
+        total = len(pages.names)
+        result = BatchImportResult()
+        written = {}
+        done = 0
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, monster_info, error in self._parse_all(pages):
+            output_path = None
+            if monster_info is not None:
+                output_path = self.output_dir / monster_filename(monster_info["name"])
+                if output_path in written:
+                    error = f"Same monster as {written[output_path]}"
+                    output_path = None
+            done += 1
+            if error is not None:
+                result.failed[name] = error
+            elif not self.overwrite and output_path.exists():
+                result.skipped.append(name)
+                output_path = None
+            else:
+                try:
+                    write_monster(monster_info, output_path)
+                except OSError as exc:
+                    error = str(exc)
+                    result.failed[name] = error
+                    output_path = None
+                else:
+                    written[output_path] = name
+                    result.imported.append(name)
+            if progress is not None:
+                progress(ImportProgress(name, done, total, output_path, error))
+        result.cancelled = self.cancelled
+        return result
+
+    def _parse_all(
+        self, pages: SavedPages
+    ) -> Iterator[Tuple[str, Optional[dict], Optional[str]]]:
+        """Yield each page's name, with its monster or why it couldn't be parsed"""
+        parser = html_parser()
+        if self.workers == 1:
+            for name in pages.names:
+                if self.cancelled:
+                    return
+                yield (name,) + _parse_saved_page(pages.read(name), name, parser)
+            return
+
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            in_flight = {}
+            for name in pages.names:
+                if self.cancelled:
+                    break
+                future = executor.submit(_parse_saved_page, pages.read(name), name, parser)
+                in_flight[future] = name
+                if len(in_flight) >= self.workers * self.PAGES_AHEAD:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        yield (in_flight.pop(future),) + future.result()
+            for future in as_completed(in_flight):
+                yield (in_flight[future],) + future.result()
+        except KeyboardInterrupt:
+            self.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+
+
+def _parse_saved_page(content: bytes, name: str, parser: str):
+    """Parse a page in a worker process, returning its monster or why it failed"""
+    try:
+        return (parse_monster_page(content, name, parser=parser), None)
+    except FourhillsMonsterImportError as exc:
+        return (None, str(exc))
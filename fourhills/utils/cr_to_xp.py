@@ -1,3 +1,8 @@
+import bisect
+from fractions import Fraction
+
+import numpy as np
+
 from fourhills.exceptions import FourhillsExperienceLookupError
 
 
@@ -39,31 +44,107 @@ CR_XP_LUT = {
 }
 
 
-def cr_to_xp(cr: float) -> int:
-    cr = float(cr)
+# The table as sorted arrays, for bisecting one challenge rating or interpolating many
+CR_VALUES = tuple(CR_XP_LUT)
+XP_VALUES = tuple(CR_XP_LUT.values())
+MAX_CR = CR_VALUES[-1]
+_CR_ARRAY = np.array(CR_VALUES)
+_XP_ARRAY = np.array(XP_VALUES, dtype=float)
+
+
+def _out_of_range_error(cr: float) -> FourhillsExperienceLookupError:
     if cr < 0.0:
-        raise FourhillsExperienceLookupError(
+        return FourhillsExperienceLookupError(
             f"Challenge rating is too low to provide experience: {cr}"
         )
-    max_cr = list(CR_XP_LUT.keys())[-1]
-    if cr > max_cr:
-        raise FourhillsExperienceLookupError(
+    if cr > MAX_CR:
+        return FourhillsExperienceLookupError(
             f"Challenge rating is too high to provide experience: {cr}. "
-            f"Highest supported challenge rating is {max_cr}."
+            f"Highest supported challenge rating is {MAX_CR}."
         )
+    return FourhillsExperienceLookupError(f"Challenge rating is not a number: {cr}")
+
+
+def cr_to_xp(cr: float) -> int:
+    """Return the experience for defeating a creature of a challenge rating.
+
+    Challenge ratings between those in the table are interpolated linearly, giving a
+    float rather than an int.
+
+    Raises
+    ------
+    FourhillsExperienceLookupError
+        If the challenge rating is negative, above `MAX_CR` or NaN.
+    TypeError, ValueError
+        If the challenge rating can't be converted to a float.
+    """
+    cr = float(cr)
+    xp = CR_XP_LUT.get(cr)
+    if xp is not None:
+        return xp
+    # Written so that NaN fails the check too
+    if not 0.0 <= cr <= MAX_CR:
+        raise _out_of_range_error(cr)
+
+    # Linear interpolation for other challenge ratings
+    upper = bisect.bisect(CR_VALUES, cr)
+    lower = upper - 1
+    ratio = (cr - CR_VALUES[lower]) / (CR_VALUES[upper] - CR_VALUES[lower])
+    additional_xp = ratio * (XP_VALUES[upper] - XP_VALUES[lower])
+    return XP_VALUES[lower] + additional_xp
+
+
+def cr_to_xp_many(crs) -> np.ndarray:
+    """Return the experience for many challenge ratings at once.
+
+    The same as calling `cr_to_xp` on each challenge rating, but in one pass over an
+    array, for whole monster libraries or every candidate encounter.
+
+    Parameters
+    ----------
+    crs : array_like
+        Challenge ratings, of any shape.
+
+    Returns
+    -------
+    numpy.ndarray
+        The experience for each challenge rating, as floats, with the same shape.
+
+    Raises
+    ------
+    FourhillsExperienceLookupError
+        If any challenge rating is negative, above `MAX_CR` or NaN; the message is the
+        one `cr_to_xp` gives for the first of them.
+    TypeError, ValueError
+        If the challenge ratings can't be converted to floats.
+    """
+    crs = np.asarray(crs)
+    if crs.dtype == object:
+        # NumPy would turn None into NaN, where float() raises
+        crs = np.array([float(cr) for cr in crs.flat]).reshape(crs.shape)
+    crs = crs.astype(float, copy=False)
+    bad = ~((crs >= 0.0) & (crs <= MAX_CR))
+    if bad.any():
+        raise _out_of_range_error(float(crs[bad].flat[0]))
+    return np.interp(crs, _CR_ARRAY, _XP_ARRAY)
+
+
+def parse_cr(cr) -> float:
+    """Convert a challenge rating such as 2, "0.5" or "1/4" to a float.
+
+    Raises
+    ------
+    ValueError
+        If the challenge rating isn't a number or fraction.
+    """
+    if isinstance(cr, str):
+        try:
+            return float(Fraction(cr.strip()))
+        except ZeroDivisionError as exc:
+            raise ValueError(f"Invalid challenge rating: {cr}") from exc
+    return float(cr)
+
 
-    if cr in CR_XP_LUT:
-        return CR_XP_LUT[cr]
-
-    # Linear interpolation will for other challenge ratings
-    for key, val in CR_XP_LUT.items():
-        if key < cr:
-            lower = (key, val)
-        if key > cr:
-            upper = (key, val)
-            break
-
-    ratio = (cr - lower[0]) / (upper[0] - lower[0])
-    additional_xp = ratio * (upper[1] - lower[1])
-    xp = lower[1] + additional_xp
-    return xp
+def format_cr(cr: float) -> str:
+    """Write a challenge rating as it appears in stat blocks, e.g. "1/4" or "2"."""
+    return str(Fraction(cr).limit_denominator(8))
@@ -1,18 +1,74 @@
 import bs4
+from email.utils import parsedate_to_datetime
+import importlib.util
 from pathlib import Path
 import re
+import time
+from typing import Optional
 from urllib.request import Request, urlopen
-from urllib.error import HTTPError
-import yaml
+from urllib.error import HTTPError, URLError
 
-from fourhills.exceptions import FourhillsMonsterImportError
+from fourhills.exceptions import FourhillsMonsterFetchError, FourhillsMonsterImportError
+from fourhills.utils.page_cache import PageCache
 from fourhills.utils.text_utils import slugify
+from fourhills.utils.yaml_loader import dump_yaml
+
+DND_BEYOND_MONSTER_URL = "https://www.dndbeyond.com/monsters/"
+REQUEST_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+REQUEST_TIMEOUT = 30
+
+# lxml builds trees several times faster than Python's own HTML parser, but is optional
+HTML_PARSERS = ["html.parser"]
+if importlib.util.find_spec("lxml") is not None:
+    HTML_PARSERS.append("lxml")
+
+_html_parser = "lxml" if "lxml" in HTML_PARSERS else "html.parser"
+
+# Only the stat block and the description below it are read, so only they are parsed
+MONSTER_PAGE_STRAINER = bs4.SoupStrainer(
+    "div", class_=["mon-stat-block", "mon-details__description-block-content"]
+)
+
+MELEE_REGEX = re.compile(
+    "Melee Weapon Attack: (\\+\\d+) to hit, reach (\\d+.*ft\\.), (.+)\\."
+    " Hit: (.+? damage.*?)\\.(.*)"
+)
+RANGED_REGEX = re.compile(
+    "Ranged Weapon Attack: (\\+\\d+) to hit, range (.+ ft\\.), (.+)\\."
+    " Hit: (.+? damage)\\.(.*)"
+)
+
+
+def html_parser() -> str:
+    """Return the name of the HTML parser monster pages are parsed with."""
+    return _html_parser
+
+
+def set_html_parser(name: str):
+    """Choose the HTML parser monster pages are parsed with.
+
+    Parameters
+    ----------
+    name : str
+        Either "lxml" or "html.parser".
+
+    Raises
+    ------
+    ValueError
+        If the parser is unknown, or lxml is not installed.
+    """
+    global _html_parser
+    if name not in HTML_PARSERS:
+        raise ValueError(
+            f"HTML parser {name} is not available. Available parsers: "
+            + ", ".join(sorted(HTML_PARSERS))
+        )
+    _html_parser = name
 
 
 def strip_inner(s):
-    s_parts = re.split("\\s", s)
-    s_word_parts = [word.strip() for word in s_parts if word.strip()]
-    return " ".join(s_word_parts)
+    """Collapse each run of whitespace to one space, and strip it from both ends."""
+    return " ".join(s.split())
 
 
 def escape(s):
@@ -22,11 +78,7 @@ def escape(s):
 
 
 def parse_melee(melee_desc):
-    melee_regex = re.compile(
-        "Melee Weapon Attack: (\\+\\d+) to hit, reach (\\d+.*ft\\.), (.+)\\."
-        " Hit: (.+? damage.*?)\\.(.*)"
-    )
-    match = melee_regex.match(melee_desc)
+    match = MELEE_REGEX.match(melee_desc)
     melee_dict = {
         "hit": match.group(1),
         "reach": match.group(2),
@@ -39,11 +91,7 @@ def parse_melee(melee_desc):
 
 
 def parse_ranged(ranged_desc):
-    ranged_regex = re.compile(
-        "Ranged Weapon Attack: (\\+\\d+) to hit, range (.+ ft\\.), (.+)\\."
-        " Hit: (.+? damage)\\.(.*)"
-    )
-    match = ranged_regex.match(ranged_desc)
+    match = RANGED_REGEX.match(ranged_desc)
     ranged_dict = {
         "hit": match.group(1),
         "range": match.group(2),
@@ -55,35 +103,170 @@ def parse_ranged(ranged_desc):
     return ranged_dict
 
 
-def import_monster(monster_name: str, output_path: Path, monster_url=None):
+def monster_url_for(monster_name: str, base_url: str = DND_BEYOND_MONSTER_URL) -> str:
+    """Return the URL of a monster's page, e.g. .../monsters/giant-rat for "Giant Rat"."""
+    return base_url + slugify(monster_name)
 
-    monster_slug = slugify(monster_name)
 
-    if monster_url:
-        url = monster_url
-    else:
-        url = "https://www.dndbeyond.com/monsters/" + monster_slug
+def monster_filename(monster_name: str) -> str:
+    """Return the name of the YAML file a monster is imported to, e.g. giant_rat.yaml."""
+    return slugify(monster_name).replace("-", "_") + ".yaml"
 
-    headers = {'User-Agent': 'Mozilla/5.0'}
+
+def _retry_after(error: HTTPError) -> Optional[float]:
+    """Return the number of seconds a server asked us to wait before retrying, if any."""
+    value = error.headers.get("Retry-After") if error.headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_monster_page(
+    url: str,
+    timeout: float = REQUEST_TIMEOUT,
+    cache: Optional[PageCache] = None,
+    offline: bool = False,
+) -> bytes:
+    """Download a monster's page, or take it from a page cache.
+
+    With a cache, a recently downloaded page is used without going to the website, and
+    an older one is only downloaded again if the website says it has changed.
+
+    Parameters
+    ----------
+    url : str
+        The page to download.
+    timeout : float
+        How many seconds to wait for the website to respond.
+    cache : PageCache, optional
+        The cache to take the page from, and store it in once downloaded.
+    offline : bool
+        Never go to the website, only use pages in the cache, however old.
+
+    Raises
+    ------
+    FourhillsMonsterFetchError
+        If the server returns an error or can't be reached. The error says whether
+        trying again later might work.
+    FourhillsMonsterImportError
+        If offline and the page isn't in the cache.
+    """
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and (offline or cache.is_fresh(url)):
+        return cached.body
+    if offline:
+        raise FourhillsMonsterImportError(
+            f"The page at URL {url} hasn't been downloaded, and importing offline."
+        )
+
+    headers = dict(REQUEST_HEADERS)
+    if cached is not None:
+        # Ask for the page only if it changed since it was cached
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
     req = Request(url, headers=headers)
     try:
-        response = urlopen(req)
-        content = response.read()
+        with urlopen(req, timeout=timeout) as response:
+            content = response.read()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
     except HTTPError as e:
-        raise FourhillsMonsterImportError(f"No response from website for URL {url}") from e
+        if e.code == 304 and cached is not None:
+            cache.revalidated(url)
+            return cached.body
+        raise FourhillsMonsterFetchError(
+            f"No response from website for URL {url} (HTTP {e.code})",
+            status=e.code,
+            retry_after=_retry_after(e),
+        ) from e
+    except (URLError, OSError) as e:
+        reason = getattr(e, "reason", e)
+        raise FourhillsMonsterFetchError(
+            f"Could not connect to website for URL {url}: {reason}"
+        ) from e
+    if cache is not None:
+        cache.put(url, content, etag, last_modified)
+    return content
+
+
+def import_monster(
+    monster_name: str,
+    output_path: Path,
+    monster_url=None,
+    cache: Optional[PageCache] = None,
+    offline: bool = False,
+):
+    """Download a monster's page from D&D Beyond and save its stat block as YAML.
+
+    The page is taken from `cache` if it is there; see `fetch_monster_page`.
+
+    Raises
+    ------
+    FourhillsMonsterImportError
+        If the page can't be downloaded, or doesn't hold a stat block.
+    """
+    url = monster_url or monster_url_for(monster_name)
+    content = fetch_monster_page(url, cache=cache, offline=offline)
+    monster_info = parse_monster_page(content, url)
+    write_monster(monster_info, output_path)
+
+
+def write_monster(monster_info: dict, output_path: Path):
+    """Save a parsed stat block as a monster YAML file."""
+    with open(output_path, 'w') as f:
+        dump_yaml(monster_info, f, sort_keys=False)
 
-    # Parse content using beautifulsoup
-    soup = bs4.BeautifulSoup(content, 'html.parser')
 
-    stat_blocks = soup.find_all("div", "mon-stat-block")
-    if not stat_blocks:
-        raise FourhillsMonsterImportError(f"Cannot access monster information at URL {url}.")
+def parse_monster_page(content, url: str = "", parser: Optional[str] = None) -> dict:
+    """Parse the stat block on a monster's page into the contents of a monster file.
 
-    stat_block = stat_blocks[0]
+    Only the parts of the page holding the stat block and description are turned into a
+    tree, which is much quicker than parsing the whole page.
+
+    Parameters
+    ----------
+    content : bytes or str
+        The page's HTML.
+    url : str
+        Where the page came from, used in error messages.
+    parser : str, optional
+        The HTML parser to use, instead of the one chosen by `set_html_parser`.
+
+    Raises
+    ------
+    FourhillsMonsterImportError
+        If the page doesn't hold a stat block, or it can't be understood.
+    """
+    try:
+        soup = bs4.BeautifulSoup(
+            content, parser or _html_parser, parse_only=MONSTER_PAGE_STRAINER
+        )
+        return _parse_monster_page(soup, url)
+    except FourhillsMonsterImportError:
+        raise
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+        raise FourhillsMonsterImportError(
+            f"Could not understand the monster information at URL {url}: {e!r}"
+        ) from e
+
+
+def _parse_monster_page(soup, url):
+    stat_block = soup.find("div", "mon-stat-block")
+    if stat_block is None:
+        raise FourhillsMonsterImportError(f"Cannot access monster information at URL {url}.")
 
     # Parse out monster summary info
-    name = stat_block.find_all("a", "mon-stat-block__name-link")[0].text.strip()
-    meta = stat_block.find_all("div", "mon-stat-block__meta")[0]
+    name = stat_block.find("a", "mon-stat-block__name-link").text.strip()
+    meta = stat_block.find("div", "mon-stat-block__meta")
     meta_parts = meta.text.strip().split(",")
     alignment = meta_parts[1].strip().capitalize()
     size = meta_parts[0].split(" ")[0]
@@ -94,13 +277,13 @@ def import_monster(monster_name: str, output_path: Path, monster_url=None):
     speed = None
 
     for div in stat_block.find_all("div", "mon-stat-block__attribute"):
-        label = div.find_all("span", "mon-stat-block__attribute-label")[0].text.strip()
-        value_divs = div.find_all("span", "mon-stat-block__attribute-value")
-        if value_divs:
-            value = strip_inner(value_divs[0].text)
-        data_divs = div.find_all("span", "mon-stat-block__attribute-data")
-        if data_divs:
-            data = strip_inner(data_divs[0].text)
+        label = div.find("span", "mon-stat-block__attribute-label").text.strip()
+        value_span = div.find("span", "mon-stat-block__attribute-value")
+        if value_span is not None:
+            value = strip_inner(value_span.text)
+        data_span = div.find("span", "mon-stat-block__attribute-data")
+        if data_span is not None:
+            data = strip_inner(data_span.text)
         if label == "Armor Class":
             ac = value
         elif label == "Hit Points":
@@ -112,7 +295,7 @@ def import_monster(monster_name: str, output_path: Path, monster_url=None):
 
     # Parse out stat block
     stats = [
-        strip_inner(stat.text.strip()) for stat in
+        strip_inner(stat.text) for stat in
         stat_block.find_all("span", "ability-block__score")
     ]
 
@@ -127,8 +310,8 @@ def import_monster(monster_name: str, output_path: Path, monster_url=None):
     damage_resistances = None
     damage_vulnerabilities = None
     for div in stat_block.find_all("div", "mon-stat-block__tidbit"):
-        label = div.find_all("span", "mon-stat-block__tidbit-label")[0].text.strip()
-        value = div.find_all("span", "mon-stat-block__tidbit-data")[0].text.strip()
+        label = div.find("span", "mon-stat-block__tidbit-label").text.strip()
+        value = div.find("span", "mon-stat-block__tidbit-data").text.strip()
         value_list = [strip_inner(val) for val in value.split(",")]
         if label == "Skills":
             skills = value_list
@@ -173,9 +356,9 @@ def import_monster(monster_name: str, output_path: Path, monster_url=None):
     description_blocks = stat_block.find_all("div", "mon-stat-block__description-block")
     for block in description_blocks:
         title = None
-        headers = block.find_all("div", "mon-stat-block__description-block-heading")
-        if headers:
-            title = strip_inner(headers[0].text)
+        heading = block.find("div", "mon-stat-block__description-block-heading")
+        if heading is not None:
+            title = strip_inner(heading.text)
 
         # Form the dict from the actions
         block_dict = {}
@@ -183,9 +366,9 @@ def import_monster(monster_name: str, output_path: Path, monster_url=None):
             block_desc = p.text.strip()
 
             # Name is in bold, use -1 to strip . at the end
-            strong_text = p.find_all("strong")
-            if strong_text:
-                block_name = p.find_all("strong")[0].text.strip()[:-1]
+            strong = p.find("strong")
+            if strong is not None:
+                block_name = strong.text.strip()[:-1]
                 # Remove the name of the attack from the beginning to get the description
                 # Include the full stop and space after the title from removal
                 block_desc = block_desc[len(block_name) + 2:]
@@ -225,10 +408,10 @@ def import_monster(monster_name: str, output_path: Path, monster_url=None):
     lair_actions = None
     lair_blocks = description_blocks
     for lair_block in lair_blocks:
-        lair_title = lair_block.find_all("p", string='Lair Actions')
-        if lair_title:
+        lair_title = lair_block.find("p", string='Lair Actions')
+        if lair_title is not None:
             lair_actions = {}
-            for element in lair_title[0].next_siblings:
+            for element in lair_title.next_siblings:
                 if type(element) == bs4.element.NavigableString:
                     continue
                 lines = element.find_all("li")
@@ -350,6 +533,4 @@ def import_monster(monster_name: str, output_path: Path, monster_url=None):
     if description:
         monster_info["description"] = description
 
-    # Dump to yaml file in output_path
-    with open(output_path, 'w') as f:
-        yaml.safe_dump(monster_info, f, sort_keys=False)
+    return monster_info
@@ -0,0 +1,225 @@
+"""Keeping downloaded web pages, so importing a monster again needn't download it again"""
+
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+import zlib
+
+from fourhills.cache import DiskCache
+
+# Bump this whenever the layout of the page cache changes
+PAGE_CACHE_FORMAT = 1
+
+
+class CachedPage(NamedTuple):
+    """A downloaded page, with what the server said to check whether it has changed"""
+
+    url: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # When the page was last downloaded or confirmed unchanged, in seconds since the epoch
+    fetched_at: float
+
+
+class PageCache:
+    """Downloaded pages keyed by URL, compressed in an SQLite database.
+
+    A page downloaded less than `max_age` seconds ago is used as it is. An older one is
+    revalidated with the `ETag` and `Last-Modified` headers the server sent with it,
+    so it is only downloaded again if it changed. Once the compressed pages take up
+    more than `max_bytes`, the least recently used ones are thrown away.
+
+    Like `DiskCache`, this is only ever a cache: if the database is corrupt, it is
+    thrown away and started again. It may be used from several threads at once.
+
+    Parameters
+    ----------
+    db_path : pathlib.Path
+        Path to the database, which is created if it doesn't exist.
+    max_bytes : int
+        The most space the compressed pages may take up.
+    max_age : float
+        How many seconds a page is used for before it is revalidated.
+    clock : callable
+        Returns the current time in seconds since the epoch; for testing.
+    """
+
+    FILENAME = "pages.sqlite"
+    DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+    # Stat blocks are hardly ever corrected, so a week between checks is plenty
+    DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+        clock=time.time,
+    ):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._connect()
+        except sqlite3.OperationalError:
+            raise
+        except sqlite3.DatabaseError:
+            self._reset()
+
+    @classmethod
+    def for_root(cls, root: Path, **kwargs) -> Optional["PageCache"]:
+        """Open the page cache for a setting root, or return None if it can't be created"""
+        try:
+            return cls(Path(root) / DiskCache.DIRNAME / cls.FILENAME, **kwargs)
+        except (OSError, sqlite3.Error):
+            return None
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != PAGE_CACHE_FORMAT:
+                conn.execute("DROP TABLE IF EXISTS pages")
+                conn.execute(f"PRAGMA user_version = {PAGE_CACHE_FORMAT}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fetched_at REAL, "
+                "accessed_at REAL, size INTEGER, body BLOB)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)"
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._conn = conn
+
+    def _reset(self):
+        """Delete the database and create an empty one in its place"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.remove(str(self.db_path) + suffix)
+            except OSError:
+                pass
+        try:
+            self._connect()
+        except sqlite3.Error:
+            # Carry on without the cache rather than failing every import
+            self._conn = None
+
+    def _execute(self, sql: str, parameters=(), many: bool = False) -> Optional[List]:
+        """Run a statement and commit it, returning its rows, or None on failure"""
+        with self._lock:
+            if self._conn is None:
+                return None
+            try:
+                if many:
+                    cursor = self._conn.executemany(sql, parameters)
+                else:
+                    cursor = self._conn.execute(sql, parameters)
+                rows = cursor.fetchall()
+                if self._conn.in_transaction:
+                    self._conn.commit()
+                return rows
+            except sqlite3.OperationalError:
+                # Most likely another process holds the lock; a miss or lost write is fine
+                return None
+            except sqlite3.DatabaseError:
+                self._reset()
+                return None
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for a URL, however old, or None if there isn't one"""
+        rows = self._execute(
+            "SELECT etag, last_modified, fetched_at, body FROM pages WHERE url = ?", (url,)
+        )
+        if not rows:
+            return None
+        etag, last_modified, fetched_at, data = rows[0]
+        try:
+            body = zlib.decompress(data)
+        except (zlib.error, TypeError):
+            self.remove(url)
+            return None
+        self._execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (self._clock(), url))
+        return CachedPage(url, body, etag, last_modified, fetched_at)
+
+    def is_fresh(self, url: str) -> bool:
+        """Return whether the page for a URL is cached and needn't be revalidated yet"""
+        rows = self._execute("SELECT fetched_at FROM pages WHERE url = ?", (url,))
+        return bool(rows) and self._clock() - rows[0][0] < self.max_age
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Store a freshly downloaded page, then evict pages if the cache is too big"""
+        data = zlib.compress(body)
+        now = self._clock()
+        self._execute(
+            "INSERT OR REPLACE INTO pages "
+            "(url, etag, last_modified, fetched_at, accessed_at, size, body) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, now, now, len(data), data),
+        )
+        self.evict()
+
+    def revalidated(self, url: str):
+        """Record that the server said a cached page hasn't changed"""
+        self._execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (self._clock(), url))
+
+    def remove(self, url: str):
+        self._execute("DELETE FROM pages WHERE url = ?", (url,))
+
+    def evict(self):
+        """Throw away the least recently used pages until the cache fits in `max_bytes`"""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        rows = self._execute("SELECT url, size FROM pages ORDER BY accessed_at") or []
+        urls = []
+        for url, size in rows:
+            if excess <= 0:
+                break
+            urls.append((url,))
+            excess -= size
+        self._execute("DELETE FROM pages WHERE url = ?", urls, many=True)
+
+    def size(self) -> int:
+        """Return the space the compressed pages take up, in bytes"""
+        rows = self._execute("SELECT COALESCE(SUM(size), 0) FROM pages")
+        return rows[0][0] if rows else 0
+
+    def __len__(self):
+        rows = self._execute("SELECT COUNT(*) FROM pages")
+        return rows[0][0] if rows else 0
+
+    def clear(self):
+        """Remove every page from the cache"""
+        self._execute("DELETE FROM pages")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
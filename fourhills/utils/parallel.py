@@ -0,0 +1,71 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import Callable, Dict, Hashable, Iterable, Iterator, Optional, TypeVar
+
+Key = TypeVar("Key", bound=Hashable)
+Value = TypeVar("Value")
+
+
+def map_ordered(
+    function: Callable[[Key], Value],
+    items: Iterable[Key],
+    max_workers: Optional[int] = None,
+    window: Optional[int] = None,
+) -> Iterator[Value]:
+    """Apply a function to items in a thread pool, yielding the results in order.
+
+    Only `window` items are worked on ahead of the one being yielded, so results are
+    produced as soon as the first is ready, and memory is bounded however many items
+    there are. Any exception raised by the function is raised when its result is due.
+
+    Parameters
+    ----------
+    function : callable
+        Called with each item.
+    items : iterable
+        The items, which are only taken from as they are needed.
+    max_workers : int, optional
+        The number of threads; defaults to the number of CPUs.
+    window : int, optional
+        The most items worked on at once; defaults to twice the number of threads.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    window = window or 2 * max_workers
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(pool.submit(function, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # If the results stop being wanted, don't start on any more
+            for future in pending:
+                future.cancel()
+
+
+def map_unique(
+    function: Callable[[Key], Value],
+    keys: Iterable[Key],
+    max_workers: Optional[int] = None,
+    window: Optional[int] = None,
+) -> Iterator[Value]:
+    """Like `map_ordered`, but calling the function once for each distinct key.
+
+    The result for a key which repeats is kept only until its last use.
+    """
+    keys = list(keys)
+    last_use = {key: index for index, key in enumerate(keys)}
+    results = map_ordered(function, iter(dict.fromkeys(keys)), max_workers, window)
+    kept: Dict[Key, Value] = {}
+    for index, key in enumerate(keys):
+        if key not in kept:
+            # Distinct keys come back in order of their first use, so this is the next
+            kept[key] = next(results)
+        if last_use[key] == index:
+            yield kept.pop(key)
+        else:
+            yield kept[key]
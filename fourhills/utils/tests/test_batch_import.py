@@ -0,0 +1,336 @@
+from collections import Counter
+import hashlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+import pytest
+import shutil
+from socketserver import ThreadingMixIn
+import threading
+import zipfile
+
+from fourhills.exceptions import FourhillsMonsterFetchError, FourhillsMonsterImportError
+from fourhills.utils.batch_import import (
+    BatchImporter,
+    HostRateLimiter,
+    ImportQueue,
+    SavedPageImporter,
+    read_monster_names,
+)
+from fourhills.utils.import_monster import import_monster
+from fourhills.utils.page_cache import PageCache
+from fourhills.utils.yaml_loader import load_yaml
+
+PAGES_DIR = Path(__file__).parent / "pages"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves saved stat block pages as /monsters/<slug>, like D&D Beyond"""
+
+    def do_GET(self):
+        server = self.server
+        slug = self.path.rstrip("/").rsplit("/", 1)[-1]
+        with server.lock:
+            server.requests[slug] += 1
+            server.validators.append(self.headers.get("If-None-Match"))
+            failures_left = server.failures.get(slug, 0)
+            if failures_left:
+                server.failures[slug] = failures_left - 1
+        page = server.pages_dir / f"{slug}.html"
+        if failures_left:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+        elif not page.is_file():
+            self.send_response(404)
+            self.end_headers()
+        else:
+            content = page.read_bytes()
+            etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def pages_dir(tmp_path):
+    """Saved pages for the two real monsters, plus copies for a bigger batch"""
+    pages = tmp_path / "pages"
+    shutil.copytree(str(PAGES_DIR), str(pages))
+    for i in range(20):
+        shutil.copy(str(pages / "goblin.html"), str(pages / f"goblin-{i}.html"))
+    return pages
+
+
+@pytest.fixture
+def server(pages_dir):
+    server = StandInServer(("127.0.0.1", 0), StandInHandler)
+    server.pages_dir = pages_dir
+    server.requests = Counter()
+    server.failures = {}
+    server.validators = []
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/monsters/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_importer(server, tmp_path, **kwargs):
+    options = dict(workers=4, min_interval=0, retries=2, backoff=0.01)
+    options.update(kwargs)
+    return BatchImporter(
+        tmp_path / "monsters",
+        queue_path=tmp_path / "queue.json",
+        base_url=server.base_url,
+        **options,
+    )
+
+
+def test_import_monster_from_stand_in(server, tmp_path):
+    output_path = tmp_path / "goblin.yaml"
+    import_monster("Goblin", output_path, monster_url=server.base_url + "goblin")
+    goblin = load_yaml(output_path)
+    assert goblin["name"] == "Goblin"
+    assert goblin["challenge"] == 0.25
+    assert goblin["melee_attacks"]["Scimitar"]["damage"] == "5 (1d6 + 2) slashing damage"
+
+
+def test_batch_import(server, tmp_path):
+    names = ["Goblin", "Giant Rat"] + [f"Goblin {i}" for i in range(20)]
+    importer = make_importer(server, tmp_path)
+    progress = []
+    result = importer.run(names, progress=progress.append)
+
+    assert sorted(result.imported) == sorted(names)
+    assert not result.failed
+    assert load_yaml(tmp_path / "monsters" / "giant_rat.yaml")["name"] == "Giant Rat"
+    assert (tmp_path / "monsters" / "goblin_19.yaml").is_file()
+    assert [p.done for p in progress] == list(range(1, len(names) + 1))
+    # The queue is removed once everything is imported
+    assert not (tmp_path / "queue.json").exists()
+
+
+def test_retries_and_failures(server, tmp_path):
+    server.failures = {"goblin": 2, "giant-rat": 5}
+    importer = make_importer(server, tmp_path)
+    result = importer.run(["Goblin", "Giant Rat", "Owlbear"])
+
+    assert result.imported == ["Goblin"]
+    assert server.requests["goblin"] == 3
+    # Retried until the retries ran out
+    assert server.requests["giant-rat"] == 3
+    assert "503" in result.failed["Giant Rat"]
+    # Missing pages aren't retried
+    assert server.requests["owlbear"] == 1
+    assert "404" in result.failed["Owlbear"]
+
+    queue = ImportQueue(tmp_path / "queue.json")
+    assert queue.status("Goblin") == ImportQueue.DONE
+    assert queue.status("Owlbear") == ImportQueue.FAILED
+
+
+def test_resume(server, tmp_path):
+    names = [f"Goblin {i}" for i in range(10)]
+    importer = make_importer(server, tmp_path, workers=1)
+
+    def cancel_after_three(progress):
+        if progress.done == 3:
+            importer.cancel()
+
+    result = importer.run(names, progress=cancel_after_three)
+    assert result.cancelled
+    # The monster being downloaded when it was cancelled is finished too
+    imported = result.imported
+    assert len(imported) in (3, 4)
+    pending = ImportQueue(tmp_path / "queue.json").pending(names)
+    assert sorted(pending + imported) == sorted(names)
+
+    # Running it again only fetches the monsters which weren't imported
+    server.requests.clear()
+    result = make_importer(server, tmp_path).run(names)
+    assert sorted(result.imported) == sorted(pending)
+    assert sorted(result.skipped) == sorted(imported)
+    assert sum(server.requests.values()) == len(pending)
+
+
+def test_existing_monsters_skipped(server, tmp_path):
+    (tmp_path / "monsters").mkdir()
+    (tmp_path / "monsters" / "goblin.yaml").write_text("name: My goblin\n")
+    result = make_importer(server, tmp_path).run(["Goblin"])
+    assert result.skipped == ["Goblin"]
+    assert server.requests["goblin"] == 0
+    result = make_importer(server, tmp_path, overwrite=True).run(["Goblin"])
+    assert result.imported == ["Goblin"]
+
+
+def test_unwritable_monster_fails_alone(server, tmp_path):
+    # A directory in the way of the output file can't be written over
+    (tmp_path / "monsters" / "goblin.yaml").mkdir(parents=True)
+    result = make_importer(server, tmp_path, overwrite=True).run(["Goblin", "Giant Rat"])
+    assert result.imported == ["Giant Rat"]
+    assert list(result.failed) == ["Goblin"]
+    assert ImportQueue(tmp_path / "queue.json").status("Goblin") == ImportQueue.FAILED
+
+
+def test_reimport_from_page_cache(server, tmp_path):
+    page_cache = PageCache(tmp_path / "pages.sqlite")
+    names = ["Goblin", "Giant Rat"] + [f"Goblin {i}" for i in range(5)]
+    make_importer(server, tmp_path, page_cache=page_cache).run(names)
+    assert sum(server.requests.values()) == len(names)
+    assert len(page_cache) == len(names)
+
+    # Importing them all again doesn't go to the website at all
+    server.requests.clear()
+    result = make_importer(
+        server, tmp_path, page_cache=page_cache, overwrite=True, min_interval=10
+    ).run(names)
+    assert sorted(result.imported) == sorted(names)
+    assert sum(server.requests.values()) == 0
+
+
+def test_page_cache_revalidation(server, pages_dir, tmp_path):
+    now = [1000.0]
+    page_cache = PageCache(tmp_path / "pages.sqlite", max_age=60, clock=lambda: now[0])
+    url = server.base_url + "goblin"
+    output_path = tmp_path / "goblin.yaml"
+    import_monster("Goblin", output_path, monster_url=url, cache=page_cache)
+    etag = page_cache.get(url).etag
+    assert etag
+
+    # Once the page is too old, the website is asked whether it changed
+    now[0] += 61
+    import_monster("Goblin", output_path, monster_url=url, cache=page_cache)
+    assert server.validators == [None, etag]
+    assert page_cache.is_fresh(url)
+
+    now[0] += 61
+    content = (pages_dir / "goblin.html").read_text().replace("Goblin", "Hobgoblin")
+    (pages_dir / "goblin.html").write_text(content)
+    import_monster("Goblin", output_path, monster_url=url, cache=page_cache)
+    assert load_yaml(output_path)["name"] == "Hobgoblin"
+    assert page_cache.get(url).etag != etag
+
+
+def test_offline_import(server, tmp_path):
+    page_cache = PageCache(tmp_path / "pages.sqlite", max_age=0)
+    make_importer(server, tmp_path, page_cache=page_cache).run(["Goblin"])
+
+    server.requests.clear()
+    importer = make_importer(
+        server, tmp_path, page_cache=page_cache, offline=True, overwrite=True
+    )
+    result = importer.run(["Goblin", "Giant Rat"])
+    assert result.imported == ["Goblin"]
+    assert "hasn't been downloaded" in result.failed["Giant Rat"]
+    assert sum(server.requests.values()) == 0
+
+
+@pytest.fixture
+def saved_pages(tmp_path):
+    """Saved pages, one of them not a monster page, in subdirectories and a zip file"""
+    source = tmp_path / "saved"
+    shutil.copytree(str(PAGES_DIR), str(source / "srd"))
+    (source / "broken.html").write_text("<html><body>Page not found</body></html>")
+    (source / "notes.txt").write_text("Not a page")
+    archive = tmp_path / "saved.zip"
+    with zipfile.ZipFile(str(archive), "w") as zf:
+        for path in source.rglob("*"):
+            zf.write(str(path), path.relative_to(source).as_posix())
+    return source, archive
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_saved_pages(saved_pages, tmp_path, workers):
+    source, archive = saved_pages
+    for i, pages in enumerate([source, archive]):
+        output_dir = tmp_path / f"monsters_{i}"
+        progress = []
+        result = SavedPageImporter(output_dir, workers=workers).run(pages, progress.append)
+        assert sorted(result.imported) == [
+            "srd/adult-red-dragon.html", "srd/giant-rat.html", "srd/goblin.html"
+        ]
+        assert list(result.failed) == ["broken.html"]
+        assert "Cannot access monster information" in result.failed["broken.html"]
+        assert sorted(path.name for path in output_dir.iterdir()) == [
+            "adult_red_dragon.yaml", "giant_rat.yaml", "goblin.yaml"
+        ]
+        assert load_yaml(output_dir / "goblin.yaml")["challenge"] == 0.25
+        assert [p.done for p in progress] == [1, 2, 3, 4]
+        assert {p.total for p in progress} == {4}
+
+
+def test_saved_pages_skipped_and_duplicates(saved_pages, tmp_path):
+    source, _ = saved_pages
+    shutil.copy(str(source / "srd" / "goblin.html"), str(source / "goblin copy.html"))
+    output_dir = tmp_path / "monsters"
+    output_dir.mkdir()
+    (output_dir / "giant_rat.yaml").write_text("name: My rat\n")
+
+    result = SavedPageImporter(output_dir, workers=1).run(source)
+    assert result.skipped == ["srd/giant-rat.html"]
+    assert load_yaml(output_dir / "giant_rat.yaml")["name"] == "My rat"
+    # The copy is found first, so the original is the duplicate
+    assert result.failed["srd/goblin.html"] == "Same monster as goblin copy.html"
+
+
+def test_unwritable_saved_page_fails_alone(saved_pages, tmp_path):
+    source, _ = saved_pages
+    output_dir = tmp_path / "monsters"
+    (output_dir / "goblin.yaml").mkdir(parents=True)
+    progress = []
+    result = SavedPageImporter(output_dir, workers=1, overwrite=True).run(
+        source, progress.append
+    )
+    assert sorted(result.imported) == ["srd/adult-red-dragon.html", "srd/giant-rat.html"]
+    assert sorted(result.failed) == ["broken.html", "srd/goblin.html"]
+    assert len(progress) == 4
+
+
+def test_saved_pages_bad_source(tmp_path):
+    (tmp_path / "names.txt").write_text("Goblin\n")
+    with pytest.raises(FourhillsMonsterImportError):
+        SavedPageImporter(tmp_path / "monsters").run(tmp_path / "names.txt")
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = HostRateLimiter(1.0, clock=lambda: now[0], sleep=sleep)
+    limiter.wait("http://a.example/1")
+    limiter.wait("http://b.example/1")
+    limiter.wait("http://a.example/2")
+    limiter.hold_off("http://b.example/", 5.0)
+    limiter.wait("http://b.example/2")
+    assert sleeps == [1.0, 5.0]
+
+
+def test_read_monster_names():
+    lines = ["Goblin\n", "\n", "# Comment\n", "  Giant Rat  \n", "Goblin\n"]
+    assert read_monster_names(lines) == ["Goblin", "Giant Rat"]
+
+
+def test_fetch_error_retryable():
+    assert FourhillsMonsterFetchError("timeout").retryable
+    assert FourhillsMonsterFetchError("busy", status=503).retryable
+    assert not FourhillsMonsterFetchError("missing", status=404).retryable
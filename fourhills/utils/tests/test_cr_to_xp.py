@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from fourhills.exceptions import FourhillsExperienceLookupError
+from fourhills.utils.cr_to_xp import CR_XP_LUT, cr_to_xp, cr_to_xp_many
+
+
+def old_cr_to_xp(cr):
+    """The linear scan cr_to_xp used to do, to check the new version against"""
+    cr = float(cr)
+    if cr in CR_XP_LUT:
+        return CR_XP_LUT[cr]
+    for key, val in CR_XP_LUT.items():
+        if key < cr:
+            lower = (key, val)
+        if key > cr:
+            upper = (key, val)
+            break
+    ratio = (cr - lower[0]) / (upper[0] - lower[0])
+    return lower[1] + ratio * (upper[1] - lower[1])
+
+
+def test_table_values():
+    for cr, xp in CR_XP_LUT.items():
+        assert cr_to_xp(cr) == xp
+        assert type(cr_to_xp(cr)) is int
+    assert cr_to_xp("0.25") == 50
+    assert cr_to_xp(30) == 155000
+
+
+def test_interpolation_matches_linear_scan():
+    crs = np.linspace(0, 30, 1001)
+    for cr in crs:
+        assert cr_to_xp(cr) == old_cr_to_xp(cr)
+    assert cr_to_xp(0.75) == 150
+    np.testing.assert_allclose(cr_to_xp_many(crs), [old_cr_to_xp(cr) for cr in crs])
+
+
+def test_many_keeps_shape():
+    xp = cr_to_xp_many([[0.25, 1], [2, 30]])
+    assert xp.shape == (2, 2)
+    assert xp.tolist() == [[50, 200], [450, 155000]]
+    assert cr_to_xp_many([]).shape == (0,)
+    assert cr_to_xp_many(0.5) == 100
+
+
+@pytest.mark.parametrize("cr, message", [
+    (-0.5, "too low"),
+    (30.5, "too high"),
+    (float("nan"), "not a number"),
+])
+def test_out_of_range(cr, message):
+    with pytest.raises(FourhillsExperienceLookupError, match=message) as scalar:
+        cr_to_xp(cr)
+    with pytest.raises(FourhillsExperienceLookupError) as many:
+        cr_to_xp_many([1, cr, -1])
+    assert str(many.value) == str(scalar.value)
+
+
+def test_not_a_number():
+    with pytest.raises(ValueError):
+        cr_to_xp("1/4")
+    with pytest.raises(ValueError):
+        cr_to_xp_many(["1/4"])
+    with pytest.raises(TypeError):
+        cr_to_xp(None)
+    with pytest.raises(TypeError):
+        cr_to_xp_many([None])
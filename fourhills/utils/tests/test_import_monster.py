@@ -0,0 +1,59 @@
+import importlib
+from pathlib import Path
+import pytest
+
+from fourhills.exceptions import FourhillsMonsterImportError
+
+# fourhills.utils exports a function with the same name as the module
+import_monster = importlib.import_module("fourhills.utils.import_monster")
+
+PAGES_DIR = Path(__file__).parent / "pages"
+
+
+@pytest.fixture(params=import_monster.HTML_PARSERS)
+def parser(request):
+    return request.param
+
+
+def parse_page(name, parser):
+    return import_monster.parse_monster_page((PAGES_DIR / name).read_bytes(), parser=parser)
+
+
+def test_parse_stat_block(parser):
+    rat = parse_page("giant-rat.html", parser)
+    assert rat["name"] == "Giant Rat"
+    assert rat["size"] == "Small"
+    assert rat["hp"] == "7 (2d6)"
+    assert rat["ability"]["DEX"] == 15
+    assert rat["challenge"] == 0.125
+
+
+def test_parse_legendary_and_lair_actions(parser):
+    dragon = parse_page("adult-red-dragon.html", parser)
+    assert dragon["saving_throws"]["CON"] == "+13"
+    assert dragon["melee_attacks"]["Claw"]["damage"] == "15 (2d6 + 8) slashing damage"
+    assert "Fire Breath (Recharge 5-6)" in dragon["other_actions"]
+    assert list(dragon["legendary_actions"]) == ["Extra info", "Detect", "Tail Attack"]
+    assert len(dragon["lair_actions"]["actions"]) == 2
+    assert dragon["lair_actions"]["description"].startswith("On initiative count 20")
+    assert dragon["description"].startswith("The most covetous of the true dragons")
+
+
+def test_parsers_agree():
+    pages = sorted(PAGES_DIR.glob("*.html"))
+    for page in pages:
+        results = [parse_page(page.name, parser) for parser in import_monster.HTML_PARSERS]
+        assert all(result == results[0] for result in results)
+
+
+def test_page_without_stat_block(parser):
+    with pytest.raises(FourhillsMonsterImportError):
+        import_monster.parse_monster_page(
+            b"<html><body><div class='error'>Not found</div></body></html>", parser=parser
+        )
+
+
+def test_unknown_parser():
+    with pytest.raises(ValueError):
+        import_monster.set_html_parser("no-such-parser")
+    assert import_monster.html_parser() in import_monster.HTML_PARSERS
@@ -0,0 +1,71 @@
+import pytest
+
+from fourhills.utils.page_cache import PageCache
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+
+    def tick(seconds=1.0):
+        now[0] += seconds
+        return now[0]
+
+    tick.now = lambda: now[0]
+    return tick
+
+
+def make_page(i, size=4000):
+    # Random enough not to compress away to nothing
+    return bytes((i * 7919 + j * j) % 251 for j in range(size))
+
+
+def test_pages_stored_compressed(tmp_path):
+    cache = PageCache(tmp_path / "pages.sqlite")
+    body = b"<html>" + b"<div class='mon-stat-block'></div>" * 1000 + b"</html>"
+    cache.put("http://a/goblin", body, etag='"1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    page = PageCache(tmp_path / "pages.sqlite").get("http://a/goblin")
+    assert page.body == body
+    assert page.etag == '"1"'
+    assert page.last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert cache.size() < len(body) / 10
+    assert cache.get("http://a/owlbear") is None
+
+
+def test_freshness(tmp_path, clock):
+    cache = PageCache(tmp_path / "pages.sqlite", max_age=60, clock=clock.now)
+    assert not cache.is_fresh("http://a/goblin")
+    cache.put("http://a/goblin", b"goblin")
+    clock(59)
+    assert cache.is_fresh("http://a/goblin")
+    clock(2)
+    assert not cache.is_fresh("http://a/goblin")
+    cache.revalidated("http://a/goblin")
+    assert cache.is_fresh("http://a/goblin")
+
+
+def test_least_recently_used_evicted(tmp_path, clock):
+    cache = PageCache(tmp_path / "pages.sqlite", clock=clock.now)
+    for i in range(3):
+        clock()
+        cache.put(f"http://a/{i}", make_page(i))
+    page_size = cache.size() // 3
+    cache.max_bytes = cache.size() + page_size // 2
+
+    clock()
+    cache.get("http://a/0")
+    clock()
+    cache.put("http://a/3", make_page(3))
+    assert len(cache) == 3
+    assert cache.get("http://a/1") is None
+    assert cache.get("http://a/0").body == make_page(0)
+    assert cache.size() <= cache.max_bytes
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path):
+    db_path = tmp_path / "pages.sqlite"
+    db_path.write_bytes(b"not a database" * 100)
+    cache = PageCache(db_path)
+    assert len(cache) == 0
+    cache.put("http://a/goblin", b"goblin")
+    assert cache.get("http://a/goblin").body == b"goblin"
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from fourhills.utils.parallel import map_ordered, map_unique
+
+
+def test_map_ordered_keeps_order():
+    def slow_square(value):
+        # Later items finish first
+        time.sleep((10 - value) / 1000)
+        return value * value
+
+    assert list(map_ordered(slow_square, range(10), max_workers=4)) == [
+        value * value for value in range(10)
+    ]
+
+
+def test_map_ordered_is_bounded():
+    started = []
+    lock = threading.Lock()
+
+    def record(value):
+        with lock:
+            started.append(value)
+        return value
+
+    results = map_ordered(record, iter(range(1000)), max_workers=2, window=4)
+    assert next(results) == 0
+    assert len(started) <= 4
+    results.close()
+
+
+def test_map_ordered_raises_in_order():
+    def fail_on_three(value):
+        if value == 3:
+            raise ValueError(value)
+        return value
+
+    results = map_ordered(fail_on_three, range(6), max_workers=2)
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError):
+        next(results)
+
+
+def test_map_unique_calls_once_per_key():
+    calls = []
+
+    def load(name):
+        calls.append(name)
+        return name.upper()
+
+    keys = ["goblin", "orc", "goblin", "ogre", "orc", "goblin"]
+    assert list(map_unique(load, keys, max_workers=3)) == [key.upper() for key in keys]
+    assert sorted(calls) == ["goblin", "ogre", "orc"]
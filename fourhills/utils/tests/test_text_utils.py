@@ -0,0 +1,45 @@
+import itertools
+
+import pytest
+
+from fourhills.utils.text_utils import screen_lines
+
+
+def old_screen_lines(panes, columns, column_width):
+    """How display_panes used to lay out the whole screen at once, to check against"""
+    lines = []
+    for row in itertools.count():
+        parts = []
+        for column in range(columns):
+            column_lines = [
+                line for pane in panes[column::columns] for line in pane
+            ]
+            parts.append(column_lines[row] if row < len(column_lines) else None)
+        if all(part is None for part in parts):
+            return lines
+        lines.append("".join(
+            part.ljust(column_width) if part else " " * column_width for part in parts
+        ))
+
+
+@pytest.mark.parametrize("columns", [1, 2, 3])
+def test_screen_lines_matches_old_layout(columns):
+    panes = [[f"pane {pane} line {line}" for line in range(pane % 4 + 1)] for pane in range(7)]
+    panes.insert(3, [])
+    assert list(screen_lines(panes, columns, 20)) == old_screen_lines(panes, columns, 20)
+
+
+def test_screen_lines_are_lazy():
+    taken = []
+
+    def panes():
+        for pane in itertools.count():
+            taken.append(pane)
+            yield (f"line {line}" for line in range(10))
+
+    lines = screen_lines(panes(), 2, 10)
+    assert next(lines) == "line 0    line 0    "
+    assert taken == [0, 1]
+    # Endless panes can still be shown a screen at a time
+    assert len(list(itertools.islice(lines, 100))) == 100
+    assert len(taken) < 30
@@ -0,0 +1,62 @@
+import pytest
+
+from fourhills.exceptions import FourhillsFileLoadError
+from fourhills.utils import yaml_loader
+from fourhills.utils.yaml_loader import (
+    BACKENDS, dump_yaml, load_yaml, load_yaml_string, set_yaml_backend, yaml_backend
+)
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    original = yaml_backend()
+    set_yaml_backend(request.param)
+    yield request.param
+    set_yaml_backend(original)
+
+
+def test_default_backend_prefers_libyaml():
+    if "libyaml" in BACKENDS:
+        assert yaml_backend() == "libyaml"
+    else:
+        assert yaml_backend() == "python"
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        set_yaml_backend("not a backend")
+
+
+def test_round_trip(backend, tmp_path):
+    data = {"name": "Goblin", "ability": {"STR": 8}, "languages": ["common", "goblin"]}
+    path = tmp_path / "goblin.yaml"
+    with open(path, "w") as f:
+        dump_yaml(data, f, sort_keys=False)
+    assert load_yaml(path) == data
+
+
+def test_empty_file_gives_none(backend, tmp_path):
+    path = tmp_path / "empty.yaml"
+    path.touch()
+    assert load_yaml(path) is None
+
+
+def test_invalid_yaml_raises_load_error(backend, tmp_path):
+    path = tmp_path / "bad.yaml"
+    path.write_text("name: [unclosed\n")
+    with pytest.raises(FourhillsFileLoadError):
+        load_yaml(path)
+    with pytest.raises(FourhillsFileLoadError):
+        load_yaml_string("name: [unclosed\n")
+
+
+def test_backends_agree(tmp_path):
+    path = tmp_path / "monster.yaml"
+    path.write_text("name: Orc\nchallenge: 0.5\nhp: 15 (2d8 + 6)\n")
+    results = []
+    for name in sorted(yaml_loader.BACKENDS):
+        original = yaml_backend()
+        set_yaml_backend(name)
+        results.append(load_yaml(path))
+        set_yaml_backend(original)
+    assert all(result == results[0] for result in results)
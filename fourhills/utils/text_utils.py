@@ -1,6 +1,6 @@
 import textwrap
 import click
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional
 
 
 def format_indented_paragraph(text: str, line_width: int) -> list:
@@ -75,58 +75,81 @@ def centre_pad(s, line_width):
     return "{:^{width}}".format(s, width=line_width)
 
 
-def display_panes(panes: List[List[str]], columns: int, column_width: int):
-    """Display a set of panes in columns on the screen via click.
+def screen_lines(
+    panes: Iterable[Iterable[str]], columns: int, column_width: int
+) -> Iterator[str]:
+    """Lay out panes in columns, generating each whole-screen line as it is needed.
+
+    Panes are placed in the columns in turn, so pane 0 goes in the first column, pane 1
+    in the second, and so on, with each pane carrying on under the one `columns` before
+    it. Panes are only taken from `panes`, and their lines only read, when the screen
+    reaches them, so the first lines can be shown before the last panes are ready.
 
     Parameters
     ----------
-    panes : list of list of str
-        Each pane is represented by a list of lines (strings). This is a list of the
-        data for each pane to be displayed.
+    panes : iterable of iterable of str
+        The lines of each pane.
     columns : int
-        How many columns to display.
+        How many columns to lay out.
     column_width : int
         The width of each column, in characters.
     """
-
-    # This returns a generator that will produce all of the lines for a particular
-    # column on the screen until there are no more; after that, it will produce None
-    # forever
-    def line_for_column(column_index):
-        for pane_index in range(column_index, len(panes), columns):
-            yield from panes[pane_index]
+    panes = iter(panes)
+    # Panes taken from `panes` which their column hasn't started yet, by index
+    taken: Dict[int, Iterator[str]] = {}
+    n_taken = 0
+
+    def take_pane(index) -> Optional[Iterator[str]]:
+        nonlocal n_taken
+        while n_taken <= index:
+            try:
+                taken[n_taken] = iter(next(panes))
+            except StopIteration:
+                return None
+            n_taken += 1
+        return taken.pop(index)
+
+    # The lines of every pane in one column, one after the other
+    def column_lines(column_index) -> Iterator[str]:
+        pane_index = column_index
         while True:
-            yield None
-
-    # This takes a list of strings, extends them with spaces to the column width, and
-    # joins them together to produce a single string: a line for the whole-screen
-    # display. If any items in the list are None, it will replace them with spaces for
-    # the column width.
-    def format_screen_line(line_parts):
-        return "".join(
-            [
-                part.ljust(column_width) if part else " " * column_width
-                for part in line_parts
-            ]
-        )
+            lines = take_pane(pane_index)
+            if lines is None:
+                return
+            yield from lines
+            pane_index += columns
 
-    # List of generators for each of the columns
-    column_generators = [line_for_column(column) for column in range(columns)]
-
-    # List of whole-screen lines
-    screen_lines = []
+    column_generators = [column_lines(column) for column in range(columns)]
     # Keep going until all of the columns are done
     while True:
-        # Create a list of the strings from each pane that will make up this line
-        line_parts = [next(column_generator) for column_generator in column_generators]
-        # If all of the generators have run out of lines, stop
+        # The strings from each column that make up this line, or None for columns
+        # which have finished
+        line_parts = [next(column_generator, None) for column_generator in column_generators]
         if all(part is None for part in line_parts):
             break
-        # Join the parts of the line to make a whole-screen line and append
-        screen_lines.append(format_screen_line(line_parts))
+        # Pad each part to the column width, and join them into one line
+        yield "".join(
+            part.ljust(column_width) if part else " " * column_width
+            for part in line_parts
+        )
+
+
+def display_panes(panes: Iterable[Iterable[str]], columns: int, column_width: int):
+    """Display a set of panes in columns on the screen via click.
+
+    The lines are streamed to the pager as they are laid out; see `screen_lines`.
 
-    # Display the result
-    click.echo_via_pager("\n".join(screen_lines))
+    Parameters
+    ----------
+    panes : iterable of iterable of str
+        Each pane is represented by a list of lines (strings). This is the data for
+        each pane to be displayed, which may be generated as it is needed.
+    columns : int
+        How many columns to display.
+    column_width : int
+        The width of each column, in characters.
+    """
+    click.echo_via_pager(f"{line}\n" for line in screen_lines(panes, columns, column_width))
 
 
 def slugify(text):
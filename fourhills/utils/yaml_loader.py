@@ -0,0 +1,105 @@
+from pathlib import Path
+from typing import Any, Optional
+import yaml
+
+from fourhills.exceptions import FourhillsFileLoadError
+
+
+# The LibYAML bindings are several times faster than the pure Python implementation,
+# but are only present if PyYAML was built against LibYAML
+BACKENDS = {"python": (yaml.SafeLoader, yaml.SafeDumper)}
+if hasattr(yaml, "CSafeLoader"):
+    BACKENDS["libyaml"] = (yaml.CSafeLoader, yaml.CSafeDumper)
+
+_backend = "libyaml" if "libyaml" in BACKENDS else "python"
+
+
+def yaml_backend() -> str:
+    """Return the name of the YAML backend in use, either "libyaml" or "python"."""
+    return _backend
+
+
+def set_yaml_backend(name: str):
+    """Choose the YAML backend used by every load and dump.
+
+    Parameters
+    ----------
+    name : str
+        Either "libyaml" or "python".
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown, or LibYAML is not available.
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(
+            f"YAML backend {name} is not available. Available backends: "
+            + ", ".join(sorted(BACKENDS))
+        )
+    _backend = name
+
+
+def load_yaml_string(text: str, source: Optional[str] = None) -> Any:
+    """Parse a YAML document from a string.
+
+    Parameters
+    ----------
+    text : str
+        The YAML document.
+    source : str or None
+        Where the text came from, used in error messages.
+
+    Raises
+    ------
+    FourhillsFileLoadError
+        If the text isn't valid YAML.
+    """
+    loader, _ = BACKENDS[_backend]
+    try:
+        return yaml.load(text, Loader=loader)
+    except yaml.YAMLError as exc:
+        raise FourhillsFileLoadError(f"Error loading from {source or 'string'}.") from exc
+
+
+def load_yaml(path: Path) -> Any:
+    """Parse a YAML file.
+
+    Parameters
+    ----------
+    path : pathlib.Path or str
+        Path to the YAML file.
+
+    Returns
+    -------
+    object
+        The parsed document, or None if the file is empty.
+
+    Raises
+    ------
+    FourhillsFileLoadError
+        If the file isn't valid YAML.
+    """
+    loader, _ = BACKENDS[_backend]
+    with open(path, "rb") as f:
+        try:
+            return yaml.load(f, Loader=loader)
+        except yaml.YAMLError as exc:
+            raise FourhillsFileLoadError(f"Error loading from {path}.") from exc
+
+
+def dump_yaml(data: Any, stream=None, **kwargs) -> Optional[str]:
+    """Serialise data as YAML, as `yaml.safe_dump` does.
+
+    Parameters
+    ----------
+    data : object
+        The data to serialise.
+    stream : file-like or None
+        Where to write the YAML. If None, the YAML is returned as a string.
+    **kwargs
+        Passed on to `yaml.dump`, e.g. `sort_keys=False`.
+    """
+    _, dumper = BACKENDS[_backend]
+    return yaml.dump(data, stream, Dumper=dumper, **kwargs)
@@ -0,0 +1,212 @@
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class Entry(NamedTuple):
+    """What a snapshot records about one file or directory."""
+
+    is_dir: bool
+    inode: int
+    mtime_ns: int
+    size: int
+
+
+@dataclass
+class ChangeSet:
+    """A coalesced set of changes to the files in a directory tree.
+
+    When a directory is added, removed or renamed, only the directory itself is
+    listed; everything inside it is implied. Renames are only reported when they can
+    be detected, i.e. the file or directory kept its inode; otherwise they appear as a
+    removal and an addition.
+    """
+
+    added: Set[Path] = field(default_factory=set)
+    removed: Set[Path] = field(default_factory=set)
+    modified: Set[Path] = field(default_factory=set)
+    renamed: Dict[Path, Path] = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified or self.renamed)
+
+    def paths(self) -> Set[Path]:
+        """Every path touched by the changes, including both ends of each rename."""
+        return (
+            self.added | self.removed | self.modified
+            | set(self.renamed) | set(self.renamed.values())
+        )
+
+    def ordered_renames(self) -> List[Tuple[Path, Path]]:
+        """Return the renames, deepest first.
+
+        Applying them in this order moves a file out of a renamed directory before the
+        directory itself is renamed.
+        """
+        return sorted(self.renamed.items(), key=lambda item: -len(item[0].parts))
+
+    def under(self, directory: Path) -> "ChangeSet":
+        """Return only the changes inside a directory.
+
+        A rename into or out of the directory becomes an addition or a removal.
+        """
+        directory = Path(directory)
+
+        def inside(path: Path) -> bool:
+            return directory in path.parents
+
+        changes = ChangeSet(
+            added={path for path in self.added if inside(path)},
+            removed={path for path in self.removed if inside(path)},
+            modified={path for path in self.modified if inside(path)},
+        )
+        for old, new in self.renamed.items():
+            if inside(old) and inside(new):
+                changes.renamed[old] = new
+            elif inside(old):
+                changes.removed.add(old)
+            elif inside(new):
+                changes.added.add(new)
+        return changes
+
+
+def _scan_directory(directory: Path, entries: Dict[Path, Entry], recursive: bool):
+    """Add the entries in a directory to a dictionary, skipping hidden ones."""
+    try:
+        with os.scandir(directory) as it:
+            dir_entries = list(it)
+    except OSError:
+        return
+    for dir_entry in dir_entries:
+        if dir_entry.name.startswith("."):
+            continue
+        try:
+            stat = dir_entry.stat()
+            is_dir = dir_entry.is_dir()
+        except OSError:
+            # Deleted while scanning
+            continue
+        path = directory / dir_entry.name
+        entries[path] = Entry(is_dir, dir_entry.inode(), stat.st_mtime_ns, stat.st_size)
+        if is_dir and recursive:
+            _scan_directory(path, entries, recursive)
+
+
+def _is_covered(path: Path, roots: Set[Path]) -> bool:
+    return any(parent in roots for parent in path.parents)
+
+
+def diff_entries(old: Dict[Path, Entry], new: Dict[Path, Entry]) -> ChangeSet:
+    """Work out how a directory tree changed between two scans."""
+    removed = old.keys() - new.keys()
+    added = new.keys() - old.keys()
+
+    # A path which disappeared and one which appeared with the same inode were renamed
+    renamed: Dict[Path, Path] = {}
+    added_by_inode = {new[path].inode: path for path in added if new[path].inode}
+    for path in sorted(removed):
+        new_path = added_by_inode.get(old[path].inode)
+        if new_path in added and old[path].is_dir == new[new_path].is_dir:
+            renamed[path] = new_path
+            added.discard(new_path)
+    removed -= renamed.keys()
+
+    # Directory timestamps change whenever their contents do, so only files count
+    modified = {
+        path for path in old.keys() & new.keys()
+        if not new[path].is_dir and old[path] != new[path]
+    }
+
+    # Leave out changes implied by a change to a parent directory
+    # Each set of covering paths is built once, as checking every path against a new
+    # copy would take quadratic time
+    gone = removed | set(renamed)
+    removed = {path for path in removed if not _is_covered(path, gone)}
+    arrived = added | set(renamed.values())
+    added = {path for path in added if not _is_covered(path, arrived)}
+    implied = {}
+    for path, new_path in renamed.items():
+        for parent in path.parents:
+            if parent in renamed:
+                implied[path] = renamed[parent] / path.relative_to(parent) == new_path
+                break
+    renamed = {path: new_path for path, new_path in renamed.items() if not implied.get(path)}
+    changed = gone | added | set(renamed.values())
+    modified = {path for path in modified if not _is_covered(path, changed)}
+    return ChangeSet(added=added, removed=removed, modified=modified, renamed=renamed)
+
+
+class TreeSnapshot:
+    """A record of every file and directory below a root, for finding what changed.
+
+    Hidden files and directories, whose names start with a dot, are ignored.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.entries: Dict[Path, Entry] = {}
+
+    def scan(self) -> ChangeSet:
+        """Scan the whole tree, returning what changed since the last scan."""
+        entries: Dict[Path, Entry] = {}
+        _scan_directory(self.root, entries, recursive=True)
+        return self._update(entries)
+
+    def rescan(self, directories: Iterable[Path]) -> ChangeSet:
+        """Scan only the given directories, returning what changed since the last scan.
+
+        Each directory is listed without recursing into subdirectories that already
+        existed, so this is much cheaper than `scan` when the directories which changed
+        are known, e.g. from a filesystem watcher.
+        """
+        entries = dict(self.entries)
+        for directory in sorted(set(Path(d) for d in directories)):
+            if directory != self.root and directory not in entries:
+                # Not known yet; it will be scanned as part of its parent
+                continue
+            listing: Dict[Path, Entry] = {}
+            _scan_directory(directory, listing, recursive=False)
+            # Forget whatever has gone or been replaced, along with its contents
+            for path in [path for path in entries if path.parent == directory]:
+                old_entry = entries[path]
+                new_entry = listing.get(path)
+                if (
+                    new_entry is None or new_entry.inode != old_entry.inode
+                    or new_entry.is_dir != old_entry.is_dir
+                ):
+                    self._drop_tree(entries, path)
+            # Directories which are still known kept their contents; new ones are scanned
+            for path, entry in listing.items():
+                if entry.is_dir and path not in entries:
+                    _scan_directory(path, entries, recursive=True)
+                entries[path] = entry
+        return self._update(entries)
+
+    def directories(self) -> Set[Path]:
+        """The root and every directory below it."""
+        return {self.root} | {path for path, entry in self.entries.items() if entry.is_dir}
+
+    def files(self) -> Set[Path]:
+        """Every file below the root."""
+        return {path for path, entry in self.entries.items() if not entry.is_dir}
+
+    def _update(self, entries: Dict[Path, Entry]) -> ChangeSet:
+        changes = diff_entries(self.entries, entries)
+        self.entries = entries
+        return changes
+
+    @staticmethod
+    def _drop_tree(entries: Dict[Path, Entry], path: Path):
+        entries.pop(path, None)
+        for child in [child for child in entries if path in child.parents]:
+            del entries[child]
+
+
+def directory_for_event(path: Path, snapshot: TreeSnapshot) -> Optional[Path]:
+    """Return the directory to rescan after a filesystem event for a path."""
+    path = Path(path)
+    entry = snapshot.entries.get(path)
+    if path == snapshot.root or (entry is not None and entry.is_dir):
+        return path
+    return path.parent
@@ -0,0 +1,307 @@
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fourhills.backlinks import BacklinkIndex
+from fourhills.catalog import CatalogIndex
+from fourhills.cache import Signature, file_signature
+from fourhills.dataclasses import Location, Npc, Party, Quest, StatBlock
+from fourhills.exceptions import FourhillsError, FourhillsSettingStructureError
+from fourhills.index import FileIndex
+from fourhills.search import SearchIndex, SearchResult
+from fourhills.setting import Setting
+from fourhills.stats_index import StatsIndex
+from fourhills.utils.yaml_loader import load_yaml
+
+EXECUTORS = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+
+def _parse_file(path: Path) -> Tuple[Optional[Signature], Any, Optional[Exception]]:
+    """Parse one YAML file in a worker, returning its signature, data and any error.
+
+    Errors are returned rather than raised so one bad file doesn't stop the others.
+    """
+    signature = file_signature(path)
+    try:
+        return (signature, load_yaml(path), None)
+    except (FourhillsError, OSError) as exc:
+        return (signature, None, exc)
+
+
+@dataclass
+class LoadResult:
+    """Everything loaded by `World.preload`, with the errors for files that failed."""
+
+    monsters: Dict[str, StatBlock] = field(default_factory=dict)
+    npcs: Dict[str, Npc] = field(default_factory=dict)
+    parties: Dict[str, Party] = field(default_factory=dict)
+    locations: Dict[Path, Location] = field(default_factory=dict)
+    quests: Dict[Path, Quest] = field(default_factory=dict)
+    errors: Dict[Path, Exception] = field(default_factory=dict)
+
+    def __len__(self):
+        return sum(
+            len(entities) for entities in
+            (self.monsters, self.npcs, self.parties, self.locations, self.quests)
+        )
+
+
+class EntityCollection(Mapping):
+    """A lazy, read-only mapping from names to one kind of entity in the setting.
+
+    Nothing is parsed until an entity is looked up, and every lookup goes through the
+    setting's file cache, so looking up an unchanged entity again only costs a `stat()`.
+    """
+
+    def __init__(self, setting: Setting, entity_cls, directory: Path):
+        self.setting = setting
+        self.entity_cls = entity_cls
+        self.directory = directory
+
+    def __getitem__(self, key):
+        key = self.make_key(key)
+        try:
+            return self.entity_cls.from_name(key, self.setting)
+        except FourhillsSettingStructureError as exc:
+            raise KeyError(key) from exc
+
+    def __contains__(self, key):
+        return self.path_for(key).is_file()
+
+    def __iter__(self) -> Iterator:
+        if not self.directory.is_dir():
+            return iter([])
+        return iter(sorted(self.keys_on_disk()))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "{}({}, {})".format(
+            type(self).__name__, self.entity_cls.__name__, self.directory
+        )
+
+    def make_key(self, key):
+        """Convert a user-supplied key to the form used by the entity's `from_name`."""
+        raise NotImplementedError
+
+    def path_for(self, key) -> Path:
+        """Return the path of the file an entity is loaded from."""
+        raise NotImplementedError
+
+    def keys_on_disk(self) -> Iterator:
+        """Generate the key of every entity present in the collection's directory."""
+        raise NotImplementedError
+
+
+class NamedEntityCollection(EntityCollection):
+    """Entities stored as `<name>.yaml` files directly inside a directory."""
+
+    def make_key(self, key) -> str:
+        return str(key)
+
+    def path_for(self, key) -> Path:
+        return self.entity_cls.absolute_path(self.make_key(key), self.setting)
+
+    def keys_on_disk(self) -> Iterator[str]:
+        for name, is_dir in self.setting.cache.list_dir(self.directory):
+            if not is_dir and name.endswith(".yaml"):
+                yield name[:-len(".yaml")]
+
+
+class StatBlockCollection(NamedEntityCollection):
+    """Named entities with stat blocks, which can be queried by their numbers."""
+
+    def __init__(self, setting: Setting, entity_cls, directory: Path, index: StatsIndex,
+                 kind: str):
+        super().__init__(setting, entity_cls, directory)
+        self._index = index
+        self._kind = kind
+
+    def query(self, **filters) -> List[str]:
+        """Return the names of the entities whose stats match every filter, e.g.
+        `world.monsters.query(cr=(2, 5), creature_type="undead", immune="poison")`;
+        see `StatsIndex.query` for the filters."""
+        return self._index.query(self._kind, **filters)
+
+
+class PathEntityCollection(EntityCollection):
+    """Entities stored as directories containing a marker file, at any depth.
+
+    Keys are paths relative to the collection's directory, e.g. `Path("Walton/LensonHouse")`
+    for a location. Strings are accepted too, and are converted to paths.
+    """
+
+    def __init__(self, setting: Setting, entity_cls, directory: Path, path_fn):
+        super().__init__(setting, entity_cls, directory)
+        self._path_fn = path_fn
+
+    def make_key(self, key) -> Path:
+        return Path(key)
+
+    def path_for(self, key) -> Path:
+        return self._path_fn(self.make_key(key), self.setting)
+
+    def keys_on_disk(self) -> Iterator[Path]:
+        marker = self._path_fn(Path("."), self.setting).name
+        for dirpath, _, filenames in self.setting.cache.walk(self.directory):
+            if marker in filenames:
+                yield dirpath.relative_to(self.directory)
+
+
+class World:
+    """Looks up every kind of entity in a setting through one shared cache.
+
+    Each collection behaves like a read-only dictionary, for example
+    `world.npcs["centel"]`, `world.monsters["walton_thug"]` or
+    `world.locations[Path("Walton/LensonHouse")]`. `world.backlinks` answers where
+    each object is referred to from, `world.search` finds objects by their text,
+    `world.catalog` summarises every object for listing and sorting, and
+    `world.monsters.query` and `world.npcs.query` find stat blocks by their numbers.
+    """
+
+    def __init__(self, setting: Optional[Setting] = None, base_path=None):
+        if setting is None:
+            setting = Setting(base_path=base_path)
+        if setting.root is None:
+            raise FourhillsSettingStructureError(
+                f"Could not find {Setting.CONFIG_FILENAME} in any parent directory."
+            )
+        self.setting = setting
+
+        self.stats = StatsIndex(setting)
+        self.monsters = StatBlockCollection(
+            setting, StatBlock, setting.monsters_dir, self.stats, "monster"
+        )
+        self.npcs = StatBlockCollection(setting, Npc, setting.npcs_dir, self.stats, "npc")
+        self.parties = NamedEntityCollection(setting, Party, setting.parties_dir)
+        self.locations = PathEntityCollection(
+            setting, Location, setting.world_dir, Location.get_location_path
+        )
+        self.quests = PathEntityCollection(
+            setting, Quest, setting.quest_dir, Quest.get_quest_path
+        )
+        self.backlinks = BacklinkIndex(setting)
+        self.search_index = SearchIndex(setting)
+        self.catalog = CatalogIndex(setting)
+
+    @property
+    def root(self) -> Path:
+        return self.setting.root
+
+    @property
+    def cache(self):
+        return self.setting.cache
+
+    def invalidate(self, path: Optional[Path] = None):
+        """Forget cached data for one file, or for the whole world if no path is given."""
+        self.setting.cache.invalidate(path)
+        for index in self.indexes:
+            if path is None:
+                index.reset()
+            else:
+                index.update_path(path)
+
+    def invalidate_paths(self, paths: Iterable[Path]):
+        """Forget cached data for several files or directories which changed at once."""
+        paths = list(paths)
+        for path in paths:
+            self.setting.cache.invalidate(path)
+        for index in self.indexes:
+            index.update_paths(paths)
+
+    @property
+    def indexes(self) -> List[FileIndex]:
+        """The indexes over the whole world, which are updated as files change."""
+        return [self.backlinks, self.search_index, self.catalog, self.stats]
+
+    def search(self, query: str, limit: Optional[int] = 20) -> List[SearchResult]:
+        """Search the text of every object in the world; see `SearchIndex.search`."""
+        return self.search_index.search(query, limit=limit)
+
+    @property
+    def collections(self) -> Dict[str, EntityCollection]:
+        """The collections in the world, by name, in dependency order."""
+        return {
+            "monsters": self.monsters,
+            "npcs": self.npcs,
+            "parties": self.parties,
+            "locations": self.locations,
+            "quests": self.quests,
+        }
+
+    def preload(self, executor: str = "thread", max_workers: Optional[int] = None) -> LoadResult:
+        """Load every entity in the world, parsing the files concurrently.
+
+        Files which are already cached (in memory or on disk) are not parsed again, so
+        only new or changed files are sent to the workers. Everything parsed is added to
+        the cache, so later lookups are cheap.
+
+        Parameters
+        ----------
+        executor : str
+            "thread" to parse in a thread pool, or "process" to use a process pool. The
+            process pool sidesteps the GIL, so is faster for large, cold worlds; the
+            thread pool has no start-up cost.
+        max_workers : int or None
+            Number of workers; defaults to the number of CPUs.
+
+        Returns
+        -------
+        LoadResult
+            The loaded entities, and an error for every file which could not be loaded.
+            One bad file never stops the rest of the world from loading.
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(
+                f"Unknown executor {executor}; expected one of: " + ", ".join(EXECUTORS)
+            )
+        cache = self.setting.cache
+        result = LoadResult()
+
+        # Work out which files actually need parsing
+        keys = {name: list(collection) for name, collection in self.collections.items()}
+        to_parse: List[Path] = []
+        for name, collection in self.collections.items():
+            for key in keys[name]:
+                path = collection.path_for(key)
+                found, _ = cache.lookup(path)
+                if not found:
+                    to_parse.append(path)
+
+        # Parse them all concurrently, adding the results to the cache
+        if to_parse:
+            workers = max_workers or os.cpu_count() or 1
+            chunksize = max(1, len(to_parse) // (workers * 4))
+            with EXECUTORS[executor](max_workers=workers) as pool:
+                if executor == "process":
+                    parsed = pool.map(_parse_file, to_parse, chunksize=chunksize)
+                else:
+                    parsed = pool.map(_parse_file, to_parse)
+                for path, (signature, data, error) in zip(to_parse, parsed):
+                    if error is not None:
+                        result.errors[path] = error
+                    elif signature is not None:
+                        cache.put(path, signature, data)
+
+        # Build the entities; every file is cached by now so this is cheap
+        for name, collection in self.collections.items():
+            entities = getattr(result, name)
+            for key in keys[name]:
+                path = collection.path_for(key)
+                if path in result.errors:
+                    continue
+                try:
+                    entities[key] = collection[key]
+                except KeyError as exc:
+                    result.errors[path] = exc.__cause__ or exc
+                except (FourhillsError, TypeError, NotImplementedError) as exc:
+                    result.errors[path] = exc
+
+        return result